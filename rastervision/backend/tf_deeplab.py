@@ -721,24 +721,36 @@ class TFDeeplab(Backend):
         """Predict using an already-trained DeepLab model.
 
         Args:
-            chips: An np.ndarray containing the image data in a batch of size 1.
+            chips: An np.ndarray containing a batch of image data.
+            windows: The windows of the chips.
             tmp_dir: (str) temporary directory to use
 
         Returns:
-             SemanticSegmentationLabels object with predictions for a single chip
+             SemanticSegmentationLabels object with predictions for the
+             windows of the chips
         """
         self.load_model(tmp_dir)
-        label_arr = self.sess.run(
-            OUTPUT_TENSOR_NAME, feed_dict={INPUT_TENSOR_NAME: [chips[0]]})[0]
 
-        # Return "trivial" instance of SemanticSegmentationLabels that holds a single
-        # window and has ability to get labels for that one window.
+        # Models exported by the DeepLab export script have a fixed batch size
+        # of 1, so only run the whole batch at once if the model allows it.
+        input_tensor = self.sess.graph.get_tensor_by_name(INPUT_TENSOR_NAME)
+        if input_tensor.shape[0].value is None:
+            label_arrs = self.sess.run(
+                OUTPUT_TENSOR_NAME, feed_dict={INPUT_TENSOR_NAME: chips})
+        else:
+            label_arrs = [
+                self.sess.run(
+                    OUTPUT_TENSOR_NAME,
+                    feed_dict={INPUT_TENSOR_NAME: [chip]})[0] for chip in chips
+            ]
+
+        window_to_label_arr = dict(
+            zip([w.tuple_format() for w in windows], label_arrs))
+
         def label_fn(_window):
-            if _window == windows[0]:
-                return label_arr
-            else:
+            label_arr = window_to_label_arr.get(_window.tuple_format())
+            if label_arr is None:
                 raise ValueError('Trying to get labels for unknown window.')
+            return label_arr
 
-        labels = SemanticSegmentationLabels(windows, label_fn)
-
-        return labels
+        return SemanticSegmentationLabels(windows, label_fn)
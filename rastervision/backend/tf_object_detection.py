@@ -572,17 +572,18 @@ def compute_prediction(image_nps, windows, detection_graph, session):
     (boxes, scores, class_ids) = session.run(
         [boxes, scores, class_ids], feed_dict={image_tensor: image_nps})
 
-    labels = ObjectDetectionLabels.make_empty()
+    labels_list = [ObjectDetectionLabels.make_empty()]
     for chip_boxes, chip_scores, chip_class_ids, window in zip(
             boxes, scores, class_ids, windows):
         chip_boxes = ObjectDetectionLabels.normalized_to_local(
             chip_boxes, window)
         chip_boxes = ObjectDetectionLabels.local_to_global(chip_boxes, window)
         chip_class_ids = chip_class_ids.astype(np.int32)
-        labels = (labels + ObjectDetectionLabels(
-            chip_boxes, chip_class_ids, scores=chip_scores))
+        labels_list.append(
+            ObjectDetectionLabels(
+                chip_boxes, chip_class_ids, scores=chip_scores))
 
-    return labels
+    return ObjectDetectionLabels.concatenate_all(labels_list)
 
 
 class TFObjectDetection(Backend):
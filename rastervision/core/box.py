@@ -122,11 +122,13 @@ class Box():
 
         return Box.make_square(rand_y, rand_x, size)
 
-    def make_random_square(self, size):
+    def make_random_square(self, size, rng=random):
         """Return new randomly positioned square Box that lies inside this Box.
 
         Args:
             size: the height and width of the new Box
+            rng: random.Random to draw the position from, which is the
+                global one by default
 
         """
         if size >= self.get_width():
@@ -137,11 +139,11 @@ class Box():
 
         lb = self.ymin
         ub = self.ymax - size
-        rand_y = random.randint(lb, ub)
+        rand_y = rng.randint(lb, ub)
 
         lb = self.xmin
         ub = self.xmax - size
-        rand_x = random.randint(lb, ub)
+        rand_x = rng.randint(lb, ub)
 
         return Box.make_square(rand_y, rand_x, size)
 
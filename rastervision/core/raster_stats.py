@@ -1,8 +1,13 @@
 import json
+import math
+import random
 
 import numpy as np
 
+from rastervision.core.box import Box
+from rastervision.rv_config import RVConfig
 from rastervision.utils.files import str_to_file, file_to_str
+from rastervision.utils.parallel import map_forked
 
 chip_size = 300
 
@@ -23,6 +28,9 @@ def parallel_variance(mean_a, count_a, var_a, mean_b, count_b, var_b):
 
     Return:
         the variance of the two partitions if they were combined
+
+    RasterStats merges stats using StatsAccumulator instead, but this is
+    kept as part of the public API.
     """
     delta = mean_b - mean_a
     m_a = var_a * (count_a - 1)
@@ -46,17 +54,158 @@ def parallel_mean(mean_a, count_a, mean_b, count_b):
 
     Return:
         the mean of the two partitions if they were combined
+
+    RasterStats merges stats using StatsAccumulator instead, but this is
+    kept as part of the public API.
     """
     mean = (count_a * mean_a + count_b * mean_b) / (count_a + count_b)
     return mean
 
 
+class StatsAccumulator():
+    """Accumulates per-channel statistics of pixel values in a single pass.
+
+    Zero (ie. NODATA) and NaN values are ignored. Chips are summarized by
+    their count, mean and sum of squared differences from the mean, which
+    are merged into the running totals using the parallel algorithm (see
+    parallel_variance). This is numerically stable and works directly on
+    integer data.
+
+    If compute_histograms is True, the number of times each value occurs
+    in each channel is also counted, so that percentiles can be computed.
+    This is only supported for integer data of up to 16 bits.
+    """
+
+    def __init__(self, num_channels, compute_histograms=False):
+        self.count = np.zeros((num_channels, ), dtype=np.int64)
+        self.mean = np.zeros((num_channels, ))
+        self.m2 = np.zeros((num_channels, ))
+
+        self.compute_histograms = compute_histograms
+        # [num_channels, num_values] array of counts of each value, where
+        # the first column is for the value hist_offset. This is set up
+        # when the dtype of the data is known.
+        self.histograms = None
+        self.hist_offset = 0
+
+    def _merge(self, channel, count, mean, m2):
+        total = self.count[channel] + count
+        delta = mean - self.mean[channel]
+        self.m2[channel] += m2 + delta**2 * self.count[channel] * count / total
+        self.mean[channel] += delta * count / total
+        self.count[channel] = total
+
+    def _init_histograms(self, dtype):
+        if not (np.issubdtype(dtype, np.integer) and dtype.itemsize <= 2):
+            raise ValueError(
+                'Histograms can only be computed for integer data of up to '
+                '16 bits, got {}'.format(dtype))
+        num_values = 2**(8 * dtype.itemsize)
+        self.histograms = np.zeros(
+            (len(self.count), num_values), dtype=np.int64)
+        self.hist_offset = np.iinfo(dtype).min
+
+    def update(self, chip):
+        """Add the values in a [height, width, channels] chip."""
+        if self.compute_histograms and self.histograms is None:
+            self._init_histograms(chip.dtype)
+
+        is_float = np.issubdtype(chip.dtype, np.floating)
+        for channel in range(chip.shape[2]):
+            values = chip[:, :, channel]
+            is_valid = values != 0
+            if is_float:
+                is_valid &= ~np.isnan(values)
+            values = values[is_valid]
+            if values.size == 0:
+                continue
+
+            mean = np.mean(values, dtype=np.float64)
+            m2 = np.sum((values - mean)**2, dtype=np.float64)
+            self._merge(channel, values.size, mean, m2)
+
+            if self.histograms is not None:
+                self.histograms[channel] += np.bincount(
+                    values.astype(np.int64) - self.hist_offset,
+                    minlength=self.histograms.shape[1])
+
+    def merge(self, other):
+        """Add the values accumulated by another StatsAccumulator."""
+        for channel in range(len(self.count)):
+            if other.count[channel] > 0:
+                self._merge(channel, other.count[channel], other.mean[channel],
+                            other.m2[channel])
+
+        if other.histograms is not None:
+            if self.histograms is None:
+                self.histograms = other.histograms.copy()
+                self.hist_offset = other.hist_offset
+            elif (self.histograms.shape != other.histograms.shape
+                  or self.hist_offset != other.hist_offset):
+                raise ValueError(
+                    'Cannot merge histograms of data with different dtypes')
+            else:
+                self.histograms += other.histograms
+
+    def get_means(self):
+        return self.mean
+
+    def get_stds(self):
+        var = np.zeros(self.m2.shape)
+        has_values = self.count > 0
+        var[has_values] = self.m2[has_values] / self.count[has_values]
+        return np.sqrt(var)
+
+    def get_percentiles(self, percentiles):
+        """Return a dict from each percentile to a list with a value per channel.
+
+        A channel without any values gets a value of 0.
+        """
+        result = {}
+        cum_counts = np.cumsum(self.histograms, axis=1)
+        for percentile in percentiles:
+            values = []
+            for channel_cum_counts in cum_counts:
+                total = channel_cum_counts[-1]
+                if total == 0:
+                    values.append(0)
+                    continue
+                rank = max(percentile / 100 * total, 1)
+                ind = np.searchsorted(channel_cum_counts, rank)
+                values.append(int(ind + self.hist_offset))
+            result[percentile] = values
+        return result
+
+
+def get_block_windows(raster_source):
+    """Return windows covering a raster source that are aligned with its blocks.
+
+    The windows are made up of whole blocks of the underlying data (eg.
+    internal tiles of a GeoTIFF) and are at least chip_size along each
+    axis, so that each block is decoded exactly once. Raster sources that
+    aren't stored in blocks are covered with chip_size windows.
+    """
+    extent = raster_source.get_extent()
+    block_shape = raster_source.get_block_shape()
+    if block_shape is None:
+        height, width = chip_size, chip_size
+    else:
+        height, width = [b * math.ceil(chip_size / b) for b in block_shape]
+
+    return [
+        Box(ymin, xmin, ymin + height, xmin + width)
+        for ymin in range(extent.ymin, extent.ymax, height)
+        for xmin in range(extent.xmin, extent.xmax, width)
+    ]
+
+
 class RasterStats():
     def __init__(self):
         self.means = None
         self.stds = None
+        self.percentiles = None
 
-    def compute(self, raster_sources, sample_prob=None):
+    def compute(self, raster_sources, sample_prob=None, percentiles=None):
         """Compute the mean and stds over all the raster_sources.
 
         This ignores NODATA values.
@@ -65,81 +214,73 @@ class RasterStats():
         speeds up the computation. Roughly speaking, if sample_prob=0.5, then half the
         pixels in the scene will be used. More precisely, the number of chips is equal to
         sample_prob * (width * height / 300^2), or 1, whichever is greater. Each chip is
-        uniformly sampled from the scene with replacement. Otherwise, it uses a sliding
-        window over the entire scene to compute stats.
+        uniformly sampled from the scene with replacement. Otherwise, the stats are
+        computed over the entire scene, which is read a block at a time (see
+        get_block_windows).
+
+        The stats are computed in a single pass over the data. The raster sources
+        are processed in a pool of worker processes if the stats_num_workers option in
+        the [RV] section of the Raster Vision config is greater than 1.
 
         Args:
             raster_sources: list of RasterSource
             sample_prob: (float or None) between 0 and 1
+            percentiles: (list of float or None) if set, percentiles between 0 and
+                100 of the values of each channel are also computed, using
+                histograms accumulated in the same pass. Only supported for
+                integer data of up to 16 bits.
         """
-        stride = chip_size
         nb_channels = raster_sources[0].num_channels
+        compute_histograms = percentiles is not None
+        jobs = [(raster_source, nb_channels, compute_histograms, sample_prob,
+                 random.getrandbits(32)) for raster_source in raster_sources]
+
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        num_workers = rv_config('stats_num_workers', parser=int, default='1')
+        accumulators = map_forked(self._compute_raster_source, jobs,
+                                  num_workers)
 
-        def get_chip(raster_source, window):
-            """Return chip or None if all values are NODATA."""
-            chip = raster_source.get_raw_chip(window).astype(np.float32)
-            # Convert shape from [h,w,c] to [c,h*w]
-            chip = np.reshape(np.transpose(chip, [2, 0, 1]), (nb_channels, -1))
-
-            # Ignore NODATA values.
-            chip[chip == 0.0] = np.nan
-            if np.any(~np.isnan(chip)):
-                return chip
-            return None
-
-        def sliding_chip_stream():
-            """Get stream of chips using a sliding window of size 300."""
-            for raster_source in raster_sources:
-                with raster_source.activate():
-                    windows = raster_source.get_extent().get_windows(
-                        chip_size, stride)
-                    for window in windows:
-                        chip = get_chip(raster_source, window)
-                        if chip is not None:
-                            yield chip
-
-        def random_chip_stream():
-            """Get random stream of chips."""
-            for raster_source in raster_sources:
-                with raster_source.activate():
-                    extent = raster_source.get_extent()
-                    num_pixels = extent.get_width() * extent.get_height()
-                    num_chips = round(
-                        sample_prob * (num_pixels / (chip_size**2)))
-                    num_chips = max(1, num_chips)
-                    for _ in range(num_chips):
-                        window = raster_source.get_extent().make_random_square(
-                            chip_size)
-                        chip = get_chip(raster_source, window)
-                        if chip is not None:
-                            yield chip
-
-        # For each chip, compute the mean and var of that chip and then update the
-        # running mean and var.
-        count = 0
-        mean = np.zeros((nb_channels, ))
-        var = np.zeros((nb_channels, ))
-        chip_stream = (sliding_chip_stream()
-                       if sample_prob is None else random_chip_stream())
-
-        for c in chip_stream:
-            chip_means = np.nanmean(c, axis=1)
-            chip_vars = np.nanvar(c, axis=1)
-            chip_count = np.sum(c[0] != np.nan)
-
-            var = parallel_variance(chip_means, chip_count, chip_vars, mean,
-                                    count, var)
-            mean = parallel_mean(chip_means, chip_count, mean, count)
-            count += chip_count
-
-        self.means = mean
-        self.stds = np.sqrt(var)
+        stats = StatsAccumulator(nb_channels, compute_histograms)
+        for accumulator in accumulators:
+            stats.merge(accumulator)
+
+        self.means = stats.get_means()
+        self.stds = stats.get_stds()
+        if compute_histograms:
+            self.percentiles = stats.get_percentiles(percentiles)
+
+    def _compute_raster_source(self, raster_source, nb_channels,
+                               compute_histograms, sample_prob, seed):
+        """Return a StatsAccumulator with the stats of one raster source."""
+        stats = StatsAccumulator(nb_channels, compute_histograms)
+        with raster_source.activate():
+            extent = raster_source.get_extent()
+            if sample_prob is None:
+                windows = get_block_windows(raster_source)
+            else:
+                # The windows are sampled without changing the state of the
+                # global generator.
+                rng = random.Random(seed)
+                num_pixels = extent.get_width() * extent.get_height()
+                num_chips = round(sample_prob * (num_pixels / (chip_size**2)))
+                num_chips = max(1, num_chips)
+                windows = [
+                    extent.make_random_square(chip_size, rng)
+                    for _ in range(num_chips)
+                ]
+
+            for window in windows:
+                stats.update(raster_source.get_raw_chip(window))
+        return stats
 
     def save(self, stats_uri):
         # Ensure lists
         means = list(self.means)
         stds = list(self.stds)
         stats = {'means': means, 'stds': stds}
+        if self.percentiles is not None:
+            stats['percentiles'] = dict(
+                [(str(p), values) for p, values in self.percentiles.items()])
         str_to_file(json.dumps(stats), stats_uri)
 
     @staticmethod
@@ -148,4 +289,8 @@ class RasterStats():
         stats = RasterStats()
         stats.means = stats_json['means']
         stats.stds = stats_json['stds']
+        if 'percentiles' in stats_json:
+            stats.percentiles = dict(
+                [(float(p), values)
+                 for p, values in stats_json['percentiles'].items()])
         return stats
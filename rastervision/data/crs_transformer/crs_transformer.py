@@ -1,3 +1,41 @@
+import numpy as np
+
+
+def get_points_array(points):
+    """Return an [N, 2] float64 numpy array of (x, y) points.
+
+    Args:
+        points: sequence of (x, y) points, or an array of them. Extra
+            coordinates of each point (eg. z) are dropped.
+    """
+    points = np.asarray(points)
+    if points.ndim != 2 and points.size > 0:
+        # Points with different numbers of coordinates.
+        points = np.array([point[0:2] for point in points])
+    if points.size == 0:
+        return np.empty((0, 2), dtype=np.float64)
+    return points[:, 0:2].astype(np.float64)
+
+
+def transform_point_lists(point_lists, transform_batch):
+    """Transform several lists of points using a single batch transform.
+
+    Args:
+        point_lists: list of sequences of (x, y) points, eg. the rings of
+            polygons
+        transform_batch: batch transform method of a CRSTransformer, eg.
+            crs_transformer.map_to_pixel_batch
+
+    Returns:
+        list with an [N, 2] numpy array of transformed points for each list
+    """
+    arrays = [get_points_array(points) for points in point_lists]
+    if not arrays:
+        return []
+    points = transform_batch(np.concatenate(arrays))
+    return np.split(points, np.cumsum([len(a) for a in arrays])[:-1])
+
+
 class CRSTransformer(object):
     """Transforms map points in some CRS into pixel coordinates.
 
@@ -29,6 +67,40 @@ class CRSTransformer(object):
         """
         pass
 
+    def map_to_pixel_batch(self, map_points):
+        """Transform an array of points from map to pixel-based coordinates.
+
+        Subclasses should override this to transform all the points at once,
+        instead of calling map_to_pixel on each point.
+
+        Args:
+            map_points: [N, 2] array or sequence of (x, y) points in map
+                coordinates (eg. lon/lat)
+
+        Returns:
+            [N, 2] numpy array of (x, y) points in pixel coordinates
+        """
+        map_points = get_points_array(map_points)
+        return np.array([self.map_to_pixel(p) for p in map_points]).reshape(
+            (-1, 2))
+
+    def pixel_to_map_batch(self, pixel_points):
+        """Transform an array of points from pixel to map-based coordinates.
+
+        Subclasses should override this to transform all the points at once,
+        instead of calling pixel_to_map on each point.
+
+        Args:
+            pixel_points: [N, 2] array or sequence of (x, y) points in pixel
+                coordinates
+
+        Returns:
+            [N, 2] numpy array of (x, y) points in map coordinates
+        """
+        pixel_points = get_points_array(pixel_points)
+        return np.array([self.pixel_to_map(p) for p in pixel_points]).reshape(
+            (-1, 2))
+
     def get_image_crs(self):
         return self.image_crs
 
@@ -37,3 +109,14 @@ class CRSTransformer(object):
 
     def get_affine_transform(self):
         raise NotImplementedError()
+
+    def get_cache_id(self):
+        """Return a description of this transformer.
+
+        Transformers with the same description transform points in the same
+        way.
+
+        Returns:
+            JSON serializable description, or None if there isn't one
+        """
+        return None
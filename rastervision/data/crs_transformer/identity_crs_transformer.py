@@ -1,4 +1,5 @@
-from rastervision.data.crs_transformer import CRSTransformer
+from rastervision.data.crs_transformer import (CRSTransformer,
+                                               get_points_array)
 
 
 class IdentityCRSTransformer(CRSTransformer):
@@ -28,3 +29,30 @@ class IdentityCRSTransformer(CRSTransformer):
             (x, y) tuple in pixel coordinates
         """
         return pixel_point
+
+    def map_to_pixel_batch(self, map_points):
+        """Identity function.
+
+        Args:
+            map_points: [N, 2] array or sequence of (x, y) points in pixel
+                coordinates
+
+        Returns:
+            [N, 2] numpy array of (x, y) points in pixel coordinates
+        """
+        return get_points_array(map_points)
+
+    def pixel_to_map_batch(self, pixel_points):
+        """Identity function.
+
+        Args:
+            pixel_points: [N, 2] array or sequence of (x, y) points in pixel
+                coordinates
+
+        Returns:
+            [N, 2] numpy array of (x, y) points in pixel coordinates
+        """
+        return get_points_array(pixel_points)
+
+    def get_cache_id(self):
+        return [type(self).__name__]
@@ -1,13 +1,18 @@
+import numpy as np
 import pyproj
+from affine import Affine
 
-from rasterio.transform import (rowcol, xy)
-
-from rastervision.data.crs_transformer import (CRSTransformer,
-                                               IdentityCRSTransformer)
+from rastervision.data.crs_transformer import (
+    CRSTransformer, IdentityCRSTransformer, get_points_array)
 
 
 class RasterioCRSTransformer(CRSTransformer):
-    """Transformer for a RasterioRasterSource."""
+    """Transformer for a RasterioRasterSource.
+
+    Points are transformed in batches using the array form of
+    pyproj.transform and the affine transform of the dataset, so that
+    transforming the vertices of a geometry takes a single call.
+    """
 
     def __init__(self, transform, image_crs, map_crs='epsg:4326'):
         """Construct transformer.
@@ -17,6 +22,11 @@ class RasterioCRSTransformer(CRSTransformer):
             map_crs: CRS code
         """
         self.transform = transform
+        # Maps image coordinates to fractional (col, row) pixel coordinates.
+        self.inverse_transform = ~transform
+        # Maps (col, row) pixel coordinates to the image coordinates of the
+        # center of the pixel.
+        self.center_transform = transform * Affine.translation(0.5, 0.5)
         self.map_proj = pyproj.Proj(init=map_crs)
         self.image_proj = pyproj.Proj(init=image_crs)
 
@@ -31,11 +41,7 @@ class RasterioCRSTransformer(CRSTransformer):
         Returns:
             (x, y) tuple in pixel coordinates
         """
-        image_point = pyproj.transform(self.map_proj, self.image_proj,
-                                       map_point[0], map_point[1])
-        pixel_point = rowcol(self.transform, image_point[0], image_point[1])
-        pixel_point = (pixel_point[1], pixel_point[0])
-        return pixel_point
+        return tuple(self.map_to_pixel_batch([map_point])[0].tolist())
 
     def pixel_to_map(self, pixel_point):
         """Transform point from pixel to map-based coordinates.
@@ -46,19 +52,76 @@ class RasterioCRSTransformer(CRSTransformer):
         Returns:
             (x, y) tuple in map coordinates
         """
-        image_point = xy(self.transform, int(pixel_point[1]),
-                         int(pixel_point[0]))
-        map_point = pyproj.transform(self.image_proj, self.map_proj,
-                                     image_point[0], image_point[1])
-        return map_point
+        return tuple(self.pixel_to_map_batch([pixel_point])[0].tolist())
+
+    def map_to_pixel_batch(self, map_points):
+        """Transform an array of points from map to pixel-based coordinates.
+
+        Points are mapped to the pixel that contains them.
+
+        Args:
+            map_points: [N, 2] array or sequence of (x, y) points in map
+                coordinates
+
+        Returns:
+            [N, 2] int numpy array of (x, y) points in pixel coordinates
+        """
+        map_points = get_points_array(map_points)
+        if len(map_points) == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        xs, ys = pyproj.transform(self.map_proj, self.image_proj,
+                                  map_points[:, 0], map_points[:, 1])
+        cols, rows = self.inverse_transform * (xs, ys)
+        pixel_points = np.empty((len(map_points), 2), dtype=np.int64)
+        pixel_points[:, 0] = np.floor(cols)
+        pixel_points[:, 1] = np.floor(rows)
+        return pixel_points
+
+    def pixel_to_map_batch(self, pixel_points):
+        """Transform an array of points from pixel to map-based coordinates.
+
+        Points are mapped to the center of the pixel that contains them.
+
+        Args:
+            pixel_points: [N, 2] array or sequence of (x, y) points in pixel
+                coordinates
+
+        Returns:
+            [N, 2] numpy array of (x, y) points in map coordinates
+        """
+        pixel_points = get_points_array(pixel_points)
+        if len(pixel_points) == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        pixel_points = np.trunc(pixel_points)
+        xs, ys = self.center_transform * (pixel_points[:, 0],
+                                          pixel_points[:, 1])
+        xs, ys = pyproj.transform(self.image_proj, self.map_proj, xs, ys)
+        return np.stack([xs, ys], axis=1)
 
     @classmethod
     def from_dataset(cls, dataset, map_crs='epsg:4326'):
-        if dataset.crs is None:
+        return cls.from_crs(dataset.transform, dataset.crs, map_crs)
+
+    @classmethod
+    def from_crs(cls, transform, crs, map_crs='epsg:4326'):
+        """Construct a transformer from the transform and CRS of a dataset.
+
+        Args:
+            transform: Affine transform of the dataset
+            crs: rasterio CRS of the dataset, or None, in which case an
+                IdentityCRSTransformer is returned
+            map_crs: CRS code
+        """
+        if crs is None:
             return IdentityCRSTransformer()
-        transform = dataset.transform
-        image_crs = dataset.crs['init']
+        image_crs = crs['init']
         return cls(transform, image_crs, map_crs)
 
     def get_affine_transform(self):
         return self.transform
+
+    def get_cache_id(self):
+        return [
+            type(self).__name__, [float(v) for v in self.transform[:6]],
+            self.image_crs, self.map_crs
+        ]
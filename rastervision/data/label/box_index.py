@@ -0,0 +1,161 @@
+import numpy as np
+
+# Boxes that span more than this many grid cells along an axis are not put in
+# the grid, and are checked against every query instead.
+MAX_CELL_SPAN = 4
+
+
+class BoxIndex():
+    """A uniform grid index for finding the boxes that intersect a window.
+
+    Each box is assigned to the grid cells it overlaps. The (row, col) keys of
+    the assignments are packed into integers and sorted, so the cells along a
+    row of a query window form a contiguous range that is found with
+    searchsorted.
+    """
+
+    def __init__(self, npboxes, cell_size=None):
+        """Construct a new BoxIndex.
+
+        Args:
+            npboxes: float numpy array of size nx4 with cols
+                ymin, xmin, ymax, xmax
+            cell_size: the height and width of the grid cells. Defaults to
+                twice the median of the box heights and widths.
+        """
+        self.npboxes = npboxes
+        if len(npboxes) == 0:
+            self.origin = np.zeros((2, ))
+            self.cell_size = 1
+            self.num_cols = 1
+            self.keys = np.empty((0, ), dtype=np.int64)
+            self.key_inds = np.empty((0, ), dtype=np.int64)
+            self.large_inds = np.empty((0, ), dtype=np.int64)
+            return
+
+        if cell_size is None:
+            sizes = np.concatenate(
+                [npboxes[:, 2] - npboxes[:, 0], npboxes[:, 3] - npboxes[:, 1]])
+            cell_size = max(2 * float(np.median(sizes)), 1.0)
+        self.cell_size = cell_size
+        self.origin = np.min(npboxes[:, 0:2], axis=0)
+
+        row_min, col_min, row_max, col_max = self._get_cells(npboxes)
+        self.num_cols = int(np.max(col_max)) + 1
+
+        row_span = row_max - row_min + 1
+        col_span = col_max - col_min + 1
+        is_large = (row_span > MAX_CELL_SPAN) | (col_span > MAX_CELL_SPAN)
+        self.large_inds = np.nonzero(is_large)[0]
+
+        keys = []
+        key_inds = []
+        for row_offset in range(MAX_CELL_SPAN):
+            for col_offset in range(MAX_CELL_SPAN):
+                inds = np.nonzero(~is_large & (row_offset < row_span)
+                                  & (col_offset < col_span))[0]
+                keys.append((row_min[inds] + row_offset) * self.num_cols +
+                            col_min[inds] + col_offset)
+                key_inds.append(inds)
+        keys = np.concatenate(keys)
+        key_inds = np.concatenate(key_inds)
+
+        order = np.argsort(keys, kind='mergesort')
+        self.keys = keys[order]
+        self.key_inds = key_inds[order]
+
+    def _get_cells(self, npboxes):
+        """Return the min/max grid rows and cols overlapped by boxes."""
+        cells = np.floor(
+            (npboxes - self.origin[[0, 1, 0, 1]]) / self.cell_size)
+        cells = np.maximum(cells, 0).astype(np.int64)
+        return cells[:, 0], cells[:, 1], cells[:, 2], cells[:, 3]
+
+    def query(self, window):
+        """Return the indices of the boxes that intersect a window.
+
+        Boxes that only touch the window along an edge are not included.
+
+        Args:
+            window: numpy array of size 4 with ymin, xmin, ymax, xmax
+
+        Returns:
+            sorted int numpy array of indices into npboxes
+        """
+        candidates = [self.large_inds]
+        if len(self.keys) > 0:
+            row_min, col_min, row_max, col_max = [
+                c[0] for c in self._get_cells(np.expand_dims(window, axis=0))
+            ]
+            col_max = min(col_max, self.num_cols - 1)
+            max_row = self.keys[-1] // self.num_cols
+            rows = np.arange(row_min, min(row_max, max_row) + 1)
+            starts = np.searchsorted(self.keys, rows * self.num_cols + col_min)
+            ends = np.searchsorted(self.keys,
+                                   rows * self.num_cols + col_max + 1)
+            for start, end in zip(starts, ends):
+                candidates.append(self.key_inds[start:end])
+        candidates = np.unique(np.concatenate(candidates))
+
+        boxes = self.npboxes[candidates]
+        intersects = ((boxes[:, 0] < window[2]) & (boxes[:, 2] > window[0])
+                      & (boxes[:, 1] < window[3]) & (boxes[:, 3] > window[1]))
+        return candidates[intersects]
+
+    def get_intersecting_pairs(self):
+        """Return all pairs of boxes that intersect each other.
+
+        Boxes that only touch along an edge are not considered to intersect.
+        Only boxes that share a grid cell are compared, so this is much faster
+        than comparing all pairs when the boxes are spread out.
+
+        Returns:
+            (inds1, inds2) int numpy arrays of indices into npboxes. Each
+            pair of intersecting boxes appears once.
+        """
+        inds1 = [np.empty((0, ), dtype=np.int64)]
+        inds2 = [np.empty((0, ), dtype=np.int64)]
+
+        num_keys = len(self.keys)
+        if num_keys > 0:
+            # Pair each entry with the entries after it in the same cell.
+            starts = np.nonzero(
+                np.concatenate([[True], self.keys[1:] != self.keys[:-1]]))[0]
+            ends = np.append(starts[1:], num_keys)
+            num_partners = np.repeat(ends,
+                                     ends - starts) - np.arange(num_keys) - 1
+            left = np.repeat(np.arange(num_keys), num_partners)
+            offsets = np.arange(len(left)) - np.repeat(
+                np.cumsum(num_partners) - num_partners, num_partners)
+            right = left + 1 + offsets
+
+            boxes1 = self.npboxes[self.key_inds[left]]
+            boxes2 = self.npboxes[self.key_inds[right]]
+            intersects = ((boxes1[:, 0] < boxes2[:, 2])
+                          & (boxes1[:, 2] > boxes2[:, 0])
+                          & (boxes1[:, 1] < boxes2[:, 3])
+                          & (boxes1[:, 3] > boxes2[:, 1]))
+            left, right = left[intersects], right[intersects]
+            boxes1, boxes2 = boxes1[intersects], boxes2[intersects]
+
+            # A pair can share several cells, so only keep it in the cell
+            # that contains the top left corner of the intersection.
+            corners = np.maximum(boxes1[:, 0:2], boxes2[:, 0:2])
+            corner_rows, corner_cols, _, _ = self._get_cells(
+                np.hstack([corners, corners]))
+            is_corner_cell = (
+                corner_rows * self.num_cols + corner_cols == self.keys[left])
+            inds1.append(self.key_inds[left[is_corner_cell]])
+            inds2.append(self.key_inds[right[is_corner_cell]])
+
+        # Boxes that aren't in the grid are paired using queries, and pairs
+        # of two such boxes are kept once.
+        is_large = np.zeros((len(self.npboxes), ), dtype=bool)
+        is_large[self.large_inds] = True
+        for ind in self.large_inds:
+            others = self.query(self.npboxes[ind])
+            others = others[(~is_large[others]) | (others > ind)]
+            inds1.append(np.full(others.shape, ind, dtype=np.int64))
+            inds2.append(others)
+
+        return np.concatenate(inds1), np.concatenate(inds2)
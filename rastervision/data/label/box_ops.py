@@ -0,0 +1,290 @@
+import heapq
+
+import numpy as np
+
+from rastervision.data.label.box_index import BoxIndex
+
+# Vectorized operations on boxes stored as float numpy arrays of size nx4 with
+# cols ymin, xmin, ymax, xmax.
+
+
+def area(npboxes):
+    """Return the area of each box."""
+    return (npboxes[:, 2] - npboxes[:, 0]) * (npboxes[:, 3] - npboxes[:, 1])
+
+
+def intersection(npboxes1, npboxes2):
+    """Return the [N, M] array of intersection areas between pairs of boxes."""
+    ymin = np.maximum(npboxes1[:, np.newaxis, 0], npboxes2[np.newaxis, :, 0])
+    xmin = np.maximum(npboxes1[:, np.newaxis, 1], npboxes2[np.newaxis, :, 1])
+    ymax = np.minimum(npboxes1[:, np.newaxis, 2], npboxes2[np.newaxis, :, 2])
+    xmax = np.minimum(npboxes1[:, np.newaxis, 3], npboxes2[np.newaxis, :, 3])
+    return np.maximum(ymax - ymin, 0) * np.maximum(xmax - xmin, 0)
+
+
+def iou(npboxes1, npboxes2):
+    """Return the [N, M] array of intersection over union between pairs of boxes.
+
+    Pairs of boxes with no area have a NaN IOU.
+    """
+    intersect = intersection(npboxes1, npboxes2)
+    union = (area(npboxes1)[:, np.newaxis] + area(npboxes2)[np.newaxis, :] -
+             intersect)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersect / union
+
+
+def ioa(npboxes1, npboxes2):
+    """Return the [N, M] array of intersection over the area of npboxes2.
+
+    Boxes in npboxes2 with no area have a NaN IOA.
+    """
+    intersect = intersection(npboxes1, npboxes2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersect / area(npboxes2)[np.newaxis, :]
+
+
+def clip_to_window(npboxes, window):
+    """Clip boxes to a window.
+
+    Args:
+        npboxes: nx4 numpy array
+        window: numpy array of size 4 with ymin, xmin, ymax, xmax
+
+    Returns:
+        (clipped npboxes, indices of the boxes that still have some area after
+        clipping)
+    """
+    mins = np.tile(window[0:2], 2)
+    maxs = np.tile(window[2:4], 2)
+    clipped = np.fmax(np.fmin(npboxes, maxs), mins)
+    inds = np.nonzero(area(clipped) > 0)[0]
+    return clipped[inds], inds
+
+
+def paired_iou(npboxes1, npboxes2):
+    """Return the IOU between each box and the box in the same row of the other.
+
+    Args:
+        npboxes1: nx4 numpy array
+        npboxes2: nx4 numpy array
+    """
+    ymin = np.maximum(npboxes1[:, 0], npboxes2[:, 0])
+    xmin = np.maximum(npboxes1[:, 1], npboxes2[:, 1])
+    ymax = np.minimum(npboxes1[:, 2], npboxes2[:, 2])
+    xmax = np.minimum(npboxes1[:, 3], npboxes2[:, 3])
+    intersect = np.maximum(ymax - ymin, 0) * np.maximum(xmax - xmin, 0)
+    union = area(npboxes1) + area(npboxes2) - intersect
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return intersect / union
+
+
+def get_overlaps(npboxes, class_ids=None):
+    """Return the pairs of boxes that intersect and their IOUs.
+
+    Args:
+        npboxes: nx4 numpy array
+        class_ids: if set, only pairs of boxes with the same class id are
+            returned
+
+    Returns:
+        (inds1, inds2, ious) where each pair of intersecting boxes appears
+        once
+    """
+    inds1, inds2 = BoxIndex(npboxes).get_intersecting_pairs()
+    if class_ids is not None:
+        same_class = class_ids[inds1] == class_ids[inds2]
+        inds1, inds2 = inds1[same_class], inds2[same_class]
+    return inds1, inds2, paired_iou(npboxes[inds1], npboxes[inds2])
+
+
+def _sort_by_score(scores, score_thresh):
+    """Return indices of scores above score_thresh in decreasing order."""
+    inds = np.nonzero(scores > score_thresh)[0]
+    return inds[np.argsort(scores[inds])[::-1]]
+
+
+def _group_edges(src, dst, *values):
+    """Sort edges by source and return the range of edges for each source."""
+    order = np.argsort(src, kind='mergesort')
+    src = src[order]
+    srcs, starts = np.unique(src, return_index=True)
+    ends = np.append(starts[1:], len(src))
+    return (srcs, starts, ends, dst[order]) + tuple(v[order] for v in values)
+
+
+def _greedy_clusters(npboxes, scores, iou_thresh, score_thresh, class_ids):
+    """Run greedy NMS and assign each suppressed box to a selected box.
+
+    Only pairs of intersecting boxes are compared, so this scales with the
+    number of overlapping boxes rather than the square of the number of
+    boxes.
+
+    Returns:
+        (inds, selected, owners) where inds are the indices of boxes with
+        scores above score_thresh in decreasing order of score, selected are
+        the positions in inds of the selected boxes, and owners are the
+        positions in inds of the selected box that suppressed each box in
+        inds, or the box itself if it is selected.
+    """
+    if iou_thresh < 0. or iou_thresh > 1.:
+        raise ValueError('IOU threshold must be in [0, 1]')
+
+    inds = _sort_by_score(scores, score_thresh)
+    owners = np.arange(len(inds))
+    if iou_thresh == 1. or len(inds) == 0:
+        return inds, owners, owners
+
+    ranks1, ranks2, ious = get_overlaps(
+        npboxes[inds], None if class_ids is None else class_ids[inds])
+    is_edge = ious > iou_thresh
+    ranks1, ranks2 = ranks1[is_edge], ranks2[is_edge]
+    # Edges point from the higher scoring box to the one it may suppress,
+    # so boxes are visited in decreasing order of score, and all boxes that
+    # could suppress a box are visited before it.
+    srcs, starts, ends, dsts = _group_edges(
+        np.minimum(ranks1, ranks2), np.maximum(ranks1, ranks2))
+
+    suppressed = np.zeros((len(inds), ), dtype=bool)
+    for src, start, end in zip(srcs.tolist(), starts.tolist(), ends.tolist()):
+        if suppressed[src]:
+            continue
+        targets = dsts[start:end]
+        targets = targets[~suppressed[targets]]
+        suppressed[targets] = True
+        owners[targets] = src
+    return inds, np.nonzero(~suppressed)[0], owners
+
+
+def non_max_suppression(npboxes,
+                        scores,
+                        iou_thresh,
+                        score_thresh,
+                        class_ids=None):
+    """Greedily select boxes, removing boxes that overlap selected ones.
+
+    Boxes are considered in order of decreasing score, and a box is removed
+    if its IOU with an already selected box is greater than iou_thresh.
+
+    Args:
+        npboxes: nx4 numpy array
+        scores: numpy array of size n
+        iou_thresh: IOU threshold between 0 and 1
+        score_thresh: boxes with a score that isn't greater than this are
+            removed
+        class_ids: if set, boxes only suppress boxes with the same class id
+
+    Returns:
+        indices of the selected boxes in order of decreasing score
+    """
+    inds, selected, _ = _greedy_clusters(npboxes, scores, iou_thresh,
+                                         score_thresh, class_ids)
+    return inds[selected]
+
+
+def soft_non_max_suppression(npboxes,
+                             scores,
+                             score_thresh,
+                             sigma=0.5,
+                             class_ids=None):
+    """Select boxes using Gaussian soft-NMS.
+
+    Rather than removing boxes that overlap a selected box, their scores are
+    multiplied by exp(-iou^2 / sigma), and boxes are removed once their score
+    is no longer greater than score_thresh. See Bodla et al., "Soft-NMS --
+    Improving Object Detection With One Line of Code".
+
+    Args:
+        npboxes: nx4 numpy array
+        scores: numpy array of size n
+        score_thresh: boxes with a score that isn't greater than this are
+            removed
+        sigma: controls how quickly scores decay with overlap
+        class_ids: if set, boxes only decay the scores of boxes with the
+            same class id
+
+    Returns:
+        (indices of the selected boxes, their decayed scores), in order of
+        decreasing decayed score
+    """
+    inds = _sort_by_score(scores, score_thresh)
+    ranks1, ranks2, ious = get_overlaps(
+        npboxes[inds], None if class_ids is None else class_ids[inds])
+    with np.errstate(invalid='ignore'):
+        decays = np.nan_to_num(np.exp(-ious**2 / sigma))
+    srcs, starts, ends, dsts, decays = _group_edges(
+        np.concatenate([ranks1, ranks2]), np.concatenate([ranks2, ranks1]),
+        np.concatenate([decays, decays]))
+    edge_ranges = np.zeros((len(inds), 2), dtype=np.int64)
+    edge_ranges[srcs, 0] = starts
+    edge_ranges[srcs, 1] = ends
+
+    cur_scores = scores[inds].astype(np.float64)
+    heap = list(zip((-cur_scores).tolist(), range(len(inds))))
+    heapq.heapify(heap)
+    done = np.zeros((len(inds), ), dtype=bool)
+    selected = []
+    while heap:
+        neg_score, rank = heapq.heappop(heap)
+        # Skip entries that have been replaced by a lower score.
+        if done[rank] or -neg_score != cur_scores[rank]:
+            continue
+        if -neg_score <= score_thresh:
+            break
+        done[rank] = True
+        selected.append(rank)
+
+        start, end = edge_ranges[rank]
+        targets = dsts[start:end]
+        is_open = ~done[targets]
+        targets = targets[is_open]
+        cur_scores[targets] *= decays[start:end][is_open]
+        for target, score in zip(targets.tolist(),
+                                 cur_scores[targets].tolist()):
+            heapq.heappush(heap, (-score, target))
+
+    selected = np.array(selected, dtype=np.int64)
+    return inds[selected], cur_scores[selected]
+
+
+def weighted_box_fusion(npboxes,
+                        scores,
+                        iou_thresh,
+                        score_thresh,
+                        class_ids=None):
+    """Merge clusters of overlapping boxes into score-weighted average boxes.
+
+    Clusters are formed by greedy NMS: each selected box forms a cluster with
+    the boxes it suppresses. The coordinates of each cluster are averaged
+    using the scores as weights, and its score is the mean score of the
+    cluster. See Solovyev et al., "Weighted boxes fusion: ensembling boxes
+    for object detection models".
+
+    Args:
+        npboxes: nx4 numpy array
+        scores: numpy array of size n
+        iou_thresh: IOU threshold between 0 and 1
+        score_thresh: boxes with a score that isn't greater than this are
+            removed
+        class_ids: if set, only boxes with the same class id are merged
+
+    Returns:
+        (fused npboxes, fused scores, indices of the highest scoring box in
+        each cluster)
+    """
+    inds, selected, owners = _greedy_clusters(npboxes, scores, iou_thresh,
+                                              score_thresh, class_ids)
+    clusters = np.searchsorted(selected, owners)
+    num_clusters = len(selected)
+    weights = scores[inds].astype(np.float64)
+    weight_sums = np.bincount(clusters, weights, minlength=num_clusters)
+    fused_npboxes = np.stack(
+        [
+            np.bincount(
+                clusters, weights * npboxes[inds, col], minlength=num_clusters)
+            for col in range(4)
+        ],
+        axis=1) / weight_sums[:, np.newaxis]
+    fused_scores = weight_sums / np.bincount(clusters, minlength=num_clusters)
+    return (fused_npboxes.astype(npboxes.dtype),
+            fused_scores.astype(scores.dtype), inds[selected])
@@ -1,15 +1,112 @@
+import itertools
+
+import numpy as np
+from affine import Affine
+from rasterio.features import rasterize
+
 from rastervision.core.box import Box
 from rastervision.data.label import Labels
 
+# Class ids in the grid of cells that aren't set, and of cells whose class_id
+# is None.
+EMPTY_CELL = np.iinfo(np.int64).min
+NO_CLASS = EMPTY_CELL + 1
+# Class ids that can be stored in the grid.
+MAX_GRID_CLASS_ID = 2**62
+# Pending cells are stored one at a time if there are fewer than this.
+MIN_FLUSH_BATCH = 16
+
+
+def _to_int(value):
+    """Return a number as an int, or None if it isn't a whole number."""
+    if type(value) is int:
+        return value
+    if isinstance(value, (bool, np.bool_)):
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, (float, np.floating)) and float(value).is_integer():
+        return int(value)
+    return None
+
+
+def _to_grid_class_id(class_id):
+    """Return a class_id as it is stored in the grid.
+
+    Returns:
+        int, or EMPTY_CELL if the class_id can't be stored in the grid
+    """
+    if class_id is None:
+        return NO_CLASS
+    if type(class_id) is not int:
+        if (isinstance(class_id, (bool, np.bool_))
+                or not isinstance(class_id, (int, np.integer))):
+            return EMPTY_CELL
+        class_id = int(class_id)
+    if abs(class_id) >= MAX_GRID_CLASS_ID:
+        return EMPTY_CELL
+    return class_id
+
+
+def _dilate(mask):
+    """Return a boolean mask grown by one element in all 8 directions."""
+    out = mask.copy()
+    out[1:, :] |= mask[:-1, :]
+    out[:-1, :] |= mask[1:, :]
+    grown = out.copy()
+    out[:, 1:] |= grown[:, :-1]
+    out[:, :-1] |= grown[:, 1:]
+    return out
+
 
 class ChipClassificationLabels(Labels):
-    """Represents a spatial grid of cells associated with classes."""
+    """Represents a spatial grid of cells associated with classes.
+
+    The grid is defined by the position and size of the first cell that is
+    set. Cells that line up with it are stored in a dense array of class_ids
+    and a float32 array of scores, so that looking up a cell is O(1), and
+    adding and filtering labels are vectorized. Other cells, and cells whose
+    class_id or scores don't fit in the arrays, are kept in a dict. The
+    methods that return cells and their values are views over both, where
+    the cells in the grid come first in row-major order.
+
+    Cells are buffered by set_cell and stored in a batch the next time the
+    labels are read.
+    """
 
     def __init__(self):
-        self.cell_to_class_id = {}
+        # (ymin, xmin, height, width) of the grid, or None until a cell that
+        # can define it is set.
+        self.grid = None
+        # (row, col) in the grid of the first element of the arrays.
+        self.grid_offset = (0, 0)
+        # [rows, cols] array of class_ids, which are EMPTY_CELL for cells
+        # that aren't set.
+        self.grid_class_ids = np.full((0, 0), EMPTY_CELL, dtype=np.int64)
+        # [rows, cols, num_scores] array of scores, or None until a cell in
+        # the grid has scores.
+        self.grid_scores = None
+        # [rows, cols] array which is True for cells in the grid with scores.
+        self.grid_has_scores = np.zeros((0, 0), dtype=bool)
+        # Map from the tuple_format of other cells to (class_id, scores).
+        self.other_cells = {}
+        # Map from the tuple_format of cells that have been set but not yet
+        # stored in the grid or other_cells to (class_id, scores), in the
+        # order they were set.
+        self.pending_cells = {}
+
+    @property
+    def cell_to_class_id(self):
+        """Dict from the tuple_format of each cell to (class_id, scores)."""
+        self._flush()
+        return dict(
+            zip([cell.tuple_format() for cell in self.get_cells()],
+                self.get_values()))
 
     def __len__(self):
-        return len(self.cell_to_class_id)
+        self._flush()
+        return (int(np.count_nonzero(self.grid_class_ids != EMPTY_CELL)) + len(
+            self.other_cells))
 
     def __eq__(self, other):
         return (isinstance(other, ChipClassificationLabels)
@@ -22,16 +119,175 @@ class ChipClassificationLabels(Labels):
         return result
 
     def filter_by_aoi(self, aoi_polygons):
+        self._flush()
         result = ChipClassificationLabels()
-        for cell in self.cell_to_class_id:
+        if self.grid is not None:
+            occupied = self.grid_class_ids != EMPTY_CELL
+            keep = np.zeros(occupied.shape, dtype=bool)
+            for aoi in aoi_polygons:
+                keep |= self._get_within_mask(aoi, occupied & ~keep)
+            result.grid = self.grid
+            result.grid_offset = self.grid_offset
+            result.grid_class_ids = np.where(keep, self.grid_class_ids,
+                                             EMPTY_CELL)
+            if self.grid_scores is not None:
+                result.grid_scores = self.grid_scores.copy()
+            result.grid_has_scores = self.grid_has_scores & keep
+
+        for cell, (class_id, scores) in self.other_cells.items():
             cell_box = Box.from_tuple(cell)
             cell_poly = cell_box.to_shapely()
             for aoi in aoi_polygons:
                 if cell_poly.within(aoi):
-                    (class_id, scores) = self.cell_to_class_id[cell]
                     result.set_cell(cell_box, class_id, scores)
         return result
 
+    def _get_within_mask(self, aoi, candidates):
+        """Return a mask of the cells in the grid that are within a polygon.
+
+        Cells whose centers are inside the polygon and that aren't next to
+        its boundary are within it. The polygon is rasterized to find them,
+        and only the candidate cells near the boundary are checked one at a
+        time.
+
+        Args:
+            aoi: shapely polygon in pixel coordinates
+            candidates: [rows, cols] mask of the cells to check
+        """
+        within = np.zeros(candidates.shape, dtype=bool)
+        if aoi.is_empty or not candidates.any():
+            return within
+
+        ymin, xmin, height, width = self.grid
+        row_offset, col_offset = self.grid_offset
+        transform = Affine(width, 0, xmin + col_offset * width, 0, height,
+                           ymin + row_offset * height)
+        inside = rasterize(
+            [(aoi, 1)],
+            out_shape=candidates.shape,
+            transform=transform,
+            fill=0,
+            dtype=np.uint8).astype(bool)
+        near_boundary = _dilate(
+            rasterize(
+                [(aoi.boundary, 1)],
+                out_shape=candidates.shape,
+                transform=transform,
+                fill=0,
+                all_touched=True,
+                dtype=np.uint8).astype(bool))
+
+        within[inside & ~near_boundary & candidates] = True
+        for row, col in zip(*np.nonzero(near_boundary & candidates)):
+            cell = self._get_grid_cell(row, col)
+            within[row, col] = cell.to_shapely().within(aoi)
+        return within
+
+    def _get_grid_index(self, cell, define_grid=False):
+        """Return the (row, col) of a cell in the grid.
+
+        Args:
+            cell: (Box)
+            define_grid: if True and there is no grid yet, the grid is
+                defined by the cell
+
+        Returns:
+            (row, col) tuple, or None if the cell doesn't line up with the
+            grid
+        """
+        coords = [_to_int(v) for v in cell.tuple_format()]
+        if None in coords:
+            return None
+        ymin, xmin, ymax, xmax = coords
+        if self.grid is None:
+            if not define_grid or ymax <= ymin or xmax <= xmin:
+                return None
+            self.grid = (ymin, xmin, ymax - ymin, xmax - xmin)
+
+        grid_ymin, grid_xmin, height, width = self.grid
+        if ymax - ymin != height or xmax - xmin != width:
+            return None
+        row, row_rem = divmod(ymin - grid_ymin, height)
+        col, col_rem = divmod(xmin - grid_xmin, width)
+        if row_rem or col_rem:
+            return None
+        return (row, col)
+
+    def _get_grid_cell(self, row, col):
+        """Return the cell at an index into the arrays of the grid."""
+        ymin, xmin, height, width = self.grid
+        ymin += (int(row) + self.grid_offset[0]) * height
+        xmin += (int(col) + self.grid_offset[1]) * width
+        return Box(ymin, xmin, ymin + height, xmin + width)
+
+    def _reserve(self, row_range, col_range):
+        """Grow the arrays of the grid to cover ranges of rows and columns.
+
+        The arrays are grown at least twice as much as needed, so that
+        setting cells one at a time takes amortized O(1) time.
+
+        Args:
+            row_range: (first row, last row + 1) in the grid
+            col_range: (first col, last col + 1) in the grid
+        """
+        row_offset, col_offset = self.grid_offset
+        rows, cols = self.grid_class_ids.shape
+        if (row_offset <= row_range[0] and row_range[1] <= row_offset + rows
+                and col_offset <= col_range[0]
+                and col_range[1] <= col_offset + cols):
+            return
+
+        def grow(start, end, offset, size):
+            new_start, new_end = offset, offset + size
+            if size == 0:
+                return start, end
+            if start < new_start:
+                new_start = min(start, offset - size)
+            if end > new_end:
+                new_end = max(end, offset + 2 * size)
+            return new_start, new_end
+
+        row_start, row_end = grow(*row_range, row_offset, rows)
+        col_start, col_end = grow(*col_range, col_offset, cols)
+        shape = (row_end - row_start, col_end - col_start)
+        rs = slice(row_offset - row_start, row_offset - row_start + rows)
+        cs = slice(col_offset - col_start, col_offset - col_start + cols)
+
+        class_ids = np.full(shape, EMPTY_CELL, dtype=np.int64)
+        class_ids[rs, cs] = self.grid_class_ids
+        self.grid_class_ids = class_ids
+        has_scores = np.zeros(shape, dtype=bool)
+        has_scores[rs, cs] = self.grid_has_scores
+        self.grid_has_scores = has_scores
+        if self.grid_scores is not None:
+            scores = np.zeros(
+                shape + self.grid_scores.shape[2:], dtype=np.float32)
+            scores[rs, cs] = self.grid_scores
+            self.grid_scores = scores
+        self.grid_offset = (row_start, col_start)
+
+    def _fits_grid(self, class_id, scores):
+        """Return True if a class_id and scores can be stored in the grid."""
+        if _to_grid_class_id(class_id) == EMPTY_CELL:
+            return False
+        if scores is not None and self.grid_scores is not None:
+            return len(scores) == self.grid_scores.shape[2]
+        return True
+
+    def _remove_other_cells(self):
+        """Remove other cells that have been set in the grid."""
+        if not self.other_cells:
+            return
+        for cell in list(self.other_cells.keys()):
+            index = self._get_grid_index(Box.from_tuple(cell))
+            if index is not None:
+                row = index[0] - self.grid_offset[0]
+                col = index[1] - self.grid_offset[1]
+                rows, cols = self.grid_class_ids.shape
+                if (0 <= row < rows and 0 <= col < cols
+                        and self.grid_class_ids[row, col] != EMPTY_CELL):
+                    del self.other_cells[cell]
+
     def set_cell(self, cell, class_id, scores=None):
         """Set cell and its class_id.
 
@@ -41,8 +297,161 @@ class ChipClassificationLabels(Labels):
             scores: 1d numpy array of probabilities for each class
         """
         if scores is not None:
-            scores = list(map(lambda x: float(x), list(scores)))
-        self.cell_to_class_id[cell.tuple_format()] = (class_id, scores)
+            scores = [float(x) for x in scores]
+        self.pending_cells[cell.tuple_format()] = (class_id, scores)
+
+    def _flush(self):
+        """Store the pending cells in the grid or in other_cells."""
+        if not self.pending_cells:
+            return
+        cells = list(self.pending_cells.keys())
+        values = list(self.pending_cells.values())
+        self.pending_cells = {}
+
+        start = 0
+        while self.grid is None and start < len(cells):
+            self._set_cell(Box.from_tuple(cells[start]), *values[start])
+            start += 1
+        cells, values = cells[start:], values[start:]
+        if len(cells) < MIN_FLUSH_BATCH:
+            set_inds = range(len(cells))
+        else:
+            set_inds = np.nonzero(~self._set_grid_cells(cells, values))[0]
+        for ind in set_inds:
+            self._set_cell(Box.from_tuple(cells[ind]), *values[ind])
+
+    def _set_grid_cells(self, cells, values):
+        """Store a batch of cells in the grid at once.
+
+        Args:
+            cells: list of the tuple_format of cells
+            values: list of (class_id, scores) of the cells
+
+        Returns:
+            [len(cells)] mask of the cells that were stored, which are the
+            ones that line up with the grid and whose class_id and scores
+            fit in its arrays
+        """
+        try:
+            coords = np.fromiter(
+                itertools.chain.from_iterable(cells),
+                dtype=np.float64,
+                count=4 * len(cells)).reshape(-1, 4)
+        except (TypeError, ValueError):
+            return np.zeros(len(cells), dtype=bool)
+        whole = np.all(
+            (coords == np.floor(coords)) & (np.abs(coords) < 2**53), axis=1)
+        coords = np.where(whole[:, np.newaxis], coords, 0)
+        ymin, xmin, ymax, xmax = coords.astype(np.int64).T
+
+        grid_ymin, grid_xmin, height, width = self.grid
+        rows, row_rems = np.divmod(ymin - grid_ymin, height)
+        cols, col_rems = np.divmod(xmin - grid_xmin, width)
+        class_ids = np.array(
+            [
+                c if type(c) is int
+                and -MAX_GRID_CLASS_ID < c < MAX_GRID_CLASS_ID else
+                _to_grid_class_id(c) for c, _ in values
+            ],
+            dtype=np.int64)
+        fits = (whole & (ymax - ymin == height) & (xmax - xmin == width)
+                & (row_rems == 0) & (col_rems == 0)
+                & (class_ids != EMPTY_CELL))
+
+        scores = [cell_scores for _, cell_scores in values]
+        has_scores = np.array([s is not None for s in scores], dtype=bool)
+        if has_scores.any():
+            if self.grid_scores is not None:
+                num_scores = self.grid_scores.shape[2]
+            elif (fits & has_scores).any():
+                num_scores = len(scores[np.argmax(fits & has_scores)])
+            else:
+                num_scores = None
+            num_cell_scores = np.array(
+                [-1 if s is None else len(s) for s in scores])
+            fits &= ~has_scores | (num_cell_scores == num_scores)
+        if not fits.any():
+            return fits
+
+        rows, cols = rows[fits], cols[fits]
+        self._reserve((int(rows.min()), int(rows.max()) + 1),
+                      (int(cols.min()), int(cols.max()) + 1))
+        rows -= self.grid_offset[0]
+        cols -= self.grid_offset[1]
+        self.grid_class_ids[rows, cols] = class_ids[fits]
+        self.grid_has_scores[rows, cols] = has_scores[fits]
+        score_inds = np.nonzero(fits & has_scores)[0]
+        if len(score_inds) > 0:
+            if self.grid_scores is None:
+                self.grid_scores = np.zeros(
+                    self.grid_class_ids.shape + (num_scores, ),
+                    dtype=np.float32)
+            cell_has_scores = has_scores[fits]
+            self.grid_scores[rows[cell_has_scores], cols[cell_has_scores]] = \
+                np.fromiter(
+                    itertools.chain.from_iterable(
+                        scores[ind] for ind in score_inds),
+                    dtype=np.float32,
+                    count=len(score_inds) * num_scores).reshape(-1, num_scores)
+        if self.other_cells:
+            for ind in np.nonzero(fits)[0]:
+                self.other_cells.pop(cells[ind], None)
+        return fits
+
+    def _set_cell(self, cell, class_id, scores):
+        """Store a cell in the grid, or in other_cells if it doesn't fit."""
+        fits_grid = self._fits_grid(class_id, scores)
+        index = self._get_grid_index(cell, define_grid=fits_grid)
+        if index is not None and fits_grid:
+            row, col = index
+            self._reserve((row, row + 1), (col, col + 1))
+            row -= self.grid_offset[0]
+            col -= self.grid_offset[1]
+            self.grid_class_ids[row, col] = _to_grid_class_id(class_id)
+            self.grid_has_scores[row, col] = scores is not None
+            if scores is not None:
+                if self.grid_scores is None:
+                    self.grid_scores = np.zeros(
+                        self.grid_class_ids.shape + (len(scores), ),
+                        dtype=np.float32)
+                self.grid_scores[row, col] = scores
+            if self.other_cells:
+                self.other_cells.pop(cell.tuple_format(), None)
+            return
+
+        if index is not None:
+            # Clear the cell in the grid, in case it was set there before.
+            row = index[0] - self.grid_offset[0]
+            col = index[1] - self.grid_offset[1]
+            rows, cols = self.grid_class_ids.shape
+            if 0 <= row < rows and 0 <= col < cols:
+                self.grid_class_ids[row, col] = EMPTY_CELL
+                self.grid_has_scores[row, col] = False
+        self.other_cells[cell.tuple_format()] = (class_id, scores)
+
+    def _get_grid_values(self, rows, cols):
+        """Return lists of the class_ids and scores of cells in the grid."""
+        class_ids = self.grid_class_ids[rows, cols]
+        no_class = class_ids == NO_CLASS
+        class_ids = class_ids.tolist()
+        if no_class.any():
+            class_ids = [None if c == NO_CLASS else c for c in class_ids]
+        if self.grid_scores is None:
+            return class_ids, [None] * len(class_ids)
+
+        has_scores = self.grid_has_scores[rows, cols]
+        if has_scores.all():
+            return class_ids, self.grid_scores[rows, cols].tolist()
+        cell_scores = iter(
+            self.grid_scores[rows[has_scores], cols[has_scores]].tolist())
+        scores = [
+            next(cell_scores) if h else None for h in has_scores.tolist()
+        ]
+        return class_ids, scores
+
+    def _get_grid_inds(self):
+        """Return the indices into the arrays of the cells set in the grid."""
+        return np.nonzero(self.grid_class_ids != EMPTY_CELL)
 
     def get_cell_class_id(self, cell):
         """Return class_id for a cell.
@@ -50,7 +459,7 @@ class ChipClassificationLabels(Labels):
         Args:
             cell: (Box)
         """
-        result = self.cell_to_class_id.get(cell.tuple_format())
+        result = self.get_cell_values(cell)
         if result:
             return result[0]
         else:
@@ -62,7 +471,7 @@ class ChipClassificationLabels(Labels):
         Args:
             cell: (Box)
         """
-        result = self.cell_to_class_id.get(cell.tuple_format())
+        result = self.get_cell_values(cell)
         if result:
             return result[1]
         else:
@@ -74,7 +483,18 @@ class ChipClassificationLabels(Labels):
         Args:
             cell: (Box)
         """
-        return self.cell_to_class_id.get(cell.tuple_format())
+        self._flush()
+        index = self._get_grid_index(cell)
+        if index is not None:
+            row = index[0] - self.grid_offset[0]
+            col = index[1] - self.grid_offset[1]
+            rows, cols = self.grid_class_ids.shape
+            if (0 <= row < rows and 0 <= col < cols
+                    and self.grid_class_ids[row, col] != EMPTY_CELL):
+                class_ids, scores = self._get_grid_values(
+                    np.array([row]), np.array([col]))
+                return (class_ids[0], scores[0])
+        return self.other_cells.get(cell.tuple_format())
 
     def get_singleton_labels(self, cell):
         """Return Labels object representing a single cell.
@@ -89,22 +509,99 @@ class ChipClassificationLabels(Labels):
 
     def get_cells(self):
         """Return list of all cells (list of Box)."""
-        return [
-            Box.from_npbox(box_tup)
-            for box_tup in self.cell_to_class_id.keys()
+        self._flush()
+        cells = []
+        if self.grid is not None:
+            rows, cols = self._get_grid_inds()
+            ymin, xmin, height, width = self.grid
+            ymins = (ymin + (rows + self.grid_offset[0]) * height).tolist()
+            xmins = (xmin + (cols + self.grid_offset[1]) * width).tolist()
+            cells = [
+                Box(y, x, y + height, x + width) for y, x in zip(ymins, xmins)
+            ]
+        return cells + [
+            Box.from_npbox(box_tup) for box_tup in self.other_cells.keys()
         ]
 
     def get_class_ids(self):
         """Return list of class_ids for all cells."""
-        return list(map(lambda x: x[0], self.cell_to_class_id.values()))
+        return list(map(lambda x: x[0], self.get_values()))
 
     def get_scores(self):
         """Return list of scores for all cells."""
-        return list(map(lambda x: x[1], self.cell_to_class_id.values()))
+        return list(map(lambda x: x[1], self.get_values()))
 
     def get_values(self):
         """Return list of class_ids and scores for all cells."""
-        return list(self.cell_to_class_id.values())
+        self._flush()
+        class_ids, scores = self._get_grid_values(*self._get_grid_inds())
+        return list(zip(class_ids, scores)) + list(self.other_cells.values())
+
+    def _get_shift(self, labels):
+        """Return the offset of the grid of other labels from this grid.
+
+        Returns:
+            (rows, cols) tuple, or None if the grids don't line up
+        """
+        ymin, xmin, height, width = self.grid
+        other_ymin, other_xmin, other_height, other_width = labels.grid
+        if other_height != height or other_width != width:
+            return None
+        row_shift, row_rem = divmod(other_ymin - ymin, height)
+        col_shift, col_rem = divmod(other_xmin - xmin, width)
+        if row_rem or col_rem:
+            return None
+        return (row_shift, col_shift)
+
+    def _extend_grid(self, labels):
+        """Add the cells in the grid of other labels.
+
+        Returns:
+            True if the cells were added at once, or False if the grids
+            don't line up or the scores have different lengths
+        """
+        if self.grid is None:
+            self.grid = labels.grid
+        shift = self._get_shift(labels)
+        if shift is None:
+            return False
+        if (self.grid_scores is not None and labels.grid_scores is not None
+                and self.grid_scores.shape[2] != labels.grid_scores.shape[2]):
+            return False
+
+        occupied = labels.grid_class_ids != EMPTY_CELL
+        rows, cols = np.nonzero(occupied)
+        if len(rows) == 0:
+            return True
+        row_start, row_end = rows.min(), rows.max() + 1
+        col_start, col_end = cols.min(), cols.max() + 1
+        occupied = occupied[row_start:row_end, col_start:col_end]
+
+        # The range of the cells in this grid.
+        row_offset = labels.grid_offset[0] + shift[0]
+        col_offset = labels.grid_offset[1] + shift[1]
+        self._reserve((row_offset + row_start, row_offset + row_end),
+                      (col_offset + col_start, col_offset + col_end))
+        rs = slice(row_offset + row_start - self.grid_offset[0],
+                   row_offset + row_end - self.grid_offset[0])
+        cs = slice(col_offset + col_start - self.grid_offset[1],
+                   col_offset + col_end - self.grid_offset[1])
+        other_rs = slice(row_start, row_end)
+        other_cs = slice(col_start, col_end)
+
+        self.grid_class_ids[rs, cs][occupied] = \
+            labels.grid_class_ids[other_rs, other_cs][occupied]
+        self.grid_has_scores[rs, cs][occupied] = \
+            labels.grid_has_scores[other_rs, other_cs][occupied]
+        if labels.grid_scores is not None:
+            if self.grid_scores is None:
+                self.grid_scores = np.zeros(
+                    self.grid_class_ids.shape + labels.grid_scores.shape[2:],
+                    dtype=np.float32)
+            self.grid_scores[rs, cs][occupied] = \
+                labels.grid_scores[other_rs, other_cs][occupied]
+        self._remove_other_cells()
+        return True
 
     def extend(self, labels):
         """Adds cells contained in labels.
@@ -112,6 +609,14 @@ class ChipClassificationLabels(Labels):
         Args:
             labels: ChipClassificationLabels
         """
-        for cell in labels.get_cells():
-            class_id, scores = labels.get_cell_values(cell)
-            self.set_cell(cell, class_id, scores)
+        self._flush()
+        labels._flush()
+        if labels.grid is None or not self._extend_grid(labels):
+            rows, cols = labels._get_grid_inds()
+            class_ids, scores = labels._get_grid_values(rows, cols)
+            for row, col, class_id, cell_scores in zip(rows, cols, class_ids,
+                                                       scores):
+                self.set_cell(
+                    labels._get_grid_cell(row, col), class_id, cell_scores)
+        for cell, (class_id, scores) in labels.other_cells.items():
+            self.set_cell(Box.from_tuple(cell), class_id, scores)
@@ -2,12 +2,24 @@ import numpy as np
 
 from rastervision.core.box import Box
 from rastervision.data.label import Labels
+from rastervision.data.label import box_ops
+from rastervision.data.label.box_index import BoxIndex
+
+# Labels with fewer boxes than this are queried without using a BoxIndex.
+MIN_INDEXED_BOXES = 64
+
+# Methods for removing duplicate boxes in prune_duplicates.
+NMS = 'nms'
+SOFT_NMS = 'soft_nms'
+WBF = 'wbf'
+NMS_METHODS = [NMS, SOFT_NMS, WBF]
 
 
 class ObjectDetectionLabels(Labels):
     """A set of boxes and associated class_ids and scores.
 
-    Implemented using the Tensorflow Object Detection API's BoxList class.
+    The boxes, class_ids and scores are stored in numpy arrays, and operations
+    on them are vectorized (see box_ops).
     """
 
     def __init__(self, npboxes, class_ids, scores=None):
@@ -20,18 +32,30 @@ class ObjectDetectionLabels(Labels):
             class_ids: int numpy array of size n with class ids starting at 1
             scores: float numpy array of size n
         """
-        # Lazily load TF Object Detection
-        from object_detection.utils.np_box_list import BoxList
-
-        self.boxlist = BoxList(npboxes)
-        # This field name actually needs to be 'classes' to be able to use
-        # certain utility functions in the TF Object Detection API.
-        self.boxlist.add_field('classes', class_ids)
-        # We need to ensure that there is always a scores field so that the
-        # concatenate method will work with empty labels objects.
+        if not isinstance(npboxes, np.ndarray):
+            raise ValueError('npboxes must be a numpy array.')
+        if len(npboxes.shape) != 2 or npboxes.shape[1] != 4:
+            raise ValueError('Invalid dimensions for npboxes.')
+        if npboxes.dtype != np.float32 and npboxes.dtype != np.float64:
+            raise ValueError('Invalid data type for npboxes: float is '
+                             'required.')
+        if np.any(npboxes[:, 0] > npboxes[:, 2]) or np.any(
+                npboxes[:, 1] > npboxes[:, 3]):
+            raise ValueError('Invalid box data. npboxes must be a numpy '
+                             'array of N*[ymin, xmin, ymax, xmax]')
         if scores is None:
             scores = np.ones(class_ids.shape)
-        self.boxlist.add_field('scores', scores)
+        if class_ids.shape[0] != npboxes.shape[0] or \
+                scores.shape[0] != npboxes.shape[0]:
+            raise ValueError('class_ids and scores must have one value per '
+                             'box.')
+
+        self.npboxes = npboxes
+        self.class_ids = class_ids
+        self.scores = scores
+
+        # Built on first use by get_box_index.
+        self.box_index = None
 
     def __add__(self, other):
         return ObjectDetectionLabels.concatenate(self, other)
@@ -50,23 +74,20 @@ class ObjectDetectionLabels(Labels):
 
     def filter_by_aoi(self, aoi_polygons):
         boxes = self.get_boxes()
-        class_ids = self.get_class_ids()
-        scores = self.get_scores()
-
-        new_boxes = []
-        new_class_ids = []
-        new_scores = []
-        for box, class_id, score in zip(boxes, class_ids, scores):
+        inds = []
+        for ind, box in enumerate(boxes):
             box_poly = box.to_shapely()
             for aoi in aoi_polygons:
                 if box_poly.within(aoi):
-                    new_boxes.append(box)
-                    new_class_ids.append(class_id)
-                    new_scores.append(score)
+                    inds.append(ind)
                     break
 
-        return ObjectDetectionLabels(
-            np.array(new_boxes), np.array(new_class_ids), np.array(new_scores))
+        return self._gather(np.array(inds, dtype=np.int64))
+
+    def _gather(self, inds):
+        """Return labels with the boxes at some indices."""
+        return ObjectDetectionLabels(self.npboxes[inds], self.class_ids[inds],
+                                     self.scores[inds])
 
     @staticmethod
     def make_empty():
@@ -85,27 +106,40 @@ class ObjectDetectionLabels(Labels):
 
     def get_boxes(self):
         """Return list of Boxes."""
-        return [Box.from_npbox(npbox) for npbox in self.boxlist.get()]
+        return [Box.from_npbox(npbox) for npbox in self.npboxes]
 
     def get_npboxes(self):
-        return self.boxlist.get()
+        return self.npboxes
 
     def get_scores(self):
-        if self.boxlist.has_field('scores'):
-            return self.boxlist.get_field('scores')
-        return None
+        return self.scores
 
     def get_class_ids(self):
-        return self.boxlist.get_field('classes')
+        return self.class_ids
 
     def __len__(self):
-        return self.boxlist.get().shape[0]
+        return self.npboxes.shape[0]
+
+    def get_box_index(self):
+        """Return a BoxIndex of the boxes, which is built on first use."""
+        if self.box_index is None:
+            self.box_index = BoxIndex(self.npboxes)
+        return self.box_index
 
     def __str__(self):
-        return str(self.boxlist.get())
+        return str(self.npboxes)
 
     def to_boxlist(self):
-        return self.boxlist
+        """Return a TF Object Detection API BoxList with the labels."""
+        # Lazily load TF Object Detection
+        from object_detection.utils.np_box_list import BoxList
+
+        boxlist = BoxList(self.npboxes)
+        # This field name needs to be 'classes' to be able to use certain
+        # utility functions in the TF Object Detection API.
+        boxlist.add_field('classes', self.class_ids)
+        boxlist.add_field('scores', self.scores)
+        return boxlist
 
     def to_dict(self):
         """Returns a dict version of these labels.
@@ -169,6 +203,9 @@ class ObjectDetectionLabels(Labels):
     def get_overlapping(labels, window, ioa_thresh=0.000001, clip=False):
         """Return subset of labels that overlap with window.
 
+        The boxes that intersect the window are looked up using the BoxIndex
+        of the labels.
+
         Args:
             labels: ObjectDetectionLabels
             window: Box
@@ -176,19 +213,27 @@ class ObjectDetectionLabels(Labels):
                 overlapping
             clip: if True, clip label boxes to the window
         """
-        # Lazily load TF Object Detection
-        from object_detection.utils.np_box_list import BoxList
-        from object_detection.utils.np_box_list_ops import (
-            prune_non_overlapping_boxes, clip_to_window)
-
         window_npbox = window.npbox_format()
-        window_boxlist = BoxList(np.expand_dims(window_npbox, axis=0))
-        boxlist = prune_non_overlapping_boxes(
-            labels.boxlist, window_boxlist, minoverlap=ioa_thresh)
+        if ioa_thresh > 0 and len(labels) >= MIN_INDEXED_BOXES:
+            # Only boxes that intersect the window can have a positive IOA,
+            # so use the index to avoid computing it for every box.
+            inds = labels.get_box_index().query(window_npbox)
+        else:
+            inds = np.arange(len(labels))
+
+        window_ioas = box_ops.ioa(
+            np.expand_dims(window_npbox, axis=0), labels.npboxes[inds])[0]
+        with np.errstate(invalid='ignore'):
+            inds = inds[window_ioas >= ioa_thresh]
+        labels = labels._gather(inds)
+
         if clip:
-            boxlist = clip_to_window(boxlist, window_npbox)
+            npboxes, inds = box_ops.clip_to_window(labels.npboxes,
+                                                   window_npbox)
+            labels = ObjectDetectionLabels(npboxes, labels.class_ids[inds],
+                                           labels.scores[inds])
 
-        return ObjectDetectionLabels.from_boxlist(boxlist)
+        return labels
 
     @staticmethod
     def concatenate(labels1, labels2):
@@ -198,33 +243,77 @@ class ObjectDetectionLabels(Labels):
             labels1: ObjectDetectionLabels
             labels2: ObjectDetectionLabels
         """
-        from object_detection.utils.np_box_list_ops import concatenate
+        return ObjectDetectionLabels.concatenate_all([labels1, labels2])
+
+    @staticmethod
+    def concatenate_all(labels_list):
+        """Return concatenation of a list of labels.
 
-        new_boxlist = concatenate([labels1.to_boxlist(), labels2.to_boxlist()])
-        return ObjectDetectionLabels.from_boxlist(new_boxlist)
+        This copies each box once, so it is faster than adding the labels
+        together one at a time.
+
+        Args:
+            labels_list: non-empty list of ObjectDetectionLabels
+        """
+        npboxes = np.concatenate([ls.npboxes for ls in labels_list])
+        class_ids = np.concatenate([ls.class_ids for ls in labels_list])
+        scores = np.concatenate([ls.scores for ls in labels_list])
+        return ObjectDetectionLabels(npboxes, class_ids, scores=scores)
 
     @staticmethod
-    def prune_duplicates(labels, score_thresh, merge_thresh):
+    def prune_duplicates(labels,
+                         score_thresh,
+                         merge_thresh,
+                         nms_method=NMS,
+                         class_aware=False,
+                         soft_nms_sigma=0.5):
         """Remove duplicate boxes.
 
         Runs non-maximum suppression to remove duplicate boxes that result from
-        sliding window prediction algorithm.
+        sliding window prediction algorithm. Only boxes that are near each
+        other are compared, so this scales to scenes with many boxes.
 
         Args:
             labels: ObjectDetectionLabels
             score_thresh: the minimum allowed score of boxes
-            merge_thresh: the minimum IOA allowed when merging two boxes
-                together
+            merge_thresh: the minimum IOU allowed when merging two boxes
+                together. Not used by soft_nms.
+            nms_method: one of NMS_METHODS. nms removes boxes that overlap a
+                higher scoring box, soft_nms decays the scores of overlapping
+                boxes instead, and wbf replaces each group of overlapping
+                boxes with their score-weighted average.
+            class_aware: if True, only boxes with the same class are merged
+            soft_nms_sigma: controls how quickly scores decay with overlap
+                when using soft_nms
 
         Returns:
             ObjectDetectionLabels
         """
-        from object_detection.utils.np_box_list_ops import non_max_suppression
-
-        max_output_size = 1000000
-        pruned_boxlist = non_max_suppression(
-            labels.boxlist,
-            max_output_size=max_output_size,
-            iou_threshold=merge_thresh,
-            score_threshold=score_thresh)
-        return ObjectDetectionLabels.from_boxlist(pruned_boxlist)
+        class_ids = labels.class_ids if class_aware else None
+        if nms_method == NMS:
+            inds = box_ops.non_max_suppression(
+                labels.npboxes,
+                labels.scores,
+                iou_thresh=merge_thresh,
+                score_thresh=score_thresh,
+                class_ids=class_ids)
+            return labels._gather(inds)
+        if nms_method == SOFT_NMS:
+            inds, scores = box_ops.soft_non_max_suppression(
+                labels.npboxes,
+                labels.scores,
+                score_thresh=score_thresh,
+                sigma=soft_nms_sigma,
+                class_ids=class_ids)
+            return ObjectDetectionLabels(labels.npboxes[inds],
+                                         labels.class_ids[inds], scores)
+        if nms_method == WBF:
+            npboxes, scores, inds = box_ops.weighted_box_fusion(
+                labels.npboxes,
+                labels.scores,
+                iou_thresh=merge_thresh,
+                score_thresh=score_thresh,
+                class_ids=class_ids)
+            return ObjectDetectionLabels(npboxes, labels.class_ids[inds],
+                                         scores)
+        raise ValueError('Unknown nms_method: {}'.format(nms_method))
@@ -91,7 +91,8 @@ class SemanticSegmentationLabels(Labels):
             if window_aois:
                 # If window intersects with AOI, set pixels outside the AOI polygon to 0,
                 # so they are ignored during eval.
-                label_arr = self.label_fn(window)
+                # Copy so that label_fn can return arrays that it holds on to.
+                label_arr = self.label_fn(window).copy()
                 mask = rasterize(
                     [(p, 0) for p in window_aois],
                     out_shape=label_arr.shape,
@@ -109,6 +109,25 @@ def infer_labels(geojson, crs_transformer, extent, cell_size, ioa_thresh,
         ChipClassificationLabels
     """
     shapes = geojson_to_shapes(geojson, crs_transformer)
+    return infer_labels_from_shapes(shapes, extent, cell_size, ioa_thresh,
+                                    use_intersection_over_cell,
+                                    pick_min_class_id, background_class_id)
+
+
+def infer_labels_from_shapes(shapes, extent, cell_size, ioa_thresh,
+                             use_intersection_over_cell, pick_min_class_id,
+                             background_class_id):
+    """Infer ChipClassificationLabels grid from polygons.
+
+    Like infer_labels, but for shapes that are already in pixel coordinates.
+
+    Args:
+        shapes: List of (shapely.geometry, class_id) tuples
+        extent: Box representing the bounds of the grid
+
+    Returns:
+        ChipClassificationLabels
+    """
     # Only keep polygons and multipolygons.
     # TODO: handle linestrings
     shapes = [(shape, class_id) for shape, class_id in shapes
@@ -211,11 +230,16 @@ class ChipClassificationLabelSource(LabelSource):
                     crs_transformer=crs_transformer, extent=extent, class_map=class_map)
 
         self.labels = ChipClassificationLabels()
-        geojson = vector_source.get_geojson()
-        self.labels = load_geojson(geojson, crs_transformer, extent,
-                                   infer_cells, cell_size, ioa_thresh,
-                                   use_intersection_over_cell,
-                                   pick_min_class_id, background_class_id)
+        if infer_cells:
+            # The shapes may be cached by the vector source.
+            shapes = vector_source.get_shapes(crs_transformer)
+            self.labels = infer_labels_from_shapes(
+                shapes, extent, cell_size, ioa_thresh,
+                use_intersection_over_cell, pick_min_class_id,
+                background_class_id)
+        else:
+            geojson = vector_source.get_geojson()
+            self.labels = read_labels(geojson, crs_transformer, extent)
 
     def get_labels(self, window=None):
         if window is None:
@@ -1,7 +1,7 @@
 import numpy as np
 
-from rastervision.data.label_source.utils import (
-    color_to_triple, color_to_integer, rgb_to_int_array)
+from rastervision.data.label_source.utils import (color_to_triple,
+                                                  rgb_to_int_array)
 
 
 class SegmentationClassTransformer():
@@ -9,54 +9,39 @@ class SegmentationClassTransformer():
         color_to_class = dict(
             [(item.color, item.id) for item in class_map.get_items()])
 
-        # color int to class
-        color_int_to_class = dict(
-            zip([color_to_integer(c) for c in color_to_class.keys()],
-                color_to_class.values()))
-
-        def color_int_to_class_fn(color: int) -> int:
-            # Convert unspecified colors to class 0 which is "don't care"
-            return color_int_to_class.get(color, 0x00)
-
-        self.transform_color_int_to_class = \
-            np.vectorize(color_int_to_class_fn, otypes=[np.uint8])
-
-        # class to color triple
-        class_to_color_triple = dict(
-            zip(color_to_class.values(),
-                [color_to_triple(c) for c in color_to_class.keys()]))
-
-        def class_to_channel_color(channel: int, class_id: int) -> int:
-            """Given a channel (red, green, or blue) and a class, return the
-            intensity of that channel.
-
-            Args:
-                 channel: An integer with value 0, 1, or 2
-                      representing the channel.
-                 class_id: The class id represented as an integer.
-            Returns:
-                 The intensity of the channel for the color associated
-                      with the given class.
-            """
-            default_triple = (0x00, 0x00, 0x00)
-            return class_to_color_triple.get(class_id, default_triple)[channel]
-
-        class_to_r = np.vectorize(
-            lambda c: class_to_channel_color(0, c), otypes=[np.uint8])
-        class_to_g = np.vectorize(
-            lambda c: class_to_channel_color(1, c), otypes=[np.uint8])
-        class_to_b = np.vectorize(
-            lambda c: class_to_channel_color(2, c), otypes=[np.uint8])
-        self.transform_class_to_color = [class_to_r, class_to_g, class_to_b]
+        # Palette of color triples indexed by class id. The extra last row is
+        # black and used for class ids that have no color.
+        num_ids = max(color_to_class.values(), default=-1) + 1
+        self.palette = np.zeros((num_ids + 1, 3), dtype=np.uint8)
+
+        # Packed color ints and classes sorted by color int, for looking up
+        # classes using searchsorted.
+        color_int_to_class = {}
+        for color, class_id in color_to_class.items():
+            r, g, b = color_to_triple(color)
+            self.palette[class_id, :] = (r, g, b)
+            color_int_to_class[(r << 16) + (g << 8) + b] = class_id
+        self.color_ints = np.array(
+            sorted(color_int_to_class.keys()), dtype=np.uint32)
+        self.color_int_classes = np.array(
+            [color_int_to_class[c] for c in self.color_ints]).astype(np.uint8)
 
     def rgb_to_class(self, rgb_labels):
         color_int_labels = rgb_to_int_array(rgb_labels)
-        class_labels = self.transform_color_int_to_class(color_int_labels)
-        return class_labels.astype(np.uint8)
+        class_labels = np.zeros(color_int_labels.shape, dtype=np.uint8)
+        if len(self.color_ints) == 0:
+            return class_labels
+
+        inds = np.searchsorted(self.color_ints, color_int_labels)
+        inds[inds == len(self.color_ints)] = 0
+        # Convert unspecified colors to class 0 which is "don't care"
+        is_known = self.color_ints[inds] == color_int_labels
+        class_labels[is_known] = self.color_int_classes[inds[is_known]]
+        return class_labels
 
     def class_to_rgb(self, class_labels):
-        rgb_labels = np.empty(class_labels.shape + (3, ))
-        for chan in range(3):
-            class_to_channel_color = self.transform_class_to_color[chan]
-            rgb_labels[:, :, chan] = class_to_channel_color(class_labels)
-        return rgb_labels.astype(np.uint8)
+        class_labels = np.asarray(class_labels)
+        no_color_ind = len(self.palette) - 1
+        inds = np.where((class_labels >= 0) & (class_labels < no_color_ind),
+                        class_labels, no_color_ind)
+        return self.palette[inds]
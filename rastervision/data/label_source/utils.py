@@ -7,6 +7,7 @@ from PIL import ImageColor
 import rastervision as rv
 from rastervision.core.box import Box
 from rastervision.data import (ChipClassificationLabels, ObjectDetectionLabels)
+from rastervision.data.crs_transformer import transform_point_lists
 from rastervision.utils.files import file_to_str
 
 
@@ -40,16 +41,10 @@ def geojson_to_object_detection_labels(geojson_dict,
     class_ids = []
     scores = []
 
-    def polygon_to_label(polygon, crs_transformer):
-        polygon = [crs_transformer.map_to_pixel(p) for p in polygon]
-        xmin, ymin = np.min(polygon, axis=0)
-        xmax, ymax = np.max(polygon, axis=0)
-        boxes.append(Box(ymin, xmin, ymax, xmax))
-
-        properties = feature['properties']
-        class_ids.append(properties['class_id'])
-        scores.append(properties.get('score', 1.0))
-
+    # The polygons are collected so that their vertices can be transformed
+    # in a single batch.
+    polygons = []
+    polygon_properties = []
     for feature in features:
         # This was added to handle empty GeometryCollections which appear when using
         # OSM vector tiles.
@@ -60,14 +55,25 @@ def geojson_to_object_detection_labels(geojson_dict,
         coordinates = feature['geometry']['coordinates']
         if geom_type == 'MultiPolygon':
             for polygon in coordinates:
-                polygon_to_label(polygon[0], crs_transformer)
+                polygons.append(polygon[0])
+                polygon_properties.append(feature['properties'])
         elif geom_type == 'Polygon':
-            polygon_to_label(coordinates[0], crs_transformer)
+            polygons.append(coordinates[0])
+            polygon_properties.append(feature['properties'])
         else:
             raise Exception(
                 'Geometries of type {} are not supported in object detection \
                 labels.'.format(geom_type))
 
+    polygons = transform_point_lists(polygons,
+                                     crs_transformer.map_to_pixel_batch)
+    for polygon, properties in zip(polygons, polygon_properties):
+        xmin, ymin = np.min(polygon, axis=0)
+        xmax, ymax = np.max(polygon, axis=0)
+        boxes.append(Box(ymin, xmin, ymax, xmax))
+        class_ids.append(properties['class_id'])
+        scores.append(properties.get('score', 1.0))
+
     if len(boxes):
         boxes = np.array([box.npbox_format() for box in boxes], dtype=float)
         class_ids = np.array(class_ids)
@@ -106,21 +112,10 @@ def geojson_to_chip_classification_labels(geojson_dict,
     if extent:
         extent_shape = extent.to_shapely()
 
-    def polygon_to_label(polygon, crs_transformer):
-        polygon = [crs_transformer.map_to_pixel(p) for p in polygon]
-        xmin, ymin = np.min(polygon, axis=0)
-        xmax, ymax = np.max(polygon, axis=0)
-        cell = Box(ymin, xmin, ymax, xmax)
-
-        if extent_shape and not cell.to_shapely().intersects(extent_shape):
-            return
-
-        properties = feature['properties']
-        class_id = properties['class_id']
-        scores = properties.get('scores')
-
-        labels.set_cell(cell, class_id, scores)
-
+    # The polygons are collected so that their vertices can be transformed
+    # in a single batch.
+    polygons = []
+    polygon_properties = []
     for feature in features:
         # This was added to handle empty GeometryCollections which appear when using
         # OSM vector tiles.
@@ -130,11 +125,27 @@ def geojson_to_chip_classification_labels(geojson_dict,
         geom_type = feature['geometry']['type']
         coordinates = feature['geometry']['coordinates']
         if geom_type == 'Polygon':
-            polygon_to_label(coordinates[0], crs_transformer)
+            polygons.append(coordinates[0])
+            polygon_properties.append(feature['properties'])
         else:
             raise Exception(
                 'Geometries of type {} are not supported in chip classification \
                 labels.'.format(geom_type))
+
+    polygons = transform_point_lists(polygons,
+                                     crs_transformer.map_to_pixel_batch)
+    for polygon, properties in zip(polygons, polygon_properties):
+        xmin, ymin = np.min(polygon, axis=0)
+        xmax, ymax = np.max(polygon, axis=0)
+        cell = Box(ymin, xmin, ymax, xmax)
+
+        if extent_shape and not cell.to_shapely().intersects(extent_shape):
+            continue
+
+        class_id = properties['class_id']
+        scores = properties.get('scores')
+
+        labels.set_cell(cell, class_id, scores)
     return labels
 
 
@@ -1,12 +1,16 @@
+import json
+
 import numpy as np
 import rasterio
 
 import rastervision as rv
+from rastervision.rv_config import RVConfig
 from rastervision.utils.files import (get_local_path, make_dir, upload_or_copy,
                                       file_exists)
 from rastervision.data.label import SemanticSegmentationLabels
 from rastervision.data.label_store import LabelStore
 from rastervision.data.label_source import SegmentationClassTransformer
+from rastervision.data.label_store.tiled_vectorizer import TiledVectorizer
 
 
 class SemanticSegmentationRasterStore(LabelStore):
@@ -95,17 +99,6 @@ class SemanticSegmentationRasterStore(LabelStore):
         if self.class_trans:
             band_count = 3
 
-        if self.vector_output:
-            # We need to store the whole output mask to run feature extraction.
-            # If the raster is large, this will result in running out of memory, so
-            # more work will be needed to get this to work in a scalable way. But this
-            # is complicated because of the need to merge features that are split
-            # across windows.
-            mask = np.zeros(
-                (self.extent.ymax, self.extent.xmax), dtype=np.uint8)
-        else:
-            mask = None
-
         # https://github.com/mapbox/rasterio/blob/master/docs/quickstart.rst
         # https://rasterio.readthedocs.io/en/latest/topics/windowed-rw.html
         with rasterio.open(
@@ -125,10 +118,6 @@ class SemanticSegmentationRasterStore(LabelStore):
                                    window.ymin + class_labels.shape[0]),
                                   (window.xmin,
                                    window.xmin + class_labels.shape[1]))
-                if mask is not None:
-                    mask[clipped_window[0][0]:clipped_window[0][1],
-                         clipped_window[1][0]:clipped_window[1][
-                             1]] = class_labels
                 if self.class_trans:
                     rgb_labels = self.class_trans.class_to_rgb(class_labels)
                     for chan in range(3):
@@ -143,41 +132,92 @@ class SemanticSegmentationRasterStore(LabelStore):
         upload_or_copy(local_path, self.uri)
 
         if self.vector_output:
-            import mask_to_polygons.vectorification as vectorification
-            import mask_to_polygons.processing.denoise as denoise
-
-            for vo in self.vector_output:
-                denoise_radius = vo['denoise']
-                uri = vo['uri']
-                mode = vo['mode']
-                class_id = vo['class_id']
-                class_mask = np.array(mask == class_id, dtype=np.uint8)
-                local_geojson_path = get_local_path(uri, self.tmp_dir)
-
-                def transform(x, y):
-                    return self.crs_transformer.pixel_to_map((x, y))
-
-                if denoise_radius > 0:
-                    class_mask = denoise.denoise(class_mask, denoise_radius)
-
-                if uri and mode == 'buildings':
-                    options = vo['building_options']
-                    geojson = vectorification.geojson_from_mask(
-                        mask=class_mask,
-                        transform=transform,
-                        mode=mode,
-                        min_aspect_ratio=options['min_aspect_ratio'],
-                        min_area=options['min_area'],
-                        width_factor=options['element_width_factor'],
-                        thickness=options['element_thickness'])
-                elif uri and mode == 'polygons':
-                    geojson = vectorification.geojson_from_mask(
-                        mask=class_mask, transform=transform, mode=mode)
-
-                if local_geojson_path:
-                    with open(local_geojson_path, 'w') as file_out:
-                        file_out.write(geojson)
-                        upload_or_copy(local_geojson_path, uri)
+            self._save_vector_output(local_path)
+
+    def _read_class_mask(self, local_path, class_id, window):
+        """Read the mask of pixels of a class from the saved raster."""
+        with rasterio.open(local_path) as dataset:
+            raw_labels = dataset.read(window=window)
+        if self.class_trans:
+            class_labels = self.class_trans.rgb_to_class(
+                np.transpose(raw_labels, (1, 2, 0)))
+        else:
+            class_labels = raw_labels[0]
+        return np.array(class_labels == class_id, dtype=np.uint8)
+
+    def _save_vector_output(self, local_path):
+        """Vectorize the saved raster.
+
+        The raster is vectorized tile by tile (see TiledVectorizer) so that
+        the whole mask never needs to be in memory. The tile size and number
+        of worker processes are set by the vector_tile_size and
+        vector_num_workers options in the [RV] section of the Raster Vision
+        config.
+        """
+        import mask_to_polygons.vectorification as vectorification
+        import mask_to_polygons.processing.denoise as denoise
+
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        tile_size = rv_config('vector_tile_size', parser=int, default='2048')
+        num_workers = rv_config('vector_num_workers', parser=int, default='1')
+
+        def transform(x, y):
+            return self.crs_transformer.pixel_to_map((x, y))
+
+        for vo in self.vector_output:
+            denoise_radius = vo['denoise']
+            uri = vo['uri']
+            mode = vo['mode']
+            class_id = vo['class_id']
+            if not uri:
+                continue
+            local_geojson_path = get_local_path(uri, self.tmp_dir)
+
+            def read_mask(window, class_id=class_id):
+                return self._read_class_mask(local_path, class_id, window)
+
+            def denoise_mask(mask, denoise_radius=denoise_radius):
+                return denoise.denoise(mask, denoise_radius)
+
+            if mode == 'buildings':
+                options = vo['building_options']
+                vectorize_options = {
+                    'min_aspect_ratio': options['min_aspect_ratio'],
+                    'min_area': options['min_area'],
+                    'width_factor': options['element_width_factor'],
+                    'thickness': options['element_thickness']
+                }
+            elif mode == 'polygons':
+                vectorize_options = {}
+            else:
+                raise rv.ConfigError(
+                    'mode key in vector_output dictionary must be one of '
+                    "['buildings', 'polygons'], not {}".format(mode))
+
+            def vectorize(mask,
+                          transform,
+                          mode=mode,
+                          options=vectorize_options):
+                geojson = vectorification.geojson_from_mask(
+                    mask=mask, transform=transform, mode=mode, **options)
+                return json.loads(geojson)['features']
+
+            vectorizer = TiledVectorizer(
+                read_mask, (self.extent.ymax, self.extent.xmax),
+                vectorize,
+                denoise=denoise_mask if denoise_radius > 0 else None,
+                denoise_radius=denoise_radius,
+                tile_size=tile_size,
+                num_workers=num_workers)
+            geojson = json.dumps({
+                'type': 'FeatureCollection',
+                'features': vectorizer.get_features(transform)
+            })
+
+            if local_geojson_path:
+                with open(local_geojson_path, 'w') as file_out:
+                    file_out.write(geojson)
+                    upload_or_copy(local_geojson_path, uri)
 
     def empty_labels(self):
         """Returns an empty SemanticSegmentationLabels object."""
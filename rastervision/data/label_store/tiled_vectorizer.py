@@ -0,0 +1,248 @@
+import numpy as np
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+
+from rastervision.utils.parallel import map_forked
+
+# Connected components are 8-connected.
+_structure = np.ones((3, 3), dtype=np.int32)
+
+
+class TiledVectorizer():
+    """Vectorizes a binary mask of a large raster tile by tile.
+
+    The mask is never held in memory all at once. First, the connected
+    components of each tile are found, and components that touch across tile
+    boundaries are merged. Then, the components that lie within a single tile
+    are vectorized together, and each component that spans several tiles is
+    vectorized from a window around it. Each call to vectorize sees whole
+    connected components, so the features are the same as those produced by
+    vectorizing the whole mask at once, as long as vectorize handles each
+    connected component independently.
+
+    Peak memory is bounded by the tile size and the size of the largest
+    component that spans several tiles.
+    """
+
+    def __init__(self,
+                 read_mask,
+                 shape,
+                 vectorize,
+                 denoise=None,
+                 denoise_radius=0,
+                 tile_size=2048,
+                 num_workers=1):
+        """Construct a new TiledVectorizer.
+
+        Args:
+            read_mask: function that takes a rasterio-formatted window
+                ((row_start, row_stop), (col_start, col_stop)) that lies within
+                the raster and returns a [height, width] uint8 mask
+            shape: (height, width) of the raster
+            vectorize: function that takes a [height, width] uint8 mask and a
+                function that maps pixel (x, y) coordinates of the mask to map
+                coordinates and returns a list of GeoJSON features
+            denoise: optional function that takes a mask and returns a
+                denoised mask, applied before vectorization
+            denoise_radius: the number of pixels that denoise looks at around
+                each pixel. Masks are read with a margin of more than twice this
+                size so that they are denoised as part of the whole mask.
+            tile_size: the height and width of the tiles
+            num_workers: number of processes used to process tiles and
+                components. If 1, everything runs in the main process.
+        """
+        self.read_mask = read_mask
+        self.height, self.width = shape
+        self.vectorize = vectorize
+        self.denoise = denoise
+        self.margin = 2 * denoise_radius + 1 if denoise else 0
+        self.tile_size = tile_size
+        self.num_workers = num_workers
+
+        self.num_tile_rows = -(-self.height // tile_size)
+        self.num_tile_cols = -(-self.width // tile_size)
+
+    def _get_tile_window(self, tile_row, tile_col):
+        ymin = tile_row * self.tile_size
+        xmin = tile_col * self.tile_size
+        return ((ymin, min(ymin + self.tile_size, self.height)),
+                (xmin, min(xmin + self.tile_size, self.width)))
+
+    def _get_mask(self, window):
+        """Return the denoised mask in a window."""
+        (ymin, ymax), (xmin, xmax) = window
+        if not self.denoise:
+            return self.read_mask(window)
+
+        # Read with a margin so that pixels near the window edge are denoised
+        # using their full neighborhood.
+        read_ymin = max(ymin - self.margin, 0)
+        read_xmin = max(xmin - self.margin, 0)
+        read_window = ((read_ymin, min(ymax + self.margin, self.height)),
+                       (read_xmin, min(xmax + self.margin, self.width)))
+        mask = self.denoise(self.read_mask(read_window))
+        return mask[ymin - read_ymin:ymax - read_ymin, xmin - read_xmin:xmax -
+                    read_xmin]
+
+    def _label_tile(self, tile_row, tile_col):
+        """Find the connected components of a tile.
+
+        Returns:
+            dict with the labels along the edges of the tile, and the bounding
+            box and top-left pixel of each component, in global coordinates
+        """
+        window = self._get_tile_window(tile_row, tile_col)
+        (ymin, _), (xmin, _) = window
+        labels, num_labels = ndimage.label(
+            self._get_mask(window), structure=_structure)
+
+        bboxes = np.zeros((num_labels, 4), dtype=np.int64)
+        seeds = np.zeros((num_labels, 2), dtype=np.int64)
+        for ind, (rows, cols) in enumerate(ndimage.find_objects(labels)):
+            bboxes[ind] = (rows.start, cols.start, rows.stop, cols.stop)
+            first_row = labels[rows.start, cols] == ind + 1
+            seeds[ind] = (rows.start, cols.start + np.argmax(first_row))
+        bboxes += (ymin, xmin, ymin, xmin)
+        seeds += (ymin, xmin)
+
+        return {
+            'num_labels': num_labels,
+            'top': labels[0, :].copy(),
+            'bottom': labels[-1, :].copy(),
+            'left': labels[:, 0].copy(),
+            'right': labels[:, -1].copy(),
+            'bboxes': bboxes,
+            'seeds': seeds
+        }
+
+    def _vectorize_window(self, window, seeds, transform):
+        """Vectorize the components in a window that contain seed pixels."""
+        (ymin, _), (xmin, _) = window
+        labels, _ = ndimage.label(self._get_mask(window), structure=_structure)
+        seed_labels = labels[seeds[:, 0] - ymin, seeds[:, 1] - xmin]
+        mask = np.isin(labels, seed_labels).astype(np.uint8)
+
+        def window_transform(x, y):
+            return transform(x + xmin, y + ymin)
+
+        return self.vectorize(mask, window_transform)
+
+    def _map(self, fn, args_list):
+        # The vectorizer holds functions that cannot be pickled.
+        return list(map_forked(fn, args_list, self.num_workers))
+
+    def _merge_components(self, tiles):
+        """Merge components that touch across tile boundaries.
+
+        Args:
+            tiles: dict from (tile_row, tile_col) to the output of _label_tile
+
+        Returns:
+            (offsets, components) where offsets maps each tile to the global
+            id of its first component, and components maps each global id to
+            the id of the merged component it belongs to
+        """
+        offsets = {}
+        num_labels = 0
+        for key in sorted(tiles.keys()):
+            offsets[key] = num_labels
+            num_labels += tiles[key]['num_labels']
+
+        def get_ids(key, labels):
+            return np.where(labels > 0, labels - 1 + offsets[key], -1)
+
+        # Pairs of pixels along the seams between tiles that are 8-connected.
+        ids1 = []
+        ids2 = []
+
+        def add_seam(key1, edge1, key2, edge2):
+            edge1 = get_ids(key1, edge1)
+            edge2 = get_ids(key2, edge2)
+            for shift in [-1, 0, 1]:
+                if shift < 0:
+                    a, b = edge1[-shift:], edge2[:shift]
+                elif shift > 0:
+                    a, b = edge1[:-shift], edge2[shift:]
+                else:
+                    a, b = edge1, edge2
+                is_pair = (a >= 0) & (b >= 0)
+                ids1.append(a[is_pair])
+                ids2.append(b[is_pair])
+
+        for (row, col), tile in tiles.items():
+            right_key = (row, col + 1)
+            bottom_key = (row + 1, col)
+            if right_key in tiles:
+                add_seam((row, col), tile['right'], right_key,
+                         tiles[right_key]['left'])
+            if bottom_key in tiles:
+                add_seam((row, col), tile['bottom'], bottom_key,
+                         tiles[bottom_key]['top'])
+            # Pixels that touch diagonally across the corner of four tiles.
+            corner_key = (row + 1, col + 1)
+            if corner_key in tiles:
+                add_seam((row, col), tile['bottom'][-1:], corner_key,
+                         tiles[corner_key]['top'][:1])
+            corner_key = (row + 1, col - 1)
+            if corner_key in tiles:
+                add_seam((row, col), tile['bottom'][:1], corner_key,
+                         tiles[corner_key]['top'][-1:])
+
+        ids1 = np.concatenate(ids1 + [np.empty((0, ), dtype=np.int64)])
+        ids2 = np.concatenate(ids2 + [np.empty((0, ), dtype=np.int64)])
+        graph = coo_matrix(
+            (np.ones(len(ids1)), (ids1, ids2)), shape=(num_labels, num_labels))
+        _, components = connected_components(graph, directed=False)
+        return offsets, components
+
+    def get_features(self, transform):
+        """Return the GeoJSON features of the mask.
+
+        Args:
+            transform: function that maps pixel (x, y) coordinates of the
+                raster to map coordinates
+
+        Returns:
+            list of GeoJSON features
+        """
+        keys = [(row, col) for row in range(self.num_tile_rows)
+                for col in range(self.num_tile_cols)]
+        tiles = dict(zip(keys, self._map(self._label_tile, keys)))
+        offsets, components = self._merge_components(tiles)
+
+        bboxes = np.concatenate([tiles[key]['bboxes']
+                                 for key in keys] + [np.zeros((0, 4))])
+        seeds = np.concatenate([tiles[key]['seeds']
+                                for key in keys] + [np.zeros((0, 2))])
+        bboxes = bboxes.astype(np.int64)
+        seeds = seeds.astype(np.int64)
+        component_sizes = np.bincount(components)
+
+        # Components that lie in one tile are vectorized a tile at a time.
+        jobs = []
+        for key in keys:
+            ids = np.arange(offsets[key],
+                            offsets[key] + tiles[key]['num_labels'])
+            ids = ids[component_sizes[components[ids]] == 1]
+            if len(ids) > 0:
+                jobs.append((self._get_tile_window(*key), seeds[ids],
+                             transform))
+
+        # Components that span tiles are vectorized from their bounding boxes.
+        split_ids = np.nonzero(component_sizes[components] > 1)[0]
+        split_ids = split_ids[np.argsort(
+            components[split_ids], kind='mergesort')]
+        _, starts = np.unique(components[split_ids], return_index=True)
+        for ids in np.split(split_ids, starts[1:]):
+            if len(ids) == 0:
+                continue
+            ymin, xmin = np.min(bboxes[ids, 0:2], axis=0)
+            ymax, xmax = np.max(bboxes[ids, 2:4], axis=0)
+            jobs.append((((int(ymin), int(ymax)), (int(xmin), int(xmax))),
+                         seeds[ids[0:1]], transform))
+
+        features = []
+        for job_features in self._map(self._vectorize_window, jobs):
+            features.extend(job_features)
+        return features
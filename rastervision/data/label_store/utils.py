@@ -1,3 +1,6 @@
+from rastervision.data.crs_transformer import transform_point_lists
+
+
 def boxes_to_geojson(boxes, class_ids, crs_transformer, class_map,
                      scores=None):
     """Convert boxes and associated data into a GeoJSON dict.
@@ -15,10 +18,14 @@ def boxes_to_geojson(boxes, class_ids, crs_transformer, class_map,
     Returns:
         dict in GeoJSON format
     """
+    # The corners of all the boxes are transformed in a single batch.
+    polygons = transform_point_lists(
+        [box.geojson_coordinates() for box in boxes],
+        crs_transformer.pixel_to_map_batch)
+
     features = []
-    for box_ind, box in enumerate(boxes):
-        polygon = box.geojson_coordinates()
-        polygon = [list(crs_transformer.pixel_to_map(p)) for p in polygon]
+    for box_ind, polygon in enumerate(polygons):
+        polygon = polygon.tolist()
 
         class_id = int(class_ids[box_ind])
         class_name = class_map.get_by_id(class_id).name
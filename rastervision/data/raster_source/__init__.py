@@ -8,3 +8,5 @@ from rastervision.data.raster_source.image_source import *
 from rastervision.data.raster_source.image_source_config import *
 from rastervision.data.raster_source.rasterized_source import *
 from rastervision.data.raster_source.rasterized_source_config import *
+from rastervision.data.raster_source.multi_raster_source import *
+from rastervision.data.raster_source.multi_raster_source_config import *
@@ -8,6 +8,7 @@ RASTER_SOURCE = 'RASTER_SOURCE'
 GEOTIFF_SOURCE = 'GEOTIFF_SOURCE'
 IMAGE_SOURCE = 'IMAGE_SOURCE'
 RASTERIZED_SOURCE = 'RASTERIZED_SOURCE'
+MULTI_RASTER_SOURCE = 'MULTI_RASTER_SOURCE'
 
 raster_source_deprecated_map = {GEOJSON_SOURCE: RASTERIZED_SOURCE}
 
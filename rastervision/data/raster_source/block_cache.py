@@ -0,0 +1,173 @@
+from collections import OrderedDict
+import math
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+
+def make_disk_read_block(read_block, cache_dir):
+    """Wrap a read_block function so that blocks are also cached on disk.
+
+    Blocks are saved as .npy files in cache_dir, so they are only read once
+    even across activations, which is useful when reading is expensive, for
+    example when it involves HTTP requests.
+
+    Args:
+        read_block: function with the signature of BlockCache.read_block
+        cache_dir: directory to save blocks in. It should only be used for
+            one raster and set of channels.
+
+    Returns:
+        function with the signature of BlockCache.read_block
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+
+    def disk_read_block(window):
+        (ymin, ymax), (xmin, xmax) = window
+        block_path = os.path.join(
+            cache_dir, '{}-{}-{}-{}.npy'.format(ymin, ymax, xmin, xmax))
+        if os.path.isfile(block_path):
+            return np.load(block_path)
+
+        block = read_block(window)
+        # Write to a temporary file first so that other threads or processes
+        # never load a partially written block.
+        fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.npy.tmp')
+        with os.fdopen(fd, 'wb') as tmp_file:
+            np.save(tmp_file, block)
+        os.replace(tmp_path, block_path)
+        return block
+
+    return disk_read_block
+
+
+class BlockCache():
+    """An LRU cache of blocks of a raster, used to assemble chips.
+
+    The raster is divided into a grid of blocks which should be aligned with
+    the internal tile or strip grid of the underlying file, so that reading
+    a block decodes each internal tile exactly once. Chips are assembled by
+    copying from the cached blocks that overlap them, so overlapping windows
+    only decode each block once as long as it stays in the cache.
+
+    The cache can be used from several threads at once. Blocks are read
+    outside of the lock, so two threads may both read a missing block.
+    """
+
+    def __init__(self,
+                 read_block,
+                 shape,
+                 block_shape,
+                 num_channels,
+                 dtype,
+                 max_bytes,
+                 min_block_size=128):
+        """Construct a new BlockCache.
+
+        Args:
+            read_block: function that takes a rasterio-formatted window
+                ((row_start, row_stop), (col_start, col_stop)) that lies
+                within the raster and returns a [height, width, channels]
+                numpy array
+            shape: (height, width) of the raster
+            block_shape: (height, width) of the internal blocks of the raster
+            num_channels: number of channels returned by read_block
+            dtype: numpy dtype of the arrays returned by read_block
+            max_bytes: the maximum number of bytes of block data to hold in
+                the cache
+            min_block_size: blocks smaller than this along an axis (eg.
+                single-row strips) are grouped together into cache blocks at
+                least this big along that axis
+        """
+        self.read_block = read_block
+        self.height, self.width = shape
+        self.block_height, self.block_width = [
+            b * math.ceil(min_block_size / b) for b in block_shape
+        ]
+        self.num_channels = num_channels
+        self.dtype = dtype
+        self.max_bytes = max_bytes
+
+        self.lock = threading.Lock()
+        self.blocks = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_stats(self):
+        """Return a dict with the hit and miss counts and size of the cache."""
+        with self.lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'blocks': len(self.blocks),
+                'bytes': self.nbytes
+            }
+
+    def _get_block(self, block_row, block_col):
+        key = (block_row, block_col)
+        with self.lock:
+            block = self.blocks.get(key)
+            if block is not None:
+                self.hits += 1
+                self.blocks.move_to_end(key)
+                return block
+            self.misses += 1
+
+        ymin = block_row * self.block_height
+        xmin = block_col * self.block_width
+        ymax = min(ymin + self.block_height, self.height)
+        xmax = min(xmin + self.block_width, self.width)
+        block = self.read_block(((ymin, ymax), (xmin, xmax)))
+
+        with self.lock:
+            if block.nbytes <= self.max_bytes and key not in self.blocks:
+                self.blocks[key] = block
+                self.nbytes += block.nbytes
+                while self.nbytes > self.max_bytes:
+                    _, evicted = self.blocks.popitem(last=False)
+                    self.nbytes -= evicted.nbytes
+        return block
+
+    def get_window(self, window):
+        """Return the chip in a window, assembled from cached blocks.
+
+        Args:
+            window: ((row_start, row_stop), (col_start, col_stop)) with
+                integer coordinates. Parts of the window outside the raster
+                are filled with zeros.
+
+        Returns:
+            [height, width, channels] numpy array
+        """
+        (ymin, ymax), (xmin, xmax) = window
+        chip = np.zeros(
+            (ymax - ymin, xmax - xmin, self.num_channels), dtype=self.dtype)
+
+        # Clip to the raster so that only blocks that exist are read.
+        clip_ymin, clip_ymax = max(ymin, 0), min(ymax, self.height)
+        clip_xmin, clip_xmax = max(xmin, 0), min(xmax, self.width)
+        if clip_ymin >= clip_ymax or clip_xmin >= clip_xmax:
+            return chip
+
+        for block_row in range(clip_ymin // self.block_height,
+                               (clip_ymax - 1) // self.block_height + 1):
+            block_ymin = block_row * self.block_height
+            for block_col in range(clip_xmin // self.block_width,
+                                   (clip_xmax - 1) // self.block_width + 1):
+                block_xmin = block_col * self.block_width
+                block = self._get_block(block_row, block_col)
+
+                # Intersection of the window and the block in global
+                # coordinates.
+                y0 = max(clip_ymin, block_ymin)
+                y1 = min(clip_ymax, block_ymin + block.shape[0])
+                x0 = max(clip_xmin, block_xmin)
+                x1 = min(clip_xmax, block_xmin + block.shape[1])
+                chip[y0 - ymin:y1 - ymin, x0 - xmin:x1 - xmin, :] = \
+                    block[y0 - block_ymin:y1 - block_ymin,
+                          x0 - block_xmin:x1 - block_xmin, :]
+
+        return chip
@@ -1,35 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
 import logging
 import math
 import os
 import pyproj
-import subprocess
 from decimal import Decimal
+import threading
+from urllib.parse import urlparse
+
+import rasterio
+from rasterio.errors import RasterioIOError
 
 from rastervision.core.box import Box
 from rastervision.data.crs_transformer import RasterioCRSTransformer
 from rastervision.data.raster_source.rasterio_source \
     import RasterioRasterSource
-from rastervision.utils.files import download_if_needed
+from rastervision.data.raster_source.mosaic import (Mosaic, get_vsi_path,
+                                                    read_tile_header)
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import (download_if_needed, get_local_path)
 
 log = logging.getLogger(__name__)
 wgs84 = pyproj.Proj({'init': 'epsg:4326'})
 wgs84_proj4 = '+init=epsg:4326'
 meters_per_degree = 111319.5
 
-
-def build_vrt(vrt_path, image_paths):
-    """Build a VRT for a set of TIFF files."""
-    cmd = ['gdalbuildvrt', vrt_path]
-    cmd.extend(image_paths)
-    subprocess.run(cmd)
-
-
-def download_and_build_vrt(image_uris, temp_dir):
-    log.info('Building VRT...')
-    image_paths = [download_if_needed(uri, temp_dir) for uri in image_uris]
-    image_path = os.path.join(temp_dir, 'index.vrt')
-    build_vrt(image_path, image_paths)
-    return image_path
+# URI schemes of files that can be read using range requests.
+stream_schemes = ['s3', 'http', 'https']
+# GDAL options used when opening streamed files. By default, GDAL lists the
+# directory of the file to look for sidecar files, which takes extra requests.
+stream_options = {
+    'GDAL_DISABLE_READDIR_ON_OPEN': 'EMPTY_DIR',
+    'VSI_CACHE': 'TRUE'
+}
 
 
 class GeoTiffSource(RasterioRasterSource):
@@ -39,23 +41,112 @@ class GeoTiffSource(RasterioRasterSource):
                  temp_dir,
                  channel_order=None,
                  x_shift_meters=0.0,
-                 y_shift_meters=0.0):
+                 y_shift_meters=0.0,
+                 stream=False,
+                 materialize=False):
         self.x_shift_meters = x_shift_meters
         self.y_shift_meters = y_shift_meters
         self.uris = uris
-        super().__init__(raster_transformers, temp_dir, channel_order)
+        self.stream = stream
+        self.is_streaming = False
+
+        # When there are several URIs, they are combined into a mosaic which
+        # is built once from the headers of the files. Files are only
+        # downloaded when a window that intersects them is read.
+        self.mosaic = None
+        self.tile_paths = None
+        self.tile_futures = None
+        self.tile_lock = threading.Lock()
+        self.tile_executor = None
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        self.download_num_threads = rv_config(
+            'download_num_threads', parser=int, default='8')
+
+        super().__init__(raster_transformers, temp_dir, channel_order,
+                         materialize)
+
+    def _can_stream(self):
+        return self.stream and all(
+            urlparse(uri).scheme in stream_schemes for uri in self.uris)
+
+    def _read_tile_header(self, uri, temp_dir):
+        """Read the header of a file, using range requests if it's remote."""
+        vsi_path = get_vsi_path(uri)
+        if vsi_path != uri:
+            try:
+                with rasterio.Env(**stream_options):
+                    return read_tile_header(vsi_path, uri)
+            except RasterioIOError as e:
+                log.warning(
+                    'Could not read header of {}, downloading it instead: {}'.
+                    format(uri, e))
+        return read_tile_header(download_if_needed(uri, temp_dir), uri)
+
+    def _get_mosaic(self, temp_dir):
+        if self.mosaic is None:
+            log.info('Building mosaic of {} files...'.format(len(self.uris)))
+            with ThreadPoolExecutor(
+                    max_workers=self.download_num_threads) as executor:
+                tiles = list(
+                    executor.map(
+                        lambda uri: self._read_tile_header(uri, temp_dir),
+                        self.uris))
+            self.mosaic = Mosaic(tiles)
+        return self.mosaic
 
     def _download_data(self, temp_dir):
         if len(self.uris) == 1:
+            if self.is_streaming:
+                return self.uris[0]
             return download_if_needed(self.uris[0], temp_dir)
-        else:
-            return download_and_build_vrt(self.uris, temp_dir)
 
-    def _set_crs_transformer(self):
-        self.crs_transformer = RasterioCRSTransformer.from_dataset(
-            self.image_dataset)
-
-    def _get_chip(self, window):
+        mosaic = self._get_mosaic(temp_dir)
+        if self.is_streaming:
+            self.tile_paths = [get_vsi_path(t.uri) for t in mosaic.tiles]
+        else:
+            self.tile_paths = [
+                get_local_path(t.uri, temp_dir) for t in mosaic.tiles
+            ]
+        vrt_path = os.path.join(temp_dir, 'index.vrt')
+        with open(vrt_path, 'w') as vrt_file:
+            vrt_file.write(mosaic.to_vrt(self.tile_paths))
+        return vrt_path
+
+    def _fetch_tile(self, ind):
+        tile = self.mosaic.tiles[ind]
+        if self.tile_paths[ind] != tile.uri:
+            download_if_needed(tile.uri, self.image_temp_dir.name)
+
+    def _before_read(self, window):
+        # Download the files of the mosaic that the window intersects in
+        # parallel, unless they are streamed.
+        if self.tile_paths is None or self.is_streaming:
+            return
+
+        futures = []
+        with self.tile_lock:
+            for ind in self.mosaic.get_tile_inds(window):
+                future = self.tile_futures.get(ind)
+                if future is None:
+                    future = self.tile_executor.submit(self._fetch_tile, ind)
+                    self.tile_futures[ind] = future
+                futures.append(future)
+        for future in futures:
+            future.result()
+
+    def _open_image_dataset(self):
+        if self.is_streaming:
+            with rasterio.Env(**stream_options):
+                return rasterio.open(self.imagery_path)
+        return super()._open_image_dataset()
+
+    def _get_cache_uris(self):
+        return self.uris
+
+    def _make_crs_transformer(self, transform, crs):
+        return RasterioCRSTransformer.from_crs(transform, crs)
+
+    def _get_read_window(self, window):
         no_shift = self.x_shift_meters == 0.0 and self.y_shift_meters == 0.0
         yes_shift = not no_shift
         if yes_shift:
@@ -64,7 +155,7 @@ class GeoTiffSource(RasterioRasterSource):
             height = window.get_height()
 
             # Transform image coordinates into world coordinates
-            transform = self.image_dataset.transform
+            transform = self.transform
             xmin2, ymin2 = transform * (xmin, ymin)
 
             # Transform from world coordinates to WGS84
@@ -98,13 +189,53 @@ class GeoTiffSource(RasterioRasterSource):
 
             window = Box(ymin4, xmin4, ymin4 + height, xmin4 + width)
 
-        return super()._get_chip(window)
+        return window
+
+    def _open_dataset(self):
+        # Stream the file if possible, and fall back to downloading it.
+        try:
+            super()._open_dataset()
+        except RasterioIOError as e:
+            if not self.is_streaming:
+                raise
+            log.warning(
+                'Could not stream {}, downloading it instead: {}'.format(
+                    self.uris[0], e))
+            self.is_streaming = False
+            super()._open_dataset()
+
+        # Cache the blocks of streamed files on disk, so they are only
+        # fetched once. The directory is keyed by the URIs and versions of
+        # all the files, so it is only shared by sources reading the same
+        # mosaic of the same files.
+        if self.is_streaming:
+            if self.cache_key is None:
+                log.debug('Not caching blocks of {} on disk since the '
+                          'versions of its files are unknown.'.format(
+                              self.uris[0]))
+            else:
+                cache_root = self.temp_dir or self.image_temp_dir.name
+                self.block_cache_dir = os.path.join(
+                    cache_root, 'geotiff-blocks', self.cache_key)
 
     def _activate(self):
+        self.tile_paths = None
+        self.tile_futures = {}
+        self.tile_executor = ThreadPoolExecutor(
+            max_workers=self.download_num_threads)
+        self.is_streaming = self._can_stream()
+        self.block_cache_dir = None
         super()._activate()
-        self.crs = self.image_dataset.crs
+
+        self.crs = self.raster_crs
         if self.crs:
             self.proj = pyproj.Proj(self.crs)
         else:
             self.proj = None
         self.crs = str(self.crs)
+
+    def _deactivate(self):
+        self.tile_executor.shutdown()
+        self.tile_executor = None
+        self.tile_futures = None
+        super()._deactivate()
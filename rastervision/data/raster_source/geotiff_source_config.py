@@ -15,14 +15,18 @@ class GeoTiffSourceConfig(RasterSourceConfig):
                  x_shift_meters=0.0,
                  y_shift_meters=0.0,
                  transformers=None,
-                 channel_order=None):
+                 channel_order=None,
+                 stream=False,
+                 materialize=False):
         super().__init__(
             source_type=rv.GEOTIFF_SOURCE,
             transformers=transformers,
-            channel_order=channel_order)
+            channel_order=channel_order,
+            materialize=materialize)
         self.uris = uris
         self.x_shift_meters = x_shift_meters
         self.y_shift_meters = y_shift_meters
+        self.stream = stream
 
     def to_proto(self):
         msg = super().to_proto()
@@ -30,7 +34,8 @@ class GeoTiffSourceConfig(RasterSourceConfig):
             RasterSourceConfigMsg.GeoTiffFiles(
                 uris=self.uris,
                 x_shift_meters=self.x_shift_meters,
-                y_shift_meters=self.y_shift_meters))
+                y_shift_meters=self.y_shift_meters,
+                stream=self.stream))
         return msg
 
     def save_bundle_files(self, bundle_dir):
@@ -67,7 +72,9 @@ class GeoTiffSourceConfig(RasterSourceConfig):
             temp_dir=tmp_dir,
             channel_order=self.channel_order,
             x_shift_meters=x_shift_meters,
-            y_shift_meters=y_shift_meters)
+            y_shift_meters=y_shift_meters,
+            stream=self.stream,
+            materialize=self.materialize)
 
     def update_for_command(self,
                            command_type,
@@ -92,6 +99,8 @@ class GeoTiffSourceConfigBuilder(RasterSourceConfigBuilder):
                 'channel_order': prev.channel_order,
                 'x_shift_meters': prev.x_shift_meters,
                 'y_shift_meters': prev.y_shift_meters,
+                'stream': prev.stream,
+                'materialize': prev.materialize
             }
 
         super().__init__(GeoTiffSourceConfig, config)
@@ -118,7 +127,8 @@ class GeoTiffSourceConfigBuilder(RasterSourceConfigBuilder):
         y = msg.geotiff_files.y_shift_meters
         return b \
             .with_uris(msg.geotiff_files.uris) \
-            .with_shifts(x, y)
+            .with_shifts(x, y) \
+            .with_stream(msg.geotiff_files.stream)
 
     def with_uris(self, uris):
         """Set URIs for a GeoTIFFs containing as raster data."""
@@ -147,3 +157,19 @@ class GeoTiffSourceConfigBuilder(RasterSourceConfigBuilder):
         b.config['x_shift_meters'] = x
         b.config['y_shift_meters'] = y
         return b
+
+    def with_stream(self, stream=True):
+        """Set whether to stream remote GeoTIFFs rather than download them.
+
+            Args:
+                stream: If True, GeoTIFFs on S3 or HTTP(S) are read using
+                    range requests, so only the parts of the file that are
+                    used are transferred. This works best with Cloud
+                    Optimized GeoTIFFs. Blocks that have been read are cached
+                    on disk in the temporary directory. If a file can't be
+                    streamed, it is downloaded instead. Streaming is only
+                    used when there is a single URI.
+        """
+        b = deepcopy(self)
+        b.config['stream'] = stream
+        return b
@@ -6,12 +6,21 @@ from rastervision.utils.files import download_if_needed
 
 
 class ImageSource(RasterioRasterSource):
-    def __init__(self, uri, raster_transformers, temp_dir, channel_order=None):
+    def __init__(self,
+                 uri,
+                 raster_transformers,
+                 temp_dir,
+                 channel_order=None,
+                 materialize=False):
         self.uri = uri
-        super().__init__(raster_transformers, temp_dir, channel_order)
+        super().__init__(raster_transformers, temp_dir, channel_order,
+                         materialize)
 
     def _download_data(self, temp_dir):
         return download_if_needed(self.uri, temp_dir)
 
-    def _set_crs_transformer(self):
-        self.crs_transformer = IdentityCRSTransformer()
+    def _get_cache_uris(self):
+        return [self.uri]
+
+    def _make_crs_transformer(self, transform, crs):
+        return IdentityCRSTransformer()
@@ -10,11 +10,16 @@ from rastervision.utils.files import download_if_needed
 
 
 class ImageSourceConfig(RasterSourceConfig):
-    def __init__(self, uri, transformers=None, channel_order=None):
+    def __init__(self,
+                 uri,
+                 transformers=None,
+                 channel_order=None,
+                 materialize=False):
         super().__init__(
             source_type=rv.IMAGE_SOURCE,
             transformers=transformers,
-            channel_order=channel_order)
+            channel_order=channel_order,
+            materialize=materialize)
         self.uri = uri
 
     def to_proto(self):
@@ -49,7 +54,8 @@ class ImageSourceConfig(RasterSourceConfig):
                       extent=None,
                       class_map=None):
         transformers = self.create_transformers()
-        return ImageSource(self.uri, transformers, tmp_dir, self.channel_order)
+        return ImageSource(self.uri, transformers, tmp_dir, self.channel_order,
+                           self.materialize)
 
     def update_for_command(self,
                            command_type,
@@ -70,7 +76,8 @@ class ImageSourceConfigBuilder(RasterSourceConfigBuilder):
             config = {
                 'uri': prev.uri,
                 'transformers': prev.transformers,
-                'channel_order': prev.channel_order
+                'channel_order': prev.channel_order,
+                'materialize': prev.materialize
             }
 
         super().__init__(ImageSourceConfig, config)
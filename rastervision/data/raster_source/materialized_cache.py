@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Each entry of the cache is a directory holding the data as a .npy file and a
+# sidecar index describing it. An entry is complete once its index exists.
+DATA_FILE = 'data.npy'
+INDEX_FILE = 'index.json'
+
+
+class MaterializedCache():
+    """A cache of decoded rasters stored on disk as memory-mapped arrays.
+
+    Reading a window of a cached raster is a slice of a memory-mapped array,
+    so nothing is decoded and data is only copied when it is used. The least
+    recently used entries are evicted to keep the total size of the cache
+    under a budget. Several processes can share the cache.
+    """
+
+    def __init__(self, cache_dir, max_size):
+        """Construct a new MaterializedCache.
+
+        Args:
+            cache_dir: directory to store entries in
+            max_size: maximum number of bytes of data in the cache
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _get_entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Return the cached array for a key, or None if there is none.
+
+        The array is memory-mapped copy-on-write, so changing it doesn't
+        change the cache.
+        """
+        entry_dir = self._get_entry_dir(key)
+        index_path = os.path.join(entry_dir, INDEX_FILE)
+        try:
+            with open(index_path) as index_file:
+                index = json.load(index_file)
+            # The time the index was modified is when the entry was last
+            # used.
+            os.utime(index_path)
+            data = np.load(os.path.join(entry_dir, DATA_FILE), mmap_mode='c')
+        except (OSError, ValueError):
+            return None
+
+        if (list(data.shape) != index['shape']
+                or str(data.dtype) != index['dtype']):
+            return None
+        return data
+
+    def _get_entries(self):
+        """Return (last used time, size, dir) of each entry."""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            try:
+                used_time = os.path.getmtime(
+                    os.path.join(entry_dir, INDEX_FILE))
+                size = os.path.getsize(os.path.join(entry_dir, DATA_FILE))
+            except OSError:
+                continue
+            entries.append((used_time, size, entry_dir))
+        return entries
+
+    def _evict(self, size):
+        """Evict entries until there are size bytes free in the budget."""
+        entries = sorted(self._get_entries())
+        total_size = sum(entry[1] for entry in entries)
+        for _, entry_size, entry_dir in entries:
+            if total_size + size <= self.max_size:
+                break
+            log.debug('Evicting {} from materialized cache'.format(entry_dir))
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total_size -= entry_size
+
+    def put(self, key, shape, dtype, write_data):
+        """Add an array to the cache and return it.
+
+        Args:
+            key: str that identifies the array
+            shape: the shape of the array
+            dtype: the dtype of the array
+            write_data: function that takes a writable [height, width,
+                channels] memory-mapped array and fills it in
+
+        Returns:
+            the memory-mapped array, or None if it is larger than the budget
+        """
+        dtype = np.dtype(dtype)
+        size = int(np.prod(shape)) * dtype.itemsize
+        if size > self.max_size:
+            log.warning(
+                'Not materializing raster of {} bytes, which is more than '
+                'the budget of {} bytes'.format(size, self.max_size))
+            return None
+        self._evict(size)
+
+        # The entry is written to a temporary directory which is renamed
+        # when it is complete, so other processes never see partial entries.
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix='.tmp-')
+        try:
+            data = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, DATA_FILE),
+                mode='w+',
+                dtype=dtype,
+                shape=tuple(shape))
+            write_data(data)
+            data.flush()
+            del data
+
+            index = {'shape': list(shape), 'dtype': str(dtype), 'size': size}
+            with open(os.path.join(tmp_dir, INDEX_FILE), 'w') as index_file:
+                json.dump(index, index_file)
+            try:
+                os.rename(tmp_dir, self._get_entry_dir(key))
+            except OSError:
+                # Another process added the entry first.
+                shutil.rmtree(tmp_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        return self.get(key)
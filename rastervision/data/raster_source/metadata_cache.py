@@ -0,0 +1,144 @@
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import urllib.request
+from urllib.parse import urlparse
+
+from rastervision.filesystem import (FileSystem, HttpFileSystem,
+                                     LocalFileSystem, S3FileSystem)
+from rastervision.utils.files import (evict_least_recently_used, TMP_PREFIX)
+
+log = logging.getLogger(__name__)
+
+# Increment this when the format of the cached metadata changes.
+METADATA_VERSION = 1
+# Maximum number of versions of files that are fetched at once.
+MAX_VERSION_THREADS = 16
+
+
+def get_file_version(uri, s3=None):
+    """Return a string that changes whenever the file at a URI changes.
+
+    The ETag is used for files on S3 and HTTP servers that provide it, and
+    otherwise the time the file was last modified.
+
+    Args:
+        uri: URI of the file
+        s3: optional boto3 S3 client to use for files on S3
+
+    Returns:
+        str, or None if the version of the file can't be determined
+    """
+    fs = FileSystem.get_file_system(uri, 'r')
+    if fs is S3FileSystem:
+        parsed_uri = urlparse(uri)
+        if s3 is None:
+            s3 = S3FileSystem.get_session().client('s3')
+        head_data = s3.head_object(
+            Bucket=parsed_uri.netloc, Key=parsed_uri.path[1:])
+        return head_data['ETag']
+    if fs is HttpFileSystem:
+        request = urllib.request.Request(uri, method='HEAD')
+        with urllib.request.urlopen(request) as response:
+            headers = response.headers
+        if headers.get('ETag'):
+            return headers['ETag']
+        if headers.get('Last-Modified'):
+            return '{} {}'.format(headers['Last-Modified'],
+                                  headers.get('Content-Length'))
+        return None
+    if fs is LocalFileSystem:
+        stat = os.stat(uri)
+        return '{} {}'.format(stat.st_mtime_ns, stat.st_size)
+
+    last_modified = fs.last_modified(uri)
+    if last_modified is None:
+        return None
+    return last_modified.isoformat()
+
+
+def get_cache_key(name, uris):
+    """Return a key for data derived from some files.
+
+    This makes a request for each remote file to get its version. Requests
+    are made in parallel, and files on S3 share one client.
+
+    Args:
+        name: name of what is derived, for instance the class of the raster
+            source reading the files
+        uris: list of URIs of the files
+
+    Returns:
+        str, or None if the versions of the files can't be determined
+    """
+    s3 = None
+    if any(urlparse(uri).scheme == 's3' for uri in uris):
+        s3 = S3FileSystem.get_session().client('s3')
+
+    def get_version(uri):
+        try:
+            return get_file_version(uri, s3)
+        except Exception as e:
+            log.warning('Not caching data derived from {} since its version '
+                        'could not be determined: {}'.format(uri, e))
+            return None
+
+    if len(uris) == 1:
+        versions = [get_version(uris[0])]
+    else:
+        with ThreadPoolExecutor(
+                max_workers=min(MAX_VERSION_THREADS, len(uris))) as executor:
+            versions = list(executor.map(get_version, uris))
+    if None in versions:
+        return None
+    key_str = json.dumps([METADATA_VERSION, name, uris, versions])
+    return hashlib.sha1(key_str.encode()).hexdigest()
+
+
+class MetadataCache():
+    """A cache of the metadata of raster files, persisted on disk.
+
+    Entries are keyed using get_cache_key, so an entry is no longer used once
+    any of the files changes. If max_size is set, the least recently used
+    entries are removed by evict once the cache takes up more than max_size
+    bytes.
+    """
+
+    def __init__(self, cache_dir, max_size=None):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir, '{}.json'.format(key))
+
+    def get(self, key):
+        """Return the cached metadata for a key, or None if there is none."""
+        path = self._get_path(key)
+        try:
+            with open(path) as metadata_file:
+                metadata = json.load(metadata_file)
+            if self.max_size is not None:
+                # The time the entry was modified is when it was last used.
+                os.utime(path)
+            return metadata
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, metadata):
+        """Cache metadata, which must be serializable as JSON."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so that other processes never read
+        # a partially written entry.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.cache_dir, prefix=TMP_PREFIX, suffix='.tmp')
+        with os.fdopen(fd, 'w') as tmp_file:
+            json.dump(metadata, tmp_file)
+        os.replace(tmp_path, self._get_path(key))
+
+    def evict(self):
+        """Remove the least recently used entries over max_size, if set."""
+        if self.max_size is not None:
+            evict_least_recently_used(self.cache_dir, self.max_size)
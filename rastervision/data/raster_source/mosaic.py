@@ -0,0 +1,205 @@
+import logging
+from urllib.parse import urlparse
+from xml.etree import ElementTree
+
+import numpy as np
+import rasterio
+
+log = logging.getLogger(__name__)
+
+# GDAL names of color interpretations, indexed by the value of
+# rasterio.enums.ColorInterp.
+color_interp_names = [
+    'Undefined', 'Gray', 'Palette', 'Red', 'Green', 'Blue', 'Alpha', 'Hue',
+    'Saturation', 'Lightness', 'Cyan', 'Magenta', 'Yellow', 'Black', 'YCbCr_Y',
+    'YCbCr_Cb', 'YCbCr_Cr'
+]
+
+# GDAL names of the data types of rasters, keyed by their numpy dtype.
+gdal_data_type_names = {
+    'uint8': 'Byte',
+    'uint16': 'UInt16',
+    'int16': 'Int16',
+    'uint32': 'UInt32',
+    'int32': 'Int32',
+    'float32': 'Float32',
+    'float64': 'Float64',
+    'complex64': 'CFloat32',
+    'complex128': 'CFloat64'
+}
+
+
+def get_vsi_path(uri):
+    """Return the path that GDAL uses to read a file at a URI in place."""
+    scheme = urlparse(uri).scheme
+    if scheme == 's3':
+        return '/vsis3/' + uri[len('s3://'):]
+    if scheme in ['http', 'https']:
+        return '/vsicurl/' + uri
+    return uri
+
+
+class MosaicTile():
+    """The header of a GeoTIFF that is part of a mosaic."""
+
+    def __init__(self, uri, image_dataset):
+        self.uri = uri
+        self.width = image_dataset.width
+        self.height = image_dataset.height
+        self.transform = image_dataset.transform
+        self.bounds = image_dataset.bounds
+        self.crs = image_dataset.crs
+        self.count = image_dataset.count
+        self.dtype = image_dataset.dtypes[0]
+        self.nodatavals = image_dataset.nodatavals
+        self.colorinterp = image_dataset.colorinterp
+        self.block_shape = image_dataset.block_shapes[0]
+
+    def is_compatible(self, other):
+        return (self.crs == other.crs and self.count == other.count
+                and self.dtype == other.dtype)
+
+
+class Mosaic():
+    """A mosaic of GeoTIFF tiles, built the same way as gdalbuildvrt.
+
+    The mosaic covers the union of the bounds of the tiles at their average
+    resolution, and where tiles overlap, the last one is on top. Only the
+    headers of the tiles are needed to build the mosaic, and it can be
+    written as a VRT in which tiles are only opened when they are read.
+    """
+
+    def __init__(self, tiles):
+        """Construct a new Mosaic.
+
+        Tiles that are rotated or don't have the same CRS, number of bands
+        and data type as the first tile are skipped with a warning, as in
+        gdalbuildvrt.
+
+        Args:
+            tiles: list of MosaicTile
+        """
+        self.tiles = []
+        for tile in tiles:
+            if tile.transform.b != 0 or tile.transform.d != 0:
+                log.warning('Skipping rotated tile {}'.format(tile.uri))
+            elif self.tiles and not tile.is_compatible(self.tiles[0]):
+                log.warning('Skipping tile {} which does not match {}'.format(
+                    tile.uri, self.tiles[0].uri))
+            else:
+                self.tiles.append(tile)
+        if not self.tiles:
+            raise ValueError('No tiles can be used to build the mosaic.')
+
+        self.res_x = np.mean([tile.transform.a for tile in self.tiles])
+        self.res_y = np.mean([-tile.transform.e for tile in self.tiles])
+        self.xmin = min(tile.bounds.left for tile in self.tiles)
+        self.ymin = min(tile.bounds.bottom for tile in self.tiles)
+        self.xmax = max(tile.bounds.right for tile in self.tiles)
+        self.ymax = max(tile.bounds.top for tile in self.tiles)
+        self.width = int(0.5 + (self.xmax - self.xmin) / self.res_x)
+        self.height = int(0.5 + (self.ymax - self.ymin) / self.res_y)
+
+        # The pixel rectangle covered by each tile, with cols
+        # x_off, y_off, x_size, y_size.
+        self.dst_rects = np.array(
+            [[(tile.bounds.left - self.xmin) / self.res_x,
+              (self.ymax - tile.bounds.top) / self.res_y,
+              tile.width * tile.transform.a / self.res_x,
+              tile.height * -tile.transform.e / self.res_y]
+             for tile in self.tiles])
+
+    def get_tile_inds(self, window):
+        """Return the indices of the tiles that intersect a window.
+
+        Args:
+            window: ((row_start, row_stop), (col_start, col_stop))
+        """
+        (ymin, ymax), (xmin, xmax) = window
+        x_off, y_off, x_size, y_size = self.dst_rects.T
+        return np.nonzero((x_off < xmax) & (x_off + x_size > xmin)
+                          & (y_off < ymax) & (y_off + y_size > ymin))[0]
+
+    def to_vrt(self, paths):
+        """Return the XML of a VRT of the mosaic.
+
+        Args:
+            paths: the path GDAL should read each tile from. The files don't
+                need to exist until a window that intersects them is read.
+        """
+        first_tile = self.tiles[0]
+        root = ElementTree.Element(
+            'VRTDataset',
+            rasterXSize=str(self.width),
+            rasterYSize=str(self.height))
+        if first_tile.crs:
+            ElementTree.SubElement(root, 'SRS').text = first_tile.crs.wkt
+        ElementTree.SubElement(root, 'GeoTransform').text = ', '.join(
+            repr(float(v))
+            for v in [self.xmin, self.res_x, 0, self.ymax, 0, -self.res_y])
+
+        data_type = gdal_data_type_names.get(str(first_tile.dtype))
+        if data_type is None:
+            raise ValueError('Cannot build a mosaic of tiles with dtype {}.'
+                             .format(first_tile.dtype))
+        for band in range(first_tile.count):
+            band_elem = ElementTree.SubElement(
+                root, 'VRTRasterBand', dataType=data_type, band=str(band + 1))
+            nodata = first_tile.nodatavals[band]
+            if nodata is not None:
+                ElementTree.SubElement(band_elem,
+                                       'NoDataValue').text = repr(nodata)
+            ElementTree.SubElement(band_elem,
+                                   'ColorInterp').text = color_interp_names[
+                                       first_tile.colorinterp[band].value]
+
+            for tile, path, dst_rect in zip(self.tiles, paths, self.dst_rects):
+                nodata = tile.nodatavals[band]
+                source_elem = ElementTree.SubElement(
+                    band_elem, 'SimpleSource'
+                    if nodata is None else 'ComplexSource')
+                ElementTree.SubElement(
+                    source_elem, 'SourceFilename',
+                    relativeToVRT='0').text = path
+                ElementTree.SubElement(source_elem,
+                                       'SourceBand').text = str(band + 1)
+                # Giving the properties of the source means GDAL doesn't need
+                # to open it until it is read.
+                ElementTree.SubElement(
+                    source_elem,
+                    'SourceProperties',
+                    RasterXSize=str(tile.width),
+                    RasterYSize=str(tile.height),
+                    DataType=data_type,
+                    BlockXSize=str(tile.block_shape[1]),
+                    BlockYSize=str(tile.block_shape[0]))
+                ElementTree.SubElement(
+                    source_elem,
+                    'SrcRect',
+                    xOff='0',
+                    yOff='0',
+                    xSize=str(tile.width),
+                    ySize=str(tile.height))
+                ElementTree.SubElement(
+                    source_elem,
+                    'DstRect',
+                    xOff=repr(float(dst_rect[0])),
+                    yOff=repr(float(dst_rect[1])),
+                    xSize=repr(float(dst_rect[2])),
+                    ySize=repr(float(dst_rect[3])))
+                if nodata is not None:
+                    ElementTree.SubElement(source_elem,
+                                           'NODATA').text = repr(nodata)
+
+        return ElementTree.tostring(root, encoding='unicode')
+
+
+def read_tile_header(path, uri=None):
+    """Read the header of a tile using rasterio.
+
+    Args:
+        path: path to open with rasterio
+        uri: the URI of the tile, if it is different from path
+    """
+    with rasterio.open(path) as image_dataset:
+        return MosaicTile(uri or path, image_dataset)
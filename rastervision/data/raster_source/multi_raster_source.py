@@ -0,0 +1,286 @@
+import logging
+import math
+
+import numpy as np
+from affine import Affine
+from rasterio.crs import CRS
+from rasterio.enums import Resampling
+from rasterio.warp import (reproject, transform_bounds)
+
+from rastervision.core.box import Box
+from rastervision.data import ActivateMixin
+from rastervision.data.raster_source import RasterSource
+
+log = logging.getLogger(__name__)
+
+# Number of pixels around the part of a sub-source that covers a window that
+# are also read, so that resampling near the edges of the window has all the
+# source pixels it needs.
+RESAMPLING_PAD = 3
+# Number of bytes of blocks cached for each sub-source that is resampled,
+# unless it already has a block cache. Windows of these sources are read with
+# padding and don't line up with their blocks, so without a cache adjacent
+# windows would decode the same blocks.
+SOURCE_BLOCK_CACHE_SIZE = 64 * 2**20
+
+
+def get_georeference(raster_source):
+    """Return the Affine transform and rasterio CRS of a RasterSource.
+
+    Returns:
+        (transform, crs) tuple, or None if the raster source isn't
+        georeferenced
+    """
+    crs_transformer = raster_source.get_crs_transformer()
+    image_crs = crs_transformer.get_image_crs()
+    if image_crs is None:
+        return None
+    try:
+        transform = crs_transformer.get_affine_transform()
+    except NotImplementedError:
+        return None
+    return (transform, CRS({'init': image_crs}))
+
+
+def get_pixel_offset(transform, other_transform):
+    """Return the offset of a pixel grid from another in the same CRS.
+
+    Returns:
+        (row, col) offset of the pixels of other_transform from those of
+        transform, or None if the grids don't have the same resolution and
+        aren't offset by a whole number of pixels
+    """
+    m = ~other_transform * transform
+    if not all(
+            math.isclose(v, expected, abs_tol=1e-9)
+            for v, expected in [(m.a, 1), (m.b, 0), (m.d, 0), (m.e, 1)]):
+        return None
+    row, col = round(m.f), round(m.c)
+    if not (math.isclose(m.f, row, abs_tol=1e-6)
+            and math.isclose(m.c, col, abs_tol=1e-6)):
+        return None
+    return (row, col)
+
+
+class MultiRasterSource(ActivateMixin, RasterSource):
+    """A RasterSource that stacks the channels of several RasterSources.
+
+    The primary raster source defines the extent, CRS and pixel grid. The
+    channels of each raster source come after those of the previous one.
+    Raster sources whose pixel grid is aligned with that of the primary one
+    are read directly. The others can have a different resolution or CRS,
+    and only the part that covers each window that is read is resampled to
+    the grid of the primary raster source. Raster sources that aren't
+    georeferenced are assumed to be aligned with the primary one.
+    """
+
+    def __init__(self,
+                 raster_sources,
+                 primary_source_idx=0,
+                 resampling='bilinear',
+                 channel_order=None,
+                 raster_transformers=[]):
+        """Constructor.
+
+        Args:
+            raster_sources: list of RasterSources to stack
+            primary_source_idx: index of the raster source whose extent, CRS
+                and pixel grid are used
+            resampling: name of the rasterio resampling method used for
+                raster sources that aren't aligned with the primary one, for
+                instance 'nearest', 'bilinear' or 'cubic'
+            channel_order: list of indices into the stacked channels
+            raster_transformers: RasterTransformers applied to the stacked
+                chips
+        """
+        self.raster_sources = raster_sources
+        self.primary_source = raster_sources[primary_source_idx]
+        self.resampling = Resampling[resampling]
+
+        # The source index and channel within that source of each channel.
+        self.source_channels = []
+        for source_ind, source in enumerate(raster_sources):
+            num_source_channels = len(
+                source.channel_order or range(source.num_channels))
+            self.source_channels.extend([
+                (source_ind, channel) for channel in range(num_source_channels)
+            ])
+        num_channels = len(self.source_channels)
+
+        # The offset of each raster source that is aligned with the primary
+        # one, or None for those that are resampled.
+        self.georeference = get_georeference(self.primary_source)
+        self.source_georeferences = []
+        self.source_offsets = []
+        for source in raster_sources:
+            source_georeference = get_georeference(source)
+            offset = (0, 0)
+            if (self.georeference is not None
+                    and source_georeference is not None):
+                transform, crs = self.georeference
+                source_transform, source_crs = source_georeference
+                offset = None
+                if source_crs == crs:
+                    offset = get_pixel_offset(transform, source_transform)
+            if (offset is None
+                    and getattr(source, 'block_cache_size', None) == 0):
+                source.block_cache_size = SOURCE_BLOCK_CACHE_SIZE
+            self.source_georeferences.append(source_georeference)
+            self.source_offsets.append(offset)
+
+        self.raw_dtype = np.result_type(
+            *[source.get_dtype() for source in raster_sources])
+
+        # Transform a 1x1 chip to get the final dtype
+        self.channel_order = channel_order or list(range(num_channels))
+        test_chip = np.zeros((1, 1, num_channels), dtype=self.raw_dtype)
+        test_chip = test_chip[:, :, self.channel_order]
+        for transformer in raster_transformers:
+            test_chip = transformer.transform(test_chip, channel_order)
+        self.dtype = test_chip.dtype
+
+        super().__init__(channel_order, num_channels, raster_transformers)
+
+    def get_extent(self):
+        return self.primary_source.get_extent()
+
+    def get_dtype(self):
+        """Return the numpy.dtype of this scene"""
+        return self.dtype
+
+    def get_crs_transformer(self):
+        return self.primary_source.get_crs_transformer()
+
+    def get_block_shape(self):
+        return self.primary_source.get_block_shape()
+
+    def _subcomponents_to_activate(self):
+        return self.raster_sources
+
+    def _activate(self):
+        pass
+
+    def _deactivate(self):
+        pass
+
+    def _get_channel_chip(self, window, out=None):
+        return self._read_chip(window, self.channel_order, out)
+
+    def _get_read_dtype(self):
+        return self.raw_dtype
+
+    def _get_chip(self, window):
+        return self._read_chip(window)
+
+    def _read_chip(self, window, channel_order=None, out=None):
+        """Return the stacked chip in a window.
+
+        Only the raster sources that have channels in channel_order are read.
+
+        Args:
+            window: Box
+            channel_order: optional list of indices into the stacked channels
+            out: optional [height, width, channels] array to put the chip in,
+                which is returned
+
+        Returns:
+            [height, width, channels] numpy array
+        """
+        if not channel_order:
+            channel_order = list(range(self.num_channels))
+
+        chip = out
+        if chip is None:
+            height = int(round(window.get_height()))
+            width = int(round(window.get_width()))
+            chip = np.empty(
+                (height, width, len(channel_order)), dtype=self.raw_dtype)
+        for source_ind in range(len(self.raster_sources)):
+            out_channels = []
+            source_channels = []
+            for out_channel, channel in enumerate(channel_order):
+                channel_source_ind, source_channel = \
+                    self.source_channels[channel]
+                if channel_source_ind == source_ind:
+                    out_channels.append(out_channel)
+                    source_channels.append(source_channel)
+            if out_channels:
+                source_chip = self._get_source_chip(source_ind, window)
+                chip[:, :, out_channels] = source_chip[:, :, source_channels]
+        return chip
+
+    def _get_source_chip(self, source_ind, window):
+        """Return the transformed chip of a raster source in a window.
+
+        Args:
+            source_ind: index of the raster source
+            window: Box in the pixel coordinates of the primary raster source
+
+        Returns:
+            [height, width, channels] numpy array aligned with the window
+        """
+        source = self.raster_sources[source_ind]
+        offset = self.source_offsets[source_ind]
+        if offset is not None:
+            row, col = offset
+            return source.get_chip(
+                Box(window.ymin + row, window.xmin + col, window.ymax + row,
+                    window.xmax + col))
+
+        transform, crs = self.georeference
+        source_transform, source_crs = self.source_georeferences[source_ind]
+        source_window = self._get_source_window(window, source_transform,
+                                                source_crs)
+        source_chip = source.get_chip(source_window)
+
+        # Resample in the dtype of the stacked chip, so that methods like
+        # average aren't rounded to the dtype of the raster source.
+        height = int(round(window.get_height()))
+        width = int(round(window.get_width()))
+        chip = np.zeros(
+            (source_chip.shape[2], height, width), dtype=self.raw_dtype)
+        reproject(
+            np.transpose(source_chip, axes=[2, 0, 1]).astype(self.raw_dtype),
+            chip,
+            src_transform=source_transform * Affine.translation(
+                source_window.xmin, source_window.ymin),
+            src_crs=source_crs,
+            dst_transform=transform * Affine.translation(
+                window.xmin, window.ymin),
+            dst_crs=crs,
+            resampling=self.resampling)
+        return np.transpose(chip, axes=[1, 2, 0])
+
+    def _get_source_window(self, window, source_transform, source_crs):
+        """Return the window of a raster source that covers a window.
+
+        Args:
+            window: Box in the pixel coordinates of the primary raster source
+            source_transform: Affine transform of the raster source
+            source_crs: rasterio CRS of the raster source
+
+        Returns:
+            Box in the pixel coordinates of the raster source, aligned with
+            its pixel grid and padded by RESAMPLING_PAD pixels
+        """
+        transform, crs = self.georeference
+        corners = [
+            transform * (x, y) for x in (window.xmin, window.xmax)
+            for y in (window.ymin, window.ymax)
+        ]
+        xs, ys = zip(*corners)
+        bounds = (min(xs), min(ys), max(xs), max(ys))
+        if source_crs != crs:
+            bounds = transform_bounds(crs, source_crs, *bounds)
+
+        left, bottom, right, top = bounds
+        source_corners = [
+            ~source_transform * (x, y) for x in (left, right)
+            for y in (bottom, top)
+        ]
+        cols, rows = zip(*source_corners)
+        return Box(
+            math.floor(min(rows)) - RESAMPLING_PAD,
+            math.floor(min(cols)) - RESAMPLING_PAD,
+            math.ceil(max(rows)) + RESAMPLING_PAD,
+            math.ceil(max(cols)) + RESAMPLING_PAD)
@@ -0,0 +1,205 @@
+from copy import deepcopy
+
+from rasterio.enums import Resampling
+
+import rastervision as rv
+from rastervision.data.raster_source.multi_raster_source import (
+    MultiRasterSource)
+from rastervision.data.raster_source.raster_source_config \
+    import (RasterSourceConfig, RasterSourceConfigBuilder)
+from rastervision.protos.raster_source_pb2 \
+    import RasterSourceConfig as RasterSourceConfigMsg
+
+
+class MultiRasterSourceConfig(RasterSourceConfig):
+    def __init__(self,
+                 raster_sources,
+                 primary_source_idx=0,
+                 resampling='bilinear',
+                 transformers=None,
+                 channel_order=None,
+                 materialize=False):
+        super().__init__(
+            source_type=rv.MULTI_RASTER_SOURCE,
+            transformers=transformers,
+            channel_order=channel_order,
+            materialize=materialize)
+        self.raster_sources = raster_sources
+        self.primary_source_idx = primary_source_idx
+        self.resampling = resampling
+
+    def to_proto(self):
+        msg = super().to_proto()
+        msg.multi_raster_source.CopyFrom(
+            RasterSourceConfigMsg.MultiRasterSource(
+                raster_sources=[rs.to_proto() for rs in self.raster_sources],
+                primary_source_idx=self.primary_source_idx,
+                resampling=self.resampling))
+        return msg
+
+    def save_bundle_files(self, bundle_dir):
+        (conf, files) = super().save_bundle_files(bundle_dir)
+        new_raster_sources = []
+        for raster_source in self.raster_sources:
+            new_raster_source, rs_files = raster_source.save_bundle_files(
+                bundle_dir)
+            new_raster_sources.append(new_raster_source)
+            files.extend(rs_files)
+        new_config = conf.to_builder() \
+                         .with_raster_sources(new_raster_sources) \
+                         .build()
+        return (new_config, files)
+
+    def load_bundle_files(self, bundle_dir):
+        conf = super().load_bundle_files(bundle_dir)
+        new_raster_sources = [
+            rs.load_bundle_files(bundle_dir) for rs in self.raster_sources
+        ]
+        return conf.to_builder() \
+                   .with_raster_sources(new_raster_sources) \
+                   .build()
+
+    def for_prediction(self, image_uri):
+        """Creates a new config with the image_uri.
+
+        Args:
+            image_uri: list with the URI of each raster source
+        """
+        if (not isinstance(image_uri, (list, tuple))
+                or len(image_uri) != len(self.raster_sources)):
+            raise rv.ConfigError(
+                'Predicting with a MultiRasterSource requires a list with '
+                'one image URI for each of its {} raster sources'.format(
+                    len(self.raster_sources)))
+        new_raster_sources = [
+            rs.for_prediction(uri)
+            for rs, uri in zip(self.raster_sources, image_uri)
+        ]
+        return self.to_builder() \
+                   .with_raster_sources(new_raster_sources) \
+                   .build()
+
+    def create_local(self, tmp_dir):
+        new_raster_sources = [
+            rs.create_local(tmp_dir) for rs in self.raster_sources
+        ]
+        return self.to_builder() \
+                   .with_raster_sources(new_raster_sources) \
+                   .build()
+
+    def create_source(self,
+                      tmp_dir,
+                      crs_transformer=None,
+                      extent=None,
+                      class_map=None):
+        raster_sources = [
+            rs.create_source(tmp_dir, crs_transformer, extent, class_map)
+            for rs in self.raster_sources
+        ]
+        transformers = self.create_transformers()
+        return MultiRasterSource(
+            raster_sources,
+            primary_source_idx=self.primary_source_idx,
+            resampling=self.resampling,
+            channel_order=self.channel_order,
+            raster_transformers=transformers)
+
+    def update_for_command(self,
+                           command_type,
+                           experiment_config,
+                           context=None,
+                           io_def=None):
+        io_def = super().update_for_command(command_type, experiment_config,
+                                            context, io_def)
+        for raster_source in self.raster_sources:
+            raster_source.update_for_command(command_type, experiment_config,
+                                             context, io_def)
+        return io_def
+
+
+class MultiRasterSourceConfigBuilder(RasterSourceConfigBuilder):
+    def __init__(self, prev=None):
+        config = {}
+        if prev:
+            config = {
+                'raster_sources': prev.raster_sources,
+                'primary_source_idx': prev.primary_source_idx,
+                'resampling': prev.resampling,
+                'transformers': prev.transformers,
+                'channel_order': prev.channel_order,
+                'materialize': prev.materialize
+            }
+
+        super().__init__(MultiRasterSourceConfig, config)
+
+    def validate(self):
+        super().validate()
+        raster_sources = self.config.get('raster_sources')
+        if not raster_sources:
+            raise rv.ConfigError(
+                'You must specify raster_sources for the '
+                'MultiRasterSourceConfig. Use "with_raster_sources"')
+        for raster_source in raster_sources:
+            if not isinstance(raster_source, RasterSourceConfig):
+                raise rv.ConfigError(
+                    'raster_sources must be of type RasterSourceConfig, '
+                    'got {}'.format(type(raster_source)))
+
+        primary_source_idx = self.config.get('primary_source_idx', 0)
+        if not 0 <= primary_source_idx < len(raster_sources):
+            raise rv.ConfigError(
+                'primary_source_idx must be the index of one of the {} '
+                'raster_sources, got {}'.format(
+                    len(raster_sources), primary_source_idx))
+
+        resampling = self.config.get('resampling', 'bilinear')
+        if resampling not in Resampling.__members__:
+            raise rv.ConfigError('resampling must be one of {}, got {}'.format(
+                list(Resampling.__members__), resampling))
+
+    def from_proto(self, msg):
+        b = super().from_proto(msg)
+        conf = msg.multi_raster_source
+        raster_sources = [
+            RasterSourceConfig.from_proto(rs) for rs in conf.raster_sources
+        ]
+
+        return b \
+            .with_raster_sources(raster_sources) \
+            .with_primary_source_idx(conf.primary_source_idx) \
+            .with_resampling(conf.resampling)
+
+    def with_raster_sources(self, raster_sources):
+        """Set the raster sources to stack.
+
+        Args:
+            raster_sources: list of RasterSourceConfigs. The channels of each
+                raster source come after those of the previous one.
+        """
+        b = deepcopy(self)
+        b.config['raster_sources'] = list(raster_sources)
+        return b
+
+    def with_primary_source_idx(self, primary_source_idx):
+        """Set the raster source whose extent, CRS and pixel grid are used.
+
+        Args:
+            primary_source_idx: index into raster_sources
+        """
+        b = deepcopy(self)
+        b.config['primary_source_idx'] = primary_source_idx
+        return b
+
+    def with_resampling(self, resampling):
+        """Set the method used to resample raster sources.
+
+        Raster sources whose pixel grid isn't aligned with that of the
+        primary raster source are resampled to it, one window at a time.
+
+        Args:
+            resampling: name of a rasterio resampling method, for instance
+                'nearest', 'bilinear' or 'cubic'
+        """
+        b = deepcopy(self)
+        b.config['resampling'] = resampling
+        return b
@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from rastervision.data.raster_transformer.transformer_pipeline import (
+    TransformerPipeline)
+
 
 class RasterSource(ABC):
     """A source of raster data.
@@ -20,6 +25,7 @@ class RasterSource(ABC):
                 whenever they are retrieved.
         """
         self.raster_transformers = raster_transformers
+        self.transformer_pipeline = TransformerPipeline(raster_transformers)
         self.channel_order = channel_order
         self.num_channels = num_channels
 
@@ -42,6 +48,14 @@ class RasterSource(ABC):
         """Return the associated CRSTransformer."""
         pass
 
+    def get_block_shape(self):
+        """Return the (height, width) of the blocks the raster is stored in.
+
+        Reading windows made up of whole blocks avoids decoding the same data
+        more than once. Returns None if the raster isn't stored in blocks.
+        """
+        return None
+
     @abstractmethod
     def _get_chip(self, window):
         """Return the chip located in the window.
@@ -54,35 +68,119 @@ class RasterSource(ABC):
         """
         pass
 
-    def get_chip(self, window):
-        """Return the transformed chip in the window.
+    def _get_channel_chip(self, window, out=None):
+        """Return the untransformed chip in the window with the channels in
+        channel_order.
 
         Args:
             window: Box
+            out: optional [height, width, channels] array to put the chip
+                in, which is returned. Subclasses can avoid allocating memory
+                for each chip by reading straight into it.
 
         Returns:
             [height, width, channels] numpy array
         """
         chip = self._get_chip(window)
-
         if self.channel_order:
             chip = chip[:, :, self.channel_order]
 
-        for transformer in self.raster_transformers:
-            chip = transformer.transform(chip, self.channel_order)
+        if out is None:
+            return chip
+        np.copyto(out, chip)
+        return out
 
-        return chip
+    def _get_read_dtype(self):
+        """Return the dtype of chips returned by _get_channel_chip.
 
-    def get_raw_chip(self, window):
+        If this is known, chips are read into scratch buffers before being
+        transformed rather than allocating memory for each chip.
+
+        Returns:
+            numpy dtype, or None if unknown
+        """
+        return None
+
+    def _get_read_buffer(self, window, batch_size=None):
+        """Return a scratch buffer to read chips in a window into, or None."""
+        dtype = self._get_read_dtype()
+        if dtype is None or window != window.to_int():
+            return None
+        window = window.to_int()
+        num_channels = len(self.channel_order or range(self.num_channels))
+        shape = (window.get_height(), window.get_width(), num_channels)
+        if batch_size is None:
+            return self.transformer_pipeline.get_buffer('read', shape, dtype)
+        return self.transformer_pipeline.get_buffer(
+            'batch_read', (batch_size, ) + shape, dtype)
+
+    def get_chip(self, window, out=None):
+        """Return the transformed chip in the window.
+
+        Args:
+            window: Box
+            out: optional [height, width, channels] array to put the chip
+                in, which is returned
+
+        Returns:
+            [height, width, channels] numpy array
+        """
+        pipeline = self.transformer_pipeline
+        if pipeline.is_identity():
+            return self._get_channel_chip(window, out=out)
+
+        chip = self._get_channel_chip(
+            window, out=self._get_read_buffer(window))
+        return pipeline.transform(chip, self.channel_order, out=out)
+
+    def get_chips(self, windows, out=None):
+        """Return the transformed chips in windows of the same size.
+
+        When possible, the chips are read into a scratch buffer and then
+        transformed as a batch.
+
+        Args:
+            windows: list of Boxes with the same height and width
+            out: optional [len(windows), height, width, channels] array to
+                put the chips in, which is returned
+
+        Returns:
+            [len(windows), height, width, channels] numpy array
+        """
+        pipeline = self.transformer_pipeline
+        chips = None
+        if windows and not pipeline.is_identity():
+            chips = self._get_read_buffer(windows[0], len(windows))
+        if chips is not None:
+            for ind, window in enumerate(windows):
+                self._get_channel_chip(window, out=chips[ind])
+            return pipeline.transform_batch(chips, self.channel_order, out=out)
+
+        for ind, window in enumerate(windows):
+            if out is None:
+                chip = self.get_chip(window)
+                out = np.empty((len(windows), ) + chip.shape, dtype=chip.dtype)
+                out[ind] = chip
+            else:
+                self.get_chip(window, out=out[ind])
+        return out
+
+    def get_raw_chip(self, window, out=None):
         """Return the untransformed chip in the window.
 
         Args:
             window: Box
+            out: optional [height, width, channels] array to put the chip
+                in, which is returned
 
         Returns:
             [height, width, channels] numpy array
         """
-        return self._get_chip(window)
+        chip = self._get_chip(window)
+        if out is None:
+            return chip
+        np.copyto(out, chip)
+        return out
 
     def get_image_array(self):
         """Return entire transformed image array.
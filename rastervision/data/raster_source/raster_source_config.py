@@ -15,20 +15,26 @@ log = logging.getLogger(__name__)
 class RasterSourceConfig(BundledConfigMixin, Config):
     deprecation_warnings = []
 
-    def __init__(self, source_type, transformers=None, channel_order=None):
+    def __init__(self,
+                 source_type,
+                 transformers=None,
+                 channel_order=None,
+                 materialize=False):
         if transformers is None:
             transformers = []
 
         self.source_type = source_type
         self.transformers = transformers
         self.channel_order = channel_order
+        self.materialize = materialize
 
     def to_proto(self):
         transformers = list(map(lambda c: c.to_proto(), self.transformers))
         msg = RasterSourceConfigMsg(
             source_type=self.source_type,
             channel_order=self.channel_order,
-            transformers=transformers)
+            transformers=transformers,
+            materialize=self.materialize)
         return msg
 
     def save_bundle_files(self, bundle_dir):
@@ -122,7 +128,8 @@ class RasterSourceConfigBuilder(ConfigBuilder):
                 msg.transformers))
 
         return self.with_channel_order(list(msg.channel_order)) \
-                   .with_transformers(transformers)
+                   .with_transformers(transformers) \
+                   .with_materialize(msg.materialize)
 
     def with_channel_order(self, channel_order):
         """Defines the channel order for this raster source.
@@ -135,6 +142,24 @@ class RasterSourceConfigBuilder(ConfigBuilder):
         b.config['channel_order'] = channel_order
         return b
 
+    def with_materialize(self, materialize=True):
+        """Set whether to materialize the raster source.
+
+        Args:
+            materialize: If True, the first time the raster source is
+                activated, the raster is decoded into a memory-mapped array
+                in the temporary directory, after selecting the channels in
+                channel_order. Chips are then read from this array without
+                decoding anything, including when the raster source is
+                created again in a later command. The least recently used
+                rasters are evicted to keep the total size under the
+                materialize_cache_size set in the RV config section. Only
+                GeoTIFF and image raster sources are materialized.
+        """
+        b = deepcopy(self)
+        b.config['materialize'] = materialize
+        return b
+
     def with_transformers(self, transformers):
         """Transformers to be applied to the raster data.
 
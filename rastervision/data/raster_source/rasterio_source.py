@@ -1,81 +1,271 @@
 from abc import abstractmethod
+import hashlib
+import json
+import logging
+import os
 import tempfile
+import threading
 
 import numpy as np
+from affine import Affine
 import rasterio
+from rasterio.crs import CRS
 from rasterio.enums import (ColorInterp, MaskFlags)
 
 from rastervision.data import (ActivateMixin, ActivationError)
 from rastervision.data.raster_source import RasterSource
+from rastervision.data.raster_source.block_cache import (BlockCache,
+                                                         make_disk_read_block)
+from rastervision.data.raster_source.materialized_cache import (
+    MaterializedCache)
+from rastervision.data.raster_source.metadata_cache import (MetadataCache,
+                                                            get_cache_key)
 from rastervision.core.box import Box
+from rastervision.rv_config import RVConfig
 
+log = logging.getLogger(__name__)
 
-def load_window(image_dataset, window=None, channels=None, is_masked=False):
+# Number of bytes of the raster decoded at a time when materializing it.
+materialize_strip_size = 64 * 2**20
+
+
+def _fill_nodata(im, nodatavals):
+    """Set pixels equal to non-zero NODATA values to 0 in one pass.
+
+    Args:
+        im: [height, width, channels] array, changed in place
+        nodatavals: NODATA value of each channel, or None
+    """
+    has_nodata = np.array([v is not None and v != 0 for v in nodatavals])
+    if not np.any(has_nodata):
+        return
+    nodata = np.array([v if v is not None else 0 for v in nodatavals])
+    is_nodata = im == nodata
+    if not np.all(has_nodata):
+        is_nodata &= has_nodata
+    np.copyto(im, 0, where=is_nodata)
+
+
+def load_window(image_dataset,
+                window=None,
+                channels=None,
+                is_masked=False,
+                boundless=True,
+                out=None):
     """Load a window of an image from a TIFF file.
 
+    Only the bands in channels are read, and when the window is aligned with
+    the pixel grid, they are read straight into the output array.
+
     Args:
         window: ((row_start, row_stop), (col_start, col_stop)) or
         ((y_min, y_max), (x_min, x_max))
         channels: An optional list of bands to read.
         is_masked: If True, read a  masked array from rasterio
+        boundless: If True, windows that extend beyond the dataset are
+            allowed and filled in with zeros. This is always the case for
+            windows that are aligned with the pixel grid.
+        out: An optional [height, width, channels] array to read into, which
+            is returned.
     """
-    if is_masked:
-        im = image_dataset.read(window=window, boundless=True, masked=True)
-        im = np.ma.filled(im, fill_value=0)
-    else:
-        im = image_dataset.read(window=window, boundless=True)
+    if not channels:
+        channels = list(range(image_dataset.count))
+    indexes = [channel + 1 for channel in channels]
+    nodatavals = [image_dataset.nodatavals[channel] for channel in channels]
+    if window is None:
+        window = ((0, image_dataset.height), (0, image_dataset.width))
 
-    # Handle non-zero NODATA values by setting the data to 0.
-    for channel, nodata in enumerate(image_dataset.nodatavals):
-        if nodata is not None and nodata != 0:
-            im[channel, im[channel] == nodata] = 0
+    (ymin, ymax), (xmin, xmax) = window
+    if not all(float(v).is_integer() for v in [ymin, ymax, xmin, xmax]):
+        # Let rasterio handle windows that aren't aligned with the pixel
+        # grid.
+        if is_masked:
+            im = image_dataset.read(
+                indexes, window=window, boundless=boundless, masked=True)
+            im = np.ma.filled(im, fill_value=0)
+        else:
+            im = image_dataset.read(
+                indexes, window=window, boundless=boundless)
+        im = np.transpose(im, axes=[1, 2, 0])
+        _fill_nodata(im, nodatavals)
+        if out is None:
+            return im
+        np.copyto(out, im)
+        return out
 
-    if channels:
-        im = im[channels, :]
-    im = np.transpose(im, axes=[1, 2, 0])
-    return im
+    ymin, ymax, xmin, xmax = int(ymin), int(ymax), int(xmin), int(xmax)
+    if out is None:
+        out = np.empty(
+            (ymax - ymin, xmax - xmin, len(indexes)),
+            dtype=image_dataset.dtypes[0])
+
+    # Read the part of the window that lies within the dataset, and fill in
+    # the rest with zeros.
+    read_ymin, read_xmin = max(ymin, 0), max(xmin, 0)
+    read_ymax = min(ymax, image_dataset.height)
+    read_xmax = min(xmax, image_dataset.width)
+    if (read_ymin, read_xmin, read_ymax, read_xmax) != (ymin, xmin, ymax,
+                                                        xmax):
+        out.fill(0)
+    if read_ymin >= read_ymax or read_xmin >= read_xmax:
+        return out
+
+    read_window = ((read_ymin, read_ymax), (read_xmin, read_xmax))
+    im = out[read_ymin - ymin:read_ymax - ymin, read_xmin - xmin:read_xmax -
+             xmin]
+    # Rasterio reads bands first, so read into a transposed view.
+    image_dataset.read(
+        indexes, window=read_window, out=np.transpose(im, axes=[2, 0, 1]))
+    if is_masked:
+        masks = image_dataset.read_masks(indexes, window=read_window)
+        np.copyto(im, 0, where=np.transpose(masks, axes=[1, 2, 0]) == 0)
+    _fill_nodata(im, nodatavals)
+    return out
 
 
 class RasterioRasterSource(ActivateMixin, RasterSource):
-    def __init__(self, raster_transformers, temp_dir, channel_order=None):
+    def __init__(self,
+                 raster_transformers,
+                 temp_dir,
+                 channel_order=None,
+                 materialize=False):
         self.temp_dir = temp_dir
         self.image_temp_dir = None
         self.image_dataset = None
-        num_channels = None
+        self.thread_local = None
+        self.thread_datasets = []
+        self.thread_datasets_lock = threading.Lock()
+        # Lock held while opening the dataset, which is done lazily when the
+        # raster is materialized, and while making the block cache.
+        self.image_dataset_lock = threading.Lock()
+        self.block_cache = None
+        # If set, blocks are also cached on disk in this directory, and the
+        # block cache is used even if raster_block_cache_size is 0.
+        self.block_cache_dir = None
+        # The decoded raster as a memory-mapped array while active, if it is
+        # materialized.
+        self.materialize = False
+        self.materialized = None
+        # The transform and CRS of the raster, which are available without
+        # opening the dataset once it has been constructed.
+        self.transform = None
+        self.raster_crs = None
+
+        # Number of bytes of decoded blocks to cache while active. Caching is
+        # disabled if this is 0.
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        self.block_cache_size = rv_config(
+            'raster_block_cache_size', parser=int, default='0')
+
+        # Key of the files this reads from, which changes when they do.
+        self.cache_key = None
+        use_metadata_cache = rv_config(
+            'raster_metadata_cache', parser=int, default='1')
+        uris = self._get_cache_uris()
+        if uris is not None and (use_metadata_cache or materialize):
+            self.cache_key = get_cache_key(type(self).__name__, uris)
 
-        # Activate in order to get information out of the raster
-        with self.activate():
-            colorinterp = self.image_dataset.colorinterp
-            self.channels = [
-                i for i, color_interp in enumerate(colorinterp)
-                if color_interp != ColorInterp.alpha
-            ]
+        metadata = None
+        metadata_cache = MetadataCache(
+            os.path.join(RVConfig.get_tmp_dir_root(), 'raster-metadata'))
+        use_metadata_cache = use_metadata_cache and self.cache_key is not None
+        if use_metadata_cache:
+            metadata = metadata_cache.get(self.cache_key)
 
-            mask_flags = self.image_dataset.mask_flag_enums
-            self.is_masked = any(
-                [m for m in mask_flags if m != MaskFlags.all_valid])
+        if metadata is None:
+            # Activate in order to get information out of the raster
+            with self.activate():
+                metadata = self._read_metadata()
+                self._set_crs_transformer()
+            if use_metadata_cache:
+                metadata_cache.put(self.cache_key, metadata)
+        else:
+            crs = metadata['crs']
+            self.crs_transformer = self._make_crs_transformer(
+                Affine(*metadata['transform']), None
+                if crs is None else CRS(crs))
 
-            self.height = self.image_dataset.height
-            self.width = self.image_dataset.width
-            # Get 1x1 chip (after applying raster transformers) to test dtype
-            # and channel order if needed
-            test_chip = self.get_raw_chip(Box.make_square(0, 0, 1))
+        self.transform = Affine(*metadata['transform'])
+        self.raster_crs = (None if metadata['crs'] is None else
+                           CRS(metadata['crs']))
 
-            raw_channels = list(range(0, test_chip.shape[2]))
-            self.channel_order = channel_order or raw_channels
-            num_channels = len(raw_channels)
+        self.channels = metadata['channels']
+        self.is_masked = metadata['is_masked']
+        self.height = metadata['height']
+        self.width = metadata['width']
+        self.block_shape = tuple(metadata['block_shape'])
+        self.raw_dtype = np.dtype(metadata['dtype'])
 
-            # Transform the chip to get the final dtype
-            test_chip = test_chip[:, :, self.channel_order]
-            for transformer in raster_transformers:
-                test_chip = transformer.transform(test_chip, channel_order)
+        num_channels = (len(self.channels)
+                        if self.channels else metadata['count'])
+        raw_channels = list(range(0, num_channels))
+        self.channel_order = channel_order or raw_channels
 
-            self.dtype = test_chip.dtype
+        # Transform a 1x1 chip to get the final dtype
+        test_chip = np.zeros((1, 1, num_channels), dtype=metadata['dtype'])
+        test_chip = test_chip[:, :, self.channel_order]
+        for transformer in raster_transformers:
+            test_chip = transformer.transform(test_chip, channel_order)
 
-            self._set_crs_transformer()
+        self.dtype = test_chip.dtype
+        self.materialize = materialize
 
         super().__init__(channel_order, num_channels, raster_transformers)
 
+    def _get_cache_uris(self):
+        """Return the URIs of the files this reads from.
+
+        The metadata of the raster, and the raster itself if it is
+        materialized, are cached on disk using the URIs and the versions of
+        the files as the key, so that constructing the raster source again
+        doesn't have to download any imagery.
+
+        Returns:
+            list of URIs, or None if nothing should be cached
+        """
+        return None
+
+    def _read_metadata(self):
+        """Return the metadata needed to construct this from the dataset.
+
+        The metadata is serializable as JSON so that it can be cached.
+        """
+        image_dataset = self.image_dataset
+        colorinterp = image_dataset.colorinterp
+        channels = [
+            i for i, color_interp in enumerate(colorinterp)
+            if color_interp != ColorInterp.alpha
+        ]
+
+        mask_flags = image_dataset.mask_flag_enums
+        is_masked = any([m for m in mask_flags if m != MaskFlags.all_valid])
+
+        crs = image_dataset.crs
+        return {
+            'channels': channels,
+            'is_masked': is_masked,
+            'height': image_dataset.height,
+            'width': image_dataset.width,
+            'block_shape': list(image_dataset.block_shapes[0]),
+            'count': image_dataset.count,
+            'dtype': image_dataset.dtypes[0],
+            'transform': list(image_dataset.transform)[0:6],
+            'crs': None if crs is None else crs.to_dict()
+        }
+
+    def _make_crs_transformer(self, transform, crs):
+        """Return the CRSTransformer of a dataset.
+
+        Args:
+            transform: the Affine transform of the dataset
+            crs: the rasterio CRS of the dataset, or None
+        """
+        raise NotImplementedError()
+
+    def _set_crs_transformer(self):
+        self.crs_transformer = self._make_crs_transformer(
+            self.image_dataset.transform, self.image_dataset.crs)
+
     @abstractmethod
     def _download_data(self, tmp_dir):
         """Download any data needed for this Raster Source.
@@ -92,21 +282,282 @@ class RasterioRasterSource(ActivateMixin, RasterSource):
         """Return the numpy.dtype of this scene"""
         return self.dtype
 
+    def get_block_shape(self):
+        return self.block_shape
+
+    def _get_channel_chip(self, window, out=None):
+        chip = self._get_materialized_chip(window)
+        if chip is None:
+            # Only the bands in channel_order are read, straight into out.
+            return self._read_chip(window, self.channel_order, out)
+
+        if out is None:
+            return chip
+        np.copyto(out, chip)
+        return out
+
+    def _get_read_dtype(self):
+        # Chips of the materialized raster are views, which are transformed
+        # without copying them into a buffer first.
+        if self.materialized is not None:
+            return None
+        return self.raw_dtype
+
+    def get_raw_chip(self, window, out=None):
+        # The materialized raster only has the channels in channel_order.
+        chip = None
+        if (not self.channel_order
+                or self.channel_order == list(range(self.num_channels))):
+            chip = self._get_materialized_chip(window)
+        if chip is None:
+            return self._read_chip(window, out=out)
+
+        if out is None:
+            return chip
+        np.copyto(out, chip)
+        return out
+
+    def _get_read_window(self, window):
+        """Return the window of the dataset to read for a window."""
+        return window
+
+    def _get_materialized_chip(self, window):
+        """Return a chip from the materialized raster.
+
+        The chip is a view of the memory-mapped raster when the window lies
+        within it.
+
+        Returns:
+            [height, width, channels] numpy array with the channels in
+            channel_order, or None if it can't be read from the materialized
+            raster
+        """
+        if self.materialized is None:
+            return None
+        window = self._get_read_window(window)
+        if window != window.to_int():
+            return None
+
+        ymin, xmin, ymax, xmax = window.to_int().tuple_format()
+        if (ymin >= 0 and xmin >= 0 and ymax <= self.height
+                and xmax <= self.width):
+            return self.materialized[ymin:ymax, xmin:xmax]
+
+        # Windows that extend beyond the raster are filled in with zeros.
+        chip = np.zeros(
+            (ymax - ymin, xmax - xmin, self.materialized.shape[2]),
+            dtype=self.materialized.dtype)
+        read_ymin, read_xmin = max(ymin, 0), max(xmin, 0)
+        read_ymax, read_xmax = min(ymax, self.height), min(xmax, self.width)
+        if read_ymin < read_ymax and read_xmin < read_xmax:
+            chip[read_ymin - ymin:read_ymax - ymin, read_xmin -
+                 xmin:read_xmax - xmin] = self.materialized[
+                     read_ymin:read_ymax, read_xmin:read_xmax]
+        return chip
+
+    def _get_materialized(self, decode=True):
+        """Return the raster decoded into a memory-mapped array.
+
+        Args:
+            decode: if True, the raster is decoded and saved in the
+                materialized cache if it isn't there already. This requires
+                the dataset to be open.
+
+        Returns:
+            [height, width, channels] numpy array with the channels in
+            channel_order, or None if the raster can't be materialized or
+            isn't cached and decode is False
+        """
+        if self.cache_key is None:
+            log.warning('Cannot materialize raster since the versions of its '
+                        'files are unknown.')
+            return None
+
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        cache = MaterializedCache(
+            os.path.join(RVConfig.get_tmp_dir_root(), 'materialized'),
+            rv_config(
+                'materialize_cache_size', parser=int, default=str(10 * 2**30)))
+        key_str = json.dumps(
+            [self.cache_key, self.channels, self.channel_order])
+        key = hashlib.sha1(key_str.encode()).hexdigest()
+        materialized = cache.get(key)
+        if materialized is None and decode:
+            log.info('Materializing raster...')
+            num_channels = len(self._get_bands(self.channel_order))
+            materialized = cache.put(key,
+                                     (self.height, self.width, num_channels),
+                                     self.raw_dtype, self._write_materialized)
+        return materialized
+
+    def _write_materialized(self, out):
+        """Decode the raster into an array, a strip of blocks at a time."""
+        row_size = out.shape[1] * out.shape[2] * out.dtype.itemsize
+        block_height = self.block_shape[0]
+        strip_height = block_height * max(
+            1, materialize_strip_size // (row_size * block_height))
+        for ymin in range(0, self.height, strip_height):
+            window = ((ymin, min(ymin + strip_height, self.height)),
+                      (0, self.width))
+            self._before_read(window)
+            load_window(
+                self.image_dataset,
+                window,
+                self._get_bands(self.channel_order),
+                boundless=False,
+                out=out[window[0][0]:window[0][1]])
+
+    def _get_bands(self, channel_order=None):
+        """Return the bands of the dataset to read for a channel order.
+
+        Args:
+            channel_order: optional list of indices into the non-alpha bands
+
+        Returns:
+            list of 0-based band indices
+        """
+        bands = self.channels or list(range(self.num_channels))
+        if channel_order:
+            bands = [bands[channel] for channel in channel_order]
+        return bands
+
+    def _read_chip(self, window, channel_order=None, out=None):
+        """Return the chip in a window with the channels in channel_order.
+
+        Args:
+            window: Box
+            channel_order: optional list of indices into the non-alpha bands.
+                If None, all non-alpha bands are read.
+            out: optional [height, width, channels] array to read into,
+                which is returned
+        """
+        if self.image_temp_dir is None:
+            raise ActivationError('RasterSource must be activated before use')
+        self._get_image_dataset()
+        window = self._get_read_window(window)
+
+        # The cache can only be used for windows aligned with the pixel grid.
+        use_cache = self.block_cache_size > 0 or self.block_cache_dir
+        if use_cache and window == window.to_int():
+            chip = self._get_block_cache().get_window(
+                window.to_int().rasterio_format())
+            if channel_order:
+                chip = chip[:, :, channel_order]
+            if out is None:
+                return chip
+            np.copyto(out, chip)
+            return out
+
+        self._before_read(window.rasterio_format())
+        return load_window(
+            self._get_image_dataset(),
+            window.rasterio_format(),
+            self._get_bands(channel_order),
+            out=out)
+
     def _get_chip(self, window):
+        return self._read_chip(window)
+
+    def _get_image_dataset(self):
+        """Return the dataset to read from on the current thread.
+
+        Rasterio datasets can't be used by several threads at once, so each
+        thread other than the one that activated the source opens its own
+        dataset, which is closed when the source is deactivated.
+        """
         if self.image_dataset is None:
-            raise ActivationError('RasterSource must be activated before use')
-        return load_window(self.image_dataset, window.rasterio_format(),
-                           self.channels)
+            self._open()
+
+        image_dataset = getattr(self.thread_local, 'image_dataset', None)
+        if image_dataset is None:
+            image_dataset = self._open_image_dataset()
+            self.thread_local.image_dataset = image_dataset
+            with self.thread_datasets_lock:
+                self.thread_datasets.append(image_dataset)
+        return image_dataset
+
+    def _before_read(self, window):
+        """Prepare to read a window, for instance by fetching data.
+
+        Args:
+            window: ((row_start, row_stop), (col_start, col_stop))
+        """
+        pass
+
+    def _open_image_dataset(self):
+        """Open the dataset at imagery_path."""
+        return rasterio.open(self.imagery_path)
+
+    def _make_block_cache(self):
+        channels = self.channels
+
+        def read_block(window):
+            self._before_read(window)
+            return load_window(
+                self._get_image_dataset(), window, channels, boundless=False)
+
+        if self.block_cache_dir:
+            read_block = make_disk_read_block(read_block, self.block_cache_dir)
+
+        return BlockCache(
+            read_block, (self.height, self.width), self.block_shape,
+            len(self._get_bands()), self.raw_dtype, self.block_cache_size)
+
+    def _open_dataset(self):
+        """Download the data if needed and open the dataset."""
+        self.imagery_path = self._download_data(self.image_temp_dir.name)
+        self.image_dataset = self._open_image_dataset()
+        self.thread_local.image_dataset = self.image_dataset
+        self.transform = self.image_dataset.transform
+        self.raster_crs = self.image_dataset.crs
+        self._set_crs_transformer()
+
+    def _get_block_cache(self):
+        """Return the block cache, which is made on first use.
+
+        This is safe to call from several threads at once, which all get the
+        same cache.
+        """
+        if self.block_cache is None:
+            with self.image_dataset_lock:
+                if self.block_cache is None:
+                    self.block_cache = self._make_block_cache()
+        return self.block_cache
+
+    def _open(self):
+        """Open the dataset unless it is open.
+
+        This is safe to call from several threads at once.
+        """
+        with self.image_dataset_lock:
+            if self.image_dataset is None:
+                self._open_dataset()
 
     def _activate(self):
         # Download images to temporary directory and delete it when done.
         self.image_temp_dir = tempfile.TemporaryDirectory(dir=self.temp_dir)
-        self.imagery_path = self._download_data(self.image_temp_dir.name)
-        self.image_dataset = rasterio.open(self.imagery_path)
-        self._set_crs_transformer()
+        self.thread_local = threading.local()
+        # If the raster is already materialized, nothing is downloaded
+        # unless a read can't be served by the materialized raster.
+        if self.materialize:
+            self.materialized = self._get_materialized(decode=False)
+        if self.materialized is None:
+            self._open()
+            if self.materialize:
+                self.materialized = self._get_materialized()
 
     def _deactivate(self):
-        self.image_dataset.close()
-        self.image_dataset = None
+        self.materialized = None
+        if self.block_cache is not None:
+            log.debug('Block cache stats: {}'.format(
+                self.block_cache.get_stats()))
+            self.block_cache = None
+        if self.image_dataset is not None:
+            self.image_dataset.close()
+            self.image_dataset = None
+        for image_dataset in self.thread_datasets:
+            image_dataset.close()
+        self.thread_datasets = []
+        self.thread_local = None
         self.image_temp_dir.cleanup()
         self.image_temp_dir = None
@@ -1,5 +1,7 @@
 import logging
+import tempfile
 
+from affine import Affine
 from rasterio.features import rasterize
 import numpy as np
 import shapely
@@ -8,10 +10,45 @@ from shapely.strtree import STRtree
 from rastervision.core import Box
 from rastervision.data import (ActivateMixin, ActivationError)
 from rastervision.data.raster_source import RasterSource
-from rastervision.data.utils import geojson_to_shapes
+from rastervision.rv_config import RVConfig
+from rastervision.utils.parallel import map_forked
 
 log = logging.getLogger(__name__)
 
+# Height and width of the tiles that are rasterized at a time.
+RASTERIZE_TILE_SIZE = 1024
+# Rasterized label rasters larger than this many bytes are memory-mapped to a
+# temporary file rather than held in memory.
+MAX_IN_MEMORY_RASTER_SIZE = 256 * 2**20
+
+
+def rasterize_tile(str_tree, window, background_class_id):
+    """Rasterize the shapes in a tile.
+
+    Args:
+        str_tree: STRtree of shapes in pixel coordinates, each with class_id
+            and ind attributes. Shapes are burned in in order of ind.
+        window: Box of the tile
+        background_class_id: class_id of pixels that aren't in any shape
+
+    Returns:
+        [height, width] uint8 array
+    """
+    out_shape = (window.get_height(), window.get_width())
+    shapes = str_tree.query(window.to_shapely())
+    if not shapes:
+        return np.full(out_shape, background_class_id, dtype=np.uint8)
+
+    shapes.sort(key=lambda s: s.ind)
+    # The affine transform maps the pixels of the tile to those of the
+    # extent, so the shapes don't have to be moved.
+    return rasterize(
+        [(s, s.class_id) for s in shapes],
+        out_shape=out_shape,
+        fill=background_class_id,
+        transform=Affine.translation(window.xmin, window.ymin),
+        dtype=np.uint8)
+
 
 def geojson_to_raster(str_tree, rasterizer_options, window, extent,
                       crs_transformer):
@@ -84,6 +121,9 @@ class RasterizedSource(ActivateMixin, RasterSource):
         self.extent = extent
         self.crs_transformer = crs_transformer
         self.activated = False
+        # The rasterized extent while active, if rasterize_once is set.
+        self.raster = None
+        self.raster_file = None
 
         super().__init__(channel_order=[0], num_channels=1)
 
@@ -120,6 +160,9 @@ class RasterizedSource(ActivateMixin, RasterSource):
         if not self.activated:
             raise ActivationError('GeoJSONSource must be activated before use')
 
+        if self.raster is not None and window == window.to_int():
+            return np.expand_dims(self._get_raster_window(window.to_int()), 2)
+
         log.debug('Rasterizing window: {}'.format(window))
         chip = geojson_to_raster(self.str_tree,
                                  self.rasterizer_options, window,
@@ -127,9 +170,87 @@ class RasterizedSource(ActivateMixin, RasterSource):
         # Add third singleton dim since rasters must have >=1 channel.
         return np.expand_dims(chip, 2)
 
+    def _get_raster_window(self, window):
+        """Return a window of the rasterized extent.
+
+        The window is a read-only view of the raster if it lies within the
+        extent, and otherwise the parts outside the extent are zero.
+        """
+        ymin = window.ymin - self.extent.ymin
+        xmin = window.xmin - self.extent.xmin
+        ymax = ymin + window.get_height()
+        xmax = xmin + window.get_width()
+        height, width = self.raster.shape
+        if ymin >= 0 and xmin >= 0 and ymax <= height and xmax <= width:
+            return self.raster[ymin:ymax, xmin:xmax]
+
+        chip = np.zeros((ymax - ymin, xmax - xmin), dtype=np.uint8)
+        read_ymin, read_xmin = max(ymin, 0), max(xmin, 0)
+        read_ymax, read_xmax = min(ymax, height), min(xmax, width)
+        if read_ymin < read_ymax and read_xmin < read_xmax:
+            chip[read_ymin - ymin:read_ymax - ymin, read_xmin -
+                 xmin:read_xmax -
+                 xmin] = self.raster[read_ymin:read_ymax, read_xmin:read_xmax]
+        return chip
+
+    def _rasterize_extent(self, shapes):
+        """Rasterize shapes over the whole extent, a tile at a time.
+
+        Lines are buffered once up front rather than after being clipped to
+        each window. Tiles are rasterized in a pool of rasterize_num_workers
+        worker processes if that option in the [RV] section of the Raster
+        Vision config is greater than 1.
+
+        Args:
+            shapes: list of (shape, class_id) tuples in pixel coordinates
+
+        Returns:
+            [height, width] read-only uint8 array
+        """
+        line_buffer = self.rasterizer_options.line_buffer
+        buffered_shapes = []
+        for ind, (shape, class_id) in enumerate(shapes):
+            if type(shape) is shapely.geometry.LineString:
+                shape = shape.buffer(line_buffer)
+            shape.class_id = class_id
+            shape.ind = ind
+            buffered_shapes.append(shape)
+        str_tree = STRtree(buffered_shapes)
+
+        extent = self.extent.to_int()
+        height, width = extent.get_height(), extent.get_width()
+        if height * width > MAX_IN_MEMORY_RASTER_SIZE:
+            self.raster_file = tempfile.TemporaryFile(
+                dir=RVConfig.get_tmp_dir_root())
+            raster = np.memmap(
+                self.raster_file,
+                dtype=np.uint8,
+                mode='w+',
+                shape=(height, width))
+        else:
+            raster = np.empty((height, width), dtype=np.uint8)
+
+        windows = extent.get_windows(RASTERIZE_TILE_SIZE, RASTERIZE_TILE_SIZE)
+        windows = [w.intersection(extent) for w in windows]
+        jobs = [(str_tree, w, self.rasterizer_options.background_class_id)
+                for w in windows]
+
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        num_workers = rv_config(
+            'rasterize_num_workers', parser=int, default='1')
+        log.info('Rasterizing {} tiles...'.format(len(jobs)))
+        # The STRtree of shapes cannot be pickled, so tiles are rasterized
+        # using map_forked.
+        tiles = map_forked(rasterize_tile, jobs, num_workers)
+        for window, tile in zip(windows, tiles):
+            raster[window.ymin - extent.ymin:window.ymax - extent.ymin,
+                   window.xmin - extent.xmin:window.xmax - extent.xmin] = tile
+
+        raster.flags.writeable = False
+        return raster
+
     def _activate(self):
-        geojson = self.vector_source.get_geojson()
-        shapes = geojson_to_shapes(geojson, self.crs_transformer)
+        shapes = self.vector_source.get_shapes(self.crs_transformer)
 
         # Monkey-patching class_id onto shapely.geom is not a good idea because
         # if you transform it, the class_id will be lost, but this works here. I wanted to
@@ -138,8 +259,14 @@ class RasterizedSource(ActivateMixin, RasterSource):
         for shape, class_id in shapes:
             shape.class_id = class_id
         self.str_tree = STRtree([shape for shape, class_id in shapes])
+        if self.rasterizer_options.rasterize_once:
+            self.raster = self._rasterize_extent(shapes)
         self.activated = True
 
     def _deactivate(self):
         self.str_tree = None
+        self.raster = None
+        if self.raster_file is not None:
+            self.raster_file.close()
+            self.raster_file = None
         self.activated = False
@@ -13,31 +13,41 @@ from rastervision.utils.files import download_if_needed
 
 class RasterizedSourceConfig(RasterSourceConfig):
     class RasterizerOptions(object):
-        def __init__(self, background_class_id, line_buffer=15):
+        def __init__(self,
+                     background_class_id,
+                     line_buffer=15,
+                     rasterize_once=False):
             """Constructor.
 
             Args:
                 background_class_id: The class_id to use for background pixels that don't
                     overlap with any shapes in the GeoJSON file.
                 line_buffer: Number of pixels to add to each side of line when rasterized.
+                rasterize_once: If True, rasterize the whole extent into a
+                    uint8 raster when the source is activated, so reading a
+                    window is a slice of it.
             """
             self.background_class_id = background_class_id
             self.line_buffer = line_buffer
+            self.rasterize_once = rasterize_once
 
         def to_proto(self):
             return RasterSourceConfigMsg.RasterizedSource.RasterizerOptions(
                 background_class_id=self.background_class_id,
-                line_buffer=self.line_buffer)
+                line_buffer=self.line_buffer,
+                rasterize_once=self.rasterize_once)
 
     def __init__(self,
                  vector_source,
                  rasterizer_options,
                  transformers=None,
-                 channel_order=None):
+                 channel_order=None,
+                 materialize=False):
         super().__init__(
             source_type=rv.RASTERIZED_SOURCE,
             transformers=transformers,
-            channel_order=channel_order)
+            channel_order=channel_order,
+            materialize=materialize)
         self.vector_source = vector_source
         self.rasterizer_options = rasterizer_options
 
@@ -131,16 +141,19 @@ class RasterizedSourceConfigBuilder(RasterSourceConfigBuilder):
         if msg.HasField('geojson_file'):
             vector_source = msg.geojson_file.uri
             rasterizer_options = msg.geojson_file.rasterizer_options
+            rasterize_once = False
         else:
             vector_source = VectorSourceConfig.from_proto(
                 msg.rasterized_source.vector_source)
             rasterizer_options = msg.rasterized_source.rasterizer_options
+            rasterize_once = rasterizer_options.rasterize_once
 
         return b \
             .with_vector_source(vector_source) \
             .with_rasterizer_options(
                 rasterizer_options.background_class_id,
-                rasterizer_options.line_buffer)
+                rasterizer_options.line_buffer,
+                rasterize_once=rasterize_once)
 
     def with_vector_source(self, vector_source):
         """Set the vector_source.
@@ -167,16 +180,25 @@ class RasterizedSourceConfigBuilder(RasterSourceConfigBuilder):
         b.config['vector_source'] = provider.construct(uri)
         return b
 
-    def with_rasterizer_options(self, background_class_id, line_buffer=15):
+    def with_rasterizer_options(self,
+                                background_class_id,
+                                line_buffer=15,
+                                rasterize_once=False):
         """Specify options for converting GeoJSON to raster.
 
         Args:
             background_class_id: The class_id to use for background pixels that don't
                 overlap with any shapes in the GeoJSON file.
             line_buffer: Number of pixels to add to each side of line when rasterized.
+            rasterize_once: If True, rasterize the whole extent into a uint8
+                raster when the source is activated, so reading a window is a
+                slice of it. This is faster when many windows are read, for
+                instance when making chips or evaluating.
         """
         b = deepcopy(self)
         b.config[
             'rasterizer_options'] = RasterizedSourceConfig.RasterizerOptions(
-                background_class_id, line_buffer=line_buffer)
+                background_class_id,
+                line_buffer=line_buffer,
+                rasterize_once=rasterize_once)
         return b
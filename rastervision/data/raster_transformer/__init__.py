@@ -3,5 +3,6 @@
 from rastervision.data.raster_transformer.raster_transformer import *
 from rastervision.data.raster_transformer.raster_transformer_config import *
 from rastervision.data.raster_transformer.noop_transformer import *
+from rastervision.data.raster_transformer.transformer_pipeline import *
 from rastervision.data.raster_transformer.stats_transformer import *
 from rastervision.data.raster_transformer.stats_transformer_config import *
@@ -6,6 +6,8 @@ class NoopTransformer(RasterTransformer):
     """No-op transformer
     """
 
+    elementwise = True
+
     def __init__(self):
         pass
 
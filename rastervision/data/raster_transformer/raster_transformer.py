@@ -4,6 +4,11 @@ from abc import (ABC, abstractmethod)
 class RasterTransformer(ABC):
     """Transforms raw chips to be input to a neural network."""
 
+    # True if each transformed value only depends on the value and its
+    # channel, so that chips of any height and width, including several
+    # chips stacked vertically, can be transformed at once.
+    elementwise = False
+
     @abstractmethod
     def transform(self, chip, channel_order=None):
         """Transform a chip of a raster source.
@@ -16,3 +21,21 @@ class RasterTransformer(ABC):
 
         """
         pass
+
+    def get_lut(self, dtype, channel_order):
+        """Return a lookup table that computes the transformation.
+
+        Transformers that are elementwise can override this so that they
+        can be fused with other transformers into a single lookup.
+
+        Args:
+            dtype: integer numpy dtype of up to 16 bits of the chips
+            channel_order: list of the channels of the chips
+
+        Returns:
+            [channels, 2**bits] numpy array where entry [c, i] is the
+            transformed value of channel c for the value whose bits are i, or
+            None if the transformation can't be computed using a lookup
+            table
+        """
+        return None
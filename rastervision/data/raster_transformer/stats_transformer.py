@@ -2,12 +2,20 @@ import numpy as np
 
 from rastervision.data.raster_transformer.raster_transformer \
     import RasterTransformer
+from rastervision.data.raster_transformer.transformer_pipeline import (
+    get_identity_lut)
+
+# Integer dtypes which are transformed using lookup tables, which have an
+# entry for each of the 2**16 possible values.
+lut_dtypes = [np.dtype(np.uint16), np.dtype(np.int16)]
 
 
 class StatsTransformer(RasterTransformer):
     """Transforms non-uint8 to uint8 values using raster_stats.
     """
 
+    elementwise = True
+
     def __init__(self, raster_stats=None):
         """Construct a new StatsTransformer.
 
@@ -17,6 +25,55 @@ class StatsTransformer(RasterTransformer):
         """
         self.raster_stats = raster_stats
 
+        # The transformation of 16-bit values only depends on the value and
+        # channel, so it is computed once for all values.
+        self.luts = {}
+        if raster_stats:
+            self.means = np.array(raster_stats.means, dtype=np.float64)
+            self.stds = np.array(raster_stats.stds, dtype=np.float64)
+            for dtype in lut_dtypes:
+                self.luts[dtype] = self._make_lut(dtype)
+
+            # Coefficients of the transformation for other dtypes, which is
+            # done in float32 as chip * scales + offsets.
+            self.scales = (255 / (6 * self.stds)).astype(np.float32)
+            self.offsets = (255 * (3 - self.means / self.stds) / 6).astype(
+                np.float32)
+
+    def _make_lut(self, dtype):
+        """Return a lookup table of the transformed values of a 16-bit dtype.
+
+        The values are computed in float64 by subtracting the mean and
+        dividing by the std, then mapping zscores between -3 and 3 to 0 to
+        255. NODATA zero values are not transformed.
+
+        Args:
+            dtype: numpy dtype with 16 bits
+
+        Returns:
+            [channels, 2**16] uint8 numpy array where entry [c, i] is the
+            transformed value of channel c for the value whose bits are i
+        """
+        values = np.arange(2**16, dtype=np.uint16).view(dtype)
+        lut = values[np.newaxis, :] - self.means[:, np.newaxis]
+        lut /= self.stds[:, np.newaxis]
+        lut += 3
+        lut /= 6
+        np.clip(lut, 0, 1, out=lut)
+        lut *= 255
+        lut = lut.astype(np.uint8)
+        lut[:, values == 0] = 0
+        return lut
+
+    def get_lut(self, dtype, channel_order):
+        dtype = np.dtype(dtype)
+        if dtype == np.uint8:
+            return get_identity_lut(dtype, len(channel_order))
+        lut = self.luts.get(dtype)
+        if lut is None:
+            return None
+        return lut[channel_order]
+
     def transform(self, chip, channel_order=None):
         """Transform a chip.
 
@@ -29,35 +86,31 @@ class StatsTransformer(RasterTransformer):
         Returns:
             [height, width, channels] uint8 numpy array
         """
-        if chip.dtype != np.uint8:
-            if self.raster_stats:
-                if channel_order is None:
-                    channel_order = np.arange(chip.shape[2])
-
-                # Subtract mean and divide by std to get zscores.
-                means = np.array(self.raster_stats.means)
-                means = means[np.newaxis, np.newaxis, channel_order].astype(
-                    np.float)
-                stds = np.array(self.raster_stats.stds)
-                stds = stds[np.newaxis, np.newaxis, channel_order].astype(
-                    np.float)
-
-                # Don't transform NODATA zero values.
-                nodata = chip == 0
-
-                chip = chip - means
-                chip = chip / stds
-
-                # Make zscores that fall between -3 and 3 span 0 to 255.
-                chip += 3
-                chip /= 6
-
-                chip = np.clip(chip, 0, 1)
-                chip *= 255
-                chip = chip.astype(np.uint8)
-
-                chip[nodata] = 0
-            else:
-                raise ValueError('raster_stats not defined.')
-
-        return chip
+        if chip.dtype == np.uint8:
+            return chip
+        if not self.raster_stats:
+            raise ValueError('raster_stats not defined.')
+
+        if channel_order is None:
+            channel_order = np.arange(chip.shape[2])
+
+        lut = self.luts.get(chip.dtype)
+        if lut is not None:
+            # Look up each channel in a single pass.
+            chip = chip.view(np.uint16)
+            out = np.empty(chip.shape, dtype=np.uint8)
+            for i, channel in enumerate(channel_order):
+                np.take(
+                    lut[channel], chip[:, :, i], out=out[:, :, i], mode='clip')
+            return out
+
+        scales = self.scales[channel_order]
+        offsets = self.offsets[channel_order]
+        out = np.multiply(chip, scales, dtype=np.float32)
+        out += offsets
+        np.clip(out, 0, 255, out=out)
+        out = out.astype(np.uint8)
+
+        # Don't transform NODATA zero values.
+        np.copyto(out, 0, where=chip == 0)
+        return out
@@ -0,0 +1,255 @@
+import threading
+
+import numpy as np
+
+from rastervision.data.raster_transformer.noop_transformer import (
+    NoopTransformer)
+
+
+def is_lut_dtype(dtype):
+    """Return True if chips of a dtype can be transformed using lookup tables.
+
+    These are integer dtypes of up to 16 bits, so that a lookup table has an
+    entry for each of the possible values.
+    """
+    dtype = np.dtype(dtype)
+    return dtype.kind in 'iu' and dtype.itemsize <= 2
+
+
+def get_identity_lut(dtype, num_channels):
+    """Return a lookup table that maps each value of a dtype to itself.
+
+    Args:
+        dtype: an integer dtype of up to 16 bits
+        num_channels: number of channels
+
+    Returns:
+        [num_channels, 2**bits] numpy array of dtype
+    """
+    dtype = np.dtype(dtype)
+    values = np.arange(
+        2**(8 * dtype.itemsize), dtype='u{}'.format(dtype.itemsize))
+    return np.tile(values.view(dtype), (num_channels, 1))
+
+
+def apply_lut(lut, chip, out):
+    """Transform the values of each channel of a chip using a lookup table.
+
+    Args:
+        lut: [channels, 2**bits] lookup table
+        chip: [..., channels] numpy array with a dtype of bits bits
+        out: [..., channels] numpy array of the dtype of lut
+    """
+    # Index using the bits of the values, so signed values work too.
+    index = chip.view('u{}'.format(chip.dtype.itemsize))
+    for channel in range(lut.shape[0]):
+        np.take(
+            lut[channel],
+            index[..., channel],
+            out=out[..., channel],
+            mode='clip')
+    return out
+
+
+class TransformerPipeline():
+    """Applies a list of RasterTransformers to chips or batches of chips.
+
+    The first time chips with a given dtype and channel order are
+    transformed, the list of transformers is compiled into stages.
+    NoopTransformers are dropped, and consecutive transformers that provide
+    lookup tables for the dtype are composed into a single lookup table,
+    which is applied in one pass that writes straight into the output array.
+    Lookup tables that map each value to itself are dropped. Other
+    transformers are called as usual.
+
+    Intermediate arrays are kept in per-thread scratch buffers that are
+    reused for later chips, so transforming a chip allocates no memory
+    unless a transformer does so itself. Chips can be transformed from
+    several threads at once.
+    """
+
+    def __init__(self, transformers):
+        """Construct a new TransformerPipeline.
+
+        Args:
+            transformers: list of RasterTransformers applied in order
+        """
+        self.transformers = [
+            t for t in transformers if not isinstance(t, NoopTransformer)
+        ]
+        self.stages = {}
+        self.thread_local = threading.local()
+
+    def is_identity(self):
+        """Return True if transforming chips leaves them unchanged."""
+        return not self.transformers
+
+    def get_buffer(self, name, shape, dtype):
+        """Return a scratch buffer for the current thread.
+
+        The buffer is reused by later calls with the same name on the same
+        thread, so it is only valid until then.
+
+        Args:
+            name: name of the buffer
+            shape: shape of the buffer
+            dtype: dtype of the buffer
+        """
+        buffers = getattr(self.thread_local, 'buffers', None)
+        if buffers is None:
+            buffers = {}
+            self.thread_local.buffers = buffers
+        buffer = buffers.get(name)
+        if (buffer is None or buffer.shape != tuple(shape)
+                or buffer.dtype != dtype):
+            buffer = np.empty(shape, dtype=dtype)
+            buffers[name] = buffer
+        return buffer
+
+    def _is_buffer(self, array):
+        """Return True if an array may share memory with a scratch buffer."""
+        buffers = getattr(self.thread_local, 'buffers', {})
+        return any(
+            np.may_share_memory(array, buffer) for buffer in buffers.values())
+
+    def _compile(self, dtype, channel_order):
+        """Return the stages that transform chips of a dtype.
+
+        Returns:
+            list of stages, each of which is a lookup table to apply, or a
+            RasterTransformer to call
+        """
+        stages = []
+        lut = None
+        lut_dtype = None
+        dtype = np.dtype(dtype)
+        num_channels = len(channel_order)
+
+        def add_lut():
+            if lut is not None and not (
+                    lut.dtype == lut_dtype and np.array_equal(
+                        lut, get_identity_lut(lut_dtype, num_channels))):
+                stages.append(lut)
+
+        for transformer in self.transformers:
+            transformer_lut = None
+            if is_lut_dtype(dtype):
+                transformer_lut = transformer.get_lut(dtype, channel_order)
+
+            if transformer_lut is not None:
+                if lut is None:
+                    lut, lut_dtype = transformer_lut, dtype
+                else:
+                    # Compose the lookup tables by looking up the values of
+                    # one in the other.
+                    index = lut.view('u{}'.format(lut.dtype.itemsize))
+                    lut = np.stack([
+                        transformer_lut[channel][index[channel]]
+                        for channel in range(num_channels)
+                    ])
+                dtype = transformer_lut.dtype
+            else:
+                add_lut()
+                lut = None
+                stages.append(transformer)
+                # Transform a 1x1 chip to get the dtype of the output.
+                test_chip = np.zeros((1, 1, num_channels), dtype=dtype)
+                dtype = transformer.transform(test_chip, channel_order).dtype
+        add_lut()
+        return stages
+
+    def _get_stages(self, chip, channel_order):
+        if channel_order is None:
+            channel_order = list(range(chip.shape[-1]))
+        key = (chip.dtype, tuple(channel_order))
+        stages = self.stages.get(key)
+        if stages is None:
+            stages = self._compile(chip.dtype, list(channel_order))
+            self.stages[key] = stages
+        return stages, channel_order
+
+    def _get_stage_out(self, name, ind, is_last, chip, lut, out):
+        """Return the array to put the output of a lookup table stage in."""
+        if is_last:
+            if out is None:
+                return np.empty(chip.shape, dtype=lut.dtype)
+            if out.dtype == lut.dtype:
+                return out
+        # Scratch buffers are transformed in place when the dtype allows.
+        if chip.dtype == lut.dtype and self._is_buffer(chip):
+            return chip
+        return self.get_buffer((name, ind), chip.shape, lut.dtype)
+
+    def _finish(self, chip, out):
+        if out is not None:
+            if chip is not out:
+                np.copyto(out, chip)
+            return out
+        # Scratch buffers are reused, so they can't be returned.
+        if self._is_buffer(chip):
+            return chip.copy()
+        return chip
+
+    def transform(self, chip, channel_order=None, out=None):
+        """Transform a chip.
+
+        Args:
+            chip: [height, width, channels] numpy array, which may be a
+                scratch buffer of this pipeline
+            channel_order: the channel order of the chip
+            out: optional [height, width, channels] array to put the
+                transformed chip in, which is returned
+
+        Returns:
+            [height, width, channels] numpy array
+        """
+        if self.is_identity():
+            return self._finish(chip, out)
+
+        stages, channel_order = self._get_stages(chip, channel_order)
+        for ind, stage in enumerate(stages):
+            if isinstance(stage, np.ndarray):
+                stage_out = self._get_stage_out(
+                    'stage', ind, ind == len(stages) - 1, chip, stage, out)
+                chip = apply_lut(stage, chip, stage_out)
+            else:
+                chip = stage.transform(chip, channel_order)
+        return self._finish(chip, out)
+
+    def transform_batch(self, chips, channel_order=None, out=None):
+        """Transform a batch of chips at once.
+
+        Elementwise transformers, which include lookup tables, transform the
+        whole batch in one call. Other transformers are called on each chip.
+
+        Args:
+            chips: [batch_size, height, width, channels] numpy array, which
+                may be a scratch buffer of this pipeline
+            channel_order: the channel order of the chips
+            out: optional [batch_size, height, width, channels] array to put
+                the transformed chips in, which is returned
+
+        Returns:
+            [batch_size, height, width, channels] numpy array
+        """
+        if self.is_identity():
+            return self._finish(chips, out)
+
+        stages, channel_order = self._get_stages(chips, channel_order)
+        for ind, stage in enumerate(stages):
+            if isinstance(stage, np.ndarray):
+                stage_out = self._get_stage_out('batch_stage', ind,
+                                                ind == len(stages) - 1, chips,
+                                                stage, out)
+                chips = apply_lut(stage, chips, stage_out)
+            elif stage.elementwise:
+                # The batch is transformed as one tall chip.
+                batch_size, height = chips.shape[0:2]
+                chips = stage.transform(
+                    chips.reshape((batch_size * height, ) + chips.shape[2:]),
+                    channel_order)
+                chips = chips.reshape((batch_size, height) + chips.shape[1:])
+            else:
+                chips = np.stack(
+                    [stage.transform(chip, channel_order) for chip in chips])
+        return self._finish(chips, out)
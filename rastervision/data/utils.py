@@ -1,5 +1,7 @@
 import shapely
 
+from rastervision.data.crs_transformer import transform_point_lists
+
 
 def geojson_to_shapes(geojson, crs_transformer):
     """Convert GeoJSON into list of shapely.geometry shape.
@@ -14,8 +16,9 @@ def geojson_to_shapes(geojson, crs_transformer):
         List of (shapely.geometry, class_id) tuples
     """
     features = geojson['features']
-    shapes = []
 
+    # The coordinates of all the shapes are transformed in a single batch.
+    shape_specs = []
     for feature in features:
         properties = feature.get('properties', {})
         class_id = properties.get('class_id', 1)
@@ -30,25 +33,30 @@ def geojson_to_shapes(geojson, crs_transformer):
 
         if geom_type == 'MultiPolygon':
             for polygon in coordinates:
-                shell = polygon[0]
-                shape = [crs_transformer.map_to_pixel(p) for p in shell]
-                # Trick to handle self-intersecting polygons using buffer(0)
-                shape = shapely.geometry.Polygon(shape).buffer(0)
-                shapes.append((shape, class_id))
+                shape_specs.append((shapely.geometry.Polygon, polygon[0],
+                                    class_id))
         elif geom_type == 'Polygon':
-            shell = coordinates[0]
-            shape = [crs_transformer.map_to_pixel(p) for p in shell]
-            # Trick to handle self-intersecting polygons using buffer(0)
-            shape = shapely.geometry.Polygon(shape).buffer(0)
-            shapes.append((shape, class_id))
+            shape_specs.append((shapely.geometry.Polygon, coordinates[0],
+                                class_id))
         elif geom_type == 'LineString':
-            shape = [crs_transformer.map_to_pixel(p) for p in coordinates]
-            shape = shapely.geometry.LineString(shape)
-            shapes.append((shape, class_id))
+            shape_specs.append((shapely.geometry.LineString, coordinates,
+                                class_id))
         else:
             # TODO: logging warning that this type can't be parsed.
             pass
 
+    point_lists = transform_point_lists(
+        [points for _, points, _ in shape_specs],
+        crs_transformer.map_to_pixel_batch)
+
+    shapes = []
+    for (shape_class, _, class_id), points in zip(shape_specs, point_lists):
+        shape = shape_class(points)
+        if shape_class == shapely.geometry.Polygon:
+            # Trick to handle self-intersecting polygons using buffer(0)
+            shape = shape.buffer(0)
+        shapes.append((shape, class_id))
+
     return shapes
 
 
@@ -69,10 +77,14 @@ def boxes_to_geojson(boxes, class_ids, crs_transformer, class_map,
     Returns:
         dict in GeoJSON format
     """
+    # The corners of all the boxes are transformed in a single batch.
+    polygons = transform_point_lists(
+        [box.geojson_coordinates() for box in boxes],
+        crs_transformer.pixel_to_map_batch)
+
     features = []
-    for box_ind, box in enumerate(boxes):
-        polygon = box.geojson_coordinates()
-        polygon = [list(crs_transformer.pixel_to_map(p)) for p in polygon]
+    for box_ind, polygon in enumerate(polygons):
+        polygon = polygon.tolist()
 
         class_id = int(class_ids[box_ind])
         class_name = class_map.get_by_id(class_id).name
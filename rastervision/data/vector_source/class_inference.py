@@ -1,4 +1,5 @@
 import copy
+import json
 
 from rastervision.data.vector_source.label_maker.filter import create_filter
 
@@ -13,6 +14,21 @@ class ClassInferenceOptions():
         self.default_class_id = default_class_id
 
 
+def get_class_inference_key(class_inference):
+    """Return a JSON serializable description of ClassInference options."""
+    options = class_inference.options
+    class_map = None
+    if options.class_map is not None:
+        class_map = [(item.id, item.name)
+                     for item in options.class_map.get_items()]
+    class_id_to_filter = None
+    if options.class_id_to_filter is not None:
+        class_id_to_filter = sorted(
+            [str(class_id), json.dumps(filter_exp)]
+            for class_id, filter_exp in options.class_id_to_filter.items())
+    return [class_map, class_id_to_filter, options.default_class_id]
+
+
 class ClassInference():
     """Infers missing class_ids from GeoJSON features."""
 
@@ -24,12 +40,27 @@ class ClassInference():
         """
         self.options = options
 
+        # The id of each class name, which is that of the first class with
+        # the name like ClassMap.get_by_name.
+        self.class_name_to_id = {}
+        if self.options.class_map is not None:
+            for item in reversed(self.options.class_map.get_items()):
+                self.class_name_to_id[item.name] = item.id
+
         if self.options.class_id_to_filter is not None:
             self.class_id_to_filter = {}
             for class_id, filter_exp in self.options.class_id_to_filter.items(
             ):
                 self.class_id_to_filter[class_id] = create_filter(filter_exp)
 
+    def _get_class_name_id(self, class_name):
+        """Return the id of a class name, or None if it isn't in class_map."""
+        try:
+            return self.class_name_to_id.get(class_name)
+        except TypeError:
+            # Unhashable values aren't class names.
+            return None
+
     def infer_class_id(self, feature):
         """Infer the class_id for a GeoJSON feature.
 
@@ -49,13 +80,11 @@ class ClassInference():
             return class_id
 
         if self.options.class_map is not None:
-            class_name = feature.get('properties', {}).get('class_name')
-            if class_name in self.options.class_map.get_class_names():
-                return self.options.class_map.get_by_name(class_name).id
-
-            label = feature.get('properties', {}).get('label')
-            if label in self.options.class_map.get_class_names():
-                return self.options.class_map.get_by_name(label).id
+            for key in ['class_name', 'label']:
+                class_id = self._get_class_name_id(
+                    feature.get('properties', {}).get(key))
+                if class_id is not None:
+                    return class_id
 
         if self.options.class_id_to_filter is not None:
             for class_id, filter_fn in self.class_id_to_filter.items():
@@ -64,18 +93,67 @@ class ClassInference():
 
         return self.options.default_class_id
 
-    def transform_geojson(self, geojson):
+    def infer_class_ids(self, features):
+        """Infer the class_ids of a list of GeoJSON features.
+
+        This gives the same class_ids as infer_class_id, but each filter is
+        evaluated on all the features that are left at once.
+
+        Args:
+            features: list of GeoJSON features
+
+        Returns:
+            list with the class_id of each feature
+        """
+        class_ids = [None] * len(features)
+        remaining = []
+        for ind, feature in enumerate(features):
+            properties = feature.get('properties', {})
+            class_id = properties.get('class_id')
+            if class_id is None and self.options.class_map is not None:
+                class_id = self._get_class_name_id(
+                    properties.get('class_name'))
+                if class_id is None:
+                    class_id = self._get_class_name_id(properties.get('label'))
+            if class_id is None:
+                remaining.append(ind)
+            class_ids[ind] = class_id
+
+        if self.options.class_id_to_filter is not None:
+            for class_id, filter_fn in self.class_id_to_filter.items():
+                if not remaining:
+                    break
+                passes = filter_fn.filter_features(
+                    [features[ind] for ind in remaining])
+                for ind, passed in zip(remaining, passes):
+                    if passed:
+                        class_ids[ind] = class_id
+                remaining = [
+                    ind for ind, passed in zip(remaining, passes) if not passed
+                ]
+
+        for ind in remaining:
+            class_ids[ind] = self.options.default_class_id
+        return class_ids
+
+    def transform_geojson(self, geojson, copy_features=True):
         """Transform GeoJSON by appending class_ids and removing features with no class.
 
         For each feature in geojson, the class_id is inferred and is set into
         feature['properties']. If the class_id is None (because none of the rules apply
         and the default_class_id is None), the feature is dropped.
+
+        Args:
+            geojson: (dict) GeoJSON FeatureCollection
+            copy_features: (bool) if False, the features of geojson are
+                changed in place instead of being copied
         """
         new_features = []
-        for feature in geojson['features']:
-            class_id = self.infer_class_id(feature)
+        features = geojson['features']
+        for feature, class_id in zip(features, self.infer_class_ids(features)):
             if class_id is not None:
-                feature = copy.deepcopy(feature)
+                if copy_features:
+                    feature = copy.deepcopy(feature)
                 properties = feature.get('properties', {})
                 properties['class_id'] = class_id
                 feature['properties'] = properties
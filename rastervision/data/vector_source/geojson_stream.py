@@ -0,0 +1,160 @@
+import codecs
+import json
+import math
+
+# Number of bytes read from a GeoJSON file at a time.
+CHUNK_SIZE = 16 * 2**20
+
+_whitespace = ' \t\n\r'
+
+
+class _JSONReader():
+    """Reads JSON values from a binary file one at a time.
+
+    Keeps track of the offset in bytes of the current position, so that the
+    values can be read again later by seeking to them.
+    """
+
+    def __init__(self, json_file, chunk_size):
+        self.json_file = json_file
+        self.chunk_size = chunk_size
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.byte_offset = 0
+        self.eof = False
+
+    def _read_chunk(self):
+        """Read another chunk of the file into the buffer."""
+        if self.eof:
+            raise ValueError('Unexpected end of GeoJSON file.')
+        data = self.json_file.read(self.chunk_size)
+        self.eof = len(data) == 0
+        self.buffer = self.buffer[self.pos:] + self.text_decoder.decode(
+            data, final=self.eof)
+        self.pos = 0
+
+    def _advance(self, end):
+        self.byte_offset += len(self.buffer[self.pos:end].encode('utf-8'))
+        self.pos = end
+
+    def peek(self):
+        """Skip whitespace and return the next character."""
+        while True:
+            while (self.pos < len(self.buffer)
+                   and self.buffer[self.pos] in _whitespace):
+                self._advance(self.pos + 1)
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            self._read_chunk()
+
+    def expect(self, chars):
+        """Skip whitespace and the next character, which is one of chars.
+
+        Returns:
+            the character
+        """
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                'Expected one of {} in GeoJSON file, got {}'.format(
+                    list(chars), char))
+        self._advance(self.pos + 1)
+        return char
+
+    def read_value(self):
+        """Skip whitespace and decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json_decoder.raw_decode(
+                    self.buffer, self.pos)
+                # Values that end with the buffer, like numbers, may continue
+                # in the next chunk.
+                if end < len(self.buffer) or self.eof:
+                    self._advance(end)
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self._read_chunk()
+
+
+def iter_geojson_features(geojson_file, chunk_size=CHUNK_SIZE):
+    """Iterate over the features of a GeoJSON FeatureCollection.
+
+    The file is parsed incrementally, so only one feature at a time needs to
+    be in memory.
+
+    Args:
+        geojson_file: GeoJSON file opened in binary mode
+        chunk_size: number of bytes to read at a time
+
+    Returns:
+        iterator over (feature, offset, length) tuples, where offset and
+        length locate the JSON of the feature in the file in bytes
+    """
+    reader = _JSONReader(geojson_file, chunk_size)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+    while True:
+        key = reader.read_value()
+        reader.expect(':')
+        if key == 'features':
+            reader.expect('[')
+            if reader.peek() == ']':
+                reader.expect(']')
+            else:
+                while True:
+                    offset = reader.byte_offset
+                    feature = reader.read_value()
+                    yield (feature, offset, reader.byte_offset - offset)
+                    if reader.expect(',]') == ']':
+                        break
+        else:
+            reader.read_value()
+        if reader.expect(',}') == '}':
+            return
+
+
+def _get_coordinates_bbox(coordinates):
+    if not coordinates:
+        return None
+    if isinstance(coordinates[0], (int, float)):
+        x, y = coordinates[0:2]
+        return (x, y, x, y)
+    if coordinates[0] and isinstance(coordinates[0][0], (int, float)):
+        xs = [point[0] for point in coordinates]
+        ys = [point[1] for point in coordinates]
+        return (min(xs), min(ys), max(xs), max(ys))
+    if len(coordinates) == 1:
+        return _get_coordinates_bbox(coordinates[0])
+    return merge_bboxes([_get_coordinates_bbox(c) for c in coordinates])
+
+
+def merge_bboxes(bboxes):
+    """Return the bounding box of (xmin, ymin, xmax, ymax) boxes or None."""
+    bboxes = [bbox for bbox in bboxes if bbox is not None]
+    if not bboxes:
+        return None
+    return (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+            max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+
+
+def get_geometry_bbox(geometry):
+    """Return the bounding box of a GeoJSON geometry.
+
+    Returns:
+        (xmin, ymin, xmax, ymax) tuple, or None if the geometry is empty
+    """
+    if not geometry:
+        return None
+    if geometry.get('type') == 'GeometryCollection':
+        return merge_bboxes(
+            [get_geometry_bbox(g) for g in geometry.get('geometries', [])])
+    bbox = _get_coordinates_bbox(geometry.get('coordinates'))
+    if bbox is not None and any(math.isnan(v) for v in bbox):
+        return None
+    return bbox
@@ -1,20 +1,211 @@
 import json
+import logging
+import os
 
+import numpy as np
+
+from rastervision.core.box import Box
+from rastervision.data.raster_source.metadata_cache import get_cache_key
+from rastervision.data.vector_source.class_inference import (
+    get_class_inference_key)
 from rastervision.data.vector_source.vector_source import VectorSource
-from rastervision.utils.files import file_to_str
+from rastervision.data.vector_source.geojson_stream import (
+    get_geometry_bbox, iter_geojson_features)
+from rastervision.data.vector_source.vector_cache import (load_arrays,
+                                                          save_arrays)
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import (
+    download_if_needed, evict_least_recently_used, get_cached_file, make_dir)
+
+log = logging.getLogger(__name__)
+
+# Number of points along each edge of an extent that are transformed to find
+# its bounding box in map coordinates.
+EXTENT_EDGE_POINTS = 8
+
+
+def get_map_bbox(extent, crs_transformer):
+    """Return the bounding box of an extent in map coordinates.
+
+    The extent is padded by a pixel, since pixels are transformed to their
+    centers, and points along its edges are transformed so that edges that
+    are curved in map coordinates are covered.
+
+    Args:
+        extent: (Box) in pixel coordinates
+        crs_transformer: (CRSTransformer)
+
+    Returns:
+        (xmin, ymin, xmax, ymax) tuple in map coordinates
+    """
+    extent = Box(extent.ymin - 1, extent.xmin - 1, extent.ymax + 1,
+                 extent.xmax + 1)
+    xs = np.linspace(extent.xmin, extent.xmax, EXTENT_EDGE_POINTS)
+    ys = np.linspace(extent.ymin, extent.ymax, EXTENT_EDGE_POINTS)
+    points = np.concatenate([
+        np.stack([xs, np.full_like(xs, extent.ymin)], axis=1),
+        np.stack([xs, np.full_like(xs, extent.ymax)], axis=1),
+        np.stack([np.full_like(ys, extent.xmin), ys], axis=1),
+        np.stack([np.full_like(ys, extent.xmax), ys], axis=1)
+    ])
+    map_points = crs_transformer.pixel_to_map_batch(points)
+    xmin, ymin = np.min(map_points, axis=0)
+    xmax, ymax = np.max(map_points, axis=0)
+    return (xmin, ymin, xmax, ymax)
+
+
+def get_overlapping(bboxes, map_bbox):
+    """Return a boolean mask of the bboxes that overlap with map_bbox.
+
+    Args:
+        bboxes: [N, 4] array of (xmin, ymin, xmax, ymax) rows, which are NaN
+            for features without a geometry. These always overlap.
+        map_bbox: (xmin, ymin, xmax, ymax) tuple
+    """
+    xmin, ymin, xmax, ymax = map_bbox
+    return ~((bboxes[:, 2] < xmin) | (bboxes[:, 0] > xmax) |
+             (bboxes[:, 3] < ymin) | (bboxes[:, 1] > ymax))
+
+
+def scan_features(path, map_bbox=None):
+    """Read the features of a GeoJSON file while building a spatial index.
+
+    Args:
+        path: local path of a GeoJSON file
+        map_bbox: optional (xmin, ymin, xmax, ymax) tuple. Only features that
+            overlap with it are returned.
+
+    Returns:
+        (features, index) tuple where index is a dict with the offset and
+        length in bytes and the bbox of each feature in the file
+    """
+    features = []
+    offsets = []
+    lengths = []
+    bboxes = []
+    with open(path, 'rb') as geojson_file:
+        for feature, offset, length in iter_geojson_features(geojson_file):
+            bbox = get_geometry_bbox(feature.get('geometry'))
+            if bbox is None:
+                bbox = (np.nan, ) * 4
+            offsets.append(offset)
+            lengths.append(length)
+            bboxes.append(bbox)
+            if map_bbox is None or not (
+                    bbox[2] < map_bbox[0] or bbox[0] > map_bbox[2]
+                    or bbox[3] < map_bbox[1] or bbox[1] > map_bbox[3]):
+                features.append(feature)
+
+    index = {
+        'offsets': np.array(offsets, dtype=np.int64),
+        'lengths': np.array(lengths, dtype=np.int64),
+        'bboxes': np.array(bboxes, dtype=np.float64).reshape((-1, 4))
+    }
+    return features, index
+
+
+def read_indexed_features(path, index, map_bbox):
+    """Read the features of a GeoJSON file that overlap with a bbox.
+
+    Args:
+        path: local path of a GeoJSON file
+        index: spatial index of the file returned by scan_features
+        map_bbox: (xmin, ymin, xmax, ymax) tuple
+
+    Returns:
+        list of features in the order they are in the file
+    """
+    inds = np.nonzero(get_overlapping(index['bboxes'], map_bbox))[0]
+    features = []
+    with open(path, 'rb') as geojson_file:
+        for ind in inds:
+            geojson_file.seek(index['offsets'][ind])
+            feature_json = geojson_file.read(index['lengths'][ind])
+            features.append(json.loads(feature_json.decode('utf-8')))
+    return features
 
 
 class GeoJSONVectorSource(VectorSource):
-    def __init__(self, uri, class_inf_opts=None):
+    """A VectorSource that reads a GeoJSON file.
+
+    The file is parsed incrementally. When the source has an extent, only
+    the features whose bounding boxes overlap with the extent are kept.
+    Unless the geojson_index option in the [RV] section of the Raster Vision
+    config is 0, a spatial index of the file is then saved next to a cached
+    copy of it under the temporary directory. Other scenes that use the same
+    file only read the features that overlap with their extent. The least
+    recently used copies and indices are evicted once they take up more than
+    the geojson_index_size option.
+    """
+
+    def __init__(self,
+                 uri,
+                 class_inf_opts=None,
+                 crs_transformer=None,
+                 extent=None):
         """Constructor.
 
         Args:
             uri: (str) uri of GeoJSON file
             class_inf_opts: ClassInferenceOptions
+            crs_transformer: optional CRSTransformer used to find the extent
+                in map coordinates
+            extent: optional Box in pixel coordinates. Features that don't
+                overlap with it may be left out.
         """
         self.uri = uri
+        self.crs_transformer = crs_transformer
+        self.extent = extent
         super().__init__(class_inf_opts)
 
+    def _get_map_bbox(self):
+        if self.extent is None or self.crs_transformer is None:
+            return None
+        return get_map_bbox(self.extent, self.crs_transformer)
+
+    def get_cache_id(self):
+        map_bbox = self._get_map_bbox()
+        if map_bbox is not None:
+            map_bbox = [float(v) for v in map_bbox]
+        return ([
+            type(self).__name__, map_bbox,
+            get_class_inference_key(self.class_inference)
+        ], [self.uri])
+
     def _get_geojson(self):
-        geojson = json.loads(file_to_str(self.uri))
-        return self.class_inference.transform_geojson(geojson)
+        map_bbox = self._get_map_bbox()
+
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        use_index = rv_config('geojson_index', parser=int, default='1')
+        cache_key = None
+        if map_bbox is not None and use_index:
+            cache_key = get_cache_key(type(self).__name__, [self.uri])
+
+        if cache_key is None:
+            with RVConfig.get_tmp_dir() as tmp_dir:
+                path = download_if_needed(self.uri, tmp_dir)
+                features, _ = scan_features(path, map_bbox)
+        else:
+            index_root = os.path.join(RVConfig.get_tmp_dir_root(),
+                                      'geojson-index')
+            cache_dir = os.path.join(index_root, cache_key)
+            make_dir(cache_dir)
+            # The time the entry was modified is when it was last used.
+            os.utime(cache_dir)
+            path = get_cached_file(cache_dir, self.uri)
+            index_path = os.path.join(cache_dir, 'index.npz')
+            index = load_arrays(index_path)
+            if index is None:
+                log.debug('Building spatial index of {}'.format(self.uri))
+                features, index = scan_features(path, map_bbox)
+                save_arrays(index_path, index)
+                max_size = rv_config(
+                    'geojson_index_size', parser=int, default=str(10 * 2**30))
+                evict_least_recently_used(index_root, max_size, keep=cache_dir)
+            else:
+                features = read_indexed_features(path, index, map_bbox)
+
+        geojson = {'type': 'FeatureCollection', 'features': features}
+        # The features were just parsed, so they don't need to be copied.
+        return self.class_inference.transform_geojson(
+            geojson, copy_features=False)
@@ -26,7 +26,9 @@ class GeoJSONVectorSourceConfig(VectorSourceConfig):
             class_inf_opts=ClassInferenceOptions(
                 class_map=class_map,
                 class_id_to_filter=self.class_id_to_filter,
-                default_class_id=self.default_class_id))
+                default_class_id=self.default_class_id),
+            crs_transformer=crs_transformer,
+            extent=extent)
 
     def update_for_command(self,
                            command_type,
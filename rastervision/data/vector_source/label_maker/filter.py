@@ -1,11 +1,26 @@
-# Copied from https://github.com/developmentseed/label-maker/blob/master/label_maker/filter.py
+# Based on https://github.com/developmentseed/label-maker/blob/master/label_maker/filter.py
 # flake8: noqa
-
-# pylint: disable=eval-used,too-many-return-statements
 """Create a feature filtering function from a Mapbox GL Filter."""
 
 # Python port of https://github.com/mapbox/mapbox-gl-js/blob/c9900db279db776f493ce8b6749966cedc2d6b8a/src/style-spec/feature_filter/index.js
 
+import ast
+import operator
+
+# Maximum number of results that each filter remembers.
+MAX_CACHE_SIZE = 2**16
+
+_comparison_ops = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge
+}
+
+_missing = object()
+
 
 def create_filter(filt):
     """Create a feature filtering function from a Mapbox GL Filter.
@@ -23,78 +38,206 @@ def create_filter(filt):
 
     Returns
     --------
-    func: function
+    func: Filter
         A function which evaluates whether a GeoJSON feature meets the input filter criteria
     """
+    return Filter(filt)
+
+
+class Filter():
+    """A Mapbox GL filter compiled into Python functions.
+
+    The filter is compiled once, and its result for a feature only depends
+    on the properties that it refers to. So unless it refers to the type or
+    id of features, results are remembered for each combination of values of
+    those properties, and features that share them aren't evaluated again.
+    """
+
+    def __init__(self, filt):
+        refs = set()
+        self.evaluate = _compile_terms(_compile(filt, refs))
+        self.keys = sorted(refs - {'$type', '$id'}, key=repr)
+        self.cacheable = len(self.keys) == len(refs)
+        self.cache = {}
+
+    def _get_cache_key(self, p):
+        # The type of values is part of the key, so that values like 1 and
+        # True which are equal can't be mixed up.
+        values = []
+        for key in self.keys:
+            value = p.get(key, _missing)
+            values.append(type(value))
+            values.append(value)
+        return tuple(values)
+
+    def __call__(self, f):
+        """Evaluate whether a feature passes the filter."""
+        p = f['properties'] if f else {}
+        if not self.cacheable:
+            return self.evaluate(f, p)
+
+        try:
+            cache_key = self._get_cache_key(p)
+            result = self.cache.get(cache_key)
+        except TypeError:
+            # Some of the values aren't hashable.
+            return self.evaluate(f, p)
+        if result is None:
+            result = self.evaluate(f, p)
+            if len(self.cache) < MAX_CACHE_SIZE:
+                self.cache[cache_key] = result
+        return result
+
+    def filter_features(self, features):
+        """Evaluate the filter on a list of features.
+
+        Returns:
+            list of bools, which are True for features that pass the filter
+        """
+        return [self(f) for f in features]
+
+
+def _literal(s):
+    """Return the value of the Python literal that _stringify(s) is.
+
+    Filters used to be compiled into Python source, so values are parsed
+    the same way to give the same results.
+    """
+    try:
+        return ast.literal_eval(_stringify(s))
+    except (ValueError, SyntaxError):
+        return s
 
-    def func(f):
-        """evaluates whether a given feature passes its filter"""
-        p = f['properties'] if f else {}  # pylint: disable=unused-variable
-        return eval(_compile(filt))
 
-    return func
+def _compile(filt, refs):
+    """Return the compiled filter as a list of terms.
 
+    Terms are functions of the feature f and its properties p, and the
+    strings 'and' and 'or' that join them. Filters used to be compiled into
+    Python source where the expressions of 'any' and 'all' were joined
+    without parentheses, so 'and' binds tighter than 'or' in the list.
 
-def _compile(filt):
-    """Return a string represented the compiled filter function"""
+    Args:
+        filt: Mapbox GL filter
+        refs: set which the properties referred to by the filter are added to
+    """
     if not filt:
-        return 'True'
+        return [_true]
     op = filt[0]
     if len(filt) == 1:
-        return 'False' if op == 'any' else 'True'
-    if op in ['==', '!=', '<', '>', '<=', '>=']:
-        return _compile_comparison_op(filt[1], filt[2], op)
+        return [_false if op == 'any' else _true]
+    if op in _comparison_ops:
+        return [_compile_comparison_op(filt[1], filt[2], op, refs)]
     elif op == 'any':
-        return _compile_logical_op(filt[1:], ' or ')
+        return _compile_logical_op(filt[1:], 'or', refs)
     elif op == 'all':
-        return _compile_logical_op(filt[1:], ' and ')
+        return _compile_logical_op(filt[1:], 'and', refs)
     elif op == 'none':
-        return _compile_negation(_compile_logical_op(filt[1:], ' or '))
+        return [_compile_negation(_compile_logical_op(filt[1:], 'or', refs))]
     elif op == 'in':
-        return _compile_in_op(filt[1], filt[2:])
+        return [_compile_in_op(filt[1], filt[2:], refs)]
     elif op == '!in':
-        return _compile_negation(_compile_in_op(filt[1], filt[2:]))
+        return [_compile_negation([_compile_in_op(filt[1], filt[2:], refs)])]
     elif op == 'has':
-        return _compile_has_op(filt[1])
+        return [_compile_has_op(filt[1], refs)]
     elif op == '!has':
-        return _compile_negation(_compile_has_op(filt[1]))
-    return 'True'
+        return [_compile_negation([_compile_has_op(filt[1], refs)])]
+    return [_true]
 
 
-def _compile_property_reference(prop):
+def _true(f, p):
+    return True
+
+
+def _false(f, p):
+    return False
+
+
+def _compile_terms(terms):
+    """Return a function that evaluates a list of terms.
+
+    Like Python, 'and' binds tighter than 'or' and evaluation stops as soon
+    as the result is known.
+    """
+    groups = [[]]
+    for term in terms:
+        if term == 'or':
+            groups.append([])
+        elif term != 'and':
+            groups[-1].append(term)
+    if len(groups) == 1 and len(groups[0]) == 1:
+        return groups[0][0]
+
+    def evaluate(f, p):
+        return any(all(fn(f, p) for fn in group) for group in groups)
+
+    return evaluate
+
+
+def _compile_property_reference(prop, refs):
     """Find the correct reference on the input feature"""
     if prop == '$type':
-        return 'f.get("geometry").get("type")'
+        refs.add(prop)
+        return lambda f, p: f.get('geometry').get('type')
     elif prop == '$id':
-        return 'f.get("id")'
-    return 'p.get("{}")'.format(prop)
+        refs.add(prop)
+        return lambda f, p: f.get('id')
+    key = _literal(str(prop))
+    refs.add(key)
+    return lambda f, p: p.get(key)
 
 
-def _compile_comparison_op(prop, value, op):
+def _compile_comparison_op(prop, value, op, refs):
     """Combine two values with a comparison operator"""
-    left = _compile_property_reference(prop)
-    right = _stringify(value)
-    return left + op + right
+    left = _compile_property_reference(prop, refs)
+    right = _literal(value)
+    compare = _comparison_ops[op]
+    return lambda f, p: compare(left(f, p), right)
 
 
-def _compile_logical_op(expressions, op):
+def _compile_logical_op(expressions, op, refs):
     """Join multiple logical expressions"""
-    return op.join(map(_compile, expressions))
+    terms = []
+    for ind, expression in enumerate(expressions):
+        if ind > 0:
+            terms.append(op)
+        terms.extend(_compile(expression, refs))
+    return terms
 
 
-def _compile_in_op(prop, values):
+def _compile_in_op(prop, values, refs):
     """Test if a property is within a list of values"""
-    return '{} in {}'.format(_compile_property_reference(prop), values)
+    ref = _compile_property_reference(prop, refs)
+    values = list(values)
+    try:
+        value_set = frozenset(values)
+    except TypeError:
+        return lambda f, p: ref(f, p) in values
 
+    def evaluate(f, p):
+        value = ref(f, p)
+        try:
+            return value in value_set
+        except TypeError:
+            return value in values
 
-def _compile_has_op(prop):
-    """Test if a property exists on a feature"""
-    return '"id" in f' if prop == '$id' else '{} in p'.format(_stringify(prop))
+    return evaluate
 
 
-def _compile_negation(expression):
-    """Negate the input expression"""
-    return 'not ({})'.format(expression)
+def _compile_has_op(prop, refs):
+    """Test if a property exists on a feature"""
+    if prop == '$id':
+        refs.add(prop)
+        return lambda f, p: 'id' in f
+    key = _literal(prop)
+    refs.add(key)
+    return lambda f, p: key in p
+
+
+def _compile_negation(terms):
+    """Negate the input terms"""
+    evaluate = _compile_terms(terms)
+    return lambda f, p: not evaluate(f, p)
 
 
 def _stringify(s):
@@ -0,0 +1,197 @@
+import gc
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+from shapely.geos import WKBReader, WKBWriter, lgeos
+
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import (evict_least_recently_used, TMP_PREFIX)
+
+log = logging.getLogger(__name__)
+
+# Increment this when the format of cached vectors changes.
+VECTOR_CACHE_VERSION = 2
+
+# (shapes, size) of cached vectors that are kept in memory, where size is that
+# of their arrays, keyed by cache key, in order of last use.
+_memory_cache = OrderedDict()
+_memory_cache_lock = threading.Lock()
+
+
+def load_arrays(path):
+    """Load a dict of numpy arrays saved by save_arrays, or None if it can't."""
+    try:
+        with np.load(path) as arrays:
+            return {key: arrays[key] for key in arrays.files}
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def save_arrays(path, arrays):
+    """Save a dict of numpy arrays to an .npz file."""
+    # Write to a temporary file first so that other processes never read
+    # partially written arrays.
+    dir = os.path.dirname(path)
+    os.makedirs(dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=dir, prefix=TMP_PREFIX, suffix='.tmp.npz')
+    with os.fdopen(fd, 'wb') as tmp_file:
+        np.savez(tmp_file, **arrays)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def gc_disabled():
+    """Disable the garbage collector while converting many vectors.
+
+    Otherwise it runs many times while the objects of the vectors are made,
+    which slows conversions down by up to a half.
+    """
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def shapes_to_arrays(shapes):
+    """Convert shapes into compact arrays.
+
+    Args:
+        shapes: list of (shapely.geometry, class_id) tuples, where class_ids
+            are ints
+
+    Returns:
+        dict with the concatenated WKB of the shapes and the offsets of each,
+        and their class_ids, or None if the shapes can't be converted
+    """
+    class_ids = [class_id for _, class_id in shapes]
+    if any(type(class_id) is not int for class_id in class_ids):
+        return None
+    # Writing with one writer is twice as fast as using the wkb property of
+    # each shape.
+    writer = WKBWriter(lgeos)
+    with gc_disabled():
+        wkbs = [writer.write(shape) for shape, _ in shapes]
+    offsets = np.zeros(len(wkbs) + 1, dtype=np.int64)
+    np.cumsum([len(wkb) for wkb in wkbs], out=offsets[1:])
+    return {
+        'wkb': np.frombuffer(b''.join(wkbs), dtype=np.uint8),
+        'wkb_offsets': offsets,
+        'class_ids': np.array(class_ids, dtype=np.int64)
+    }
+
+
+def arrays_to_shapes(arrays):
+    """Convert arrays returned by shapes_to_arrays back into shapes."""
+    data = arrays['wkb'].tobytes()
+    offsets = arrays['wkb_offsets'].tolist()
+    class_ids = arrays['class_ids'].tolist()
+    reader = WKBReader(lgeos)
+    with gc_disabled():
+        return [(reader.read(data[offsets[ind]:offsets[ind + 1]]), class_id)
+                for ind, class_id in enumerate(class_ids)]
+
+
+def _get_size(arrays):
+    return sum(array.nbytes for array in arrays.values())
+
+
+def _put_in_memory(key, shapes, size, max_bytes):
+    if size > max_bytes:
+        return
+    with _memory_cache_lock:
+        _memory_cache[key] = (shapes, size)
+        _memory_cache.move_to_end(key)
+        total_size = sum(s for _, s in _memory_cache.values())
+        while total_size > max_bytes:
+            _, (_, evicted_size) = _memory_cache.popitem(last=False)
+            total_size -= evicted_size
+
+
+def _get_max_bytes():
+    rv_config = RVConfig.get_instance().get_subconfig('RV')
+    return rv_config('vector_cache_size', parser=int, default='536870912')
+
+
+def _get_cache_dir():
+    return os.path.join(RVConfig.get_tmp_dir_root(), 'vector-cache')
+
+
+def _get_cache_path(key):
+    return os.path.join(_get_cache_dir(), '{}.npz'.format(key))
+
+
+def load_shapes(key):
+    """Load cached shapes.
+
+    Shapes are looked up in memory first, and then on disk, where the time
+    the file of an entry was modified is when it was last used.
+
+    Args:
+        key: (str) cache key returned by get_cache_key
+
+    Returns:
+        list of (shapely.geometry, class_id) tuples, or None if they aren't
+        cached. The shapes are shared with other callers.
+    """
+    with _memory_cache_lock:
+        entry = _memory_cache.get(key)
+        if entry is not None:
+            _memory_cache.move_to_end(key)
+            return list(entry[0])
+
+    path = _get_cache_path(key)
+    arrays = load_arrays(path)
+    if arrays is None:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    shapes = arrays_to_shapes(arrays)
+    _put_in_memory(key, shapes, _get_size(arrays), _get_max_bytes())
+    return list(shapes)
+
+
+def save_shapes(key, shapes):
+    """Cache shapes in memory and on disk.
+
+    The vector_cache_size option bounds both the shapes kept in memory and
+    the files saved on disk, and the least recently used ones are evicted
+    when it is exceeded.
+
+    Args:
+        key: (str) cache key returned by get_cache_key
+        shapes: list of (shapely.geometry, class_id) tuples
+
+    Returns:
+        True if the shapes were cached, or False if they can't be
+    """
+    arrays = shapes_to_arrays(shapes)
+    if arrays is None:
+        return False
+    size = _get_size(arrays)
+    max_bytes = _get_max_bytes()
+    _put_in_memory(key, list(shapes), size, max_bytes)
+    if size > max_bytes:
+        return True
+    try:
+        evict_least_recently_used(_get_cache_dir(), max_bytes, extra_size=size)
+        save_arrays(_get_cache_path(key), arrays)
+    except OSError as e:
+        log.debug('Could not cache vectors: {}'.format(e))
+    return True
+
+
+def clear_memory_cache():
+    """Remove all vectors that are cached in memory."""
+    with _memory_cache_lock:
+        _memory_cache.clear()
@@ -1,13 +1,30 @@
+import json
+import logging
 from abc import ABC, abstractmethod
 
+from rastervision.data.raster_source.metadata_cache import get_cache_key
+from rastervision.data.utils import geojson_to_shapes
 from rastervision.data.vector_source.class_inference import (
     ClassInference, ClassInferenceOptions)
+from rastervision.data.vector_source.vector_cache import (
+    VECTOR_CACHE_VERSION, gc_disabled, load_shapes, save_shapes)
+from rastervision.rv_config import RVConfig
+
+log = logging.getLogger(__name__)
 
 
 class VectorSource(ABC):
     """A source of vector data.
 
     Uses GeoJSON as its internal representation of vector data.
+
+    Unless the vector_cache option in the [RV] section of the Raster Vision
+    config is 0, the shapes returned by get_shapes for sources that describe
+    their GeoJSON using get_cache_id, and CRS transformers that describe
+    themselves, are cached in memory and as WKB under the temporary
+    directory. Other sources in the same process, and in later commands,
+    that have the same descriptions then don't read, parse and transform the
+    vectors again.
     """
 
     def __init__(self, class_inf_opts=None):
@@ -26,6 +43,58 @@ class VectorSource(ABC):
             self.geojson = self._get_geojson()
         return self.geojson
 
+    def get_shapes(self, crs_transformer):
+        """Return the shapes of the GeoJSON in pixel coordinates.
+
+        Args:
+            crs_transformer: CRSTransformer used to convert from map to pixel
+                coords
+
+        Returns:
+            List of (shapely.geometry, class_id) tuples, as returned by
+            geojson_to_shapes. The shapes may be shared with other sources.
+        """
+        cache_key = self._get_cache_key(crs_transformer)
+        if cache_key is not None:
+            shapes = load_shapes(cache_key)
+            if shapes is not None:
+                return shapes
+
+        geojson = self.get_geojson()
+        with gc_disabled():
+            shapes = geojson_to_shapes(geojson, crs_transformer)
+        if cache_key is not None and not save_shapes(cache_key, shapes):
+            log.debug('Could not cache vectors of {}'.format(
+                type(self).__name__))
+        return shapes
+
+    def get_cache_id(self):
+        """Return a description of the GeoJSON of this source.
+
+        Sources with the same description have the same GeoJSON as long as
+        the files they read don't change.
+
+        Returns:
+            (name, uris) tuple where name is JSON serializable and uris are
+            the URIs of the files that are read, or None if the GeoJSON
+            shouldn't be cached
+        """
+        return None
+
+    def _get_cache_key(self, crs_transformer):
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        if not rv_config('vector_cache', parser=int, default='1'):
+            return None
+        cache_id = self.get_cache_id()
+        crs_transformer_id = crs_transformer.get_cache_id()
+        if cache_id is None or crs_transformer_id is None:
+            return None
+        name, uris = cache_id
+        return get_cache_key(
+            json.dumps([
+                'VectorCache', VECTOR_CACHE_VERSION, name, crs_transformer_id
+            ]), uris)
+
     @abstractmethod
     def _get_geojson(self):
         pass
@@ -0,0 +1,249 @@
+import gzip
+import math
+import sqlite3
+
+import numpy as np
+
+from rastervision.protos.vector_tile_pb2 import VectorTile
+
+# Geometry commands of the Mapbox Vector Tile specification.
+MOVE_TO = 1
+LINE_TO = 2
+CLOSE_PATH = 7
+
+SQLITE_HEADER = b'SQLite format 3\x00'
+
+
+def read_tile(tile_path, z, x, y):
+    """Read the bytes of a vector tile.
+
+    Args:
+        tile_path: (str) path of an .mbtiles file, or of a file with a single
+            (optionally gzipped) vector tile
+        z, x, y: (int) coordinates of the tile, which are used to look it up
+            in .mbtiles files
+
+    Returns:
+        (bytes) the uncompressed tile, or None if an .mbtiles file doesn't
+            contain the tile
+    """
+    with open(tile_path, 'rb') as tile_file:
+        data = tile_file.read(len(SQLITE_HEADER))
+        if data != SQLITE_HEADER:
+            data += tile_file.read()
+
+    if data == SQLITE_HEADER:
+        # The rows of .mbtiles files use the TMS scheme, which counts from
+        # the bottom.
+        conn = sqlite3.connect(tile_path)
+        try:
+            row = conn.execute(
+                'SELECT tile_data FROM tiles WHERE zoom_level = ? AND '
+                'tile_column = ? AND tile_row = ?',
+                (z, x, (1 << z) - 1 - y)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        data = bytes(row[0])
+
+    if data[0:2] == b'\x1f\x8b':
+        data = gzip.decompress(data)
+    return data
+
+
+def decode_value(value):
+    """Return the Python value of a VectorTile.Value."""
+    if value.HasField('string_value'):
+        return value.string_value
+    if value.HasField('float_value'):
+        # Use the shortest representation of the float32.
+        return float(repr(np.float32(value.float_value)))
+    if value.HasField('double_value'):
+        return value.double_value
+    if value.HasField('int_value'):
+        return value.int_value
+    if value.HasField('uint_value'):
+        return value.uint_value
+    if value.HasField('sint_value'):
+        return value.sint_value
+    if value.HasField('bool_value'):
+        return value.bool_value
+    return None
+
+
+def decode_commands(geometry):
+    """Decode the geometry commands of a feature.
+
+    Args:
+        geometry: list of ints encoding the commands
+
+    Returns:
+        list of (command, x, y) tuples in tile coordinates. The coordinates of
+            CLOSE_PATH commands are those of the start of the ring.
+    """
+    commands = []
+    x = y = 0
+    start = (0, 0)
+    i = 0
+    while i < len(geometry):
+        command = geometry[i] & 0x7
+        count = geometry[i] >> 3
+        i += 1
+        if command == CLOSE_PATH:
+            commands.extend([(CLOSE_PATH, start[0], start[1])] * count)
+            continue
+        for _ in range(count):
+            # Parameters are zigzag encoded deltas.
+            dx, dy = geometry[i], geometry[i + 1]
+            x += (dx >> 1) ^ -(dx & 1)
+            y += (dy >> 1) ^ -(dy & 1)
+            i += 2
+            if command == MOVE_TO:
+                start = (x, y)
+            commands.append((command, x, y))
+    return commands
+
+
+def _ring_area(ring):
+    """Return the signed area of a ring in tile coordinates.
+
+    The area is positive for outer rings, which are clockwise since the y
+    axis of tile coordinates points down.
+    """
+    area = 0
+    for k in range(len(ring)):
+        x1, y1 = ring[k]
+        x2, y2 = ring[(k + 1) % len(ring)]
+        area += x1 * y2 - y1 * x2
+    return area / 2
+
+
+def _split(commands):
+    """Split commands into lists that each start with MOVE_TO."""
+    parts = []
+    for command in commands:
+        if command[0] == MOVE_TO or not parts:
+            parts.append([])
+        parts[-1].append(command)
+    return parts
+
+
+def decode_geometry(geom_type, commands, to_lon_lat):
+    """Return the GeoJSON geometry of a feature.
+
+    Args:
+        geom_type: VectorTile.GeomType of the feature
+        commands: output of decode_commands
+        to_lon_lat: function mapping a list of (x, y) tile coordinates to a
+            list of [lon, lat] coordinates
+
+    Returns:
+        GeoJSON geometry dict, or None if the feature has no geometry
+    """
+    if not commands:
+        return None
+
+    if geom_type == VectorTile.POINT:
+        points = to_lon_lat([(x, y) for _, x, y in commands])
+        if len(points) == 1:
+            return {'type': 'Point', 'coordinates': points[0]}
+        return {'type': 'MultiPoint', 'coordinates': points}
+
+    if geom_type == VectorTile.LINESTRING:
+        lines = [
+            to_lon_lat([(x, y) for c, x, y in part if c != CLOSE_PATH])
+            for part in _split(commands)
+        ]
+        if len(lines) == 1:
+            return {'type': 'LineString', 'coordinates': lines[0]}
+        return {'type': 'MultiLineString', 'coordinates': lines}
+
+    if geom_type == VectorTile.POLYGON:
+        # Rings are closed by repeating their first point. Each outer ring
+        # starts a new polygon, and the inner rings after it are its holes.
+        polygons = []
+        for ind, part in enumerate(_split(commands)):
+            ring = [(x, y) for _, x, y in part]
+            if ind == 0 or _ring_area(ring) >= 0:
+                polygons.append([])
+            polygons[-1].append(to_lon_lat(ring))
+        if len(polygons) == 1:
+            return {'type': 'Polygon', 'coordinates': polygons[0]}
+        return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+    return None
+
+
+def decode_tile(data, z, x, y):
+    """Decode a vector tile into GeoJSON features.
+
+    The features are the same as those output by ``tippecanoe-decode -c``.
+    Coordinates are longitudes and latitudes rounded to 6 decimal places,
+    and the layer and zoom of each feature are in its tippecanoe member.
+
+    Args:
+        data: (bytes) uncompressed vector tile, or None for an empty tile
+        z, x, y: (int) coordinates of the tile
+
+    Returns:
+        list of GeoJSON features
+    """
+    if not data:
+        return []
+
+    tile = VectorTile()
+    tile.ParseFromString(data)
+
+    # Tile coordinates are converted to world coordinates with 32 bits of
+    # precision, and then to longitudes and latitudes.
+    world_size = 2**32
+    tile_scale = 1 << (32 - z)
+
+    features = []
+    for layer in tile.layers:
+        pixel_scale = tile_scale // layer.extent
+        values = [decode_value(value) for value in layer.values]
+
+        def to_lon_lat(points):
+            lon_lats = []
+            for px, py in points:
+                wx = tile_scale * x + pixel_scale * px
+                wy = tile_scale * y + pixel_scale * py
+                lon = 360.0 * wx / world_size - 180.0
+                lat = math.atan(
+                    math.sinh(math.pi *
+                              (1 - 2.0 * wy / world_size))) * 180.0 / math.pi
+                lon_lats.append(
+                    [float('{:f}'.format(lon)),
+                     float('{:f}'.format(lat))])
+            return lon_lats
+
+        for tile_feature in layer.features:
+            geometry = decode_geometry(tile_feature.type,
+                                       decode_commands(tile_feature.geometry),
+                                       to_lon_lat)
+            if geometry is None:
+                continue
+
+            tags = tile_feature.tags
+            properties = {
+                layer.keys[tags[i]]: values[tags[i + 1]]
+                for i in range(0,
+                               len(tags) - 1, 2)
+            }
+            feature = {
+                'type': 'Feature',
+                'properties': properties,
+                'geometry': geometry,
+                'tippecanoe': {
+                    'layer': layer.name,
+                    'minzoom': z,
+                    'maxzoom': z
+                }
+            }
+            if tile_feature.HasField('id'):
+                feature['id'] = tile_feature.id
+            features.append(feature)
+
+    return features
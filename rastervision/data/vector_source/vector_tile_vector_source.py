@@ -1,20 +1,28 @@
 import json
 import logging
 import copy
-from subprocess import check_output
 import os
-from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
 from supermercado.burntiles import burn
 from shapely.geometry import shape, mapping
 from shapely.ops import cascaded_union
 
+from rastervision.data.raster_source.metadata_cache import (MetadataCache,
+                                                            get_cache_key)
+from rastervision.data.vector_source.class_inference import (
+    get_class_inference_key)
 from rastervision.data.vector_source.vector_source import VectorSource
+from rastervision.data.vector_source.vector_tile_decoder import (decode_tile,
+                                                                 read_tile)
 from rastervision.utils.files import get_cached_file
 from rastervision.rv_config import RVConfig
 
 log = logging.getLogger(__name__)
 
+# Increment this when the format of the cached features of tiles changes.
+FEATURE_CACHE_VERSION = 1
+
 
 def merge_geojson(geojson, id_field):
     """Merge features that share an id.
@@ -51,20 +59,84 @@ def merge_geojson(geojson, id_field):
     return {'type': 'FeatureCollection', 'features': proc_features}
 
 
-@lru_cache(maxsize=32)
 def get_tile_features(tile_uri, z, x, y):
-    """Get GeoJSON features for a specific tile using in-memory caching."""
+    """Get GeoJSON features for a specific tile.
+
+    The tile is decoded in-process into the features that
+    ``tippecanoe-decode -c`` outputs.
+
+    Args:
+        tile_uri: (str) URI of the tile, or of an .mbtiles file that contains
+            it
+        z, x, y: (int) coordinates of the tile
+
+    Returns:
+        list of GeoJSON features
+    """
     cache_dir = os.path.join(RVConfig.get_tmp_dir_root(), 'vector-tiles')
     tile_path = get_cached_file(cache_dir, tile_uri)
-    cmd = ['tippecanoe-decode', '-f', '-c', tile_path, str(z), str(x), str(y)]
-    tile_geojson_str = check_output(cmd).decode('utf-8')
-    tile_features = [json.loads(ts) for ts in tile_geojson_str.split('\n')]
+    return decode_tile(read_tile(tile_path, z, x, y), z, x, y)
+
+
+def get_inferred_tile_features(tile_uri, z, x, y, class_inference,
+                               feature_cache):
+    """Get class inferred GeoJSON features for a tile, using a disk cache.
+
+    Args:
+        tile_uri: (str) URI of the tile, or of an .mbtiles file that contains
+            it
+        z, x, y: (int) coordinates of the tile
+        class_inference: (ClassInference) used to infer the class_id of the
+            features. Features with no class are dropped.
+        feature_cache: (MetadataCache) cache of the features of tiles, or
+            None to not use one
+
+    Returns:
+        list of GeoJSON features
+    """
+    cache_key = None
+    if feature_cache is not None:
+        name = json.dumps([
+            'VectorTileFeatures', FEATURE_CACHE_VERSION, z, x, y,
+            get_class_inference_key(class_inference)
+        ])
+        cache_key = get_cache_key(name, [tile_uri])
+        if cache_key is not None:
+            features = feature_cache.get(cache_key)
+            if features is not None:
+                return features
+
+    geojson = {
+        'type': 'FeatureCollection',
+        'features': get_tile_features(tile_uri, z, x, y)
+    }
+    features = class_inference.transform_geojson(geojson)['features']
+
+    if cache_key is not None:
+        feature_cache.put(cache_key, features)
+    return features
 
-    return tile_features
 
+def vector_tile_to_geojson(uri, zoom, map_extent, class_inference=None):
+    """Get GeoJSON features that overlap with an extent from a vector tile endpoint.
 
-def vector_tile_to_geojson(uri, zoom, map_extent):
-    """Get GeoJSON features that overlap with an extent from a vector tile endpoint."""
+    The tiles are read by a pool of threads whose size is set by the
+    vector_tile_num_threads option in the [RV] section of the Raster Vision
+    config. Unless the vector_tile_cache option is 0, the class inferred
+    features of each tile are cached under the temporary directory, so that
+    they are shared by scenes and commands that use the same tiles. The least
+    recently used ones are evicted once they take up more than the
+    vector_tile_cache_size option.
+
+    Args:
+        uri: (str) URI of vector tile endpoint. Should either contain
+            {z}/{x}/{y} or point to .mbtiles file.
+        zoom: (int) valid zoom level to use when fetching tiles from endpoint
+        map_extent: (Box) extent in map coordinates
+        class_inference: (ClassInference) used to infer the class_id of the
+            features, dropping features with no class. If None, the features
+            are returned as is and aren't cached.
+    """
     log.info('Downloading and converting vector tiles to GeoJSON...')
 
     # Figure out which tiles cover the extent.
@@ -78,14 +150,41 @@ def vector_tile_to_geojson(uri, zoom, map_extent):
     }]
     xyzs = burn(extent_polys, zoom)
 
-    # Retrieve tile features.
-    features = []
-    for xyz in xyzs:
-        x, y, z = xyz
+    rv_config = RVConfig.get_instance().get_subconfig('RV')
+    num_threads = rv_config('vector_tile_num_threads', parser=int, default='8')
+    use_cache = rv_config('vector_tile_cache', parser=int, default='1')
+    feature_cache = None
+    if use_cache and class_inference is not None:
+        max_size = rv_config(
+            'vector_tile_cache_size', parser=int, default=str(2**30))
+        feature_cache = MetadataCache(
+            os.path.join(RVConfig.get_tmp_dir_root(), 'vector-tile-features'),
+            max_size=max_size)
+
+    def get_features(xyz):
+        x, y, z = [int(v) for v in xyz]
         # If this isn't a zxy schema, this is a no-op.
         tile_uri = uri.format(x=x, y=y, z=z)
-        tile_features = get_tile_features(tile_uri, z, x, y)
+        if class_inference is None:
+            return get_tile_features(tile_uri, z, x, y)
+        return get_inferred_tile_features(tile_uri, z, x, y, class_inference,
+                                          feature_cache)
+
+    # Retrieve tile features.
+    features = []
+    if num_threads <= 1 or len(xyzs) <= 1:
+        tiles_features = map(get_features, xyzs)
+    else:
+        # An .mbtiles file is downloaded once before the threads read from it.
+        if uri.format(x=0, y=0, z=0) == uri:
+            get_cached_file(
+                os.path.join(RVConfig.get_tmp_dir_root(), 'vector-tiles'), uri)
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            tiles_features = list(executor.map(get_features, xyzs))
+    for tile_features in tiles_features:
         features.extend(tile_features)
+    if feature_cache is not None:
+        feature_cache.evict()
 
     # Crop features to extent
     extent_geom = map_extent.to_shapely()
@@ -131,19 +230,34 @@ class VectorTileVectorSource(VectorSource):
         self.extent = extent
         super().__init__(class_inf_opts)
 
-    def _get_geojson(self):
-        # This attempts to do things in an efficient order. First, we extract raw
-        # GeoJSON from the vector tiles covering the extent. This uses caching, so that
-        # we never have to process the same vector tile twice (even across scenes). Then,
-        # we infer class ids, which drops any irrelevant features which should speed up
-        # the next phase which merges features that are split across tiles.
-        map_extent = self.extent.reproject(
+    def _get_map_extent(self):
+        return self.extent.reproject(
             lambda point: self.crs_transformer.pixel_to_map(point))
+
+    def get_cache_id(self):
+        # Only .mbtiles files are cached, since other URIs are templates of
+        # the URIs of tiles, which are cached separately.
+        if self.uri.format(x=0, y=0, z=0) != self.uri:
+            return None
+        map_extent = self._get_map_extent()
+        return ([
+            type(self).__name__, self.zoom, self.id_field,
+            [float(v) for v in map_extent.tuple_format()],
+            get_class_inference_key(self.class_inference)
+        ], [self.uri])
+
+    def _get_geojson(self):
+        # This attempts to do things in an efficient order. First, we extract
+        # GeoJSON from the vector tiles covering the extent, inferring class ids,
+        # which drops any irrelevant features. The features of each tile are
+        # cached on disk, so that we never have to process the same vector tile
+        # twice (even across scenes and commands). This speeds up the next phase
+        # which merges features that are split across tiles.
+        map_extent = self._get_map_extent()
         log.debug(
             'Reading and converting vector tiles to GeoJSON for extent...')
-        geojson = vector_tile_to_geojson(self.uri, self.zoom, map_extent)
-        log.debug('Inferring class_ids...')
-        geojson = self.class_inference.transform_geojson(geojson)
+        geojson = vector_tile_to_geojson(self.uri, self.zoom, map_extent,
+                                         self.class_inference)
         log.debug('Merging GeoJSON features...')
         geojson = merge_geojson(geojson, self.id_field)
         return geojson
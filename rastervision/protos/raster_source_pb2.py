@@ -22,7 +22,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   name='rastervision/protos/raster_source.proto',
   package='rv.protos',
   syntax='proto2',
-  serialized_pb=_b('\n\'rastervision/protos/raster_source.proto\x12\trv.protos\x1a\x1cgoogle/protobuf/struct.proto\x1a,rastervision/protos/raster_transformer.proto\x1a\'rastervision/protos/vector_source.proto\"\xf5\x07\n\x12RasterSourceConfig\x12\x13\n\x0bsource_type\x18\x01 \x02(\t\x12\x38\n\x0ctransformers\x18\x02 \x03(\x0b\x32\".rv.protos.RasterTransformerConfig\x12\x15\n\rchannel_order\x18\x03 \x03(\x05\x12\x43\n\rgeotiff_files\x18\x04 \x01(\x0b\x32*.rv.protos.RasterSourceConfig.GeoTiffFilesH\x00\x12=\n\nimage_file\x18\x05 \x01(\x0b\x32\'.rv.protos.RasterSourceConfig.ImageFileH\x00\x12\x41\n\x0cgeojson_file\x18\x06 \x01(\x0b\x32).rv.protos.RasterSourceConfig.GeoJSONFileH\x00\x12\x30\n\rcustom_config\x18\x07 \x01(\x0b\x32\x17.google.protobuf.StructH\x00\x12K\n\x11rasterized_source\x18\x08 \x01(\x0b\x32..rv.protos.RasterSourceConfig.RasterizedSourceH\x00\x1aL\n\x0cGeoTiffFiles\x12\x0c\n\x04uris\x18\x01 \x03(\t\x12\x16\n\x0ex_shift_meters\x18\x02 \x01(\x02\x12\x16\n\x0ey_shift_meters\x18\x03 \x01(\x02\x1a\x18\n\tImageFile\x12\x0b\n\x03uri\x18\x01 \x02(\t\x1a\xf1\x01\n\x10RasterizedSource\x12\x34\n\rvector_source\x18\x01 \x02(\x0b\x32\x1d.rv.protos.VectorSourceConfig\x12\\\n\x12rasterizer_options\x18\x02 \x02(\x0b\x32@.rv.protos.RasterSourceConfig.RasterizedSource.RasterizerOptions\x1aI\n\x11RasterizerOptions\x12\x1b\n\x13\x62\x61\x63kground_class_id\x18\x02 \x02(\x05\x12\x17\n\x0bline_buffer\x18\x03 \x01(\x05:\x02\x31\x35\x1a\xbe\x01\n\x0bGeoJSONFile\x12\x0b\n\x03uri\x18\x01 \x02(\t\x12W\n\x12rasterizer_options\x18\x02 \x02(\x0b\x32;.rv.protos.RasterSourceConfig.GeoJSONFile.RasterizerOptions\x1aI\n\x11RasterizerOptions\x12\x1b\n\x13\x62\x61\x63kground_class_id\x18\x02 \x02(\x05\x12\x17\n\x0bline_buffer\x18\x03 \x01(\x05:\x02\x31\x35\x42\x16\n\x14raster_source_config')
+  serialized_pb=_b('\n\'rastervision/protos/raster_source.proto\x12\trv.protos\x1a\x1cgoogle/protobuf/struct.proto\x1a,rastervision/protos/raster_transformer.proto\x1a\'rastervision/protos/vector_source.proto\"\xa1\n\n\x12RasterSourceConfig\x12\x13\n\x0bsource_type\x18\x01 \x02(\t\x12\x38\n\x0ctransformers\x18\x02 \x03(\x0b\x32\".rv.protos.RasterTransformerConfig\x12\x15\n\rchannel_order\x18\x03 \x03(\x05\x12\x1a\n\x0bmaterialize\x18\t \x01(\x08:\x05\x66\x61lse\x12\x43\n\rgeotiff_files\x18\x04 \x01(\x0b\x32*.rv.protos.RasterSourceConfig.GeoTiffFilesH\x00\x12=\n\nimage_file\x18\x05 \x01(\x0b\x32\'.rv.protos.RasterSourceConfig.ImageFileH\x00\x12\x41\n\x0cgeojson_file\x18\x06 \x01(\x0b\x32).rv.protos.RasterSourceConfig.GeoJSONFileH\x00\x12\x30\n\rcustom_config\x18\x07 \x01(\x0b\x32\x17.google.protobuf.StructH\x00\x12K\n\x11rasterized_source\x18\x08 \x01(\x0b\x32..rv.protos.RasterSourceConfig.RasterizedSourceH\x00\x12N\n\x13multi_raster_source\x18\n \x01(\x0b\x32/.rv.protos.RasterSourceConfig.MultiRasterSourceH\x00\x1a\x63\n\x0cGeoTiffFiles\x12\x0c\n\x04uris\x18\x01 \x03(\t\x12\x16\n\x0ex_shift_meters\x18\x02 \x01(\x02\x12\x16\n\x0ey_shift_meters\x18\x03 \x01(\x02\x12\x15\n\x06stream\x18\x04 \x01(\x08:\x05\x66\x61lse\x1a\x18\n\tImageFile\x12\x0b\n\x03uri\x18\x01 \x02(\t\x1a\x90\x02\n\x10RasterizedSource\x12\x34\n\rvector_source\x18\x01 \x02(\x0b\x32\x1d.rv.protos.VectorSourceConfig\x12\\\n\x12rasterizer_options\x18\x02 \x02(\x0b\x32@.rv.protos.RasterSourceConfig.RasterizedSource.RasterizerOptions\x1ah\n\x11RasterizerOptions\x12\x1b\n\x13\x62\x61\x63kground_class_id\x18\x02 \x02(\x05\x12\x17\n\x0bline_buffer\x18\x03 \x01(\x05:\x02\x31\x35\x12\x1d\n\x0erasterize_once\x18\x04 \x01(\x08:\x05\x66\x61lse\x1a\xbe\x01\n\x0bGeoJSONFile\x12\x0b\n\x03uri\x18\x01 \x02(\t\x12W\n\x12rasterizer_options\x18\x02 \x02(\x0b\x32;.rv.protos.RasterSourceConfig.GeoJSONFile.RasterizerOptions\x1aI\n\x11RasterizerOptions\x12\x1b\n\x13\x62\x61\x63kground_class_id\x18\x02 \x02(\x05\x12\x17\n\x0bline_buffer\x18\x03 \x01(\x05:\x02\x31\x35\x1a\x87\x01\n\x11MultiRasterSource\x12\x35\n\x0eraster_sources\x18\x01 \x03(\x0b\x32\x1d.rv.protos.RasterSourceConfig\x12\x1d\n\x12primary_source_idx\x18\x02 \x01(\x05:\x01\x30\x12\x1c\n\nresampling\x18\x03 \x01(\t:\x08\x62ilinearB\x16\n\x14raster_source_config')
   ,
   dependencies=[google_dot_protobuf_dot_struct__pb2.DESCRIPTOR,rastervision_dot_protos_dot_raster__transformer__pb2.DESCRIPTOR,rastervision_dot_protos_dot_vector__source__pb2.DESCRIPTOR,])
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
@@ -58,6 +58,13 @@ _RASTERSOURCECONFIG_GEOTIFFFILES = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='stream', full_name='rv.protos.RasterSourceConfig.GeoTiffFiles.stream', index=3,
+      number=4, type=8, cpp_type=7, label=1,
+      has_default_value=True, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -70,8 +77,8 @@ _RASTERSOURCECONFIG_GEOTIFFFILES = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=622,
-  serialized_end=698,
+  serialized_start=730,
+  serialized_end=829,
 )
 
 _RASTERSOURCECONFIG_IMAGEFILE = _descriptor.Descriptor(
@@ -100,8 +107,8 @@ _RASTERSOURCECONFIG_IMAGEFILE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=700,
-  serialized_end=724,
+  serialized_start=831,
+  serialized_end=855,
 )
 
 _RASTERSOURCECONFIG_RASTERIZEDSOURCE_RASTERIZEROPTIONS = _descriptor.Descriptor(
@@ -125,6 +132,13 @@ _RASTERSOURCECONFIG_RASTERIZEDSOURCE_RASTERIZEROPTIONS = _descriptor.Descriptor(
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='rasterize_once', full_name='rv.protos.RasterSourceConfig.RasterizedSource.RasterizerOptions.rasterize_once', index=2,
+      number=4, type=8, cpp_type=7, label=1,
+      has_default_value=True, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
@@ -137,8 +151,8 @@ _RASTERSOURCECONFIG_RASTERIZEDSOURCE_RASTERIZEROPTIONS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=895,
-  serialized_end=968,
+  serialized_start=1026,
+  serialized_end=1130,
 )
 
 _RASTERSOURCECONFIG_RASTERIZEDSOURCE = _descriptor.Descriptor(
@@ -174,8 +188,8 @@ _RASTERSOURCECONFIG_RASTERIZEDSOURCE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=727,
-  serialized_end=968,
+  serialized_start=858,
+  serialized_end=1130,
 )
 
 _RASTERSOURCECONFIG_GEOJSONFILE_RASTERIZEROPTIONS = _descriptor.Descriptor(
@@ -211,8 +225,8 @@ _RASTERSOURCECONFIG_GEOJSONFILE_RASTERIZEROPTIONS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=895,
-  serialized_end=968,
+  serialized_start=1026,
+  serialized_end=1099,
 )
 
 _RASTERSOURCECONFIG_GEOJSONFILE = _descriptor.Descriptor(
@@ -248,8 +262,52 @@ _RASTERSOURCECONFIG_GEOJSONFILE = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=971,
-  serialized_end=1161,
+  serialized_start=1133,
+  serialized_end=1323,
+)
+
+_RASTERSOURCECONFIG_MULTIRASTERSOURCE = _descriptor.Descriptor(
+  name='MultiRasterSource',
+  full_name='rv.protos.RasterSourceConfig.MultiRasterSource',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='raster_sources', full_name='rv.protos.RasterSourceConfig.MultiRasterSource.raster_sources', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='primary_source_idx', full_name='rv.protos.RasterSourceConfig.MultiRasterSource.primary_source_idx', index=1,
+      number=2, type=5, cpp_type=1, label=1,
+      has_default_value=True, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='resampling', full_name='rv.protos.RasterSourceConfig.MultiRasterSource.resampling', index=2,
+      number=3, type=9, cpp_type=9, label=1,
+      has_default_value=True, default_value=_b("bilinear").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=1326,
+  serialized_end=1461,
 )
 
 _RASTERSOURCECONFIG = _descriptor.Descriptor(
@@ -281,44 +339,58 @@ _RASTERSOURCECONFIG = _descriptor.Descriptor(
       is_extension=False, extension_scope=None,
       options=None),
     _descriptor.FieldDescriptor(
-      name='geotiff_files', full_name='rv.protos.RasterSourceConfig.geotiff_files', index=3,
+      name='materialize', full_name='rv.protos.RasterSourceConfig.materialize', index=3,
+      number=9, type=8, cpp_type=7, label=1,
+      has_default_value=True, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='geotiff_files', full_name='rv.protos.RasterSourceConfig.geotiff_files', index=4,
       number=4, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
     _descriptor.FieldDescriptor(
-      name='image_file', full_name='rv.protos.RasterSourceConfig.image_file', index=4,
+      name='image_file', full_name='rv.protos.RasterSourceConfig.image_file', index=5,
       number=5, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
     _descriptor.FieldDescriptor(
-      name='geojson_file', full_name='rv.protos.RasterSourceConfig.geojson_file', index=5,
+      name='geojson_file', full_name='rv.protos.RasterSourceConfig.geojson_file', index=6,
       number=6, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
     _descriptor.FieldDescriptor(
-      name='custom_config', full_name='rv.protos.RasterSourceConfig.custom_config', index=6,
+      name='custom_config', full_name='rv.protos.RasterSourceConfig.custom_config', index=7,
       number=7, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
     _descriptor.FieldDescriptor(
-      name='rasterized_source', full_name='rv.protos.RasterSourceConfig.rasterized_source', index=7,
+      name='rasterized_source', full_name='rv.protos.RasterSourceConfig.rasterized_source', index=8,
       number=8, type=11, cpp_type=10, label=1,
       has_default_value=False, default_value=None,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       options=None),
+    _descriptor.FieldDescriptor(
+      name='multi_raster_source', full_name='rv.protos.RasterSourceConfig.multi_raster_source', index=9,
+      number=10, type=11, cpp_type=10, label=1,
+      has_default_value=False, default_value=None,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
   ],
   extensions=[
   ],
-  nested_types=[_RASTERSOURCECONFIG_GEOTIFFFILES, _RASTERSOURCECONFIG_IMAGEFILE, _RASTERSOURCECONFIG_RASTERIZEDSOURCE, _RASTERSOURCECONFIG_GEOJSONFILE, ],
+  nested_types=[_RASTERSOURCECONFIG_GEOTIFFFILES, _RASTERSOURCECONFIG_IMAGEFILE, _RASTERSOURCECONFIG_RASTERIZEDSOURCE, _RASTERSOURCECONFIG_GEOJSONFILE, _RASTERSOURCECONFIG_MULTIRASTERSOURCE, ],
   enum_types=[
   ],
   options=None,
@@ -331,7 +403,7 @@ _RASTERSOURCECONFIG = _descriptor.Descriptor(
       index=0, containing_type=None, fields=[]),
   ],
   serialized_start=172,
-  serialized_end=1185,
+  serialized_end=1485,
 )
 
 _RASTERSOURCECONFIG_GEOTIFFFILES.containing_type = _RASTERSOURCECONFIG
@@ -343,12 +415,15 @@ _RASTERSOURCECONFIG_RASTERIZEDSOURCE.containing_type = _RASTERSOURCECONFIG
 _RASTERSOURCECONFIG_GEOJSONFILE_RASTERIZEROPTIONS.containing_type = _RASTERSOURCECONFIG_GEOJSONFILE
 _RASTERSOURCECONFIG_GEOJSONFILE.fields_by_name['rasterizer_options'].message_type = _RASTERSOURCECONFIG_GEOJSONFILE_RASTERIZEROPTIONS
 _RASTERSOURCECONFIG_GEOJSONFILE.containing_type = _RASTERSOURCECONFIG
+_RASTERSOURCECONFIG_MULTIRASTERSOURCE.fields_by_name['raster_sources'].message_type = _RASTERSOURCECONFIG
+_RASTERSOURCECONFIG_MULTIRASTERSOURCE.containing_type = _RASTERSOURCECONFIG
 _RASTERSOURCECONFIG.fields_by_name['transformers'].message_type = rastervision_dot_protos_dot_raster__transformer__pb2._RASTERTRANSFORMERCONFIG
 _RASTERSOURCECONFIG.fields_by_name['geotiff_files'].message_type = _RASTERSOURCECONFIG_GEOTIFFFILES
 _RASTERSOURCECONFIG.fields_by_name['image_file'].message_type = _RASTERSOURCECONFIG_IMAGEFILE
 _RASTERSOURCECONFIG.fields_by_name['geojson_file'].message_type = _RASTERSOURCECONFIG_GEOJSONFILE
 _RASTERSOURCECONFIG.fields_by_name['custom_config'].message_type = google_dot_protobuf_dot_struct__pb2._STRUCT
 _RASTERSOURCECONFIG.fields_by_name['rasterized_source'].message_type = _RASTERSOURCECONFIG_RASTERIZEDSOURCE
+_RASTERSOURCECONFIG.fields_by_name['multi_raster_source'].message_type = _RASTERSOURCECONFIG_MULTIRASTERSOURCE
 _RASTERSOURCECONFIG.oneofs_by_name['raster_source_config'].fields.append(
   _RASTERSOURCECONFIG.fields_by_name['geotiff_files'])
 _RASTERSOURCECONFIG.fields_by_name['geotiff_files'].containing_oneof = _RASTERSOURCECONFIG.oneofs_by_name['raster_source_config']
@@ -364,6 +439,9 @@ _RASTERSOURCECONFIG.fields_by_name['custom_config'].containing_oneof = _RASTERSO
 _RASTERSOURCECONFIG.oneofs_by_name['raster_source_config'].fields.append(
   _RASTERSOURCECONFIG.fields_by_name['rasterized_source'])
 _RASTERSOURCECONFIG.fields_by_name['rasterized_source'].containing_oneof = _RASTERSOURCECONFIG.oneofs_by_name['raster_source_config']
+_RASTERSOURCECONFIG.oneofs_by_name['raster_source_config'].fields.append(
+  _RASTERSOURCECONFIG.fields_by_name['multi_raster_source'])
+_RASTERSOURCECONFIG.fields_by_name['multi_raster_source'].containing_oneof = _RASTERSOURCECONFIG.oneofs_by_name['raster_source_config']
 DESCRIPTOR.message_types_by_name['RasterSourceConfig'] = _RASTERSOURCECONFIG
 
 RasterSourceConfig = _reflection.GeneratedProtocolMessageType('RasterSourceConfig', (_message.Message,), dict(
@@ -409,6 +487,13 @@ RasterSourceConfig = _reflection.GeneratedProtocolMessageType('RasterSourceConfi
     # @@protoc_insertion_point(class_scope:rv.protos.RasterSourceConfig.GeoJSONFile)
     ))
   ,
+
+  MultiRasterSource = _reflection.GeneratedProtocolMessageType('MultiRasterSource', (_message.Message,), dict(
+    DESCRIPTOR = _RASTERSOURCECONFIG_MULTIRASTERSOURCE,
+    __module__ = 'rastervision.protos.raster_source_pb2'
+    # @@protoc_insertion_point(class_scope:rv.protos.RasterSourceConfig.MultiRasterSource)
+    ))
+  ,
   DESCRIPTOR = _RASTERSOURCECONFIG,
   __module__ = 'rastervision.protos.raster_source_pb2'
   # @@protoc_insertion_point(class_scope:rv.protos.RasterSourceConfig)
@@ -420,6 +505,7 @@ _sym_db.RegisterMessage(RasterSourceConfig.RasterizedSource)
 _sym_db.RegisterMessage(RasterSourceConfig.RasterizedSource.RasterizerOptions)
 _sym_db.RegisterMessage(RasterSourceConfig.GeoJSONFile)
 _sym_db.RegisterMessage(RasterSourceConfig.GeoJSONFile.RasterizerOptions)
+_sym_db.RegisterMessage(RasterSourceConfig.MultiRasterSource)
 
 
 # @@protoc_insertion_point(module_scope)
@@ -0,0 +1,324 @@
+# Generated by the protocol buffer compiler.  DO NOT EDIT!
+# source: rastervision/protos/vector_tile.proto
+
+import sys
+_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
+from google.protobuf import descriptor as _descriptor
+from google.protobuf import message as _message
+from google.protobuf import reflection as _reflection
+from google.protobuf import symbol_database as _symbol_database
+from google.protobuf import descriptor_pb2
+# @@protoc_insertion_point(imports)
+
+_sym_db = _symbol_database.Default()
+
+
+
+
+DESCRIPTOR = _descriptor.FileDescriptor(
+  name='rastervision/protos/vector_tile.proto',
+  package='rv.protos',
+  syntax='proto2',
+  serialized_pb=_b('\n%rastervision/protos/vector_tile.proto\x12\trv.protos\"\xd9\x04\n\nVectorTile\x12+\n\x06layers\x18\x03 \x03(\x0b\x32\x1b.rv.protos.VectorTile.Layer\x1a\xa1\x01\n\x05Value\x12\x14\n\x0cstring_value\x18\x01 \x01(\t\x12\x13\n\x0b\x66loat_value\x18\x02 \x01(\x02\x12\x14\n\x0c\x64ouble_value\x18\x03 \x01(\x01\x12\x11\n\tint_value\x18\x04 \x01(\x03\x12\x12\n\nuint_value\x18\x05 \x01(\x04\x12\x12\n\nsint_value\x18\x06 \x01(\x12\x12\x12\n\nbool_value\x18\x07 \x01(\x08*\x08\x08\x08\x10\x80\x80\x80\x80\x02\x1aw\n\x07\x46\x65\x61ture\x12\r\n\x02id\x18\x01 \x01(\x04:\x01\x30\x12\x10\n\x04tags\x18\x02 \x03(\rB\x02\x10\x01\x12\x35\n\x04type\x18\x03 \x01(\x0e\x32\x1e.rv.protos.VectorTile.GeomType:\x07UNKNOWN\x12\x14\n\x08geometry\x18\x04 \x03(\rB\x02\x10\x01\x1a\xb5\x01\n\x05Layer\x12\x12\n\x07version\x18\x0f \x01(\r:\x01\x31\x12\x0c\n\x04name\x18\x01 \x01(\t\x12/\n\x08\x66\x65\x61tures\x18\x02 \x03(\x0b\x32\x1d.rv.protos.VectorTile.Feature\x12\x0c\n\x04keys\x18\x03 \x03(\t\x12+\n\x06values\x18\x04 \x03(\x0b\x32\x1b.rv.protos.VectorTile.Value\x12\x14\n\x06\x65xtent\x18\x05 \x01(\r:\x04\x34\x30\x39\x36*\x08\x08\x10\x10\x80\x80\x80\x80\x02\"?\n\x08GeomType\x12\x0b\n\x07UNKNOWN\x10\x00\x12\t\n\x05POINT\x10\x01\x12\x0e\n\nLINESTRING\x10\x02\x12\x0b\n\x07POLYGON\x10\x03*\x08\x08\x10\x10\x80\x80\x80\x80\x02')
+)
+_sym_db.RegisterFileDescriptor(DESCRIPTOR)
+
+
+
+_VECTORTILE_GEOMTYPE = _descriptor.EnumDescriptor(
+  name='GeomType',
+  full_name='rv.protos.VectorTile.GeomType',
+  filename=None,
+  file=DESCRIPTOR,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='UNKNOWN', index=0, number=0,
+      options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='POINT', index=1, number=1,
+      options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='LINESTRING', index=2, number=2,
+      options=None,
+      type=None),
+    _descriptor.EnumValueDescriptor(
+      name='POLYGON', index=3, number=3,
+      options=None,
+      type=None),
+  ],
+  containing_type=None,
+  options=None,
+  serialized_start=581,
+  serialized_end=644,
+)
+_sym_db.RegisterEnumDescriptor(_VECTORTILE_GEOMTYPE)
+
+
+_VECTORTILE_VALUE = _descriptor.Descriptor(
+  name='Value',
+  full_name='rv.protos.VectorTile.Value',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='string_value', full_name='rv.protos.VectorTile.Value.string_value', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='float_value', full_name='rv.protos.VectorTile.Value.float_value', index=1,
+      number=2, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='double_value', full_name='rv.protos.VectorTile.Value.double_value', index=2,
+      number=3, type=1, cpp_type=5, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='int_value', full_name='rv.protos.VectorTile.Value.int_value', index=3,
+      number=4, type=3, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='uint_value', full_name='rv.protos.VectorTile.Value.uint_value', index=4,
+      number=5, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='sint_value', full_name='rv.protos.VectorTile.Value.sint_value', index=5,
+      number=6, type=18, cpp_type=2, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='bool_value', full_name='rv.protos.VectorTile.Value.bool_value', index=6,
+      number=7, type=8, cpp_type=7, label=1,
+      has_default_value=False, default_value=False,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=True,
+  syntax='proto2',
+  extension_ranges=[(8, 536870912), ],
+  oneofs=[
+  ],
+  serialized_start=113,
+  serialized_end=274,
+)
+
+_VECTORTILE_FEATURE = _descriptor.Descriptor(
+  name='Feature',
+  full_name='rv.protos.VectorTile.Feature',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='id', full_name='rv.protos.VectorTile.Feature.id', index=0,
+      number=1, type=4, cpp_type=4, label=1,
+      has_default_value=True, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='tags', full_name='rv.protos.VectorTile.Feature.tags', index=1,
+      number=2, type=13, cpp_type=3, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=_descriptor._ParseOptions(descriptor_pb2.FieldOptions(), _b('\020\001'))),
+    _descriptor.FieldDescriptor(
+      name='type', full_name='rv.protos.VectorTile.Feature.type', index=2,
+      number=3, type=14, cpp_type=8, label=1,
+      has_default_value=True, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='geometry', full_name='rv.protos.VectorTile.Feature.geometry', index=3,
+      number=4, type=13, cpp_type=3, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=_descriptor._ParseOptions(descriptor_pb2.FieldOptions(), _b('\020\001'))),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=False,
+  syntax='proto2',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=276,
+  serialized_end=395,
+)
+
+_VECTORTILE_LAYER = _descriptor.Descriptor(
+  name='Layer',
+  full_name='rv.protos.VectorTile.Layer',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='version', full_name='rv.protos.VectorTile.Layer.version', index=0,
+      number=15, type=13, cpp_type=3, label=1,
+      has_default_value=True, default_value=1,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='name', full_name='rv.protos.VectorTile.Layer.name', index=1,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=_b("").decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='features', full_name='rv.protos.VectorTile.Layer.features', index=2,
+      number=2, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='keys', full_name='rv.protos.VectorTile.Layer.keys', index=3,
+      number=3, type=9, cpp_type=9, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='values', full_name='rv.protos.VectorTile.Layer.values', index=4,
+      number=4, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+    _descriptor.FieldDescriptor(
+      name='extent', full_name='rv.protos.VectorTile.Layer.extent', index=5,
+      number=5, type=13, cpp_type=3, label=1,
+      has_default_value=True, default_value=4096,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  options=None,
+  is_extendable=True,
+  syntax='proto2',
+  extension_ranges=[(16, 536870912), ],
+  oneofs=[
+  ],
+  serialized_start=398,
+  serialized_end=579,
+)
+
+_VECTORTILE = _descriptor.Descriptor(
+  name='VectorTile',
+  full_name='rv.protos.VectorTile',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='layers', full_name='rv.protos.VectorTile.layers', index=0,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      options=None),
+  ],
+  extensions=[
+  ],
+  nested_types=[_VECTORTILE_VALUE, _VECTORTILE_FEATURE, _VECTORTILE_LAYER, ],
+  enum_types=[
+    _VECTORTILE_GEOMTYPE,
+  ],
+  options=None,
+  is_extendable=True,
+  syntax='proto2',
+  extension_ranges=[(16, 536870912), ],
+  oneofs=[
+  ],
+  serialized_start=53,
+  serialized_end=654,
+)
+
+_VECTORTILE_VALUE.containing_type = _VECTORTILE
+_VECTORTILE_FEATURE.fields_by_name['type'].enum_type = _VECTORTILE_GEOMTYPE
+_VECTORTILE_FEATURE.containing_type = _VECTORTILE
+_VECTORTILE_LAYER.fields_by_name['features'].message_type = _VECTORTILE_FEATURE
+_VECTORTILE_LAYER.fields_by_name['values'].message_type = _VECTORTILE_VALUE
+_VECTORTILE_LAYER.containing_type = _VECTORTILE
+_VECTORTILE.fields_by_name['layers'].message_type = _VECTORTILE_LAYER
+_VECTORTILE_GEOMTYPE.containing_type = _VECTORTILE
+DESCRIPTOR.message_types_by_name['VectorTile'] = _VECTORTILE
+
+VectorTile = _reflection.GeneratedProtocolMessageType('VectorTile', (_message.Message,), dict(
+
+  Value = _reflection.GeneratedProtocolMessageType('Value', (_message.Message,), dict(
+    DESCRIPTOR = _VECTORTILE_VALUE,
+    __module__ = 'rastervision.protos.vector_tile_pb2'
+    # @@protoc_insertion_point(class_scope:rv.protos.VectorTile.Value)
+    ))
+  ,
+
+  Feature = _reflection.GeneratedProtocolMessageType('Feature', (_message.Message,), dict(
+    DESCRIPTOR = _VECTORTILE_FEATURE,
+    __module__ = 'rastervision.protos.vector_tile_pb2'
+    # @@protoc_insertion_point(class_scope:rv.protos.VectorTile.Feature)
+    ))
+  ,
+
+  Layer = _reflection.GeneratedProtocolMessageType('Layer', (_message.Message,), dict(
+    DESCRIPTOR = _VECTORTILE_LAYER,
+    __module__ = 'rastervision.protos.vector_tile_pb2'
+    # @@protoc_insertion_point(class_scope:rv.protos.VectorTile.Layer)
+    ))
+  ,
+  DESCRIPTOR = _VECTORTILE,
+  __module__ = 'rastervision.protos.vector_tile_pb2'
+  # @@protoc_insertion_point(class_scope:rv.protos.VectorTile)
+  ))
+_sym_db.RegisterMessage(VectorTile)
+_sym_db.RegisterMessage(VectorTile.Value)
+_sym_db.RegisterMessage(VectorTile.Feature)
+_sym_db.RegisterMessage(VectorTile.Layer)
+
+
+_VECTORTILE_FEATURE.fields_by_name['tags'].has_options = True
+_VECTORTILE_FEATURE.fields_by_name['tags']._options = _descriptor._ParseOptions(descriptor_pb2.FieldOptions(), _b('\020\001'))
+_VECTORTILE_FEATURE.fields_by_name['geometry'].has_options = True
+_VECTORTILE_FEATURE.fields_by_name['geometry']._options = _descriptor._ParseOptions(descriptor_pb2.FieldOptions(), _b('\020\001'))
+# @@protoc_insertion_point(module_scope)
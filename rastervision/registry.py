@@ -62,6 +62,8 @@ class Registry:
             rv.data.RasterizedSourceConfigBuilder,
             (rv.RASTER_SOURCE, rv.IMAGE_SOURCE):
             rv.data.ImageSourceConfigBuilder,
+            (rv.RASTER_SOURCE, rv.MULTI_RASTER_SOURCE):
+            rv.data.MultiRasterSourceConfigBuilder,
 
             # Alias provided for backwards compatibility.
             (rv.RASTER_SOURCE, rv.GEOJSON_SOURCE):
@@ -11,7 +11,8 @@ log = logging.getLogger(__name__)
 def _make_chip_pos_windows(image_extent, label_store, chip_size):
     chip_size = chip_size
     pos_windows = []
-    boxes = label_store.get_labels().get_boxes()
+    labels = label_store.get_labels()
+    boxes = labels.get_boxes()
     done_boxes = set()
 
     # Get a random window around each box. If a box was previously included
@@ -29,9 +30,8 @@ def _make_chip_pos_windows(image_extent, label_store, chip_size):
             pos_windows.append(window)
 
             # Get boxes that lie completely within window
-            window_boxes = label_store.get_labels(window=window)
             window_boxes = ObjectDetectionLabels.get_overlapping(
-                window_boxes, window, ioa_thresh=1.0)
+                labels, window, ioa_thresh=1.0)
             window_boxes = window_boxes.get_boxes()
             window_boxes = [box.tuple_format() for box in window_boxes]
             done_boxes.update(window_boxes)
@@ -61,19 +61,22 @@ def make_pos_windows(image_extent, label_store, chip_size, window_method,
 def make_neg_windows(raster_source, label_store, chip_size, nb_windows,
                      max_attempts, filter_windows):
     extent = raster_source.get_extent()
+    all_labels = label_store.get_labels()
     neg_windows = []
     for _ in range(max_attempts):
         for _ in range(max_attempts):
             window = extent.make_random_square(chip_size)
             if any(filter_windows([window])):
                 break
-        chip = raster_source.get_chip(window)
         labels = ObjectDetectionLabels.get_overlapping(
-            label_store.get_labels(), window, ioa_thresh=0.2)
+            all_labels, window, ioa_thresh=0.2)
 
-        # If no labels and not blank, append the chip
-        if len(labels) == 0 and np.sum(chip.ravel()) > 0:
-            neg_windows.append(window)
+        # If no labels and not blank, append the chip. The chip is only read
+        # if there are no labels.
+        if len(labels) == 0:
+            chip = raster_source.get_chip(window)
+            if np.sum(chip.ravel()) > 0:
+                neg_windows.append(window)
 
         if len(neg_windows) == nb_windows:
             break
@@ -139,10 +142,14 @@ class ObjectDetection(Task):
         return extent.get_windows(chip_size, stride)
 
     def post_process_predictions(self, labels, scene):
+        predict_options = self.config.predict_options
         return ObjectDetectionLabels.prune_duplicates(
             labels,
-            score_thresh=self.config.predict_options.score_thresh,
-            merge_thresh=self.config.predict_options.merge_thresh)
+            score_thresh=predict_options.score_thresh,
+            merge_thresh=predict_options.merge_thresh,
+            nms_method=predict_options.nms_method,
+            class_aware=predict_options.class_aware,
+            soft_nms_sigma=predict_options.soft_nms_sigma)
 
     def save_debug_predict_image(self, scene, debug_dir_uri):
         # TODO implement this
@@ -4,6 +4,7 @@ from typing import (List, Dict, Tuple, Union)
 import rastervision as rv
 from rastervision.task import ObjectDetection
 from rastervision.core.class_map import (ClassMap, ClassItem)
+from rastervision.data.label.object_detection_labels import (NMS, NMS_METHODS)
 from rastervision.task import (TaskConfig, TaskConfigBuilder)
 from rastervision.protos.task_pb2 import TaskConfig as TaskConfigMsg
 from rastervision.protos.class_item_pb2 import ClassItem as ClassItemMsg
@@ -22,9 +23,17 @@ class ObjectDetectionConfig(TaskConfig):
             self.label_buffer = label_buffer
 
     class PredictOptions:
-        def __init__(self, merge_thresh=0.5, score_thresh=0.5):
+        def __init__(self,
+                     merge_thresh=0.5,
+                     score_thresh=0.5,
+                     nms_method=NMS,
+                     class_aware=False,
+                     soft_nms_sigma=0.5):
             self.merge_thresh = merge_thresh
             self.score_thresh = score_thresh
+            self.nms_method = nms_method
+            self.class_aware = class_aware
+            self.soft_nms_sigma = soft_nms_sigma
 
     def __init__(self,
                  class_map,
@@ -55,7 +64,10 @@ class ObjectDetectionConfig(TaskConfig):
 
         predict_options = TaskConfigMsg.ObjectDetectionConfig.PredictOptions(
             merge_thresh=self.predict_options.merge_thresh,
-            score_thresh=self.predict_options.score_thresh)
+            score_thresh=self.predict_options.score_thresh,
+            nms_method=self.predict_options.nms_method,
+            class_aware=self.predict_options.class_aware,
+            soft_nms_sigma=self.predict_options.soft_nms_sigma)
 
         conf = TaskConfigMsg.ObjectDetectionConfig(
             chip_size=self.chip_size,
@@ -100,6 +112,11 @@ class ObjectDetectionConfigBuilder(TaskConfigBuilder):
             raise rv.ConfigError(
                 'Class map set with "with_classes" must be of type ClassMap, got {}'.
                 format(type(self.config['class_map'])))
+        predict_options = self.config.get('predict_options')
+        if predict_options and predict_options.nms_method not in NMS_METHODS:
+            raise rv.ConfigError(
+                'nms_method set with "with_predict_options" must be one of {}, '
+                'got {}'.format(NMS_METHODS, predict_options.nms_method))
 
     def from_proto(self, msg):
         b = super().from_proto(msg)
@@ -113,7 +130,10 @@ class ObjectDetectionConfigBuilder(TaskConfigBuilder):
                                    window_method=conf.chip_options.window_method,
                                    label_buffer=conf.chip_options.label_buffer) \
                 .with_predict_options(merge_thresh=conf.predict_options.merge_thresh,
-                                      score_thresh=conf.predict_options.score_thresh)
+                                      score_thresh=conf.predict_options.score_thresh,
+                                      nms_method=conf.predict_options.nms_method,
+                                      class_aware=conf.predict_options.class_aware,
+                                      soft_nms_sigma=conf.predict_options.soft_nms_sigma)
 
     def with_classes(
             self, classes: Union[ClassMap, List[str], List[ClassItemMsg], List[
@@ -185,19 +205,47 @@ class ObjectDetectionConfigBuilder(TaskConfigBuilder):
             label_buffer=label_buffer)
         return b
 
-    def with_predict_options(self, merge_thresh=0.5, score_thresh=0.5):
+    def with_predict_options(self,
+                             merge_thresh=0.5,
+                             score_thresh=0.5,
+                             nms_method=NMS,
+                             class_aware=False,
+                             soft_nms_sigma=0.5):
         """Prediction options for this task.
 
         Args:
-           merge_thresh: If predicted boxes have an IOA (intersection over area)
+           merge_thresh: If predicted boxes have an IOU (intersection over union)
                          greater than merge_thresh, then they are merged into a
                          single box during postprocessing. This is needed since
                          the sliding window approach results in some false duplicates.
 
            score_thresh: Predicted boxes are only output if their
                          score is above score_thresh.
+
+           nms_method: How duplicate boxes are merged.
+
+                       Valid values are:
+                         - nms (default)
+                            - boxes that overlap a higher scoring box are removed
+                         - soft_nms
+                            - the scores of boxes that overlap a higher scoring box
+                              are decayed based on the overlap, and boxes are
+                              removed once their score drops below score_thresh.
+                              merge_thresh is not used.
+                         - wbf
+                            - each group of overlapping boxes is replaced by the
+                              score-weighted average of the boxes
+
+           class_aware: If True, only boxes with the same class are merged.
+
+           soft_nms_sigma: Controls how quickly scores decay with overlap when
+                           nms_method is soft_nms.
         """
         b = deepcopy(self)
         b.config['predict_options'] = ObjectDetectionConfig.PredictOptions(
-            merge_thresh=merge_thresh, score_thresh=score_thresh)
+            merge_thresh=merge_thresh,
+            score_thresh=score_thresh,
+            nms_method=nms_method,
+            class_aware=class_aware,
+            soft_nms_sigma=soft_nms_sigma)
         return b
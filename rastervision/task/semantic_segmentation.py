@@ -1,5 +1,6 @@
 from typing import List
 import logging
+import time
 
 import numpy as np
 
@@ -119,20 +120,44 @@ class SemanticSegmentation(Task):
         pass
 
     def predict_scene(self, scene, tmp_dir):
-        """Predict on a single scene, and return the labels."""
+        """Predict on a single scene, and return the labels.
+
+        Chips are read on background threads while predicting, see
+        make_chip_batch_reader. The label arrays are computed eagerly and
+        held in memory until the labels are saved. Chips that only contain
+        NODATA are not passed to the backend, and are labeled with 0.
+        """
         log.info('Making predictions for scene')
         raster_source = scene.raster_source
         windows = self.get_predict_windows(raster_source.get_extent())
+        reader = self.make_chip_batch_reader(raster_source, windows)
+
+        label_arrs = {}
+        predict_time = 0.0
+        for batch_chips, batch_windows in reader:
+            start = time.time()
+            labels = self.backend.predict(
+                np.asarray(batch_chips), batch_windows, tmp_dir)
+            for chip, window in zip(batch_chips, batch_windows):
+                label_arr = labels.get_label_arr(window)
+
+                # Set NODATA pixels in imagery to predicted value of 0 (ie.
+                # ignore)
+                label_arr[np.sum(chip, axis=2) == 0] = 0
+
+                # Class ids are stored as uint8 by the label stores, so
+                # keep them as uint8 to save memory.
+                label_arrs[window.tuple_format()] = label_arr.astype(np.uint8)
+            predict_time += time.time() - start
+            print('.' * len(batch_chips), end='', flush=True)
+        print()
+        self.log_predict_times(reader, predict_time)
 
         def label_fn(window):
-            chip = raster_source.get_chip(window)
-            labels = self.backend.predict([chip], [window], tmp_dir)
-            label_arr = labels.get_label_arr(window)
-
-            # Set NODATA pixels in imagery to predicted value of 0 (ie. ignore)
-            label_arr[np.sum(chip, axis=2) == 0] = 0
-
-            print('.', end='', flush=True)
+            label_arr = label_arrs.get(window.tuple_format())
+            if label_arr is None:
+                return np.zeros(
+                    (window.get_height(), window.get_width()), dtype=np.uint8)
             return label_arr
 
         return SemanticSegmentationLabels(windows, label_fn)
@@ -1,9 +1,17 @@
 from abc import abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import queue
+import random
+import threading
+import time
 
 import numpy as np
 import logging
 
 from rastervision.core.training_data import TrainingData
+from rastervision.rv_config import RVConfig
+from rastervision.utils.parallel import map_forked
 
 # TODO: DRY... same keys as in ml_backends/tf_object_detection_api.py
 TRAIN = 'train'
@@ -12,6 +20,178 @@ VALIDATION = 'validation'
 log = logging.getLogger(__name__)
 
 
+def _make_scene_seed():
+    """Draw seeds for the random and numpy.random generators of one scene."""
+    return (random.getrandbits(32), np.random.randint(2**32, dtype=np.int64))
+
+
+class ChipBatchReader():
+    """Reads batches of chips for prediction on background threads.
+
+    A pool of num_threads threads reads the chips, and a background thread
+    collects them in order into batches of up to batch_size chips. Chips
+    that only contain zeros (ie. NODATA) are skipped. Up to queue_size
+    batches are read ahead, so reading overlaps with whatever is done with
+    each batch, and the batches are the same as if the chips were read
+    serially. Exceptions raised while reading are re-raised when iterating.
+
+    When the windows have the same size, chips are read into preallocated
+    arrays using the out argument of RasterSource.get_chip, and batches are
+    put together in preallocated arrays, so little memory is allocated per
+    chip.
+
+    If num_threads > 1, the RasterSource has to support get_chip being
+    called from several threads at once.
+    """
+
+    def __init__(self,
+                 raster_source,
+                 windows,
+                 batch_size,
+                 num_threads=1,
+                 queue_size=2):
+        """Construct a new ChipBatchReader.
+
+        Args:
+            raster_source: an activated RasterSource
+            windows: list of Boxes to read
+            batch_size: maximum number of chips in each batch
+            num_threads: number of threads reading chips
+            queue_size: maximum number of batches to read ahead
+        """
+        self.raster_source = raster_source
+        self.windows = windows
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.queue_size = queue_size
+        self.uniform_windows = len(
+            set((w.get_height(), w.get_width()) for w in windows)) == 1
+
+        # Seconds spent waiting for batches to be read while iterating.
+        self.wait_time = 0.0
+
+    def __iter__(self):
+        """Generate (chips, windows) tuples.
+
+        chips is a [batch_size, height, width, channels] array if the windows
+        have the same size, and otherwise a list of arrays. windows is the
+        list of corresponding Boxes. The array is reused for later batches,
+        so it is only valid until the next batch is generated.
+        """
+        batch_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        thread = threading.Thread(
+            target=self._read, args=(batch_queue, stop), daemon=True)
+        thread.start()
+        try:
+            while True:
+                start = time.time()
+                item = batch_queue.get()
+                self.wait_time += time.time() - start
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def _put(self, batch_queue, stop, item):
+        # Give up if the consumer stopped iterating, so that the reading
+        # thread doesn't block forever on a full queue.
+        while not stop.is_set():
+            try:
+                batch_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def _read_chips(self, executor):
+        """Generate (window, chip) tuples in order, reading ahead.
+
+        Once the shape of the chips is known, chips are read into a pool of
+        preallocated arrays. Each chip is only valid until the next one is
+        generated.
+        """
+        max_pending = 2 * self.num_threads
+        free_buffers = None
+        pending = deque()
+
+        def submit(window):
+            out = free_buffers.pop() if free_buffers else None
+            future = executor.submit(
+                self.raster_source.get_chip, window, out=out)
+            pending.append((window, out, future))
+
+        for window in self.windows:
+            submit(window)
+            if len(pending) >= max_pending:
+                window, out, future = pending.popleft()
+                chip = future.result()
+                if free_buffers is None and self.uniform_windows:
+                    free_buffers = [
+                        np.empty_like(chip) for _ in range(max_pending + 1)
+                    ]
+                yield window, chip
+                if out is not None:
+                    free_buffers.append(out)
+        while pending:
+            window, _, future = pending.popleft()
+            yield window, future.result()
+
+    def _read(self, batch_queue, stop):
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+                batch_chips, batch_windows = None, []
+                # Batches are put into a pool of preallocated arrays that is
+                # large enough that a batch isn't overwritten until the one
+                # after it has been taken from the queue.
+                batch_buffers = None
+                num_batches = 0
+
+                for window, chip in self._read_chips(executor):
+                    if not np.any(chip):
+                        continue
+
+                    if batch_chips is None:
+                        if not self.uniform_windows:
+                            batch_chips = []
+                        else:
+                            if batch_buffers is None:
+                                batch_buffers = [
+                                    np.empty(
+                                        (self.batch_size, ) + chip.shape,
+                                        dtype=chip.dtype)
+                                    for _ in range(self.queue_size + 2)
+                                ]
+                            batch_chips = batch_buffers[num_batches %
+                                                        len(batch_buffers)]
+                            num_batches += 1
+
+                    if self.uniform_windows:
+                        batch_chips[len(batch_windows)] = chip
+                    else:
+                        batch_chips.append(chip)
+                    batch_windows.append(window)
+
+                    if len(batch_windows) >= self.batch_size:
+                        if not self._put(batch_queue, stop,
+                                         (batch_chips, batch_windows)):
+                            return
+                        batch_chips, batch_windows = None, []
+
+                if len(batch_windows) > 0:
+                    batch_chips = batch_chips[0:len(batch_windows)]
+                    if not self._put(batch_queue, stop,
+                                     (batch_chips, batch_windows)):
+                        return
+            self._put(batch_queue, stop, None)
+        except Exception as e:
+            self._put(batch_queue, stop, e)
+
+
 class Task(object):
     """Functionality for a specific machine learning task.
 
@@ -92,46 +272,71 @@ class Task(object):
         chips in MLBackend-specific format, and write to URI specified in
         options.
 
+        Scenes are processed in a pool of worker processes if the
+        chip_num_workers option in the [RV] section of the Raster Vision
+        config is greater than 1. Each scene is processed with its own
+        random seed drawn up front from the random and numpy.random global
+        state, so the chips are the same for any number of workers as long
+        as those have been seeded.
+
         Args:
             train_scenes: list of Scenes
             validation_scenes: list of Scenes
                 (that is disjoint from train_scenes)
             augmentors: Augmentors used to augment training data
         """
+        scene_jobs = [(s, TRAIN, True) for s in train_scenes]
+        scene_jobs += [(s, VALIDATION, False) for s in validation_scenes]
+        jobs = [(scene, type_, augment, augmentors, tmp_dir,
+                 _make_scene_seed()) for (scene, type_, augment) in scene_jobs]
 
-        def _process_scene(scene, type_, augment):
-            with scene.activate():
-                data = TrainingData()
-                log.info('Making {} chips for scene: {}'.format(
-                    type_, scene.id))
-                windows = self.get_train_windows(scene)
-                for window in windows:
-                    chip = scene.raster_source.get_chip(window)
-                    labels = self.get_train_labels(window, scene)
-                    data.append(chip, window, labels)
-                # Shuffle data so the first N samples which are displayed in
-                # Tensorboard are more diverse.
-                data.shuffle()
-
-                # Process augmentation
-                if augment:
-                    for augmentor in augmentors:
-                        data = augmentor.process(data, tmp_dir)
-
-                return self.backend.process_scene_data(scene, data, tmp_dir)
-
-        def _process_scenes(scenes, type_, augment):
-            return [_process_scene(scene, type_, augment) for scene in scenes]
-
-        # TODO: parallel processing!
-        processed_training_results = _process_scenes(
-            train_scenes, TRAIN, augment=True)
-        processed_validation_results = _process_scenes(
-            validation_scenes, VALIDATION, augment=False)
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        num_workers = rv_config('chip_num_workers', parser=int, default='1')
+        if num_workers > 1 and len(jobs) > 1:
+            results = self._process_scenes_parallel(jobs, num_workers)
+        else:
+            results = [self._process_scene(*job) for job in jobs]
+
+        processed_training_results = results[0:len(train_scenes)]
+        processed_validation_results = results[len(train_scenes):]
 
         self.backend.process_sceneset_results(
             processed_training_results, processed_validation_results, tmp_dir)
 
+    def _process_scene(self, scene, type_, augment, augmentors, tmp_dir, seed):
+        """Make and process the training chips for a single scene."""
+        random.seed(seed[0])
+        np.random.seed(seed[1])
+
+        with scene.activate():
+            data = TrainingData()
+            log.info('Making {} chips for scene: {}'.format(type_, scene.id))
+            windows = self.get_train_windows(scene)
+            for window in windows:
+                chip = scene.raster_source.get_chip(window)
+                labels = self.get_train_labels(window, scene)
+                data.append(chip, window, labels)
+            # Shuffle data so the first N samples which are displayed in
+            # Tensorboard are more diverse.
+            data.shuffle()
+
+            # Process augmentation
+            if augment:
+                for augmentor in augmentors:
+                    data = augmentor.process(data, tmp_dir)
+
+            return self.backend.process_scene_data(scene, data, tmp_dir)
+
+    def _process_scenes_parallel(self, jobs, num_workers):
+        """Run _process_scene for each job in a pool of worker processes.
+
+        Scenes and backends can hold objects that cannot be pickled, so this
+        uses map_forked. Exceptions raised in a worker are re-raised here.
+        """
+        log.info('Making chips for {} scenes using {} workers'.format(
+            len(jobs), num_workers))
+        return list(map_forked(self._process_scene, jobs, num_workers))
+
     def train(self, tmp_dir):
         """Train a model.
         """
@@ -158,37 +363,50 @@ class Task(object):
                     self.save_debug_predict_image(
                         scene, self.config.predict_debug_uri)
 
+    def make_chip_batch_reader(self, raster_source, windows):
+        """Return a ChipBatchReader for predicting on windows.
+
+        The number of reading threads and the number of batches to read
+        ahead are set by the predict_num_readers and predict_queue_size
+        options in the [RV] section of the Raster Vision config.
+        """
+        rv_config = RVConfig.get_instance().get_subconfig('RV')
+        num_threads = rv_config('predict_num_readers', parser=int, default='1')
+        queue_size = rv_config('predict_queue_size', parser=int, default='2')
+        return ChipBatchReader(
+            raster_source,
+            windows,
+            self.config.predict_batch_size,
+            num_threads=num_threads,
+            queue_size=queue_size)
+
+    def log_predict_times(self, reader, predict_time):
+        """Log the time spent waiting for chips and predicting on them."""
+        log.info('Spent {:.2f}s waiting for chips to be read and {:.2f}s '
+                 'predicting'.format(reader.wait_time, predict_time))
+
     def predict_scene(self, scene, tmp_dir):
-        """Predict on a single scene, and return the labels."""
+        """Predict on a single scene, and return the labels.
+
+        Chips are read on background threads while predicting, see
+        make_chip_batch_reader.
+        """
         log.info('Making predictions for scene')
         raster_source = scene.raster_source
         label_store = scene.prediction_label_store
         labels = label_store.empty_labels()
 
         windows = self.get_predict_windows(raster_source.get_extent())
-
-        def predict_batch(predict_chips, predict_windows):
-            nonlocal labels
-            new_labels = self.backend.predict(
-                np.array(predict_chips), predict_windows, tmp_dir)
-            labels += new_labels
-            print('.' * len(predict_chips), end='', flush=True)
-
-        batch_chips, batch_windows = [], []
-        for window in windows:
-            chip = raster_source.get_chip(window)
-            if np.any(chip):
-                batch_chips.append(chip)
-                batch_windows.append(window)
-
-            # Predict on batch
-            if len(batch_chips) >= self.config.predict_batch_size:
-                predict_batch(batch_chips, batch_windows)
-                batch_chips, batch_windows = [], []
+        reader = self.make_chip_batch_reader(raster_source, windows)
+
+        predict_time = 0.0
+        for batch_chips, batch_windows in reader:
+            start = time.time()
+            labels += self.backend.predict(
+                np.asarray(batch_chips), batch_windows, tmp_dir)
+            predict_time += time.time() - start
+            print('.' * len(batch_chips), end='', flush=True)
         print()
-
-        # Predict on remaining batch
-        if len(batch_chips) > 0:
-            predict_batch(batch_chips, batch_windows)
+        self.log_predict_times(reader, predict_time)
 
         return self.post_process_predictions(labels, scene)
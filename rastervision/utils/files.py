@@ -1,6 +1,7 @@
 import os
 import shutil
 import gzip
+import tempfile
 from threading import Timer
 import time
 import logging
@@ -13,6 +14,12 @@ from rastervision.filesystem.local_filesystem import make_dir
 
 log = logging.getLogger(__name__)
 
+# Prefix of the names of files that are being written into cache directories.
+TMP_PREFIX = '.tmp-'
+# Number of seconds after which temporary files in cache directories are
+# assumed to be left behind by processes that were killed.
+MAX_TMP_AGE = 24 * 60 * 60
+
 
 def get_local_path(uri, download_dir, fs=None):
     """Convert a URI into a corresponding local path.
@@ -287,7 +294,18 @@ def get_cached_file(cache_dir, uri):
     # Only download if it isn't in the cache.
     path = get_local_path(uri, cache_dir)
     if not os.path.isfile(path):
-        path = download_if_needed(uri, cache_dir)
+        # The file is downloaded under a temporary name and moved into place
+        # once it is complete, so that other processes never read a partial
+        # download, and an interrupted download isn't cached.
+        make_dir(cache_dir)
+        with tempfile.TemporaryDirectory(
+                dir=cache_dir, prefix=TMP_PREFIX) as tmp_dir:
+            tmp_path = download_if_needed(uri, tmp_dir)
+            if tmp_path != uri:
+                make_dir(path, use_dirname=True)
+                os.replace(tmp_path, path)
+            else:
+                path = tmp_path
 
     # Unzip if .gz file
     if path.endswith('.gz'):
@@ -300,9 +318,86 @@ def get_cached_file(cache_dir, uri):
 
         # Check to see if it is already unzipped before unzipping.
         if not os.path.isfile(ungz_path):
-            with gzip.open(path, 'rb') as f_in:
-                with open(ungz_path, 'wb') as f_out:
-                    shutil.copyfileobj(f_in, f_out)
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(ungz_path), prefix=TMP_PREFIX)
+            try:
+                with gzip.open(path, 'rb') as f_in:
+                    with os.fdopen(fd, 'wb') as f_out:
+                        shutil.copyfileobj(f_in, f_out)
+                os.replace(tmp_path, ungz_path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
         path = ungz_path
 
     return path
+
+
+def _get_entry_size(path):
+    """Return the number of bytes of a file or of the files in a directory."""
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    size = 0
+    for dir_path, _, file_names in os.walk(path):
+        for file_name in file_names:
+            try:
+                size += os.path.getsize(os.path.join(dir_path, file_name))
+            except OSError:
+                pass
+    return size
+
+
+def _remove_entry(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def evict_least_recently_used(cache_dir, max_size, extra_size=0, keep=None):
+    """Remove the least recently used entries of a cache on disk.
+
+    Each file or directory in cache_dir is an entry, and the time it was last
+    modified is when it was last used, so entries should be touched using
+    os.utime when they are read. Files whose names start with TMP_PREFIX are
+    being written, and are only removed once they are older than
+    MAX_TMP_AGE.
+
+    Args:
+        cache_dir: (str) directory of the cache
+        max_size: (int) maximum number of bytes of the entries
+        extra_size: (int) number of bytes of an entry that is about to be
+            added
+        keep: (str) optional path of an entry that isn't removed
+    """
+    try:
+        names = os.listdir(cache_dir)
+    except OSError:
+        return
+
+    now = time.time()
+    entries = []
+    for name in names:
+        path = os.path.join(cache_dir, name)
+        try:
+            used_time = os.path.getmtime(path)
+            if name.startswith(TMP_PREFIX):
+                if now - used_time > MAX_TMP_AGE:
+                    _remove_entry(path)
+                continue
+            entries.append((used_time, _get_entry_size(path), path))
+        except OSError:
+            continue
+
+    total_size = sum(size for _, size, _ in entries) + extra_size
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        if path == keep:
+            continue
+        log.debug('Evicting {} from cache'.format(path))
+        _remove_entry(path)
+        total_size -= size
@@ -38,18 +38,16 @@ def aoi_geojson_to_shapely_polygons(geojson_dict, crs_transformer):
         if geom_type == 'MultiPolygon':
             for polygon in coordinates:
                 shell = polygon[0]
-                json_polygons.append(
-                    [crs_transformer.map_to_pixel(p) for p in shell])
+                json_polygons.append(crs_transformer.map_to_pixel_batch(shell))
         elif geom_type == 'Polygon':
             shell = coordinates[0]
-            json_polygons.append(
-                [crs_transformer.map_to_pixel(p) for p in shell])
+            json_polygons.append(crs_transformer.map_to_pixel_batch(shell))
         else:
             raise Exception('Geometries of type {} are not supported in AOIs'
                             .format(geom_type))
 
         for json_polygon in json_polygons:
-            polygon = geometry.Polygon([(p[0], p[1]) for p in json_polygon])
+            polygon = geometry.Polygon(json_polygon)
             # Trick to handle self-intersecting polygons which otherwise cause an
             # error.
             polygon = polygon.buffer(0)
@@ -0,0 +1,76 @@
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import logging
+import multiprocessing
+import sys
+
+log = logging.getLogger(__name__)
+
+# Jobs for the forked worker processes of each call to map_forked, keyed by
+# an id of the call. Workers inherit them, and can call map_forked too.
+_jobs = {}
+_call_ids = itertools.count()
+
+
+def _make_executor(num_workers):
+    """Return an executor whose worker processes are forked.
+
+    Returns:
+        ProcessPoolExecutor, or None if the platform can't fork
+    """
+    try:
+        context = multiprocessing.get_context('fork')
+    except ValueError:
+        return None
+    if sys.version_info >= (3, 7):
+        return ProcessPoolExecutor(max_workers=num_workers, mp_context=context)
+    # Before Python 3.7, executors use the default start method.
+    if multiprocessing.get_start_method() != 'fork':
+        return None
+    return ProcessPoolExecutor(max_workers=num_workers)
+
+
+def _run_job(call_id, job_ind):
+    fn, args = _jobs[call_id][job_ind]
+    return fn(*args)
+
+
+def map_forked(fn, args_list, num_workers):
+    """Apply a function to each of a list of arguments in worker processes.
+
+    The function and its arguments can hold objects that cannot be pickled,
+    like raster sources and STRtrees, so they are handed to forked workers
+    through a module-level variable and only their indices are sent over the
+    wire. Results are still pickled. Workers are forked whatever the
+    default start method is. The jobs run in this process if num_workers is
+    less than 2, there is at most one job, or workers can't be forked.
+
+    Args:
+        fn: function to apply
+        args_list: list of tuples of arguments to apply fn to
+        num_workers: maximum number of worker processes
+
+    Returns:
+        iterator over the results of fn, in the order of args_list.
+        Exceptions raised by fn are re-raised while iterating.
+    """
+    executor = None
+    if num_workers > 1 and len(args_list) > 1:
+        executor = _make_executor(num_workers)
+        if executor is None:
+            log.warning('Cannot fork worker processes, so running jobs in '
+                        'this process.')
+    if executor is None:
+        for args in args_list:
+            yield fn(*args)
+        return
+
+    call_id = next(_call_ids)
+    _jobs[call_id] = [(fn, args) for args in args_list]
+    try:
+        with executor:
+            yield from executor.map(_run_job,
+                                    itertools.repeat(call_id, len(args_list)),
+                                    range(len(args_list)))
+    finally:
+        del _jobs[call_id]
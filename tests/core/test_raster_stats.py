@@ -0,0 +1,182 @@
+import random
+import unittest
+import os
+from unittest.mock import patch
+
+import numpy as np
+import rasterio
+
+import rastervision as rv
+from rastervision.core import Box
+from rastervision.core import raster_stats
+from rastervision.core.raster_stats import (RasterStats, StatsAccumulator,
+                                            get_block_windows)
+from rastervision.rv_config import RVConfig
+
+from tests.mock import MockRasterSource
+
+
+class TestStatsAccumulator(unittest.TestCase):
+    def setUp(self):
+        self.chip = np.random.randint(
+            0, 2**16, size=(50, 40, 3), dtype=np.uint16)
+        self.chip[0:10, :, 0] = 0
+        self.chip[:, :, 2] = 0
+
+    def test_update(self):
+        stats = StatsAccumulator(3)
+        stats.update(self.chip[0:25])
+        stats.update(self.chip[25:])
+
+        values = self.chip[:, :, 0:2].reshape((-1, 2)).astype(np.float64)
+        values[values == 0] = np.nan
+        np.testing.assert_array_almost_equal(stats.get_means()[0:2],
+                                             np.nanmean(values, axis=0))
+        np.testing.assert_array_almost_equal(stats.get_stds()[0:2],
+                                             np.nanstd(values, axis=0))
+        # A channel that's all NODATA.
+        self.assertEqual(stats.get_means()[2], 0)
+        self.assertEqual(stats.get_stds()[2], 0)
+
+    def test_merge(self):
+        stats = StatsAccumulator(3, compute_histograms=True)
+        stats.update(self.chip)
+
+        merged_stats = StatsAccumulator(3, compute_histograms=True)
+        for chip in [self.chip[0:5], self.chip[5:30], self.chip[30:]]:
+            chip_stats = StatsAccumulator(3, compute_histograms=True)
+            chip_stats.update(chip)
+            merged_stats.merge(chip_stats)
+
+        np.testing.assert_array_equal(merged_stats.count, stats.count)
+        np.testing.assert_array_almost_equal(merged_stats.get_means(),
+                                             stats.get_means())
+        np.testing.assert_array_almost_equal(merged_stats.get_stds(),
+                                             stats.get_stds())
+        np.testing.assert_array_equal(merged_stats.histograms,
+                                      stats.histograms)
+
+    def test_percentiles(self):
+        chip = np.zeros((10, 10, 2), dtype=np.int16)
+        chip[:, :, 0] = np.arange(-50, 50).reshape((10, 10))
+        stats = StatsAccumulator(2, compute_histograms=True)
+        stats.update(chip)
+        percentiles = stats.get_percentiles([0, 2, 50, 100])
+        # 0 is NODATA, so 99 values are counted.
+        self.assertEqual(percentiles[0], [-50, 0])
+        self.assertEqual(percentiles[2], [-49, 0])
+        self.assertEqual(percentiles[50], [-1, 0])
+        self.assertEqual(percentiles[100], [49, 0])
+
+    def test_histograms_float(self):
+        stats = StatsAccumulator(3, compute_histograms=True)
+        with self.assertRaises(ValueError):
+            stats.update(self.chip.astype(np.float32))
+
+
+class TestRasterStats(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = RVConfig.get_tmp_dir()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        rv._registry.initialize_config()
+
+    def make_source(self, i):
+        image_path = os.path.join(self.tmp_dir.name, '{}.tif'.format(i))
+        im = np.random.randint(
+            0, 2**12, size=(2, 100, 130), dtype=np.uint16) * (i + 1)
+        with rasterio.open(
+                image_path,
+                'w',
+                driver='GTiff',
+                height=100,
+                width=130,
+                count=2,
+                dtype=np.uint16,
+                tiled=True,
+                blockxsize=32,
+                blockysize=16) as image_dataset:
+            image_dataset.write(im)
+        source = rv.data.GeoTiffSourceConfig(uris=[image_path]) \
+                        .create_source(self.tmp_dir.name)
+        return source, im
+
+    def test_get_block_windows(self):
+        source, _ = self.make_source(0)
+        self.assertEqual(source.get_block_shape(), (16, 32))
+        windows = get_block_windows(source)
+        self.assertEqual(windows, [Box(0, 0, 304, 320)])
+
+        source = MockRasterSource([0, 1, 2], 3)
+        source.set_raster(np.zeros((400, 500, 3)))
+        windows = get_block_windows(source)
+        self.assertEqual(len(windows), 4)
+        self.assertEqual(windows[-1], Box(300, 300, 600, 600))
+
+    def compute(self, num_workers, sources):
+        rv._registry.initialize_config(
+            config_overrides={'RV_stats_num_workers': str(num_workers)})
+        stats = RasterStats()
+        stats.compute(sources, percentiles=[2, 98])
+        return stats
+
+    def test_compute(self):
+        sources, ims = zip(*[self.make_source(i) for i in range(3)])
+        stats = self.compute(1, sources)
+        values = np.concatenate([im.reshape((2, -1)) for im in ims], axis=1)
+        values = values.astype(np.float64)
+        values[values == 0] = np.nan
+        np.testing.assert_array_almost_equal(stats.means,
+                                             np.nanmean(values, axis=1))
+        np.testing.assert_array_almost_equal(stats.stds,
+                                             np.nanstd(values, axis=1))
+        self.assertEqual(sorted(stats.percentiles.keys()), [2, 98])
+        for channel in range(2):
+            channel_values = values[channel][~np.isnan(values[channel])]
+            self.assertAlmostEqual(
+                stats.percentiles[98][channel],
+                np.percentile(channel_values, 98),
+                delta=30)
+
+    def test_compute_parallel(self):
+        sources, _ = zip(*[self.make_source(i) for i in range(3)])
+        stats = self.compute(1, sources)
+        parallel_stats = self.compute(3, sources)
+        np.testing.assert_array_almost_equal(parallel_stats.means, stats.means)
+        np.testing.assert_array_almost_equal(parallel_stats.stds, stats.stds)
+        self.assertEqual(parallel_stats.percentiles, stats.percentiles)
+
+    def test_compute_sampled(self):
+        sources, _ = zip(*[self.make_source(i) for i in range(2)])
+        with patch.object(raster_stats, 'chip_size', 20):
+            random.seed(1)
+            stats = RasterStats()
+            stats.compute(sources, sample_prob=0.5)
+            after_stats = random.random()
+
+            # The same windows are sampled for the same state of the global
+            # generator, which is only advanced by drawing one seed per
+            # source.
+            random.seed(1)
+            other_stats = RasterStats()
+            other_stats.compute(sources, sample_prob=0.5)
+            np.testing.assert_array_equal(other_stats.means, stats.means)
+
+        random.seed(1)
+        for _ in sources:
+            random.getrandbits(32)
+        self.assertEqual(random.random(), after_stats)
+
+    def test_save_load(self):
+        sources, _ = zip(*[self.make_source(i) for i in range(3)])
+        stats = self.compute(1, sources)
+        stats_uri = os.path.join(self.tmp_dir.name, 'stats.json')
+        stats.save(stats_uri)
+        loaded_stats = RasterStats.load(stats_uri)
+        np.testing.assert_array_almost_equal(loaded_stats.means, stats.means)
+        self.assertEqual(loaded_stats.percentiles, stats.percentiles)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+
+import numpy as np
+import pyproj
+from rasterio.transform import (from_origin, rowcol, xy)
+
+from rastervision.data.crs_transformer import (
+    IdentityCRSTransformer, RasterioCRSTransformer, transform_point_lists)
+from tests.data.mock_crs_transformer import DoubleCRSTransformer
+
+
+class TestRasterioCRSTransformer(unittest.TestCase):
+    def setUp(self):
+        self.transform = from_origin(500000, 4000000, 0.3, 0.3)
+        self.crs_transformer = RasterioCRSTransformer(self.transform,
+                                                      'epsg:32617')
+        self.map_proj = pyproj.Proj(init='epsg:4326')
+        self.image_proj = pyproj.Proj(init='epsg:32617')
+
+        np.random.seed(1)
+        self.pixel_points = np.random.uniform(-10, 5000, size=(100, 2))
+
+    def test_pixel_to_map_batch(self):
+        # Points are mapped to the center of their pixel.
+        map_points = self.crs_transformer.pixel_to_map_batch(self.pixel_points)
+        self.assertEqual(map_points.shape, (100, 2))
+        for pixel_point, map_point in zip(self.pixel_points, map_points):
+            image_point = xy(self.transform, int(pixel_point[1]),
+                             int(pixel_point[0]))
+            expected = pyproj.transform(self.image_proj, self.map_proj,
+                                        *image_point)
+            self.assertEqual(tuple(map_point), expected)
+            self.assertEqual(
+                self.crs_transformer.pixel_to_map(pixel_point), expected)
+
+    def test_map_to_pixel_batch(self):
+        map_points = self.crs_transformer.pixel_to_map_batch(self.pixel_points)
+        # Extra coordinates like z are ignored.
+        map_points = np.hstack([map_points, np.zeros((100, 1))])
+        pixel_points = self.crs_transformer.map_to_pixel_batch(map_points)
+        self.assertEqual(pixel_points.shape, (100, 2))
+        self.assertEqual(pixel_points.dtype, np.int64)
+        for map_point, pixel_point in zip(map_points, pixel_points):
+            image_point = pyproj.transform(self.map_proj, self.image_proj,
+                                           map_point[0], map_point[1])
+            row, col = rowcol(self.transform, *image_point)
+            self.assertEqual(tuple(pixel_point), (col, row))
+            self.assertEqual(
+                self.crs_transformer.map_to_pixel(map_point), (col, row))
+
+    def test_empty_batch(self):
+        self.assertEqual(
+            self.crs_transformer.map_to_pixel_batch([]).shape, (0, 2))
+        self.assertEqual(
+            self.crs_transformer.pixel_to_map_batch([]).shape, (0, 2))
+
+
+class TestTransformPointLists(unittest.TestCase):
+    def test_transform_point_lists(self):
+        point_lists = [[(0, 2), (4, 6), (8, 10)], [], [[2, 4, 1], [6, 8]]]
+        for crs_transformer in [
+                DoubleCRSTransformer(),
+                IdentityCRSTransformer()
+        ]:
+            results = transform_point_lists(point_lists,
+                                            crs_transformer.map_to_pixel_batch)
+            self.assertEqual(len(results), 3)
+            for points, result in zip(point_lists, results):
+                expected = [
+                    crs_transformer.map_to_pixel(point[0:2])
+                    for point in points
+                ]
+                np.testing.assert_array_equal(
+                    result.reshape(-1, 2),
+                    np.array(expected).reshape(-1, 2))
+
+        self.assertEqual(
+            transform_point_lists([],
+                                  DoubleCRSTransformer().map_to_pixel), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
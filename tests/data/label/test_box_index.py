@@ -0,0 +1,88 @@
+import unittest
+
+import numpy as np
+
+from rastervision.core.box import Box
+from rastervision.data.label.box_index import BoxIndex
+from rastervision.data.label.object_detection_labels import (
+    ObjectDetectionLabels)
+
+
+def make_npboxes(num_boxes, extent_size=1000, max_size=20):
+    mins = np.random.uniform(-10, extent_size, size=(num_boxes, 2))
+    sizes = np.random.uniform(0, max_size, size=(num_boxes, 2))
+    return np.hstack([mins, mins + sizes])
+
+
+class TestBoxIndex(unittest.TestCase):
+    def assert_query(self, index, npboxes, window):
+        boxes = npboxes
+        exp_inds = np.nonzero((boxes[:, 0] < window[2])
+                              & (boxes[:, 2] > window[0])
+                              & (boxes[:, 1] < window[3])
+                              & (boxes[:, 3] > window[1]))[0]
+        np.testing.assert_array_equal(index.query(window), exp_inds)
+
+    def test_query(self):
+        npboxes = make_npboxes(2000)
+        # Some large boxes which span many cells.
+        npboxes[0:10, 2:4] += 500
+        index = BoxIndex(npboxes)
+
+        squares = [(0, 0, 100), (950, 950, 200), (-50, -50, 30),
+                   (2000, 2000, 10), (500, -100, 1000)]
+        windows = [
+            Box.make_square(y, x, size).npbox_format()
+            for y, x, size in squares
+        ]
+        windows += [
+            np.array([y, x, y + 40, x + 60])
+            for y, x in np.random.uniform(-50, 1000, size=(20, 2))
+        ]
+        for window in windows:
+            self.assert_query(index, npboxes, window)
+
+    def test_get_intersecting_pairs(self):
+        npboxes = make_npboxes(1000, extent_size=300)
+        npboxes[0:10, 2:4] += 200
+        inds1, inds2 = BoxIndex(npboxes).get_intersecting_pairs()
+        pairs = set(zip(np.minimum(inds1, inds2), np.maximum(inds1, inds2)))
+        self.assertEqual(len(pairs), len(inds1))
+
+        intersects = ((npboxes[:, np.newaxis, 0] < npboxes[np.newaxis, :, 2])
+                      & (npboxes[:, np.newaxis, 2] > npboxes[np.newaxis, :, 0])
+                      & (npboxes[:, np.newaxis, 1] < npboxes[np.newaxis, :, 3])
+                      &
+                      (npboxes[:, np.newaxis, 3] > npboxes[np.newaxis, :, 1]))
+        exp_inds1, exp_inds2 = np.nonzero(np.triu(intersects, k=1))
+        self.assertSetEqual(pairs, set(zip(exp_inds1, exp_inds2)))
+
+    def test_query_empty(self):
+        index = BoxIndex(np.empty((0, 4)))
+        self.assertEqual(len(index.query(np.array([0, 0, 10, 10]))), 0)
+
+    def test_get_overlapping(self):
+        npboxes = make_npboxes(500, extent_size=200)
+        class_ids = np.random.randint(1, 3, size=500)
+        scores = np.random.uniform(size=500)
+        labels = ObjectDetectionLabels(npboxes, class_ids, scores=scores)
+        for window in [Box.make_square(50, 50, 30), Box(-10, 0, 40, 210)]:
+            for ioa_thresh in [0.000001, 0.5, 1.0]:
+                # Copy the labels to a list of small labels objects so that
+                # the box index isn't used.
+                exp_labels = ObjectDetectionLabels.make_empty()
+                for i in range(0, 500, 50):
+                    small_labels = ObjectDetectionLabels(
+                        npboxes[i:i + 50], class_ids[i:i + 50],
+                        scores[i:i + 50])
+                    exp_labels += ObjectDetectionLabels.get_overlapping(
+                        small_labels, window, ioa_thresh, clip=True)
+
+                window_labels = ObjectDetectionLabels.get_overlapping(
+                    labels, window, ioa_thresh, clip=True)
+                window_labels.assert_equal(exp_labels)
+        self.assertIsNotNone(labels.box_index)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+
+import numpy as np
+
+from rastervision.data.label import box_ops
+
+
+def make_detections(num_objects, extent_size=300, num_dups=4):
+    mins = np.random.uniform(0, extent_size, size=(num_objects, 2))
+    sizes = np.random.uniform(5, 20, size=(num_objects, 2))
+    npboxes = np.hstack([mins, mins + sizes]).repeat(num_dups, axis=0)
+    npboxes += np.random.normal(0, 1, size=npboxes.shape)
+    npboxes[:, 2:4] = np.maximum(npboxes[:, 2:4], npboxes[:, 0:2] + 1)
+    scores = np.random.uniform(size=len(npboxes))
+    class_ids = np.random.randint(1, 3, size=len(npboxes))
+    return npboxes, scores, class_ids
+
+
+def global_non_max_suppression(npboxes, scores, iou_thresh, score_thresh,
+                               class_ids):
+    inds = np.nonzero(scores > score_thresh)[0]
+    inds = inds[np.argsort(scores[inds])[::-1]]
+    selected = []
+    while len(inds) > 0:
+        ind = inds[0]
+        selected.append(ind)
+        ious = box_ops.iou(npboxes[ind:ind + 1], npboxes[inds[1:]])[0]
+        keep = ~(ious > iou_thresh)
+        if class_ids is not None:
+            keep |= class_ids[inds[1:]] != class_ids[ind]
+        inds = inds[1:][keep]
+    return np.array(selected, dtype=np.int64)
+
+
+def global_soft_non_max_suppression(npboxes, scores, score_thresh, sigma):
+    scores = scores.astype(np.float64)
+    inds = np.nonzero(scores > score_thresh)[0]
+    selected = []
+    selected_scores = []
+    while len(inds) > 0:
+        best = np.argmax(scores[inds])
+        ind = inds[best]
+        if scores[ind] <= score_thresh:
+            break
+        selected.append(ind)
+        selected_scores.append(scores[ind])
+        inds = np.delete(inds, best)
+        ious = box_ops.iou(npboxes[ind:ind + 1], npboxes[inds])[0]
+        scores[inds] *= np.exp(-ious**2 / sigma)
+    return np.array(selected), np.array(selected_scores)
+
+
+class TestBoxOps(unittest.TestCase):
+    def setUp(self):
+        self.npboxes1 = np.array([[0., 0., 2., 2.], [1., 1., 3., 5.]])
+        self.npboxes2 = np.array([[1., 1., 2., 2.], [0., 0., 4., 4.],
+                                  [5., 5., 5., 6.]])
+
+    def test_area(self):
+        np.testing.assert_array_equal(box_ops.area(self.npboxes1), [4., 8.])
+
+    def test_intersection(self):
+        np.testing.assert_array_equal(
+            box_ops.intersection(self.npboxes1, self.npboxes2),
+            [[1., 4., 0.], [1., 6., 0.]])
+
+    def test_iou(self):
+        np.testing.assert_array_almost_equal(
+            box_ops.iou(self.npboxes1, self.npboxes2),
+            [[1. / 4, 4. / 16, 0.], [1. / 8, 6. / 18, 0.]])
+
+    def test_ioa(self):
+        ioas = box_ops.ioa(self.npboxes1, self.npboxes2)
+        np.testing.assert_array_almost_equal(ioas[:, 0:2],
+                                             [[1., 4. / 16], [1., 6. / 16]])
+        # The last box has no area.
+        self.assertTrue(np.all(np.isnan(ioas[:, 2])))
+
+    def test_clip_to_window(self):
+        window = np.array([1., 1., 4., 4.])
+        clipped, inds = box_ops.clip_to_window(self.npboxes2, window)
+        np.testing.assert_array_equal(clipped,
+                                      [[1., 1., 2., 2.], [1., 1., 4., 4.]])
+        np.testing.assert_array_equal(inds, [0, 1])
+
+    def test_non_max_suppression(self):
+        npboxes = np.array([[0., 0., 10., 10.], [1., 1., 11., 11.],
+                            [0., 0., 10., 9.], [20., 20., 30.,
+                                                30.], [0., 0., 1., 1.]])
+        scores = np.array([0.8, 0.9, 0.7, 0.3, 0.1])
+        inds = box_ops.non_max_suppression(
+            npboxes, scores, iou_thresh=0.5, score_thresh=0.2)
+        np.testing.assert_array_equal(inds, [1, 3])
+
+        inds = box_ops.non_max_suppression(
+            npboxes, scores, iou_thresh=0.85, score_thresh=0.0)
+        np.testing.assert_array_equal(inds, [1, 0, 3, 4])
+
+        inds = box_ops.non_max_suppression(
+            npboxes, scores, iou_thresh=1.0, score_thresh=0.0)
+        np.testing.assert_array_equal(inds, [1, 0, 2, 3, 4])
+
+        with self.assertRaises(ValueError):
+            box_ops.non_max_suppression(npboxes, scores, 1.5, 0.0)
+
+    def test_non_max_suppression_matches_global(self):
+        npboxes, scores, class_ids = make_detections(500)
+        for iou_thresh in [0.0, 0.3, 0.7]:
+            for ids in [None, class_ids]:
+                np.testing.assert_array_equal(
+                    box_ops.non_max_suppression(
+                        npboxes, scores, iou_thresh, 0.1, class_ids=ids),
+                    global_non_max_suppression(npboxes, scores, iou_thresh,
+                                               0.1, ids))
+
+    def test_soft_non_max_suppression(self):
+        npboxes, scores, _ = make_detections(200)
+        inds, new_scores = box_ops.soft_non_max_suppression(
+            npboxes, scores, 0.3, sigma=0.5)
+        exp_inds, exp_scores = global_soft_non_max_suppression(
+            npboxes, scores, 0.3, 0.5)
+        np.testing.assert_array_equal(inds, exp_inds)
+        np.testing.assert_array_almost_equal(new_scores, exp_scores)
+
+    def test_weighted_box_fusion(self):
+        npboxes = np.array([[0., 0., 10., 10.], [2., 2., 12., 12.],
+                            [20., 20., 30., 30.], [0., 0., 1., 1.]])
+        scores = np.array([0.6, 0.2, 0.5, 0.05])
+        class_ids = np.array([1, 1, 2, 1])
+        fused_npboxes, fused_scores, inds = box_ops.weighted_box_fusion(
+            npboxes, scores, 0.4, 0.1, class_ids=class_ids)
+        np.testing.assert_array_almost_equal(
+            fused_npboxes, [[0.5, 0.5, 10.5, 10.5], [20., 20., 30., 30.]])
+        np.testing.assert_array_almost_equal(fused_scores, [0.4, 0.5])
+        np.testing.assert_array_equal(inds, [0, 2])
+
+        # The boxes have different classes, so they aren't merged.
+        class_ids[1] = 2
+        fused_npboxes, _, inds = box_ops.weighted_box_fusion(
+            npboxes, scores, 0.4, 0.1, class_ids=class_ids)
+        np.testing.assert_array_almost_equal(fused_npboxes, npboxes[[0, 2, 1]])
+        np.testing.assert_array_equal(inds, [0, 2, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
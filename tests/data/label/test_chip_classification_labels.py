@@ -1,5 +1,8 @@
 import unittest
 
+import numpy as np
+from shapely.geometry import Polygon
+
 from rastervision.core.box import Box
 from rastervision.data.label.chip_classification_labels import ChipClassificationLabels
 
@@ -63,6 +66,110 @@ class TestChipClassificationLabels(unittest.TestCase):
         self.assertEqual(len(cells), 3)
         self.assertTrue(cell3 in cells)
 
+    def test_scores_and_none(self):
+        self.labels.set_cell(self.cell1, None, np.array([0.25, 0.75]))
+        self.assertEqual(
+            self.labels.get_cell_values(self.cell1), (None, [0.25, 0.75]))
+        self.assertEqual(self.labels.get_cell_values(self.cell2), (2, None))
+        self.assertEqual(len(self.labels), 2)
+
+        # Scores with another length are kept outside the grid.
+        self.labels.set_cell(self.cell2, 2, [0.5])
+        self.assertEqual(self.labels.get_cell_scores(self.cell2), [0.5])
+        self.assertDictEqual(self.labels.cell_to_class_id, {
+            (0, 0, 2, 2): (None, [0.25, 0.75]),
+            (0, 2, 2, 4): (2, [0.5])
+        })
+
+    def test_cells_off_grid(self):
+        cell3 = Box(1, 1, 3, 3)
+        cell4 = Box(0.5, 0, 2.5, 2)
+        self.labels.set_cell(cell3, 3)
+        self.labels.set_cell(cell4, 4)
+        self.assertEqual(len(self.labels), 4)
+        self.assertEqual(self.labels.get_cell_class_id(cell3), 3)
+        self.assertEqual(self.labels.get_cell_class_id(cell4), 4)
+        self.assertListEqual(self.labels.get_class_ids(), [1, 2, 3, 4])
+
+    def test_lookup_does_not_define_grid(self):
+        labels = ChipClassificationLabels()
+        self.assertIsNone(labels.get_cell_class_id(Box(1, 1, 4, 4)))
+        labels.set_cell(self.cell1, 1)
+        self.assertEqual(labels.get_cell_class_id(self.cell1), 1)
+        self.assertEqual(labels.grid, (0, 0, 2, 2))
+
+    def test_set_many_cells(self):
+        # Cells that are set in a batch are stored like ones set one at a time.
+        cells = [
+            Box.make_square(y, x, 2) for y in range(0, 20, 2)
+            for x in range(0, 20, 2)
+        ]
+        cells += [Box(0.5, 0, 2.5, 2), Box(1.0, 1.0, 3.0, 3.0)]
+        labels = ChipClassificationLabels()
+        exp_values = []
+        for ind, cell in enumerate(cells):
+            class_id = None if ind % 7 == 0 else ind % 3
+            scores = [0.25, 0.75] if ind % 2 else None
+            if ind % 11 == 5:
+                class_id = 1.5
+            if ind % 13 == 0:
+                scores = [1.0]
+            labels.set_cell(cell, class_id, scores)
+            exp_values.append((class_id, scores))
+
+        for cell, exp_value in zip(cells, exp_values):
+            labels.set_cell(cell.make_copy(), *exp_value)
+            singleton = ChipClassificationLabels()
+            singleton.set_cell(cell, *exp_value)
+            self.assertEqual(labels.get_cell_values(cell), exp_value)
+            self.assertEqual(singleton.get_cell_values(cell), exp_value)
+        self.assertEqual(len(labels), len(cells))
+        self.assertEqual(labels.grid, (0, 0, 2, 2))
+
+    def test_add(self):
+        other = ChipClassificationLabels()
+        # The grid of other is offset by whole cells.
+        other.set_cell(Box.make_square(-4, 6, 2), 3, [0.1, 0.9])
+        other.set_cell(self.cell2, 4, [0.2, 0.8])
+        other.set_cell(Box(1, 1, 2, 2), 5)
+
+        labels = self.labels + other
+        self.assertDictEqual(
+            labels.cell_to_class_id, {
+                (0, 0, 2, 2): (1, None),
+                (0, 2, 2, 4): (4, [0.20000000298023224, 0.800000011920929]),
+                (-4, 6, -2, 8): (3, [0.10000000149011612, 0.8999999761581421]),
+                (1, 1, 2, 2): (5, None)
+            })
+        self.assertEqual(len(self.labels), 2)
+
+        # Grids that don't line up are added a cell at a time.
+        other = ChipClassificationLabels()
+        other.set_cell(Box.make_square(1, 0, 2), 6)
+        labels = self.labels + other
+        self.assertEqual(len(labels), 3)
+        self.assertEqual(labels.get_cell_class_id(Box.make_square(1, 0, 2)), 6)
+
+    def test_filter_by_aoi(self):
+        labels = ChipClassificationLabels()
+        for cell in Box(0, 0, 100, 100).get_windows(10, 10):
+            labels.set_cell(cell, 1)
+        labels.set_cell(Box(3, 3, 13, 13), 2)
+        aoi_polygons = [
+            Polygon([(5, 5), (95, 20), (60, 90), (5, 5)]),
+            Polygon([(0, 80), (20, 80), (20, 100), (0, 100)])
+        ]
+
+        filtered = labels.filter_by_aoi(aoi_polygons)
+        expected = [
+            cell for cell in labels.get_cells()
+            if any(cell.to_shapely().within(aoi) for aoi in aoi_polygons)
+        ]
+        self.assertTrue(len(expected) > 10)
+        self.assertEqual(
+            set(c.tuple_format() for c in filtered.get_cells()),
+            set(c.tuple_format() for c in expected))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -30,6 +30,11 @@ class ObjectDetectionLabelsTest(unittest.TestCase):
         labels = ObjectDetectionLabels.from_boxlist(boxlist)
         labels.assert_equal(self.labels)
 
+    def test_to_boxlist(self):
+        boxlist = self.labels.to_boxlist()
+        labels = ObjectDetectionLabels.from_boxlist(boxlist)
+        labels.assert_equal(self.labels)
+
     def test_make_empty(self):
         npboxes = np.empty((0, 4))
         class_ids = np.empty((0, ))
@@ -144,6 +149,30 @@ class ObjectDetectionLabelsTest(unittest.TestCase):
             npboxes, class_ids, scores=scores)
         new_labels.assert_equal(expected_labels)
 
+    def test_concatenate_all(self):
+        labels = ObjectDetectionLabels(
+            np.array([[4., 4., 5., 5.]]), np.array([2]), np.array([0.3]))
+        new_labels = ObjectDetectionLabels.concatenate_all(
+            [self.labels,
+             ObjectDetectionLabels.make_empty(), labels])
+        new_labels.assert_equal(
+            ObjectDetectionLabels.concatenate(self.labels, labels))
+
+    def test_constructor_invalid(self):
+        with self.assertRaises(ValueError):
+            ObjectDetectionLabels(np.array([[2., 0., 1., 1.]]), np.array([1]))
+        with self.assertRaises(ValueError):
+            ObjectDetectionLabels(np.array([[0, 0, 1, 1]]), np.array([1]))
+        with self.assertRaises(ValueError):
+            ObjectDetectionLabels(self.npboxes, np.array([1]))
+
+    def test_filter_by_aoi(self):
+        aoi_polygons = [Box.make_square(0, 0, 3).to_shapely()]
+        labels = self.labels.filter_by_aoi(aoi_polygons)
+        labels.assert_equal(
+            ObjectDetectionLabels(self.npboxes[0:1], self.class_ids[0:1],
+                                  self.scores[0:1]))
+
     def test_prune_duplicates(self):
         # This first box has a score below score_thresh so it should get
         # pruned. The third box overlaps with the second, but has higher score,
@@ -182,6 +211,36 @@ class ObjectDetectionLabelsTest(unittest.TestCase):
             scores=expected_scores[pruned_inds])
         pruned_labels.assert_equal(expected_labels)
 
+    def test_prune_duplicates_methods(self):
+        npboxes = np.array([[0., 0., 10., 10.], [1., 1., 11., 11.],
+                            [20., 20., 30., 30.]])
+        class_ids = np.array([1, 2, 1])
+        scores = np.array([0.9, 0.8, 0.7])
+        labels = ObjectDetectionLabels(npboxes, class_ids, scores=scores)
+
+        pruned_labels = ObjectDetectionLabels.prune_duplicates(
+            labels, 0.5, 0.5, nms_method='nms')
+        self.assertEqual(len(pruned_labels), 2)
+        pruned_labels = ObjectDetectionLabels.prune_duplicates(
+            labels, 0.5, 0.5, nms_method='nms', class_aware=True)
+        pruned_labels.assert_equal(labels)
+
+        pruned_labels = ObjectDetectionLabels.prune_duplicates(
+            labels, 0.2, 0.5, nms_method='soft_nms')
+        self.assertEqual(len(pruned_labels), 3)
+        # The second box overlaps the first, so its score is decayed.
+        self.assertLess(pruned_labels.get_scores()[2], 0.5)
+
+        pruned_labels = ObjectDetectionLabels.prune_duplicates(
+            labels, 0.5, 0.5, nms_method='wbf')
+        self.assertEqual(len(pruned_labels), 2)
+        np.testing.assert_array_equal(pruned_labels.get_class_ids(), [1, 1])
+        self.assertAlmostEqual(pruned_labels.get_scores()[0], 0.85)
+
+        with self.assertRaises(ValueError):
+            ObjectDetectionLabels.prune_duplicates(
+                labels, 0.5, 0.5, nms_method='unknown')
+
 
 if __name__ == '__main__':
     unittest.main()
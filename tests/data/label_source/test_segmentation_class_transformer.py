@@ -33,6 +33,29 @@ class TestSegmentationClassTransformer(unittest.TestCase):
         expected_rgb_image = self.rgb_image
         np.testing.assert_array_equal(rgb_image, expected_rgb_image)
 
+    def test_rgb_to_class_unknown_color(self):
+        rgb_image = np.concatenate(
+            [self.rgb_image,
+             np.array([[[1, 2, 3], [255, 255, 255]]])], axis=1)
+        class_image = self.transformer.rgb_to_class(rgb_image)
+        np.testing.assert_array_equal(class_image, [[1, 2, 3, 0, 0]])
+        self.assertEqual(class_image.dtype, np.uint8)
+
+    def test_class_to_rgb_unknown_class(self):
+        class_image = np.array([[0, 1, 4, 200]])
+        rgb_image = self.transformer.class_to_rgb(class_image)
+        expected_rgb_image = np.zeros((1, 4, 3))
+        expected_rgb_image[0, 1, :] = color_to_triple('red')
+        np.testing.assert_array_equal(rgb_image, expected_rgb_image)
+        self.assertEqual(rgb_image.dtype, np.uint8)
+
+    def test_round_trip(self):
+        class_image = np.random.randint(0, 4, (100, 80))
+        rgb_image = self.transformer.class_to_rgb(class_image)
+        self.assertEqual(rgb_image.shape, (100, 80, 3))
+        np.testing.assert_array_equal(
+            self.transformer.rgb_to_class(rgb_image), class_image)
+
 
 if __name__ == '__main__':
     unittest.main()
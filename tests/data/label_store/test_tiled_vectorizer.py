@@ -0,0 +1,93 @@
+import unittest
+
+import numpy as np
+from rasterio.features import shapes
+from scipy import ndimage
+import shapely.geometry
+import shapely.ops
+
+from rastervision.data.label_store.tiled_vectorizer import TiledVectorizer
+
+
+def vectorize(mask, transform):
+    features = []
+    for geom, value in shapes(mask, mask=mask > 0, connectivity=8):
+        polygon = shapely.ops.transform(transform,
+                                        shapely.geometry.shape(geom))
+        features.append({
+            'type': 'Feature',
+            'geometry': shapely.geometry.mapping(polygon),
+            'properties': {}
+        })
+    return features
+
+
+def denoise(mask):
+    return ndimage.binary_opening(
+        mask, structure=np.ones((3, 3)), iterations=2).astype(np.uint8)
+
+
+def transform(x, y):
+    return (x * 0.5 + 100, -y * 0.5 + 200)
+
+
+class TestTiledVectorizer(unittest.TestCase):
+    def setUp(self):
+        np.random.seed(0)
+        # Blobs of various sizes, some of which span several tiles.
+        noise = np.random.uniform(size=(130, 170))
+        self.mask = (ndimage.gaussian_filter(noise, 3) > 0.52).astype(np.uint8)
+        self.mask[5:120, 60] = 1
+        self.mask[40, 100:170] = 1
+        # Pixels that only touch diagonally across the corner of four tiles.
+        self.mask[31, 31] = 1
+        self.mask[32, 32] = 1
+
+    def read_mask(self, window):
+        (ymin, ymax), (xmin, xmax) = window
+        return self.mask[ymin:ymax, xmin:xmax].copy()
+
+    def get_geoms(self, features):
+        return sorted(
+            [shapely.geometry.shape(f['geometry']).wkt for f in features])
+
+    def assert_same_features(self, denoise=None, num_workers=1):
+        whole = TiledVectorizer(
+            self.read_mask,
+            self.mask.shape,
+            vectorize,
+            denoise=denoise,
+            denoise_radius=2,
+            tile_size=1000)
+        exp_geoms = self.get_geoms(whole.get_features(transform))
+        self.assertGreater(len(exp_geoms), 10)
+
+        tiled = TiledVectorizer(
+            self.read_mask,
+            self.mask.shape,
+            vectorize,
+            denoise=denoise,
+            denoise_radius=2,
+            tile_size=32,
+            num_workers=num_workers)
+        self.assertListEqual(
+            self.get_geoms(tiled.get_features(transform)), exp_geoms)
+
+    def test_get_features(self):
+        self.assert_same_features()
+
+    def test_get_features_denoise(self):
+        self.assert_same_features(denoise=denoise)
+
+    def test_get_features_parallel(self):
+        self.assert_same_features(num_workers=2)
+
+    def test_get_features_empty(self):
+        self.mask[:, :] = 0
+        tiled = TiledVectorizer(
+            self.read_mask, self.mask.shape, vectorize, tile_size=32)
+        self.assertListEqual(tiled.get_features(transform), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import unittest
+import os
+from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import rasterio
+
+import rastervision as rv
+from rastervision.core import Box
+from rastervision.data.raster_source.block_cache import BlockCache
+from rastervision.rv_config import RVConfig
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.raster = np.random.randint(
+            0, 256, size=(100, 70, 3), dtype=np.uint8)
+        self.reads = []
+
+        def read_block(window):
+            self.reads.append(window)
+            (ymin, ymax), (xmin, xmax) = window
+            return self.raster[ymin:ymax, xmin:xmax, :].copy()
+
+        self.read_block = read_block
+
+    def make_cache(self, max_bytes=10**9):
+        return BlockCache(
+            self.read_block, (100, 70), (16, 16),
+            3,
+            np.uint8,
+            max_bytes,
+            min_block_size=32)
+
+    def test_get_window(self):
+        cache = self.make_cache()
+        windows = [
+            Box(0, 0, 10, 10),
+            Box(20, 30, 90, 70),
+            Box(5, 5, 100, 70),
+            Box(0, 0, 100, 70)
+        ]
+        for window in windows:
+            (ymin, ymax), (xmin, xmax) = window.rasterio_format()
+            np.testing.assert_array_equal(
+                cache.get_window(window.rasterio_format()),
+                self.raster[ymin:ymax, xmin:xmax, :])
+
+    def test_get_window_boundless(self):
+        cache = self.make_cache()
+        chip = cache.get_window(((-10, 20), (60, 80)))
+        self.assertEqual(chip.shape, (30, 20, 3))
+        np.testing.assert_array_equal(chip[0:10, :, :], 0)
+        np.testing.assert_array_equal(chip[:, 10:, :], 0)
+        np.testing.assert_array_equal(chip[10:, 0:10, :],
+                                      self.raster[0:20, 60:70, :])
+
+        chip = cache.get_window(((200, 210), (0, 10)))
+        np.testing.assert_array_equal(chip, 0)
+
+    def test_blocks_read_once(self):
+        cache = self.make_cache()
+        # Blocks are grouped into 32x32 blocks.
+        cache.get_window(((0, 40), (0, 40)))
+        self.assertEqual(len(self.reads), 4)
+        self.assertEqual(cache.get_stats()['misses'], 4)
+
+        cache.get_window(((10, 50), (10, 50)))
+        self.assertEqual(len(self.reads), 4)
+        self.assertEqual(cache.get_stats()['hits'], 4)
+
+        # The last blocks are clipped to the raster.
+        cache.get_window(((90, 100), (60, 70)))
+        self.assertEqual(self.reads[-1], ((96, 100), (64, 70)))
+
+    def test_eviction(self):
+        block_bytes = 32 * 32 * 3
+        cache = self.make_cache(max_bytes=2 * block_bytes)
+        cache.get_window(((0, 1), (0, 1)))
+        cache.get_window(((0, 1), (32, 33)))
+        cache.get_window(((0, 1), (0, 1)))
+        # Evicts the least recently used block at (0, 32).
+        cache.get_window(((32, 33), (0, 1)))
+        self.assertEqual(cache.get_stats()['bytes'], 2 * block_bytes)
+
+        cache.get_window(((0, 1), (0, 1)))
+        self.assertEqual(cache.get_stats()['hits'], 2)
+        cache.get_window(((0, 1), (32, 33)))
+        self.assertEqual(cache.get_stats()['misses'], 4)
+
+    def test_get_window_from_threads(self):
+        cache = self.make_cache(max_bytes=4 * 32 * 32 * 3)
+        windows = Box(0, 0, 100, 70).get_windows(10, 10) * 5
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            chips = list(
+                executor.map(lambda w: cache.get_window(w.rasterio_format()),
+                             windows))
+        for window, chip in zip(windows, chips):
+            np.testing.assert_array_equal(
+                chip, self.raster[window.ymin:window.ymax, window.xmin:
+                                  window.xmax, :])
+        self.assertLessEqual(cache.get_stats()['bytes'], 4 * 32 * 32 * 3)
+
+
+class TestRasterioBlockCache(unittest.TestCase):
+    def tearDown(self):
+        rv._registry.initialize_config()
+
+    def test_cached_chips_match(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_path = os.path.join(tmp_dir, 'tiled.tif')
+            im = np.random.randint(
+                1, 2**16, size=(4, 150, 130), dtype=np.uint16)
+            with rasterio.open(
+                    image_path,
+                    'w',
+                    driver='GTiff',
+                    height=150,
+                    width=130,
+                    count=4,
+                    dtype=np.uint16,
+                    tiled=True,
+                    blockxsize=32,
+                    blockysize=32,
+                    nodata=7) as image_dataset:
+                image_dataset.write(im)
+
+            config = rv.data.GeoTiffSourceConfig(
+                uris=[image_path], channel_order=[2, 0])
+            source = config.create_source(tmp_dir)
+            rv._registry.initialize_config(
+                config_overrides={'RV_raster_block_cache_size': '1000000'})
+            cached_source = config.create_source(tmp_dir)
+
+            windows = Box(-20, -20, 170, 150).get_windows(50, 25)
+            with source.activate(), cached_source.activate():
+                # Threads that read at once share one cache.
+                with patch.object(
+                        cached_source,
+                        '_make_block_cache',
+                        wraps=cached_source._make_block_cache) as make_cache:
+                    with ThreadPoolExecutor(max_workers=4) as executor:
+                        chips = list(
+                            executor.map(cached_source.get_chip, windows))
+                    self.assertEqual(make_cache.call_count, 1)
+                for window, chip in zip(windows, chips):
+                    np.testing.assert_array_equal(chip,
+                                                  source.get_chip(window))
+                self.assertIsNone(source.block_cache)
+                stats = cached_source.block_cache.get_stats()
+                self.assertGreater(stats['hits'], 0)
+                self.assertLessEqual(stats['bytes'], 1000000)
+
+
+if __name__ == '__main__':
+    unittest.main()
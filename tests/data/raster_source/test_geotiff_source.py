@@ -1,5 +1,7 @@
 import unittest
 import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
 
 import numpy as np
 import rasterio
@@ -12,6 +14,7 @@ from rastervision.rv_config import RVConfig
 from rastervision.utils.files import make_dir
 
 from tests import data_file_path
+from tests.range_server import RangeServer
 
 
 class TestGeoTiffSource(unittest.TestCase):
@@ -42,6 +45,111 @@ class TestGeoTiffSource(unittest.TestCase):
                 chip = load_window(image_dataset, window=window)
             np.testing.assert_equal(chip, np.zeros(chip.shape))
 
+    def test_load_window_bands(self):
+        with RVConfig.get_tmp_dir() as temp_dir:
+            image_path = os.path.join(temp_dir, 'temp.tif')
+            im = np.random.randint(0, 10, (4, 40, 50)).astype(np.uint16)
+            with rasterio.open(
+                    image_path,
+                    'w',
+                    driver='GTiff',
+                    height=40,
+                    width=50,
+                    count=4,
+                    dtype=np.uint16,
+                    nodata=7) as image_dataset:
+                image_dataset.write(im)
+
+            windows = [
+                Box(0, 0, 40, 50),
+                Box(5, 10, 25, 30),
+                Box(-5, 40, 15, 60),
+                Box(50, 60, 55, 65),
+                Box(2.5, 3.5, 12.5, 13.5)
+            ]
+            with rasterio.open(image_path) as image_dataset:
+                for window in windows:
+                    window = window.rasterio_format()
+                    # Read all bands and select them afterwards.
+                    exp_chip = image_dataset.read(
+                        window=window, boundless=True)
+                    exp_chip[exp_chip == 7] = 0
+                    exp_chip = np.transpose(exp_chip[[3, 1]], (1, 2, 0))
+
+                    for is_masked in [False, True]:
+                        chip = load_window(
+                            image_dataset,
+                            window=window,
+                            channels=[3, 1],
+                            is_masked=is_masked)
+                        np.testing.assert_array_equal(chip, exp_chip)
+
+                    out = np.full(exp_chip.shape, 5, dtype=np.uint16)
+                    chip = load_window(
+                        image_dataset, window=window, channels=[3, 1], out=out)
+                    self.assertIs(chip, out)
+                    np.testing.assert_array_equal(out, exp_chip)
+
+    def test_get_chips(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_path = os.path.join(tmp_dir, 'image.tif')
+            self.write_tiled_image(image_path, height=200, width=200)
+            source = rv.data.GeoTiffSourceConfig(
+                uris=[image_path], channel_order=[2, 0]) \
+                .create_source(tmp_dir)
+            windows = Box(0, 0, 200, 200).get_windows(64, 64)
+
+            with source.activate():
+                exp_chips = np.array([source.get_chip(w) for w in windows])
+                np.testing.assert_array_equal(
+                    source.get_chips(windows), exp_chips)
+                out = np.zeros_like(exp_chips)
+                self.assertIs(source.get_chips(windows, out=out), out)
+                np.testing.assert_array_equal(out, exp_chips)
+
+    def test_get_chips_transformed(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_path = os.path.join(tmp_dir, 'image.tif')
+            im = np.random.randint(
+                0, 2**16, size=(3, 100, 100), dtype=np.uint16)
+            with rasterio.open(
+                    image_path,
+                    'w',
+                    driver='GTiff',
+                    height=100,
+                    width=100,
+                    count=3,
+                    dtype=np.uint16) as image_dataset:
+                image_dataset.write(im)
+
+            stats = RasterStats()
+            stats.means = [30000., 20000., 10000.]
+            stats.stds = [10000., 5000., 2000.]
+            transformer = rv.data.StatsTransformer(stats)
+            source = rv.data.GeoTiffSource(
+                uris=[image_path],
+                raster_transformers=[transformer],
+                temp_dir=tmp_dir,
+                channel_order=[2, 0])
+            windows = Box(0, 0, 100, 100).get_windows(32, 32)
+
+            with source.activate():
+                exp_chips = [
+                    transformer.transform(
+                        im[[2, 0], w.ymin:w.ymax, w.xmin:w.xmax].transpose(
+                            1, 2, 0), [2, 0]) for w in windows[0:3]
+                ]
+                chips = [source.get_chip(w) for w in windows[0:3]]
+                for chip, exp_chip in zip(chips, exp_chips):
+                    np.testing.assert_array_equal(chip, exp_chip)
+
+                exp_chips = np.array([source.get_chip(w) for w in windows])
+                np.testing.assert_array_equal(
+                    source.get_chips(windows), exp_chips)
+                out = np.zeros_like(exp_chips)
+                self.assertIs(source.get_chips(windows, out=out), out)
+                np.testing.assert_array_equal(out, exp_chips)
+
     def test_get_dtype(self):
         img_path = data_file_path('small-rgb-tile.tif')
         with RVConfig.get_tmp_dir() as tmp_dir:
@@ -188,6 +296,164 @@ class TestGeoTiffSource(unittest.TestCase):
         self.assertIsInstance(config.transformers[0],
                               rv.data.StatsTransformerConfig)
 
+    def test_get_chip_from_threads(self):
+        img_path = data_file_path('small-rgb-tile.tif')
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            source = rv.data.GeoTiffSourceConfig(uris=[img_path]) \
+                            .create_source(tmp_dir)
+            windows = source.get_extent().get_windows(40, 20)
+            with source.activate():
+                exp_chips = [source.get_chip(w) for w in windows]
+                with ThreadPoolExecutor(max_workers=4) as executor:
+                    chips = list(executor.map(source.get_chip, windows * 3))
+                # Each thread reads from its own dataset.
+                self.assertGreater(len(source.thread_datasets), 1)
+
+            for chip, exp_chip in zip(chips, exp_chips * 3):
+                np.testing.assert_array_equal(chip, exp_chip)
+            self.assertEqual(source.thread_datasets, [])
+
+    def write_tiled_image(self, image_path, height=1024, width=1024):
+        im = np.random.randint(0, 256, size=(3, height, width), dtype=np.uint8)
+        with rasterio.open(
+                image_path,
+                'w',
+                driver='GTiff',
+                height=height,
+                width=width,
+                count=3,
+                dtype=np.uint8,
+                tiled=True,
+                blockxsize=128,
+                blockysize=128) as image_dataset:
+            image_dataset.write(im)
+
+    def test_stream(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_dir = os.path.join(tmp_dir, 'images')
+            make_dir(image_dir)
+            image_path = os.path.join(image_dir, 'image.tif')
+            self.write_tiled_image(image_path)
+            windows = [Box(0, 0, 100, 100), Box(500, 600, 630, 700)]
+
+            local_source = rv.data.GeoTiffSourceConfig(uris=[image_path]) \
+                                  .create_source(tmp_dir)
+            with local_source.activate():
+                exp_chips = [local_source.get_chip(w) for w in windows]
+
+            with RangeServer(image_dir) as server:
+                config = rv.RasterSourceConfig.builder(rv.GEOTIFF_SOURCE) \
+                                              .with_uri(server.get_uri('image.tif')) \
+                                              .with_stream() \
+                                              .build()
+                source = config.create_source(tmp_dir)
+                with source.activate():
+                    self.assertTrue(source.is_streaming)
+                    for window, exp_chip in zip(windows, exp_chips):
+                        np.testing.assert_array_equal(
+                            source.get_chip(window), exp_chip)
+                    block_cache_dir = source.block_cache_dir
+
+                # The file was never fully downloaded.
+                self.assertTrue(
+                    all(method == 'HEAD' or range_header
+                        for method, _, range_header in server.requests))
+
+                # Blocks are read from the disk cache after they have been
+                # fetched once.
+                self.assertGreater(len(os.listdir(block_cache_dir)), 0)
+                num_requests = len(server.requests)
+                with source.activate():
+                    np.testing.assert_array_equal(
+                        source.get_chip(windows[1]), exp_chips[1])
+                data_requests = [
+                    r for r in server.requests[num_requests:] if r[0] == 'GET'
+                ]
+                self.assertLessEqual(len(data_requests), 1)
+
+    def test_stream_fallback(self):
+        real_open = rasterio.open
+
+        def open_local_only(path, *args, **kwargs):
+            if path.startswith('http'):
+                raise rasterio.errors.RasterioIOError('Cannot stream')
+            return real_open(path, *args, **kwargs)
+
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_dir = os.path.join(tmp_dir, 'images')
+            make_dir(image_dir)
+            self.write_tiled_image(
+                os.path.join(image_dir, 'image.tif'), height=200, width=200)
+
+            with RangeServer(image_dir) as server:
+                config = rv.data.GeoTiffSourceConfig(
+                    uris=[server.get_uri('image.tif')], stream=True)
+                with patch('rasterio.open', side_effect=open_local_only):
+                    source = config.create_source(tmp_dir)
+                    with source.activate():
+                        self.assertFalse(source.is_streaming)
+                        self.assertEqual(
+                            source.get_chip(Box(0, 0, 10, 10)).shape,
+                            (10, 10, 3))
+                # The whole file was downloaded.
+                self.assertIn(('GET', '/image.tif', None), server.requests)
+
+    def test_stream_proto_round_trip(self):
+        config = rv.data.GeoTiffSourceConfig(
+            uris=['s3://a/b.tif'], stream=True)
+        config = rv.RasterSourceConfig.from_proto(config.to_proto())
+        self.assertTrue(config.stream)
+
+    def test_metadata_cache(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_dir = os.path.join(tmp_dir, 'images')
+            make_dir(image_dir)
+            image_path = os.path.join(image_dir, 'image.tif')
+            with rasterio.open(
+                    image_path,
+                    'w',
+                    driver='GTiff',
+                    height=100,
+                    width=200,
+                    count=3,
+                    dtype=np.uint16,
+                    crs='epsg:3857',
+                    transform=rasterio.transform.from_origin(
+                        1000, 2000, 0.5, 0.5)) as image_dataset:
+                image_dataset.write(np.ones((3, 100, 200), dtype=np.uint16))
+
+            with RangeServer(image_dir) as server:
+                config = rv.data.GeoTiffSourceConfig(
+                    uris=[server.get_uri('image.tif')])
+                source = config.create_source(tmp_dir)
+                self.assertIn(('GET', '/image.tif', None), server.requests)
+
+                # The metadata is cached, so constructing the source again
+                # only checks whether the file has changed.
+                num_requests = len(server.requests)
+                cached_source = config.create_source(tmp_dir)
+                self.assertListEqual(
+                    [r[0] for r in server.requests[num_requests:]], ['HEAD'])
+                self.assertEqual(cached_source.get_extent(),
+                                 source.get_extent())
+                self.assertEqual(cached_source.get_dtype(), np.uint16)
+                self.assertEqual(cached_source.num_channels, 3)
+                self.assertEqual(
+                    cached_source.get_crs_transformer().pixel_to_map((10, 20)),
+                    source.get_crs_transformer().pixel_to_map((10, 20)))
+                with cached_source.activate():
+                    self.assertEqual(
+                        cached_source.get_chip(Box(0, 0, 10, 10)).shape,
+                        (10, 10, 3))
+
+                # Changing the file invalidates the cached metadata.
+                stat = os.stat(image_path)
+                os.utime(image_path, (stat.st_atime, stat.st_mtime + 100))
+                num_requests = len(server.requests)
+                config.create_source(tmp_dir)
+                self.assertIn(('GET', '/image.tif', None),
+                              server.requests[num_requests:])
+
     def test_missing_config_uri(self):
         with self.assertRaises(rv.ConfigError):
             rv.data.RasterSourceConfig.builder(rv.GEOTIFF_SOURCE).build()
@@ -0,0 +1,154 @@
+import importlib
+import unittest
+import os
+from unittest.mock import patch
+
+import numpy as np
+import rasterio
+
+import rastervision as rv
+from rastervision.core import Box
+from rastervision.data.raster_source.geotiff_source import GeoTiffSource
+from rastervision.data.raster_source.materialized_cache import (
+    MaterializedCache)
+from rastervision.data.raster_source.rasterio_source import (
+    RasterioRasterSource)
+from rastervision.rv_config import RVConfig
+
+
+class TestMaterializedCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.cache_dir = os.path.join(self.tmp_dir_obj.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def put(self, cache, key, value):
+        def write_data(out):
+            out[:] = value
+
+        return cache.put(key, (10, 10, 2), np.uint8, write_data)
+
+    def test_put_get(self):
+        cache = MaterializedCache(self.cache_dir, 1000)
+        self.assertIsNone(cache.get('a'))
+        data = self.put(cache, 'a', 3)
+        np.testing.assert_array_equal(data, np.full((10, 10, 2), 3))
+
+        data = MaterializedCache(self.cache_dir, 1000).get('a')
+        self.assertIsInstance(data, np.memmap)
+        np.testing.assert_array_equal(data, np.full((10, 10, 2), 3))
+
+        # Changing the array doesn't change the cache.
+        data[:] = 4
+        np.testing.assert_array_equal(cache.get('a'), np.full((10, 10, 2), 3))
+
+    def test_eviction(self):
+        # Each entry takes 200 bytes of data and a 128 byte header.
+        cache = MaterializedCache(self.cache_dir, 800)
+        self.put(cache, 'a', 1)
+        self.put(cache, 'b', 2)
+        os.utime(os.path.join(self.cache_dir, 'a', 'index.json'), (1000, 1000))
+        os.utime(os.path.join(self.cache_dir, 'b', 'index.json'), (2000, 2000))
+
+        # Using an entry makes it the most recently used.
+        cache.get('a')
+        self.put(cache, 'c', 3)
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNotNone(cache.get('c'))
+
+    def test_too_large(self):
+        cache = MaterializedCache(self.cache_dir, 100)
+        self.assertIsNone(self.put(cache, 'a', 1))
+        self.assertIsNone(cache.get('a'))
+
+
+class TestMaterializedRasterSource(unittest.TestCase):
+    def tearDown(self):
+        rv._registry.initialize_config()
+
+    def test_materialized_chips_match(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            image_path = os.path.join(tmp_dir, 'tiled.tif')
+            im = np.random.randint(
+                8, 2**16, size=(4, 150, 130), dtype=np.uint16)
+            with rasterio.open(
+                    image_path,
+                    'w',
+                    driver='GTiff',
+                    height=150,
+                    width=130,
+                    count=4,
+                    dtype=np.uint16,
+                    tiled=True,
+                    blockxsize=32,
+                    blockysize=32,
+                    nodata=7) as image_dataset:
+                image_dataset.write(im)
+
+            config = rv.data.GeoTiffSourceConfig(
+                uris=[image_path], channel_order=[2, 0])
+            source = config.create_source(tmp_dir)
+            # Decode a few rows at a time.
+            rasterio_source = importlib.import_module(
+                'rastervision.data.raster_source.rasterio_source')
+            with patch.object(rasterio_source, 'materialize_strip_size', 1000):
+                materialized_source = config.to_builder() \
+                                            .with_materialize() \
+                                            .build() \
+                                            .create_source(tmp_dir)
+                with materialized_source.activate():
+                    self.assertIsNotNone(materialized_source.materialized)
+
+            windows = Box(-20, -20, 170, 150).get_windows(50, 25)
+            with source.activate(), materialized_source.activate():
+                for window in windows:
+                    np.testing.assert_array_equal(
+                        materialized_source.get_chip(window),
+                        source.get_chip(window))
+                    np.testing.assert_array_equal(
+                        materialized_source.get_raw_chip(window),
+                        source.get_raw_chip(window))
+
+                # Chips within the raster are views of the memory-mapped
+                # array.
+                chip = materialized_source.get_chip(Box(10, 20, 60, 80))
+                self.assertTrue(
+                    np.shares_memory(chip, materialized_source.materialized))
+
+            # The raster is only decoded once, even by other raster sources.
+            other_source = config.to_builder() \
+                                 .with_materialize() \
+                                 .build() \
+                                 .create_source(tmp_dir)
+            with patch.object(RasterioRasterSource,
+                              '_write_materialized') as write_materialized, \
+                    patch.object(GeoTiffSource, '_download_data',
+                                 autospec=True,
+                                 side_effect=GeoTiffSource._download_data) \
+                    as download_data:
+                with other_source.activate():
+                    np.testing.assert_array_equal(
+                        other_source.get_chip(Box(0, 0, 30, 30)),
+                        im[[2, 0], 0:30, 0:30].transpose(1, 2, 0))
+                    # Nothing is downloaded until a read can't be served
+                    # by the materialized raster.
+                    download_data.assert_not_called()
+                    np.testing.assert_array_equal(
+                        other_source.get_raw_chip(Box(0, 0, 30, 30)),
+                        im[:, 0:30, 0:30].transpose(1, 2, 0))
+                    self.assertEqual(download_data.call_count, 1)
+            write_materialized.assert_not_called()
+
+    def test_materialize_proto_round_trip(self):
+        config = rv.data.GeoTiffSourceConfig(
+            uris=['s3://a/b.tif'], materialize=True)
+        config = rv.RasterSourceConfig.from_proto(config.to_proto())
+        self.assertTrue(config.materialize)
+        self.assertTrue(config.to_builder().build().materialize)
+
+
+if __name__ == '__main__':
+    unittest.main()
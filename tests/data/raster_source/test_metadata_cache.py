@@ -0,0 +1,78 @@
+import json
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from rastervision.data.raster_source import metadata_cache
+from rastervision.data.raster_source.metadata_cache import (MetadataCache,
+                                                            get_cache_key)
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import str_to_file
+
+
+class TestGetCacheKey(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.uris = []
+        for ind in range(20):
+            uri = os.path.join(self.tmp_dir_obj.name, '{}.txt'.format(ind))
+            str_to_file(str(ind), uri)
+            self.uris.append(uri)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_get_cache_key(self):
+        key = get_cache_key('a', self.uris)
+        self.assertEqual(get_cache_key('a', self.uris), key)
+        self.assertNotEqual(get_cache_key('b', self.uris), key)
+        self.assertNotEqual(get_cache_key('a', self.uris[1:]), key)
+
+        str_to_file('changed', self.uris[-1])
+        self.assertNotEqual(get_cache_key('a', self.uris), key)
+
+    def test_unknown_version(self):
+        uris = self.uris + [os.path.join(self.tmp_dir_obj.name, 'missing')]
+        with self.assertLogs(metadata_cache.log, 'WARNING'):
+            self.assertIsNone(get_cache_key('a', uris))
+
+        with patch.object(
+                metadata_cache, 'get_file_version', return_value=None):
+            self.assertIsNone(get_cache_key('a', self.uris))
+
+
+class TestMetadataCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.cache_dir = os.path.join(self.tmp_dir_obj.name, 'cache')
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_evict(self):
+        metadata = {'values': list(range(10))}
+        entry_size = len(json.dumps(metadata))
+        cache = MetadataCache(self.cache_dir, max_size=2 * entry_size)
+        for ind, key in enumerate(['a', 'b', 'c']):
+            cache.put(key, metadata)
+            used_time = time.time() - 10 * (3 - ind)
+            os.utime(cache._get_path(key), (used_time, used_time))
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+        # Getting an entry marks it as used.
+        self.assertDictEqual(cache.get('a'), metadata)
+        cache.evict()
+        self.assertIsNone(cache.get('b'))
+        self.assertDictEqual(cache.get('a'), metadata)
+        self.assertDictEqual(cache.get('c'), metadata)
+
+        # Without a max_size, nothing is evicted.
+        cache = MetadataCache(self.cache_dir)
+        cache.put('d', metadata)
+        cache.evict()
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
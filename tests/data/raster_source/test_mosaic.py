@@ -0,0 +1,172 @@
+import os
+import unittest
+
+import numpy as np
+import rasterio
+from rasterio.transform import from_origin
+
+import rastervision as rv
+from rastervision.core import Box
+from rastervision.data.raster_source.mosaic import (Mosaic, read_tile_header)
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import make_dir
+
+from tests.range_server import RangeServer
+
+
+def write_tile(path, im, xmin, ymax, res=0.5, nodata=None):
+    with rasterio.open(
+            path,
+            'w',
+            driver='GTiff',
+            height=im.shape[1],
+            width=im.shape[2],
+            count=im.shape[0],
+            dtype=im.dtype,
+            crs='epsg:3857',
+            transform=from_origin(xmin, ymax, res, res),
+            nodata=nodata) as image_dataset:
+        image_dataset.write(im)
+
+
+class TestMosaic(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.tmp_dir = self.tmp_dir_obj.name
+        self.image_dir = os.path.join(self.tmp_dir, 'images')
+        make_dir(self.image_dir)
+
+        # A 2x2 grid of tiles cut from one image.
+        self.im = np.random.randint(1, 256, size=(3, 200, 300), dtype=np.uint8)
+        self.tile_names = []
+        for row in range(2):
+            for col in range(2):
+                name = 'tile-{}-{}.tif'.format(row, col)
+                write_tile(
+                    os.path.join(self.image_dir, name),
+                    self.im[:, row * 100:(row + 1) * 100, col * 150:(col + 1) *
+                            150], 1000 + col * 75, 2000 - row * 50)
+                self.tile_names.append(name)
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def get_exp_chip(self, window):
+        return np.transpose(
+            self.im[:, window.ymin:window.ymax, window.xmin:window.xmax],
+            (1, 2, 0))
+
+    def test_mosaic(self):
+        paths = [os.path.join(self.image_dir, n) for n in self.tile_names]
+        mosaic = Mosaic([read_tile_header(path) for path in paths])
+        self.assertEqual((mosaic.height, mosaic.width), (200, 300))
+        np.testing.assert_array_equal(
+            mosaic.get_tile_inds(((90, 110), (0, 10))), [0, 2])
+        np.testing.assert_array_equal(
+            mosaic.get_tile_inds(((0, 200), (0, 300))), [0, 1, 2, 3])
+
+        vrt_path = os.path.join(self.tmp_dir, 'index.vrt')
+        with open(vrt_path, 'w') as vrt_file:
+            vrt_file.write(mosaic.to_vrt(paths))
+        with rasterio.open(vrt_path) as image_dataset:
+            np.testing.assert_array_equal(image_dataset.read(), self.im)
+            self.assertEqual(image_dataset.transform,
+                             from_origin(1000, 2000, 0.5, 0.5))
+
+    def test_overlap_and_nodata(self):
+        # The last tile is on top, except where it has nodata values.
+        top = np.full((3, 50, 50), 7, dtype=np.uint8)
+        top[:, 0:10, :] = 0
+        top_path = os.path.join(self.image_dir, 'top.tif')
+        write_tile(top_path, top, 1000, 2000, nodata=0)
+
+        paths = [os.path.join(self.image_dir, n) for n in self.tile_names]
+        paths.append(top_path)
+        mosaic = Mosaic([read_tile_header(path) for path in paths])
+        vrt_path = os.path.join(self.tmp_dir, 'index.vrt')
+        with open(vrt_path, 'w') as vrt_file:
+            vrt_file.write(mosaic.to_vrt(paths))
+
+        exp_im = self.im.copy()
+        exp_im[:, 10:50, 0:50] = 7
+        with rasterio.open(vrt_path) as image_dataset:
+            np.testing.assert_array_equal(image_dataset.read(), exp_im)
+
+    def test_data_types(self):
+        for dtype in [np.uint16, np.int32, np.float32, np.float64]:
+            path = os.path.join(self.image_dir, 'tile.tif')
+            write_tile(path, self.im.astype(dtype), 1000, 2000)
+            mosaic = Mosaic([read_tile_header(path)])
+            vrt_path = os.path.join(self.tmp_dir, 'index.vrt')
+            with open(vrt_path, 'w') as vrt_file:
+                vrt_file.write(mosaic.to_vrt([path]))
+            with rasterio.open(vrt_path) as image_dataset:
+                self.assertEqual(image_dataset.dtypes[0], np.dtype(dtype))
+                np.testing.assert_array_equal(image_dataset.read(), self.im)
+
+    def test_incompatible_tile(self):
+        other_path = os.path.join(self.image_dir, 'other.tif')
+        write_tile(other_path, np.zeros((1, 10, 10), dtype=np.uint8), 0, 0)
+        paths = [os.path.join(self.image_dir, n) for n in self.tile_names]
+        mosaic = Mosaic(
+            [read_tile_header(path) for path in paths + [other_path]])
+        self.assertEqual(len(mosaic.tiles), 4)
+
+    def test_lazy_download(self):
+        with RangeServer(self.image_dir) as server:
+            uris = [server.get_uri(name) for name in self.tile_names]
+            source = rv.data.GeoTiffSourceConfig(uris=uris) \
+                            .create_source(self.tmp_dir)
+
+            def get_downloads():
+                return sorted(
+                    set(path for method, path, range_header in server.requests
+                        if method == 'GET' and range_header is None))
+
+            # Nothing is downloaded in the constructor.
+            self.assertListEqual(get_downloads(), [])
+            self.assertEqual(source.get_extent(), Box(0, 0, 200, 300))
+
+            with source.activate():
+                window = Box(120, 10, 150, 60)
+                np.testing.assert_array_equal(
+                    source.get_chip(window), self.get_exp_chip(window))
+                self.assertListEqual(get_downloads(), ['/tile-1-0.tif'])
+
+                window = Box(80, 120, 130, 170)
+                np.testing.assert_array_equal(
+                    source.get_chip(window), self.get_exp_chip(window))
+                self.assertEqual(len(get_downloads()), 4)
+
+    def test_stream_mosaic(self):
+        with RangeServer(self.image_dir) as server:
+            uris = [server.get_uri(name) for name in self.tile_names]
+            source = rv.data.GeoTiffSourceConfig(uris=uris, stream=True) \
+                            .create_source(self.tmp_dir)
+            with source.activate():
+                self.assertTrue(source.is_streaming)
+                window = Box(80, 120, 130, 170)
+                np.testing.assert_array_equal(
+                    source.get_chip(window), self.get_exp_chip(window))
+            for method, _, range_header in server.requests:
+                self.assertTrue(method == 'HEAD' or range_header)
+
+    def test_stream_mosaic_block_cache(self):
+        with RangeServer(self.image_dir) as server:
+            uris = [server.get_uri(name) for name in self.tile_names]
+            window = Box(0, 0, 200, 300)
+            # Mosaics with the same first file and extent don't share cached
+            # blocks.
+            exp_chip = self.get_exp_chip(window).copy()
+            for tile_uris in [uris, [uris[0], uris[3]]]:
+                source = rv.data.GeoTiffSourceConfig(
+                    uris=tile_uris, stream=True).create_source(self.tmp_dir)
+                with source.activate():
+                    np.testing.assert_array_equal(
+                        source.get_chip(window), exp_chip)
+                exp_chip[0:100, 150:300] = 0
+                exp_chip[100:200, 0:150] = 0
+
+
+if __name__ == '__main__':
+    unittest.main()
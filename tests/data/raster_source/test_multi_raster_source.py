@@ -0,0 +1,200 @@
+import os
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import rasterio
+from rasterio.crs import CRS
+from rasterio.transform import from_origin
+from rasterio.warp import reproject, Resampling
+
+import rastervision as rv
+from rastervision.core import Box
+from rastervision.data.raster_source import (GeoTiffSource, MultiRasterSource)
+from rastervision.rv_config import RVConfig
+
+
+def write_geotiff(path, im, transform, crs='epsg:3857'):
+    with rasterio.open(
+            path,
+            'w',
+            driver='GTiff',
+            height=im.shape[1],
+            width=im.shape[2],
+            count=im.shape[0],
+            dtype=im.dtype,
+            crs=crs,
+            transform=transform) as image_dataset:
+        image_dataset.write(im)
+
+
+class TestMultiRasterSource(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.tmp_dir = self.tmp_dir_obj.name
+        np.random.seed(1)
+
+        # A 1 m resolution image with 3 bands.
+        self.transform = from_origin(1000, 2000, 1, 1)
+        self.im = np.random.randint(
+            1, 2**16, size=(3, 40, 40), dtype=np.uint16)
+        self.uri = os.path.join(self.tmp_dir, 'primary.tif')
+        write_geotiff(self.uri, self.im, self.transform)
+
+        # A 4 m resolution image covering the same area.
+        self.coarse_im = np.random.rand(1, 10, 10).astype(np.float32)
+        self.coarse_uri = os.path.join(self.tmp_dir, 'coarse.tif')
+        write_geotiff(self.coarse_uri, self.coarse_im,
+                      from_origin(1000, 2000, 4, 4))
+
+        # A 1 m resolution image offset by -5 columns and 3 rows.
+        self.shifted_im = np.random.randint(
+            1, 256, size=(2, 40, 40), dtype=np.uint8)
+        self.shifted_uri = os.path.join(self.tmp_dir, 'shifted.tif')
+        write_geotiff(self.shifted_uri, self.shifted_im,
+                      from_origin(995, 1997, 1, 1))
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def make_config(self, uris, **kwargs):
+        raster_sources = [
+            rv.RasterSourceConfig.builder(rv.GEOTIFF_SOURCE).with_uri(uri)
+            .build() for uri in uris
+        ]
+        b = rv.RasterSourceConfig.builder(rv.MULTI_RASTER_SOURCE) \
+                                 .with_raster_sources(raster_sources)
+        if 'resampling' in kwargs:
+            b = b.with_resampling(kwargs['resampling'])
+        if 'channel_order' in kwargs:
+            b = b.with_channel_order(kwargs['channel_order'])
+        if 'primary_source_idx' in kwargs:
+            b = b.with_primary_source_idx(kwargs['primary_source_idx'])
+        return b.build()
+
+    def test_stacks_sources(self):
+        config = self.make_config(
+            [self.uri, self.coarse_uri, self.shifted_uri],
+            resampling='nearest')
+        source = config.create_source(self.tmp_dir)
+        self.assertEqual(source.get_extent(), Box(0, 0, 40, 40))
+        self.assertEqual(source.num_channels, 6)
+        self.assertEqual(source.get_dtype(), np.float32)
+        # Only the coarse source is resampled.
+        self.assertEqual(source.source_offsets, [(0, 0), None, (-3, 5)])
+
+        coarse_upsampled = np.repeat(
+            np.repeat(self.coarse_im, 4, axis=1), 4, axis=2)
+        with source.activate():
+            for window in [Box(0, 0, 40, 40), Box(3, 5, 20, 33)]:
+                ymin, xmin, ymax, xmax = window.tuple_format()
+                chip = source.get_chip(window)
+                self.assertEqual(chip.shape, (ymax - ymin, xmax - xmin, 6))
+                np.testing.assert_array_equal(
+                    chip[:, :, 0:3],
+                    self.im[:, ymin:ymax, xmin:xmax].transpose(1, 2, 0))
+                np.testing.assert_array_equal(
+                    chip[:, :, 3], coarse_upsampled[0, ymin:ymax, xmin:xmax])
+
+                # The shifted image is zero outside of its extent.
+                expected = np.zeros((2, 40, 40))
+                expected[:, 3:40, 0:35] = self.shifted_im[:, 0:37, 5:40]
+                np.testing.assert_array_equal(
+                    chip[:, :, 4:6],
+                    expected[:, ymin:ymax, xmin:xmax].transpose(1, 2, 0))
+
+    def test_reprojects_source(self):
+        # The primary image in another CRS, which is resampled back to the
+        # grid of the primary image.
+        utm_uri = os.path.join(self.tmp_dir, 'utm.tif')
+        utm_crs = CRS({'init': 'epsg:32631'})
+        utm_transform = from_origin(166000, 20, 1.5, 1.5)
+        utm_im = np.zeros((1, 60, 60), dtype=np.float32)
+        reproject(
+            self.im[0:1].astype(np.float32),
+            utm_im,
+            src_transform=self.transform,
+            src_crs=CRS({
+                'init': 'epsg:3857'
+            }),
+            dst_transform=utm_transform,
+            dst_crs=utm_crs,
+            resampling=Resampling.bilinear)
+        write_geotiff(utm_uri, utm_im, utm_transform, crs='epsg:32631')
+
+        # The expected chips are the whole image resampled at once.
+        expected = np.zeros((1, 40, 40), dtype=np.float32)
+        reproject(
+            utm_im,
+            expected,
+            src_transform=utm_transform,
+            src_crs=utm_crs,
+            dst_transform=self.transform,
+            dst_crs=CRS({
+                'init': 'epsg:3857'
+            }),
+            resampling=Resampling.bilinear)
+
+        config = self.make_config([self.uri, utm_uri], channel_order=[3])
+        source = config.create_source(self.tmp_dir)
+        self.assertEqual(source.source_offsets, [(0, 0), None])
+        with source.activate():
+            for window in Box(0, 0, 40, 40).get_windows(16, 16):
+                ymin, xmin, ymax, xmax = window.tuple_format()
+                ymax, xmax = min(ymax, 40), min(xmax, 40)
+                chip = source.get_chip(window)
+                np.testing.assert_allclose(
+                    chip[0:ymax - ymin, 0:xmax - xmin, 0],
+                    expected[0, ymin:ymax, xmin:xmax],
+                    rtol=1e-4)
+
+    def test_reads_needed_sources(self):
+        config = self.make_config(
+            [self.uri, self.coarse_uri], channel_order=[2, 0])
+        source = config.create_source(self.tmp_dir)
+        with source.activate():
+            with patch.object(source.raster_sources[1],
+                              'get_chip') as get_chip:
+                chip = source.get_chip(Box(0, 0, 10, 10))
+            get_chip.assert_not_called()
+        np.testing.assert_array_equal(
+            chip, self.im[[2, 0], 0:10, 0:10].transpose(1, 2, 0))
+
+    def test_primary_source_idx(self):
+        config = self.make_config(
+            [self.uri, self.coarse_uri],
+            primary_source_idx=1,
+            resampling='average')
+        source = config.create_source(self.tmp_dir)
+        self.assertIsInstance(source, MultiRasterSource)
+        self.assertIsInstance(source.raster_sources[0], GeoTiffSource)
+        self.assertEqual(source.get_extent(), Box(0, 0, 10, 10))
+        with source.activate():
+            chip = source.get_chip(Box(0, 0, 10, 10))
+        np.testing.assert_allclose(
+            chip[:, :, 0], self.im[0].reshape(10, 4, 10, 4).mean(axis=(1, 3)))
+
+    def test_proto_round_trip(self):
+        config = self.make_config(
+            [self.uri, self.coarse_uri],
+            resampling='cubic',
+            channel_order=[3, 1, 0],
+            primary_source_idx=1)
+        config = rv.RasterSourceConfig.from_proto(config.to_proto())
+        self.assertEqual(config.resampling, 'cubic')
+        self.assertEqual(config.primary_source_idx, 1)
+        self.assertEqual(config.channel_order, [3, 1, 0])
+        self.assertEqual([rs.uris for rs in config.raster_sources],
+                         [[self.uri], [self.coarse_uri]])
+
+    def test_validate(self):
+        with self.assertRaises(rv.ConfigError):
+            rv.RasterSourceConfig.builder(rv.MULTI_RASTER_SOURCE).build()
+        with self.assertRaises(rv.ConfigError):
+            self.make_config([self.uri], primary_source_idx=1)
+        with self.assertRaises(rv.ConfigError):
+            self.make_config([self.uri], resampling='bad')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
+import importlib
 import unittest
 import os
 import json
+from unittest.mock import patch
 
 import numpy as np
 
@@ -22,12 +24,13 @@ class TestRasterizedSource(unittest.TestCase):
         self.line_buffer = 1
         self.uri = os.path.join(self.tmp_dir.name, 'temp.json')
 
-    def build_source(self, geojson):
+    def build_source(self, geojson, rasterize_once=False):
         str_to_file(json.dumps(geojson), self.uri)
 
         config = RasterSourceConfig.builder(rv.RASTERIZED_SOURCE) \
             .with_uri(self.uri) \
-            .with_rasterizer_options(self.background_class_id, self.line_buffer) \
+            .with_rasterizer_options(self.background_class_id, self.line_buffer,
+                                     rasterize_once=rasterize_once) \
             .build()
 
         # Convert to proto and back as a test.
@@ -42,8 +45,15 @@ class TestRasterizedSource(unittest.TestCase):
 
     def tearDown(self):
         self.tmp_dir.cleanup()
+        rv._registry.initialize_config()
 
     def test_get_chip(self):
+        self._test_get_chip(False)
+
+    def test_get_chip_rasterize_once(self):
+        self._test_get_chip(True)
+
+    def _test_get_chip(self, rasterize_once):
         geojson = {
             'type':
             'FeatureCollection',
@@ -70,7 +80,7 @@ class TestRasterizedSource(unittest.TestCase):
             }]
         }
 
-        source = self.build_source(geojson)
+        source = self.build_source(geojson, rasterize_once)
         with source.activate():
             self.assertEqual(source.get_extent(), self.extent)
             chip = source.get_image_array()
@@ -82,9 +92,15 @@ class TestRasterizedSource(unittest.TestCase):
             np.testing.assert_array_equal(chip, expected_chip)
 
     def test_get_chip_no_polygons(self):
+        self._test_get_chip_no_polygons(False)
+
+    def test_get_chip_no_polygons_rasterize_once(self):
+        self._test_get_chip_no_polygons(True)
+
+    def _test_get_chip_no_polygons(self, rasterize_once):
         geojson = {'type': 'FeatureCollection', 'features': []}
 
-        source = self.build_source(geojson)
+        source = self.build_source(geojson, rasterize_once)
         with source.activate():
             # Get chip that partially overlaps extent. Expect that chip has zeros
             # outside of extent, and background_class_id otherwise.
@@ -97,6 +113,67 @@ class TestRasterizedSource(unittest.TestCase):
 
             np.testing.assert_array_equal(chip, expected_chip)
 
+    def test_rasterize_once_matches(self):
+        self.extent = Box(0, 0, 50, 45)
+        features = []
+        for i in range(5):
+            for j in range(5):
+                xmin, ymin = 9 * i + 1, 10 * j + 1
+                coords = [[xmin, ymin], [xmin + i + 3, ymin],
+                          [xmin + 1, ymin + j + 4], [xmin, ymin]]
+                features.append({
+                    'type': 'Feature',
+                    'geometry': {
+                        'type': 'Polygon',
+                        'coordinates': [coords]
+                    },
+                    'properties': {
+                        'class_id': (i + j) % 2 + 1
+                    }
+                })
+        geojson = {'type': 'FeatureCollection', 'features': features}
+        source = self.build_source(geojson)
+        with source.activate():
+            raster = source.get_image_array()
+        # Windows are compared to the extent rasterized at once, since
+        # rasterizing shapes that touch the edge of a window adds artifacts.
+        raster = np.pad(raster, ((5, 25), (5, 25), (0, 0)), 'constant')
+        windows = Box(-5, -5, 55, 50).get_windows(12, 9)
+        expected_chips = [
+            raster[w.ymin + 5:w.ymax + 5, w.xmin + 5:w.xmax + 5]
+            for w in windows
+        ]
+
+        rasterized_source = importlib.import_module(
+            'rastervision.data.raster_source.rasterized_source')
+        for num_workers in [1, 2]:
+            rv._registry.initialize_config(
+                config_overrides={
+                    'RV_rasterize_num_workers': str(num_workers)
+                })
+            source = self.build_source(geojson, rasterize_once=True)
+            # Rasterize the extent in several tiles.
+            with patch.object(rasterized_source, 'RASTERIZE_TILE_SIZE', 16):
+                with source.activate():
+                    self.assertEqual(source.raster.shape, (50, 45))
+                    for window, expected_chip in zip(windows, expected_chips):
+                        np.testing.assert_array_equal(
+                            source.get_chip(window), expected_chip)
+            self.assertIsNone(source.raster)
+
+    def test_rasterize_once_proto_round_trip(self):
+        geojson = {'type': 'FeatureCollection', 'features': []}
+        str_to_file(json.dumps(geojson), self.uri)
+        config = RasterSourceConfig.builder(rv.RASTERIZED_SOURCE) \
+            .with_uri(self.uri) \
+            .with_rasterizer_options(self.background_class_id,
+                                     rasterize_once=True) \
+            .build()
+        config = RasterSourceConfig.from_proto(config.to_proto())
+        self.assertTrue(config.rasterizer_options.rasterize_once)
+        self.assertTrue(
+            config.to_builder().build().rasterizer_options.rasterize_once)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -5,9 +5,20 @@ import numpy as np
 
 import rastervision as rv
 from rastervision.core.raster_stats import RasterStats
+from rastervision.data.raster_transformer import StatsTransformer
 from rastervision.rv_config import RVConfig
 
 
+def transform_float64(chip, raster_stats, channel_order):
+    """Transform a chip by computing zscores in float64."""
+    means = np.array(raster_stats.means)[channel_order]
+    stds = np.array(raster_stats.stds)[channel_order]
+    out = np.clip(((chip - means) / stds + 3) / 6, 0, 1) * 255
+    out = out.astype(np.uint8)
+    out[chip == 0] = 0
+    return out
+
+
 class TestRasterTransformer(unittest.TestCase):
     def test_stats_transformer(self):
         raster_stats = RasterStats()
@@ -29,6 +40,39 @@ class TestRasterTransformer(unittest.TestCase):
             expected_out_chip = np.ones((2, 2, 4)) * 170
             np.testing.assert_equal(out_chip, expected_out_chip)
 
+    def test_stats_transformer_dtypes(self):
+        raster_stats = RasterStats()
+        raster_stats.means = [1200., -300., 700., 2500.]
+        raster_stats.stds = [300., 250., 200., 600.]
+        transformer = StatsTransformer(raster_stats)
+        channel_order = [3, 1, 0]
+
+        np.random.seed(1)
+        chip = np.random.randint(-2000, 5000, size=(20, 30, 3))
+        chip[0:2, :, :] = 0
+        for dtype in [np.uint16, np.int16]:
+            # 16-bit values are transformed using lookup tables, which are
+            # exactly the same as transforming in float64.
+            dtype_chip = chip.astype(dtype)
+            out_chip = transformer.transform(dtype_chip, channel_order)
+            self.assertEqual(out_chip.dtype, np.uint8)
+            np.testing.assert_array_equal(
+                out_chip,
+                transform_float64(dtype_chip, raster_stats, channel_order))
+
+        for dtype in [np.int32, np.float32, np.float64]:
+            dtype_chip = chip.astype(dtype)
+            out_chip = transformer.transform(dtype_chip, channel_order)
+            self.assertEqual(out_chip.dtype, np.uint8)
+            expected = transform_float64(dtype_chip, raster_stats,
+                                         channel_order)
+            np.testing.assert_array_equal(out_chip[chip == 0], 0)
+            self.assertLessEqual(
+                np.abs(out_chip.astype(int) - expected).max(), 1)
+
+        uint8_chip = chip.astype(np.uint8)
+        self.assertIs(transformer.transform(uint8_chip), uint8_chip)
+
 
 if __name__ == '__main__':
     unittest.main()
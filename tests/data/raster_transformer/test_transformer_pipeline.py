@@ -0,0 +1,115 @@
+import unittest
+
+import numpy as np
+
+from rastervision.core.raster_stats import RasterStats
+from rastervision.data.raster_transformer import (
+    NoopTransformer, RasterTransformer, StatsTransformer, TransformerPipeline)
+
+
+class InvertTransformer(RasterTransformer):
+    """Inverts uint8 values, using a lookup table if fused."""
+    elementwise = True
+
+    def get_lut(self, dtype, channel_order):
+        if np.dtype(dtype) != np.uint8:
+            return None
+        values = 255 - np.arange(256, dtype=np.uint8)
+        return np.tile(values, (len(channel_order), 1))
+
+    def transform(self, chip, channel_order=None):
+        return 255 - chip
+
+
+class RowSumTransformer(RasterTransformer):
+    """Adds the sum of each row, which isn't elementwise."""
+
+    def transform(self, chip, channel_order=None):
+        return chip + chip.sum(axis=1, keepdims=True)
+
+
+class TestTransformerPipeline(unittest.TestCase):
+    def setUp(self):
+        raster_stats = RasterStats()
+        raster_stats.means = [1000., 2000., 3000.]
+        raster_stats.stds = [200., 300., 400.]
+        self.stats_transformer = StatsTransformer(raster_stats)
+
+        np.random.seed(1)
+        self.chips = np.random.randint(
+            0, 5000, size=(4, 10, 12, 2)).astype(np.uint16)
+        self.chips[:, 0, :, :] = 0
+        self.channel_order = [2, 0]
+
+    def transform_each(self, transformers, chip):
+        for transformer in transformers:
+            chip = transformer.transform(chip, self.channel_order)
+        return chip
+
+    def check_pipeline(self, transformers):
+        pipeline = TransformerPipeline(transformers)
+        expected = np.stack(
+            [self.transform_each(transformers, chip) for chip in self.chips])
+
+        # The returned chips aren't reused by later calls.
+        chips = [
+            pipeline.transform(chip, self.channel_order) for chip in self.chips
+        ]
+        np.testing.assert_array_equal(np.stack(chips), expected)
+
+        out = np.empty_like(expected[0])
+        self.assertIs(
+            pipeline.transform(self.chips[1], self.channel_order, out=out),
+            out)
+        np.testing.assert_array_equal(out, expected[1])
+
+        np.testing.assert_array_equal(
+            pipeline.transform_batch(self.chips, self.channel_order), expected)
+        out = np.empty_like(expected)
+        self.assertIs(
+            pipeline.transform_batch(self.chips, self.channel_order, out=out),
+            out)
+        np.testing.assert_array_equal(out, expected)
+        return pipeline
+
+    def test_fuses_lookup_tables(self):
+        transformers = [
+            NoopTransformer(), self.stats_transformer,
+            InvertTransformer()
+        ]
+        pipeline = self.check_pipeline(transformers)
+        # The transformers are fused into a single lookup table.
+        stages, _ = pipeline._get_stages(self.chips[0], self.channel_order)
+        self.assertEqual(len(stages), 1)
+        self.assertIsInstance(stages[0], np.ndarray)
+        self.assertEqual(stages[0].shape, (2, 2**16))
+
+    def test_drops_identity(self):
+        pipeline = TransformerPipeline(
+            [NoopTransformer(), self.stats_transformer])
+        # StatsTransformer doesn't change uint8 chips.
+        chip = self.chips[0].astype(np.uint8)
+        stages, _ = pipeline._get_stages(chip, self.channel_order)
+        self.assertEqual(stages, [])
+        np.testing.assert_array_equal(
+            pipeline.transform(chip, self.channel_order), chip)
+        self.assertTrue(TransformerPipeline([NoopTransformer()]).is_identity())
+
+    def test_other_transformers(self):
+        pipeline = self.check_pipeline(
+            [self.stats_transformer,
+             RowSumTransformer(),
+             InvertTransformer()])
+        stages, _ = pipeline._get_stages(self.chips[0], self.channel_order)
+        self.assertEqual(len(stages), 3)
+
+        self.chips = self.chips.astype(np.float32)
+        self.check_pipeline([self.stats_transformer, InvertTransformer()])
+
+    def test_signed(self):
+        self.chips = (self.chips.astype(np.int32) - 2500).astype(np.int16)
+        self.check_pipeline([self.stats_transformer])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import unittest
+
+from rastervision.core.class_map import ClassMap
+from rastervision.data.vector_source.class_inference import (
+    ClassInference, ClassInferenceOptions)
+from rastervision.data.vector_source.label_maker.filter import create_filter
+
+
+def make_feature(properties, geom_type='Point', id=None):
+    feature = {
+        'type': 'Feature',
+        'properties': properties,
+        'geometry': {
+            'type': geom_type,
+            'coordinates': [0, 0]
+        }
+    }
+    if id is not None:
+        feature['id'] = id
+    return feature
+
+
+class TestFilter(unittest.TestCase):
+    def setUp(self):
+        self.features = [
+            make_feature({
+                'highway': 'primary',
+                'lanes': 2
+            }, 'LineString', 1),
+            make_feature({
+                'highway': 'residential',
+                'lanes': 1
+            }, 'LineString'),
+            make_feature({
+                'building': 'yes'
+            }, 'Polygon', 3),
+            make_feature({
+                'building': 'house',
+                'levels': 3
+            }, 'Polygon'),
+            make_feature({
+                'building': True
+            }),
+            make_feature({
+                'building': 1
+            }),
+            make_feature({
+                'building': ['a', 'b']
+            }),
+            make_feature({}),
+        ]
+
+    def assert_filter(self, filt, expected):
+        filter_fn = create_filter(filt)
+        self.assertListEqual([filter_fn(f) for f in self.features], expected)
+        # Evaluating again uses the remembered results.
+        self.assertListEqual(
+            filter_fn.filter_features(self.features), expected)
+
+    def test_comparison(self):
+        self.assert_filter(
+            ['==', 'building', 'yes'],
+            [False, False, True, False, False, False, False, False])
+        self.assert_filter(['!=', 'building', 'yes'],
+                           [True, True, False, True, True, True, True, True])
+        self.assert_filter(
+            ['==', 'building', 1],
+            [False, False, False, False, True, True, False, False])
+        self.assert_filter(
+            ['==', 'building', True],
+            [False, False, False, False, True, True, False, False])
+
+    def test_numeric_comparison(self):
+        features = [make_feature({'lanes': n}) for n in range(4)]
+        filter_fn = create_filter(['>=', 'lanes', 2])
+        self.assertListEqual(
+            filter_fn.filter_features(features), [False, False, True, True])
+        filter_fn = create_filter(['<', 'lanes', 2])
+        self.assertListEqual(
+            filter_fn.filter_features(features), [True, True, False, False])
+        # Comparing a missing property with a number fails like in Python.
+        with self.assertRaises(TypeError):
+            filter_fn(make_feature({}))
+
+    def test_type_and_id(self):
+        self.assert_filter(
+            ['==', '$type', 'Polygon'],
+            [False, False, True, True, False, False, False, False])
+        self.assert_filter(
+            ['has', '$id'],
+            [True, False, True, False, False, False, False, False])
+        self.assert_filter(
+            ['==', '$id', 3],
+            [False, False, True, False, False, False, False, False])
+
+    def test_in_and_has(self):
+        self.assert_filter(
+            ['in', 'highway', 'primary', 'secondary'],
+            [True, False, False, False, False, False, False, False])
+        self.assert_filter(['!in', 'building', 'yes', 'house'],
+                           [True, True, False, False, True, True, True, True])
+        self.assert_filter(
+            ['in', 'building', ['a', 'b']],
+            [False, False, False, False, False, False, True, False])
+        self.assert_filter(['has', 'building'],
+                           [False, False, True, True, True, True, True, False])
+        self.assert_filter(
+            ['!has', 'building'],
+            [True, True, False, False, False, False, False, True])
+
+    def test_logical(self):
+        self.assert_filter([], [True] * 8)
+        self.assert_filter(['any'], [False] * 8)
+        self.assert_filter(['all'], [True] * 8)
+        self.assert_filter(['unknown', 'building'], [True] * 8)
+        self.assert_filter(
+            ['any', ['==', 'building', 'yes'], ['==', 'highway', 'primary']],
+            [True, False, True, False, False, False, False, False])
+        self.assert_filter(
+            ['all', ['has', 'building'], ['!=', 'building', 'yes']],
+            [False, False, False, True, True, True, True, False])
+        self.assert_filter(
+            ['none', ['has', 'building'], ['has', 'highway']],
+            [False, False, False, False, False, False, False, True])
+
+    def test_nested_precedence(self):
+        # The expressions of nested 'any' and 'all' filters are joined
+        # without grouping, so this is
+        # has(highway) or (has(building) and has(levels)).
+        self.assert_filter([
+            'all', ['any', ['has', 'highway'], ['has', 'building']],
+            ['has', 'levels']
+        ], [True, True, False, True, False, False, False, False])
+
+
+class TestClassInference(unittest.TestCase):
+    def test_infer_class_ids(self):
+        class_map = ClassMap.construct_from(['building', 'road'])
+        options = ClassInferenceOptions(
+            class_map=class_map,
+            class_id_to_filter={
+                2: ['has', 'highway'],
+                1: ['has', 'building']
+            },
+            default_class_id=None)
+        class_inference = ClassInference(options)
+        features = [
+            make_feature({
+                'class_id': 5
+            }),
+            make_feature({
+                'label': 'road'
+            }),
+            make_feature({
+                'class_name': 'building'
+            }),
+            make_feature({
+                'class_name': ['building']
+            }),
+            make_feature({
+                'highway': 'primary',
+                'building': 'yes'
+            }),
+            make_feature({
+                'building': 'yes'
+            }),
+            make_feature({
+                'name': 'x'
+            }),
+        ]
+        expected = [5, 2, 1, None, 2, 1, None]
+        self.assertListEqual(
+            class_inference.infer_class_ids(features), expected)
+        self.assertListEqual(
+            [class_inference.infer_class_id(f) for f in features], expected)
+
+        geojson = class_inference.transform_geojson({
+            'type':
+            'FeatureCollection',
+            'features':
+            features
+        })
+        self.assertListEqual(
+            [f['properties']['class_id'] for f in geojson['features']],
+            [class_id for class_id in expected if class_id is not None])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import io
+import json
+import unittest
+
+from rastervision.data.vector_source.geojson_stream import (
+    get_geometry_bbox, iter_geojson_features)
+
+
+class TestGeoJSONStream(unittest.TestCase):
+    def setUp(self):
+        self.features = [{
+            'type': 'Feature',
+            'properties': {
+                'name': 'café ☃',
+                'height': 12.5
+            },
+            'geometry': {
+                'type': 'Polygon',
+                'coordinates': [[[0, 0], [2, 0], [2, 3], [0, 0]]]
+            }
+        }, {
+            'type': 'Feature',
+            'properties': {},
+            'geometry': None
+        }, {
+            'type': 'Feature',
+            'properties': {
+                'id': 1234567
+            },
+            'geometry': {
+                'type': 'Point',
+                'coordinates': [-1.5, 4]
+            }
+        }]
+
+    def _test_iter_features(self, geojson_str):
+        data = geojson_str.encode('utf-8')
+        # Small chunks split values and multi-byte characters.
+        for chunk_size in [1, 7, 2**20]:
+            results = list(iter_geojson_features(io.BytesIO(data), chunk_size))
+            self.assertEqual([f for f, _, _ in results], self.features)
+            for feature, offset, length in results:
+                self.assertEqual(
+                    json.loads(data[offset:offset + length].decode('utf-8')),
+                    feature)
+
+    def test_iter_features(self):
+        geojson = {
+            'type': 'FeatureCollection',
+            'name': 'buildings',
+            'features': self.features,
+            'bbox': [-1.5, 0, 2, 4]
+        }
+        self._test_iter_features(json.dumps(geojson))
+        self._test_iter_features(
+            json.dumps(geojson, indent=4, ensure_ascii=False))
+
+    def test_iter_no_features(self):
+        for geojson_str in [
+                '{}', '{"type": "FeatureCollection"}', '{"features": [ ]}'
+        ]:
+            self.assertEqual(
+                list(
+                    iter_geojson_features(
+                        io.BytesIO(geojson_str.encode('utf-8')), 3)), [])
+
+    def test_iter_invalid(self):
+        for geojson_str in ['[]', '{"features": [{}', '{"features": [{}}']:
+            with self.assertRaises(ValueError):
+                list(iter_geojson_features(io.BytesIO(geojson_str.encode())))
+
+    def test_get_geometry_bbox(self):
+        self.assertEqual(
+            get_geometry_bbox(self.features[0]['geometry']), (0, 0, 2, 3))
+        self.assertIsNone(get_geometry_bbox(self.features[1]['geometry']))
+        self.assertEqual(
+            get_geometry_bbox(self.features[2]['geometry']),
+            (-1.5, 4, -1.5, 4))
+        collection = {
+            'type':
+            'GeometryCollection',
+            'geometries': [
+                self.features[0]['geometry'], self.features[2]['geometry'], {
+                    'type': 'MultiLineString',
+                    'coordinates': [[[5, 5], [6, -1]], []]
+                }
+            ]
+        }
+        self.assertEqual(get_geometry_bbox(collection), (-1.5, -1, 6, 5))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,10 +1,16 @@
+import importlib
+import time
 import unittest
 import json
 import os
+from unittest.mock import patch
 
+import rastervision as rv
 from rastervision.data.vector_source import (GeoJSONVectorSourceConfigBuilder,
                                              GeoJSONVectorSourceConfig)
+from rastervision.core.box import Box
 from rastervision.core.class_map import ClassMap
+from rastervision.data.crs_transformer import IdentityCRSTransformer
 from rastervision.utils.files import str_to_file
 from rastervision.rv_config import RVConfig
 
@@ -119,6 +125,93 @@ class TestGeoJSONVectorSource(unittest.TestCase):
 
         self.assertDictEqual(transformed_geojson, expected_transformed_geojson)
 
+    def test_extent_filter(self):
+        def make_feature(name, coordinates):
+            return {
+                'type': 'Feature',
+                'properties': {
+                    'name': name
+                },
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': coordinates
+                }
+            }
+
+        features = [
+            make_feature('inside', [[[1, 1], [2, 1], [2, 2], [1, 1]]]),
+            make_feature('outside',
+                         [[[20, 20], [30, 20], [30, 30], [20, 20]]]),
+            make_feature('overlaps', [[[9, 9], [20, 9], [20, 20], [9, 9]]]),
+            make_feature('empty', [])
+        ]
+        geojson = {'type': 'FeatureCollection', 'features': features}
+        uri = os.path.join(self.temp_dir.name, 'extent.json')
+        str_to_file(json.dumps(geojson, indent=2), uri)
+
+        def get_names(extent):
+            b = GeoJSONVectorSourceConfigBuilder() \
+                .with_uri(uri) \
+                .build()
+            source = b.create_source(
+                crs_transformer=IdentityCRSTransformer(), extent=extent)
+            return [
+                f['properties']['name']
+                for f in source.get_geojson()['features']
+            ]
+
+        module = importlib.import_module(
+            'rastervision.data.vector_source.geojson_vector_source')
+        with patch.object(RVConfig, 'tmp_dir', self.temp_dir.name):
+            self.assertEqual(
+                get_names(Box(0, 0, 10, 10)), ['inside', 'overlaps', 'empty'])
+
+            # Later sources read the features they need using the spatial
+            # index of the file.
+            with patch.object(module, 'iter_geojson_features') as iter_mock:
+                self.assertEqual(
+                    get_names(Box(21, 21, 40, 40)),
+                    ['outside', 'overlaps', 'empty'])
+                self.assertEqual(
+                    get_names(Box(0, 0, 10, 10)),
+                    ['inside', 'overlaps', 'empty'])
+            iter_mock.assert_not_called()
+
+        # Without an extent, all the features are returned.
+        self.assertEqual(
+            get_names(None), ['inside', 'outside', 'overlaps', 'empty'])
+
+    def test_index_eviction(self):
+        def get_geojson(name):
+            uri = os.path.join(self.temp_dir.name, name)
+            str_to_file(json.dumps(self.geojson), uri)
+            source = GeoJSONVectorSourceConfigBuilder() \
+                .with_uri(uri) \
+                .build() \
+                .create_source(crs_transformer=IdentityCRSTransformer(),
+                               extent=Box(0, 0, 10, 10))
+            return source.get_geojson()
+
+        index_root = os.path.join(self.temp_dir.name, 'geojson-index')
+        rv._registry.initialize_config(
+            config_overrides={'RV_geojson_index_size': '1'})
+        try:
+            with patch.object(RVConfig, 'tmp_dir', self.temp_dir.name):
+                get_geojson('first.json')
+                entries = os.listdir(index_root)
+                self.assertEqual(len(entries), 1)
+                # The entry that was just added is kept even though it is
+                # over the limit.
+                old_time = time.time() - 10
+                os.utime(
+                    os.path.join(index_root, entries[0]), (old_time, old_time))
+
+                get_geojson('second.json')
+                self.assertEqual(len(os.listdir(index_root)), 1)
+                self.assertNotIn(entries[0], os.listdir(index_root))
+        finally:
+            rv._registry.initialize_config()
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,163 @@
+import json
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+from affine import Affine
+from shapely.geometry import LineString, MultiPolygon, Point, Polygon
+
+from rastervision.core.box import Box
+from rastervision.data.crs_transformer import (IdentityCRSTransformer,
+                                               RasterioCRSTransformer)
+from rastervision.data.utils import geojson_to_shapes
+from rastervision.data.vector_source import GeoJSONVectorSource
+from rastervision.data.vector_source.class_inference import (
+    ClassInferenceOptions)
+from rastervision.data.vector_source import vector_cache
+from rastervision.data.vector_source.vector_cache import (
+    arrays_to_shapes, clear_memory_cache, load_shapes, save_shapes,
+    shapes_to_arrays)
+from rastervision.rv_config import RVConfig
+from rastervision.utils.files import str_to_file
+
+
+class TestVectorCache(unittest.TestCase):
+    def setUp(self):
+        polygon = [[0, 0], [4, 0], [4, 4], [0, 4], [0, 0]]
+        self.geojson = {
+            'type':
+            'FeatureCollection',
+            'features': [{
+                'type': 'Feature',
+                'properties': {
+                    'class_id': 2
+                },
+                'geometry': {
+                    'type': 'Polygon',
+                    'coordinates': [polygon]
+                }
+            }, {
+                'type': 'Feature',
+                'properties': {
+                    'class_id': 1
+                },
+                'geometry': {
+                    'type': 'LineString',
+                    'coordinates': [[0, 0], [1, 1], [2, 0.5]]
+                }
+            }, {
+                'type': 'Feature',
+                'properties': {},
+                'geometry': {
+                    'type': 'MultiPolygon',
+                    'coordinates': [[polygon], [polygon]]
+                }
+            }]
+        }
+        self.tmp_dir = RVConfig.get_tmp_dir()
+        clear_memory_cache()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        clear_memory_cache()
+
+    def test_arrays(self):
+        shapes = [(Point(1.5, 2), 1), (LineString([(0, 0), (1, 1)]), 2),
+                  (Polygon([(0, 0), (4, 0), (4, 4)]),
+                   3), (MultiPolygon([Polygon([(0, 0), (1, 0), (1, 1)])]), 4)]
+        arrays = shapes_to_arrays(shapes)
+        self.assertListEqual(
+            sorted(arrays.keys()), ['class_ids', 'wkb', 'wkb_offsets'])
+        cached_shapes = arrays_to_shapes(arrays)
+        self.assertListEqual([c for _, c in cached_shapes], [1, 2, 3, 4])
+        for (shape, _), (cached_shape, _) in zip(shapes, cached_shapes):
+            self.assertEqual(cached_shape.wkb, shape.wkb)
+
+        self.assertIsNone(shapes_to_arrays([(Point(0, 0), 'car')]))
+
+    def test_shared_by_sources(self):
+        uri = os.path.join(self.tmp_dir.name, 'vectors.json')
+        str_to_file(json.dumps(self.geojson), uri)
+        crs_transformer = IdentityCRSTransformer()
+
+        def get_source(default_class_id=1):
+            return GeoJSONVectorSource(
+                uri,
+                ClassInferenceOptions(default_class_id=default_class_id),
+                crs_transformer=crs_transformer,
+                extent=Box.make_square(0, 0, 10))
+
+        with patch.object(RVConfig, 'tmp_dir', self.tmp_dir.name), \
+                patch.object(GeoJSONVectorSource, '_get_geojson',
+                             autospec=True,
+                             side_effect=GeoJSONVectorSource._get_geojson) \
+                as get_geojson:
+            source = get_source()
+            shapes = source.get_shapes(crs_transformer)
+            exp_shapes = geojson_to_shapes(source.get_geojson(),
+                                           crs_transformer)
+            self.assertEqual(len(shapes), 4)
+            for (shape, class_id), (exp_shape, exp_class_id) in zip(
+                    shapes, exp_shapes):
+                self.assertTrue(shape.equals(exp_shape))
+                self.assertEqual(class_id, exp_class_id)
+            self.assertEqual(get_geojson.call_count, 1)
+
+            # Other sources use the shapes cached in memory or on disk.
+            self.assertListEqual(get_source().get_shapes(crs_transformer),
+                                 shapes)
+            clear_memory_cache()
+            cached_shapes = get_source().get_shapes(crs_transformer)
+            self.assertListEqual([s.wkb for s, _ in cached_shapes],
+                                 [s.wkb for s, _ in shapes])
+            self.assertEqual(get_geojson.call_count, 1)
+
+            # Entries aren't used for other class inference options or CRS
+            # transformers.
+            get_source(default_class_id=2).get_shapes(crs_transformer)
+            self.assertEqual(get_geojson.call_count, 2)
+            other_transformer = RasterioCRSTransformer(
+                Affine(2, 0, 0, 0, -2, 10), 'epsg:3857', 'epsg:3857')
+            other_shapes = get_source().get_shapes(other_transformer)
+            self.assertEqual(get_geojson.call_count, 3)
+            exp_shapes = geojson_to_shapes(source.get_geojson(),
+                                           other_transformer)
+            self.assertListEqual([s.wkb for s, _ in other_shapes],
+                                 [s.wkb for s, _ in exp_shapes])
+            self.assertNotEqual(other_shapes[0][0].wkb, shapes[0][0].wkb)
+
+    def test_disk_eviction(self):
+        shapes = [(Polygon([(0, 0), (4, 0), (4, 4)]), 1)]
+        cache_dir = os.path.join(self.tmp_dir.name, 'vector-cache')
+
+        with patch.object(RVConfig, 'tmp_dir', self.tmp_dir.name), \
+                patch.object(vector_cache, '_get_max_bytes') as max_bytes:
+            max_bytes.return_value = 10**6
+            for ind, key in enumerate(['a', 'b']):
+                self.assertTrue(save_shapes(key, shapes))
+                used_time = time.time() - 10 * (2 - ind)
+                os.utime(
+                    os.path.join(cache_dir, key + '.npz'),
+                    (used_time, used_time))
+            clear_memory_cache()
+            file_size = os.path.getsize(os.path.join(cache_dir, 'a.npz'))
+            max_bytes.return_value = 2 * file_size
+
+            # Loading an entry from disk marks it as used, so the other one
+            # is evicted to make room for a new entry.
+            self.assertIsNotNone(load_shapes('a'))
+            clear_memory_cache()
+            save_shapes('c', shapes)
+            self.assertListEqual(
+                sorted(os.listdir(cache_dir)), ['a.npz', 'c.npz'])
+            self.assertIsNone(load_shapes('b'))
+
+            # Shapes that are larger than the cache aren't saved on disk.
+            max_bytes.return_value = 10
+            save_shapes('d', shapes)
+            self.assertNotIn('d.npz', os.listdir(cache_dir))
+
+
+if __name__ == '__main__':
+    unittest.main()
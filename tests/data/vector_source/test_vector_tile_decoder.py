@@ -0,0 +1,140 @@
+import gzip
+import os
+import sqlite3
+import unittest
+
+from rastervision.data.vector_source.vector_tile_decoder import (decode_tile,
+                                                                 read_tile)
+from rastervision.protos.vector_tile_pb2 import VectorTile
+from rastervision.rv_config import RVConfig
+
+
+def zigzag(n):
+    return (n << 1) ^ (n >> 31)
+
+
+def encode_geometry(parts, close):
+    """Encode lists of (x, y) points as MoveTo and LineTo commands."""
+    geometry = []
+    x = y = 0
+    for points in parts:
+        for ind, (px, py) in enumerate(points):
+            if ind == 0:
+                geometry.append((1 << 3) | 1)
+            elif ind == 1:
+                geometry.append(((len(points) - 1) << 3) | 2)
+            geometry.extend([zigzag(px - x), zigzag(py - y)])
+            x, y = px, py
+        if close:
+            geometry.append((1 << 3) | 7)
+    return geometry
+
+
+def make_tile():
+    tile = VectorTile()
+    layer = tile.layers.add()
+    layer.version = 2
+    layer.name = 'buildings'
+    layer.extent = 4096
+    layer.keys.extend(['name', 'height', 'levels', 'ok'])
+    layer.values.add().string_value = 'house'
+    layer.values.add().float_value = 0.1
+    layer.values.add().sint_value = -3
+    layer.values.add().bool_value = True
+
+    # A polygon with a hole, followed by another polygon.
+    feature = layer.features.add()
+    feature.id = 7
+    feature.type = VectorTile.POLYGON
+    feature.tags.extend([0, 0, 1, 1])
+    feature.geometry.extend(
+        encode_geometry(
+            [[(0, 0), (10, 0), (10, 10),
+              (0, 10)], [(2, 2), (2, 4), (4, 4), (4, 2)], [(20, 20), (30, 20),
+                                                           (30, 30)]],
+            close=True))
+
+    feature = layer.features.add()
+    feature.type = VectorTile.LINESTRING
+    feature.tags.extend([2, 2, 3, 3])
+    feature.geometry.extend(
+        encode_geometry([[(0, 0), (4096, 4096)]], close=False))
+
+    feature = layer.features.add()
+    feature.type = VectorTile.POINT
+    feature.geometry.extend(encode_geometry([[(2048, 2048)]], close=False))
+    return tile.SerializeToString()
+
+
+class TestVectorTileDecoder(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir_obj = RVConfig.get_tmp_dir()
+        self.tmp_dir = self.tmp_dir_obj.name
+
+    def tearDown(self):
+        self.tmp_dir_obj.cleanup()
+
+    def test_decode_tile(self):
+        features = decode_tile(make_tile(), 1, 1, 0)
+        self.assertEqual(len(features), 3)
+
+        polygon = features[0]
+        self.assertEqual(polygon['id'], 7)
+        self.assertEqual(polygon['properties'], {
+            'name': 'house',
+            'height': 0.1
+        })
+        self.assertEqual(polygon['tippecanoe'], {
+            'layer': 'buildings',
+            'minzoom': 1,
+            'maxzoom': 1
+        })
+        geometry = polygon['geometry']
+        self.assertEqual(geometry['type'], 'MultiPolygon')
+        self.assertEqual([len(p) for p in geometry['coordinates']], [2, 1])
+        # Rings are closed, and the top left of tile 1/1/0 is at (0, 85.05).
+        shell = geometry['coordinates'][0][0]
+        self.assertEqual(len(shell), 5)
+        self.assertEqual(shell[0], shell[-1])
+        self.assertEqual(shell[0], [0.0, 85.051129])
+
+        line = features[1]
+        self.assertNotIn('id', line)
+        self.assertEqual(line['properties'], {'levels': -3, 'ok': True})
+        self.assertEqual(line['geometry'], {
+            'type': 'LineString',
+            'coordinates': [[0.0, 85.051129], [180.0, 0.0]]
+        })
+
+        point = features[2]
+        self.assertEqual(point['geometry'], {
+            'type': 'Point',
+            'coordinates': [90.0, 66.513260]
+        })
+
+    def test_read_tile(self):
+        data = make_tile()
+        tile_path = os.path.join(self.tmp_dir, 'tile.mvt')
+        with open(tile_path, 'wb') as tile_file:
+            tile_file.write(gzip.compress(data))
+        self.assertEqual(read_tile(tile_path, 1, 1, 0), data)
+
+    def test_read_tile_from_mbtiles(self):
+        data = make_tile()
+        mbtiles_path = os.path.join(self.tmp_dir, 'tiles.mbtiles')
+        conn = sqlite3.connect(mbtiles_path)
+        conn.execute('CREATE TABLE tiles (zoom_level integer, '
+                     'tile_column integer, tile_row integer, tile_data blob)')
+        # Rows count from the bottom, so tile 1/1/0 is in row 1.
+        conn.execute('INSERT INTO tiles VALUES (1, 1, 1, ?)',
+                     (gzip.compress(data), ))
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(read_tile(mbtiles_path, 1, 1, 0), data)
+        self.assertIsNone(read_tile(mbtiles_path, 1, 1, 1))
+        self.assertEqual(decode_tile(None, 1, 1, 1), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,7 @@
+import importlib
 import unittest
 import json
+from unittest.mock import patch
 
 from shapely.geometry import shape
 
@@ -8,6 +10,7 @@ from rastervision.data.vector_source import (
 from rastervision.core.box import Box
 from rastervision.core.class_map import ClassMap
 from rastervision.data.crs_transformer import IdentityCRSTransformer
+from rastervision.rv_config import RVConfig
 from rastervision.utils.files import file_to_str
 from tests import data_file_path
 
@@ -18,9 +21,10 @@ class TestVectorTileVectorSource(unittest.TestCase):
         self.class_map = ClassMap.construct_from(['building'])
         self.crs_transformer = IdentityCRSTransformer()
 
-    def _get_source(self, uri):
+    def _get_source(self, uri, class_id_to_filter=None):
+        class_id_to_filter = class_id_to_filter or self.class_id_to_filter
         b = VectorTileVectorSourceConfigBuilder() \
-            .with_class_inference(class_id_to_filter=self.class_id_to_filter,
+            .with_class_inference(class_id_to_filter=class_id_to_filter,
                                   default_class_id=None) \
             .with_uri(uri) \
             .with_zoom(14) \
@@ -60,6 +64,34 @@ class TestVectorTileVectorSource(unittest.TestCase):
         json_uri = 'vector_tiles/lv-mbtiles.json'
         self._test_get_geojson(vector_tile_uri, json_uri)
 
+    def test_feature_cache(self):
+        vector_tile_uri = data_file_path('vector_tiles/lv.mbtiles')
+        module = importlib.import_module(
+            'rastervision.data.vector_source.vector_tile_vector_source')
+        tmp_dir_obj = RVConfig.get_tmp_dir()
+        with tmp_dir_obj, patch.object(RVConfig, 'tmp_dir', tmp_dir_obj.name):
+            geojson = self._get_source(vector_tile_uri).get_geojson()
+
+            # The class inferred features of the tiles are read from the
+            # cache.
+            with patch.object(
+                    module,
+                    'get_tile_features',
+                    side_effect=module.get_tile_features) as get_features:
+                cached_geojson = self._get_source(
+                    vector_tile_uri).get_geojson()
+                get_features.assert_not_called()
+
+                # Entries aren't used for other class inference options.
+                self._get_source(vector_tile_uri, {
+                    2: ['has', 'building']
+                }).get_geojson()
+                get_features.assert_called()
+
+        self.assertEqual(
+            json.loads(json.dumps(geojson)),
+            json.loads(json.dumps(cached_geojson)))
+
 
 if __name__ == '__main__':
     unittest.main()
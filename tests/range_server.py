@@ -0,0 +1,91 @@
+from http.server import SimpleHTTPRequestHandler
+import io
+import os
+import re
+from socketserver import ThreadingTCPServer
+import threading
+
+
+class RangeRequestHandler(SimpleHTTPRequestHandler):
+    """Serves files from the current directory and supports range requests.
+
+    The requests made to the server are recorded in server.requests as
+    (method, path, range header) tuples.
+    """
+
+    def send_head(self):
+        self.server.requests.append((self.command, self.path,
+                                     self.headers.get('Range')))
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404, 'File not found')
+            return None
+
+        stat = os.stat(path)
+        size = stat.st_size
+        # The ETag changes whenever the file does, as with most servers.
+        etag = '"{:x}-{:x}"'.format(stat.st_mtime_ns, size)
+        range_header = self.headers.get('Range')
+        match = re.match(r'bytes=(\d+)-(\d*)$', range_header or '')
+        if match is None:
+            self.send_response(200)
+            self.send_header('Content-Length', str(size))
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return open(path, 'rb')
+
+        start = int(match.group(1))
+        end = min(int(match.group(2) or size - 1), size - 1)
+        self.send_response(206)
+        self.send_header('Content-Range', 'bytes {}-{}/{}'.format(
+            start, end, size))
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.end_headers()
+        with open(path, 'rb') as f:
+            f.seek(start)
+            return io.BytesIO(f.read(end - start + 1))
+
+    def translate_path(self, path):
+        rel_path = super().translate_path(path)[len(os.getcwd()):]
+        return self.server.root_dir + rel_path
+
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeServer():
+    """A local HTTP server that supports range requests, for use in tests.
+
+    Usage:
+        with RangeServer(root_dir) as server:
+            uri = server.get_uri('image.tif')
+    """
+
+    def __init__(self, root_dir):
+        self.server = ThreadingTCPServer(('127.0.0.1', 0), RangeRequestHandler)
+        self.server.daemon_threads = True
+        self.server.root_dir = root_dir
+        self.server.requests = []
+        self.thread = None
+
+    def get_uri(self, rel_path):
+        return 'http://127.0.0.1:{}/{}'.format(self.server.server_address[1],
+                                               rel_path)
+
+    @property
+    def requests(self):
+        return self.server.requests
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
@@ -69,6 +69,30 @@ class TestObjectDetectionConfig(unittest.TestCase):
 
         self.assertDictEqual(actual_class_items, expected_class_items)
 
+    def test_predict_options_proto_round_trip(self):
+        t = rv.TaskConfig.builder(rv.OBJECT_DETECTION) \
+                         .with_classes(['car']) \
+                         .with_predict_options(merge_thresh=0.3,
+                                               score_thresh=0.2,
+                                               nms_method='wbf',
+                                               class_aware=True,
+                                               soft_nms_sigma=0.25) \
+                         .build()
+        t2 = rv.TaskConfig.from_proto(t.to_proto())
+        options = t2.predict_options
+        self.assertAlmostEqual(options.merge_thresh, 0.3)
+        self.assertAlmostEqual(options.score_thresh, 0.2)
+        self.assertEqual(options.nms_method, 'wbf')
+        self.assertTrue(options.class_aware)
+        self.assertAlmostEqual(options.soft_nms_sigma, 0.25)
+
+    def test_invalid_nms_method(self):
+        with self.assertRaises(rv.ConfigError):
+            rv.TaskConfig.builder(rv.OBJECT_DETECTION) \
+                         .with_classes(['car']) \
+                         .with_predict_options(nms_method='unknown') \
+                         .build()
+
     def test_missing_config_class_map(self):
         with self.assertRaises(rv.ConfigError):
             rv.TaskConfig.builder(rv.OBJECT_DETECTION).build()
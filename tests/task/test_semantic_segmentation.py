@@ -0,0 +1,97 @@
+import unittest
+
+import numpy as np
+
+import rastervision as rv
+from rastervision.backend import Backend
+from rastervision.core import Box
+from rastervision.data import Scene
+from rastervision.data.label import SemanticSegmentationLabels
+from rastervision.task import SemanticSegmentation
+from rastervision.rv_config import RVConfig
+
+from tests.mock import MockRasterSource
+
+
+class ThresholdBackend(Backend):
+    """Predicts class 1 where the first channel is > 100 and 2 otherwise."""
+
+    def __init__(self):
+        self.batch_sizes = []
+
+    def process_scene_data(self, scene, data, tmp_dir):
+        pass
+
+    def process_sceneset_results(self, training_results, validation_results,
+                                 tmp_dir):
+        pass
+
+    def train(self, tmp_dir):
+        pass
+
+    def load_model(self, tmp_dir):
+        pass
+
+    def predict(self, chips, windows, tmp_dir):
+        self.batch_sizes.append(len(chips))
+        label_arrs = {}
+        for chip, window in zip(chips, windows):
+            label_arrs[window.tuple_format()] = np.where(
+                chip[:, :, 0] > 100, 1, 2)
+
+        def label_fn(window):
+            return label_arrs[window.tuple_format()]
+
+        return SemanticSegmentationLabels(windows, label_fn)
+
+
+class TestSemanticSegmentation(unittest.TestCase):
+    def setUp(self):
+        self.raster = np.random.randint(
+            1, 256, size=(50, 50, 3), dtype=np.uint8)
+        # A NODATA chip and some NODATA pixels.
+        self.raster[0:10, 0:10, :] = 0
+        self.raster[20:25, 30:32, :] = 0
+
+        raster_source = MockRasterSource([0, 1, 2], 3)
+        raster_source.set_raster(self.raster)
+        self.scene = Scene('a', raster_source)
+
+        self.backend = ThresholdBackend()
+        config = rv.TaskConfig.builder(rv.SEMANTIC_SEGMENTATION) \
+                              .with_chip_size(10) \
+                              .with_classes(['a', 'b']) \
+                              .with_predict_batch_size(4) \
+                              .build()
+        self.task = SemanticSegmentation(config, self.backend)
+
+    def test_predict_scene(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            labels = self.task.predict_scene(self.scene, tmp_dir)
+
+        # The NODATA chip is skipped, and the rest are predicted in batches.
+        self.assertEqual(self.backend.batch_sizes, [4] * 6)
+
+        exp_label_arr = np.where(self.raster[:, :, 0] > 100, 1, 2)
+        exp_label_arr[np.sum(self.raster, axis=2) == 0] = 0
+        for window in labels.get_windows():
+            np.testing.assert_array_equal(
+                labels.get_label_arr(window), exp_label_arr[
+                    window.ymin:window.ymax, window.xmin:window.xmax])
+
+    def test_predict_scene_with_aoi(self):
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            labels = self.task.predict_scene(self.scene, tmp_dir)
+
+        window = Box.make_square(10, 10, 10)
+        label_arr = labels.get_label_arr(window).copy()
+        aoi_labels = labels.filter_by_aoi(
+            [Box.make_square(10, 10, 5).to_shapely()])
+        self.assertEqual(np.sum(aoi_labels.get_label_arr(window)[5:, :]), 0)
+
+        # Getting labels within an AOI doesn't change the stored labels.
+        np.testing.assert_array_equal(labels.get_label_arr(window), label_arr)
+
+
+if __name__ == '__main__':
+    unittest.main()
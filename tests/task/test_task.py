@@ -0,0 +1,223 @@
+import random
+import time
+import unittest
+
+import numpy as np
+
+import rastervision as rv
+from rastervision.backend import Backend
+from rastervision.core import Box
+from rastervision.data import (Scene, ChipClassificationLabels,
+                               ChipClassificationGeoJSONStore,
+                               IdentityCRSTransformer)
+from rastervision.task import Task
+from rastervision.task.task import ChipBatchReader
+from rastervision.rv_config import RVConfig
+
+from tests.mock import MockRasterSource
+
+
+class ChipBackend(Backend):
+    def __init__(self):
+        self.results = None
+
+    def process_scene_data(self, scene, data, tmp_dir):
+        if scene.id == 'bad':
+            raise ValueError('Cannot process scene bad')
+        return [(w.tuple_format(), c.sum()) for c, w, _ in data]
+
+    def process_sceneset_results(self, training_results, validation_results,
+                                 tmp_dir):
+        self.results = (training_results, validation_results)
+
+    def train(self, tmp_dir):
+        pass
+
+    def load_model(self, tmp_dir):
+        pass
+
+    def predict(self, chips, windows, tmp_dir):
+        pass
+
+
+class RandomWindowTask(Task):
+    def get_train_windows(self, scene):
+        extent = scene.raster_source.get_extent()
+        return [extent.make_random_square(4) for _ in range(5)]
+
+    def get_train_labels(self, window, scene):
+        return np.random.randint(10)
+
+    def post_process_predictions(self, labels, scene):
+        return labels
+
+    def get_predict_windows(self, extent):
+        return extent.get_windows(4, 4)
+
+    def save_debug_predict_image(self, scene, debug_dir_uri):
+        pass
+
+
+class SumBackend(ChipBackend):
+    def __init__(self):
+        self.batch_sizes = []
+
+    def predict(self, chips, windows, tmp_dir):
+        self.batch_sizes.append(len(chips))
+        labels = ChipClassificationLabels()
+        for chip, window in zip(chips, windows):
+            labels.set_cell(window, int(chip.sum() % 2))
+        return labels
+
+
+def make_scene(id, raster):
+    raster_source = MockRasterSource([0, 1, 2], 3)
+    raster_source.set_raster(raster)
+    return Scene(id, raster_source)
+
+
+class TestTask(unittest.TestCase):
+    def setUp(self):
+        self.raster = np.random.randint(
+            0, 256, size=(20, 20, 3), dtype=np.uint8)
+
+    def tearDown(self):
+        rv._registry.initialize_config()
+
+    def make_chips(self, num_workers, scene_ids=None):
+        rv._registry.initialize_config(
+            config_overrides={'RV_chip_num_workers': str(num_workers)})
+        scene_ids = scene_ids or ['a', 'b', 'c']
+        train_scenes = [make_scene(id, self.raster) for id in scene_ids]
+        val_scenes = [make_scene('val', self.raster)]
+
+        random.seed(1)
+        np.random.seed(1)
+        backend = ChipBackend()
+        task = RandomWindowTask(None, backend)
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            task.make_chips(train_scenes, val_scenes, [], tmp_dir)
+        return backend.results
+
+    def test_make_chips_parallel(self):
+        train_results, val_results = self.make_chips(2)
+        self.assertEqual(len(train_results), 3)
+        self.assertEqual(len(val_results), 1)
+        for result in train_results + val_results:
+            self.assertEqual(len(result), 5)
+            for window, chip_sum in result:
+                w = Box.from_tuple(window)
+                expected = self.raster[w.ymin:w.ymax, w.xmin:w.xmax, :].sum()
+                self.assertEqual(chip_sum, expected)
+
+    def test_make_chips_deterministic(self):
+        serial_results = self.make_chips(1)
+        self.assertEqual(serial_results, self.make_chips(1))
+        self.assertEqual(serial_results, self.make_chips(2))
+        self.assertEqual(serial_results, self.make_chips(3))
+
+    def test_make_chips_worker_error(self):
+        with self.assertRaises(ValueError):
+            self.make_chips(2, scene_ids=['a', 'bad'])
+
+    def test_chip_batch_reader(self):
+        raster_source = MockRasterSource([0, 1, 2], 3)
+        self.raster[0:4, 4:8, :] = 0
+        raster_source.set_raster(self.raster)
+        windows = Box(0, 0, 20, 20).get_windows(4, 4)
+
+        for num_threads in [1, 3]:
+            batches = list(
+                ChipBatchReader(
+                    raster_source, windows, 7, num_threads=num_threads))
+            self.assertEqual([len(chips) for chips, _ in batches],
+                             [7, 7, 7, 3])
+            batch_windows = [w for _, ws in batches for w in ws]
+            self.assertEqual(batch_windows, windows[0:1] + windows[2:])
+            for chips, ws in batches:
+                for chip, w in zip(chips, ws):
+                    np.testing.assert_array_equal(
+                        chip, self.raster[w.ymin:w.ymax, w.xmin:w.xmax, :])
+
+    def test_chip_batch_reader_buffers(self):
+        raster_source = MockRasterSource([0, 1, 2], 3)
+        raster_source.set_raster(self.raster)
+        windows = Box(0, 0, 20, 20).get_windows(4, 4)
+        reader = ChipBatchReader(
+            raster_source, windows, 4, num_threads=2, queue_size=1)
+
+        batch_ids = set()
+        num_batches = 0
+        for chips, ws in reader:
+            # Batches are arrays from a small pool.
+            self.assertIsInstance(chips, np.ndarray)
+            self.assertEqual(chips.shape, (len(ws), 4, 4, 3))
+            batch_ids.add(id(chips.base if chips.base is not None else chips))
+            num_batches += 1
+            for chip, w in zip(chips, ws):
+                np.testing.assert_array_equal(
+                    chip, self.raster[w.ymin:w.ymax, w.xmin:w.xmax, :])
+        self.assertEqual(num_batches, 7)
+        self.assertLessEqual(len(batch_ids), 3)
+
+    def test_chip_batch_reader_error(self):
+        raster_source = MockRasterSource([0, 1, 2], 3)
+        raster_source.mock._get_chip.side_effect = ValueError('bad read')
+        with self.assertRaises(ValueError):
+            list(
+                ChipBatchReader(
+                    raster_source, [Box(0, 0, 2, 2)] * 5, 1, num_threads=2))
+
+    def test_chip_batch_reader_stop_early(self):
+        raster_source = MockRasterSource([0, 1, 2], 3)
+        raster_source.set_raster(self.raster)
+        windows = Box(0, 0, 20, 20).get_windows(1, 1)
+        batches = iter(
+            ChipBatchReader(
+                raster_source, windows, 1, num_threads=2, queue_size=1))
+        next(batches)
+        # Closing the generator stops the reading threads.
+        batches.close()
+
+    def test_chip_batch_reader_wait_time(self):
+        raster_source = MockRasterSource([0, 1, 2], 3)
+
+        def get_chip(window):
+            time.sleep(0.01)
+            return np.ones((2, 2, 3))
+
+        raster_source.mock._get_chip.side_effect = get_chip
+        reader = ChipBatchReader(raster_source, [Box(0, 0, 2, 2)] * 5, 2)
+        list(reader)
+        self.assertGreaterEqual(reader.wait_time, 0.05)
+
+    def predict_scene(self, num_readers):
+        rv._registry.initialize_config(
+            config_overrides={'RV_predict_num_readers': str(num_readers)})
+        self.raster[4:8, 0:4, :] = 0
+        scene = make_scene('a', self.raster)
+        scene.prediction_label_store = ChipClassificationGeoJSONStore(
+            'labels.json', IdentityCRSTransformer(), None)
+        config = rv.TaskConfig.builder(rv.CHIP_CLASSIFICATION) \
+                              .with_classes(['a', 'b']) \
+                              .with_predict_batch_size(3) \
+                              .build()
+        backend = SumBackend()
+        task = RandomWindowTask(config, backend)
+        with RVConfig.get_tmp_dir() as tmp_dir:
+            labels = task.predict_scene(scene, tmp_dir)
+        return backend.batch_sizes, labels
+
+    def test_predict_scene(self):
+        batch_sizes, labels = self.predict_scene(1)
+        self.assertEqual(batch_sizes, [3] * 8)
+        self.assertEqual(len(labels), 24)
+        self.assertEqual(
+            labels.get_cell_class_id(Box(0, 4, 4, 8)),
+            self.raster[0:4, 4:8, :].sum() % 2)
+
+        self.assertEqual(self.predict_scene(4), (batch_sizes, labels))
+
+
+if __name__ == '__main__':
+    unittest.main()
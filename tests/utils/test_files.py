@@ -4,6 +4,7 @@ from unittest.mock import patch
 import json
 import datetime
 import gzip
+import time
 
 import boto3
 from moto import mock_s3
@@ -12,7 +13,8 @@ import rastervision as rv
 from rastervision.utils.files import (
     file_to_str, str_to_file, download_if_needed, upload_or_copy,
     load_json_config, ProtobufParseException, make_dir, get_local_path,
-    file_exists, sync_from_dir, sync_to_dir, list_paths, get_cached_file)
+    file_exists, sync_from_dir, sync_to_dir, list_paths, get_cached_file,
+    evict_least_recently_used, TMP_PREFIX, MAX_TMP_AGE)
 from rastervision.filesystem import (NotReadableError, NotWritableError)
 from rastervision.filesystem.filesystem import FileSystem
 from rastervision.protos.task_pb2 import TaskConfig as TaskConfigMsg
@@ -557,6 +559,72 @@ class TestGetCachedFile(unittest.TestCase):
             self.assertTrue(os.path.isfile(path))
             self.assertEqual(patched_download.call_count, 1)
 
+    def test_interrupted_download(self):
+        def download_partially(uri, download_dir):
+            path = get_local_path(uri, download_dir)
+            str_to_file(self.content_str[0:2], path)
+            raise IOError('Connection reset')
+
+        s3_path = 's3://{}/{}'.format(self.bucket_name, self.file_name)
+        str_to_file(self.content_str, s3_path)
+        with patch(
+                'rastervision.utils.files.download_if_needed',
+                side_effect=download_partially):
+            with self.assertRaises(IOError):
+                get_cached_file(self.cache_dir, s3_path)
+        # The partial download isn't cached.
+        self.assertListEqual(os.listdir(self.cache_dir), [])
+
+        path = get_cached_file(self.cache_dir, s3_path)
+        self.assertEqual(file_to_str(path), self.content_str)
+
+
+class TestEvictLeastRecentlyUsed(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = RVConfig.get_tmp_dir()
+        self.cache_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_entry(self, name, size, used_time):
+        path = os.path.join(self.cache_dir, name)
+        str_to_file('a' * size, path)
+        os.utime(path, (used_time, used_time))
+        return path
+
+    def test_evict(self):
+        now = time.time()
+        old_path = self.make_entry('old', 10, now - 30)
+        dir_path = os.path.join(self.cache_dir, 'dir')
+        make_dir(dir_path)
+        str_to_file('a' * 10, os.path.join(dir_path, 'data'))
+        os.utime(dir_path, (now - 20, now - 20))
+        new_path = self.make_entry('new', 10, now - 10)
+
+        evict_least_recently_used(self.cache_dir, 30)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 3)
+
+        # Room is made for an entry that is about to be added.
+        evict_least_recently_used(self.cache_dir, 30, extra_size=5)
+        self.assertListEqual(
+            sorted(os.listdir(self.cache_dir)), ['dir', 'new'])
+
+        evict_least_recently_used(self.cache_dir, 10, keep=dir_path)
+        self.assertListEqual(os.listdir(self.cache_dir), ['dir'])
+        self.assertFalse(os.path.exists(old_path))
+        self.assertFalse(os.path.exists(new_path))
+
+    def test_tmp_files(self):
+        now = time.time()
+        self.make_entry(TMP_PREFIX + 'new', 10, now)
+        self.make_entry(TMP_PREFIX + 'old', 10, now - MAX_TMP_AGE - 10)
+
+        # Files that are being written aren't counted or removed, unless they
+        # were left behind long ago.
+        evict_least_recently_used(self.cache_dir, 0)
+        self.assertListEqual(os.listdir(self.cache_dir), [TMP_PREFIX + 'new'])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,66 @@
+import multiprocessing
+import os
+import unittest
+from unittest.mock import patch
+
+from rastervision.utils import parallel
+from rastervision.utils.parallel import map_forked
+
+
+def get_pid(value, lock):
+    # The lock can't be pickled, so this only works in forked workers.
+    with lock:
+        return (os.getpid(), value * 2)
+
+
+def fail(value):
+    raise ValueError(value)
+
+
+def nested(value):
+    return list(map_forked(abs, [(-value, ), (value, )], 2))
+
+
+class TestMapForked(unittest.TestCase):
+    def setUp(self):
+        self.lock = multiprocessing.Lock()
+
+    def test_forked(self):
+        results = list(
+            map_forked(get_pid, [(ind, self.lock) for ind in range(6)], 2))
+        self.assertListEqual([r[1] for r in results], list(range(0, 12, 2)))
+        self.assertNotIn(os.getpid(), [r[0] for r in results])
+        self.assertEqual(parallel._jobs, {})
+
+    def test_default_spawn(self):
+        # Workers are forked even if the default start method is spawn.
+        spawn_context = multiprocessing.get_context('spawn')
+        with patch('multiprocessing.get_start_method', return_value='spawn'), \
+                patch('multiprocessing.context._default_context',
+                      spawn_context):
+            results = list(
+                map_forked(get_pid, [(ind, self.lock) for ind in range(4)], 2))
+        self.assertListEqual([r[1] for r in results], [0, 2, 4, 6])
+
+    def test_serial(self):
+        results = list(
+            map_forked(get_pid, [(1, self.lock), (2, self.lock)], 1))
+        self.assertListEqual(results, [(os.getpid(), 2), (os.getpid(), 4)])
+
+        with patch.object(parallel, '_make_executor', return_value=None):
+            results = list(
+                map_forked(get_pid, [(1, self.lock), (2, self.lock)], 2))
+        self.assertListEqual(results, [(os.getpid(), 2), (os.getpid(), 4)])
+
+    def test_nested(self):
+        self.assertListEqual(
+            list(map_forked(nested, [(1, ), (2, )], 2)), [[1, 1], [2, 2]])
+
+    def test_exception(self):
+        with self.assertRaises(ValueError):
+            list(map_forked(fail, [(1, ), (2, )], 2))
+        self.assertEqual(parallel._jobs, {})
+
+
+if __name__ == '__main__':
+    unittest.main()